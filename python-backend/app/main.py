@@ -1,13 +1,18 @@
-from fastapi import FastAPI, Request, HTTPException, Cookie
+from fastapi import FastAPI, Request, HTTPException, Cookie, WebSocket, WebSocketDisconnect
+from fastapi import Query as QueryParam
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse, Response
-from pydantic import BaseModel
-from typing import AsyncGenerator, Optional
+from fastapi.responses import JSONResponse, Response
+from starlette.background import BackgroundTask
+from starlette.requests import HTTPConnection
+from starlette.routing import Match
+from pydantic import BaseModel, Field
+from typing import AsyncGenerator, List, Optional
 import os
 import json
 import uuid
 import time
-from collections import deque
+import asyncio
+import hashlib
 
 # Load environment variables
 from dotenv import load_dotenv
@@ -26,19 +31,26 @@ from slowapi.errors import RateLimitExceeded
 # Metrics
 from prometheus_client import Counter, generate_latest, CONTENT_TYPE_LATEST
 
-from ..dexter_py.model.llm import call_llm_stream
-from ..dexter_py.utils.session_store import get_session_store
-from ..dexter_py.agent.orchestrator import Orchestrator, AgentOptions
-
-
-# Configure structlog for JSON output
-structlog.configure(
-    processors=[
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.add_log_level,
-        structlog.processors.JSONRenderer(),
-    ]
-)
+from dexter_py.model.llm import call_llm_stream, llm_request_key
+from dexter_py.model.singleflight import get_stream_single_flight
+from dexter_py.utils.session_store import get_session_store
+from dexter_py.agent.orchestrator import Orchestrator, AgentOptions, AgentEvent, AgentEventType, parse_phase_models
+from dexter_py.agent.batch import BatchItem, run_batch
+from dexter_py.agent.multiplex import RunMultiplexer
+from dexter_py.utils.sse import SSEWriter, SSEConfig, SSEResponse, ClosingStreamingResponse
+from dexter_py.utils.request_stats import RollingStats, RecentRequestLog
+from dexter_py.utils.dashboard_feed import DashboardBroadcaster
+from dexter_py.utils.metrics import REQUEST_LATENCY, SSE_STREAMS_OPEN, SESSION_STORE_SIZE
+from dexter_py.utils.admission import AdmissionRejected, get_admission_controller
+from dexter_py.utils.warmup import build_default_warmup
+from dexter_py.utils.log_pipeline import configure_logging, shutdown_logging
+from dexter_py.utils.http_pool import close_http_pool
+from dexter_py.utils import tracing
+
+
+# JSON logs, rendered and written off the event loop (see log_pipeline.py
+# for sampling, truncation and LOG_* settings)
+configure_logging()
 logger = structlog.get_logger("dexter_backend")
 
 
@@ -62,33 +74,77 @@ app.add_middleware(SlowAPIMiddleware)
 # Prometheus metrics
 REQUEST_COUNT = Counter("dexter_requests_total", "Total requests received")
 
+# SSE frame coalescing settings shared by /query and /agent/query
+SSE_CONFIG = SSEConfig.from_env()
+
+# Rolling per-route/per-client stats and a cursor-addressable recent request log
+# for dashboarding (fixed memory, updated by the HTTP middleware)
+app.state.request_stats = RollingStats()
+app.state.recent_requests = RecentRequestLog(maxlen=1000)
+# One shared aggregation task pushing deltas to every /dashboard/stream client
+app.state.dashboard_feed = DashboardBroadcaster(app.state.request_stats, app.state.recent_requests)
+
 
 class Query(BaseModel):
     prompt: str
 
+
+SESSION_STORE_SIZE_INTERVAL_S = float(os.getenv("SESSION_STORE_SIZE_INTERVAL_S", "30"))
+
+
+async def _sample_session_store_size(store, interval: float = SESSION_STORE_SIZE_INTERVAL_S) -> None:
+    """Refresh SESSION_STORE_SIZE every ``interval`` seconds, off the event loop."""
+    while True:
+        try:
+            SESSION_STORE_SIZE.set(await asyncio.to_thread(len, store))
+        except Exception as exc:
+            logger.warning("session_store_size_failed", error=str(exc))
+        await asyncio.sleep(interval)
+
+
 @app.on_event("startup")
 async def startup():
     logger.info(event="starting dexter python backend")
 
-    # Initialize a deque to hold recent requests for dashboarding
-    app.state.recent_requests = deque(maxlen=1000)
-    
     # Initialize session store (in-memory or Redis based on env var)
     app.state.session_store = get_session_store()
     logger.info("Session store initialized", store=repr(app.state.session_store))
+    # Counting Redis sessions scans the keyspace, so the gauge is refreshed in
+    # the background at a bounded interval instead of on every /metrics scrape
+    app.state.session_store_size = asyncio.create_task(_sample_session_store_size(app.state.session_store))
     
     # Initialize agent orchestrator
+    # AGENT_PHASE_MODELS="understand=<small model>,reflect=<small model>,answer=<large model>"
     app.state.orchestrator = Orchestrator(
         AgentOptions(
             model=os.getenv("LLM_MODEL", "gpt-4"),
+            phase_models=parse_phase_models(os.getenv("AGENT_PHASE_MODELS")),
         )
     )
-    logger.info("Agent orchestrator initialized", model=os.getenv("LLM_MODEL", "gpt-4"))
+    logger.info(
+        "Agent orchestrator initialized",
+        model=os.getenv("LLM_MODEL", "gpt-4"),
+        phase_models=app.state.orchestrator.phase_models,
+    )
+
+    # Warm up clients, models and caches in the background; /ready reports
+    # 503 until the required components are up
+    app.state.warmup = build_default_warmup()
+    app.state.warmup.start()
 
 
 @app.on_event("shutdown")
 async def shutdown():
     logger.info(event="shutting down dexter python backend")
+    warmup = getattr(app.state, "warmup", None)
+    if warmup is not None:
+        await warmup.stop()
+    sampler = getattr(app.state, "session_store_size", None)
+    if sampler is not None:
+        sampler.cancel()
+    await app.state.dashboard_feed.close()
+    await close_http_pool()
+    shutdown_logging()
 
 
 
@@ -97,6 +153,15 @@ async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
     return JSONResponse(status_code=429, content={"detail": "Rate limit exceeded"})
 
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "pool": exc.pool, "reason": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
@@ -104,8 +169,12 @@ async def health():
 
 @app.get("/ready")
 async def ready():
-    # For now readiness is same as health; extend to check LLM provider connectivity
-    return {"ready": True}
+    # Liveness is /health; readiness waits for the startup warm-up
+    warmup = getattr(app.state, "warmup", None)
+    if warmup is None:
+        return JSONResponse(status_code=503, content={"ready": False, "components": {}})
+    report = warmup.report()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
 
 
 @app.get("/metrics")
@@ -115,24 +184,59 @@ async def metrics():
 
 
 @app.get("/api/recent")
-async def api_recent():
-        """Return recent requests for dashboard consumption."""
-        items = list(getattr(app.state, 'recent_requests', []))
-        # Convert timestamps to ISO for readability
-        out = []
-        for it in items:
-                o = dict(it)
-                try:
-                        o['ts_iso'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(o.get('timestamp', 0)))
-                except Exception:
-                        o['ts_iso'] = None
-                out.append(o)
-        return JSONResponse(content={"recent": out})
+async def api_recent(since: int = 0, limit: Optional[int] = None):
+        """Return recent requests newer than the `since` cursor (newest first).
+
+        Clients pass back `next_since` from the previous response to receive
+        only entries they have not seen yet. A `limit` pages forward from the
+        cursor: each page holds the oldest unseen entries, and `has_more` says
+        whether newer ones are waiting.
+        """
+        log = app.state.recent_requests
+        entries = log.page(since, limit)
+        next_since = entries[0]["seq"] if entries else log.last_seq
+        return JSONResponse(content={
+            "recent": entries,
+            "next_since": next_since,
+            "has_more": next_since < log.last_seq,
+        })
+
+
+@app.get("/api/stats")
+async def api_stats():
+        """Return rolling per-route and per-client latency/error/in-flight stats."""
+        return JSONResponse(content=app.state.request_stats.snapshot())
+
+
+@app.get("/debug/trace/{request_id}")
+async def debug_trace(request: Request, request_id: str, format: str = "waterfall"):
+    """Spans recorded for a request: a waterfall (default) or OTLP/JSON (``format=otlp``)."""
+    await require_auth(request)
+    collector = tracing.get_trace_collector()
+    spans = collector.get(request_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    if format == "otlp":
+        return JSONResponse(content=tracing.to_otlp(spans))
+    content = tracing.waterfall(spans)
+    content["dropped_spans"] = collector.dropped(request_id)
+    return JSONResponse(content=content)
+
+
+@app.get("/dashboard/stream")
+async def dashboard_stream():
+    """Server-Sent Events feed of pre-aggregated dashboard deltas (see utils/dashboard_feed.py)."""
+    async def frames() -> AsyncGenerator[bytes, None]:
+        with SSE_STREAMS_OPEN.labels("/dashboard/stream").track_inprogress():
+            async for frame in app.state.dashboard_feed.stream():
+                yield frame
+
+    return SSEResponse(frames(), headers={"Cache-Control": "no-cache"})
 
 
 @app.get("/dashboard")
 async def dashboard():
-        """Serve a minimal dashboard page that fetches /api/recent and /metrics."""
+        """Serve a minimal dashboard page fed by the /dashboard/stream SSE feed."""
         html = r'''
 <!doctype html>
 <html>
@@ -141,76 +245,93 @@ async def dashboard():
         <title>Dexter Dashboard</title>
         <style>
             body { font-family: Arial, sans-serif; margin: 20px; }
-            table { border-collapse: collapse; width: 100%; }
+            table { border-collapse: collapse; width: 100%; margin-bottom: 20px; }
             th, td { border: 1px solid #ddd; padding: 8px; }
             th { background: #f4f4f4; }
-            pre { background: #111; color: #0f0; padding: 10px; }
+            #status { color: #888; }
         </style>
         <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
     </head>
     <body>
         <h1>Dexter Dashboard</h1>
+        <p id="status">Connecting...</p>
+        <p>In flight: <b id="inflight-requests">0</b> requests, <b id="inflight-runs">0</b> agent runs
+           (full Prometheus metrics at <a href="/metrics">/metrics</a>)</p>
+
+        <h2>Routes</h2>
+        <table id="route-table">
+            <thead><tr><th>Route</th><th>Requests</th><th>Errors</th><th>p50 (ms)</th><th>p95 (ms)</th><th>p99 (ms)</th><th>In flight</th></tr></thead>
+            <tbody></tbody>
+        </table>
+
+        <h2>Agent phases</h2>
+        <table id="phase-table">
+            <thead><tr><th>Phase</th><th>Runs</th><th>Avg (ms)</th><th>Recent avg (ms)</th></tr></thead>
+            <tbody></tbody>
+        </table>
+
         <p>Recent requests (most recent first)</p>
         <table id="recent-table">
             <thead><tr><th>Time</th><th>Path</th><th>Method</th><th>Status</th><th>Request ID</th><th>Prompt (snippet)</th></tr></thead>
             <tbody></tbody>
         </table>
 
-    <h2>Metrics</h2>
-    <pre id="metrics">Loading...</pre>
-
     <h2>Per-client request durations</h2>
     <canvas id="clientChart" width="800" height="200"></canvas>
 
         <script>
-                    async function loadRecent() {
-                try {
-                    const res = await fetch('/api/recent');
-                    const data = await res.json();
-                    const tbody = document.querySelector('#recent-table tbody');
-                    tbody.innerHTML = '';
-                    for (const r of data.recent) {
-                        const tr = document.createElement('tr');
-                        tr.innerHTML = `<td>${r.ts_iso || ''}</td><td>${r.path || ''}</td><td>${r.method || ''}</td><td>${r.status || ''}</td><td>${r.request_id || ''}</td><td>${(r.prompt||'').replace(/</g,'&lt;')}</td>`;
-                        tbody.appendChild(tr);
+                    const MAX_ROWS = 200;
+                    // Aggregated state; the server sends a snapshot, then only what changed
+                    const state = { routes: {}, clients: {}, phases: {} };
+
+                    function fmt(v) { return v === null || v === undefined ? '' : Math.round(v); }
+
+                    function renderTable(selector, rows) {
+                        const tbody = document.querySelector(selector + ' tbody');
+                        tbody.innerHTML = rows.map(cells => '<tr>' + cells.map(c => `<td>${c}</td>`).join('') + '</tr>').join('');
+                    }
+
+                    function addRecent(entries, replace) {
+                        const tbody = document.querySelector('#recent-table tbody');
+                        if (replace) tbody.innerHTML = '';
+                        // New entries arrive newest first; insert them above existing rows
+                        const frag = document.createDocumentFragment();
+                        for (const r of entries) {
+                            const tr = document.createElement('tr');
+                            tr.innerHTML = `<td>${r.ts_iso || ''}</td><td>${r.path || ''}</td><td>${r.method || ''}</td><td>${r.status || ''}</td><td>${r.request_id || ''}</td><td>${(r.prompt||'').replace(/</g,'&lt;')}</td>`;
+                            frag.appendChild(tr);
+                        }
+                        tbody.insertBefore(frag, tbody.firstChild);
+                        while (tbody.rows.length > MAX_ROWS) tbody.deleteRow(-1);
+                    }
+
+                    function apply(frame) {
+                        const snapshot = frame.type === 'snapshot';
+                        if (snapshot) { state.routes = {}; state.clients = {}; state.phases = {}; }
+                        if (frame.requests) addRecent(frame.requests, snapshot);
+                        const latency = frame.latency || {};
+                        Object.assign(state.routes, latency.routes || {});
+                        Object.assign(state.clients, latency.clients || {});
+                        Object.assign(state.phases, frame.phases || {});
+                        if (frame.in_flight) {
+                            document.getElementById('inflight-requests').textContent = frame.in_flight.requests;
+                            document.getElementById('inflight-runs').textContent = frame.in_flight.runs;
+                        }
+                        renderTable('#route-table', Object.entries(state.routes).map(([route, s]) =>
+                            [route, s.count, s.errors, fmt(s.p50_ms), fmt(s.p95_ms), fmt(s.p99_ms), s.in_flight]));
+                        renderTable('#phase-table', Object.entries(state.phases).map(([phase, p]) =>
+                            [phase, p.count, fmt(p.avg_ms), fmt(p.recent_avg_ms)]));
+                        if (latency.clients || snapshot) updateClientChart(state.clients);
+                        document.getElementById('status').textContent = 'Live (update ' + frame.seq + ')';
                     }
-                            updateClientChart(data.recent);
-                } catch (e) {
-                    console.error(e);
-                }
-            }
-
-            async function loadMetrics() {
-                try {
-                    const res = await fetch('/metrics');
-                    const text = await res.text();
-                    document.getElementById('metrics').textContent = text;
-                } catch (e) {
-                    document.getElementById('metrics').textContent = 'Failed to load metrics: ' + e;
-                }
-            }
-
-            async function refresh() {
-                await Promise.all([loadRecent(), loadMetrics()]);
-            }
 
                     // Chart.js setup
                     let clientChart = null;
-                    function updateClientChart(recent) {
+                    function updateClientChart(clients) {
                         try {
-                            // Aggregate by client host
-                            const byClient = {};
-                            for (const r of recent) {
-                                const client = r.client || 'unknown';
-                                if (!byClient[client]) byClient[client] = [];
-                                if (typeof r.duration_ms === 'number') byClient[client].push(r.duration_ms);
-                            }
-                            const labels = Object.keys(byClient);
-                            const avg = labels.map(l => {
-                                const arr = byClient[l];
-                                if (!arr || arr.length === 0) return 0;
-                                return Math.round(arr.reduce((a,b)=>a+b,0)/arr.length);
-                            });
+                            // Per-client averages are aggregated server-side over a sliding window
+                            const labels = Object.keys(clients);
+                            const avg = labels.map(l => Math.round(clients[l].avg_ms || 0));
 
                             if (!clientChart) {
                                 const ctx = document.getElementById('clientChart').getContext('2d');
@@ -233,8 +354,10 @@ async def dashboard():
                         }
                     }
 
-                    setInterval(refresh, 3000);
-                    refresh();
+                    // EventSource reconnects by itself; each (re)connect starts with a snapshot
+                    const source = new EventSource('/dashboard/stream');
+                    source.onmessage = (e) => apply(JSON.parse(e.data));
+                    source.onerror = () => { document.getElementById('status').textContent = 'Reconnecting...'; };
         </script>
     </body>
 </html>
@@ -259,7 +382,7 @@ def _verify_jwt(token: str) -> dict:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
-async def require_auth(request: Request) -> None:
+async def require_auth(request: HTTPConnection) -> None:
     """Authentication dependency:
     - If `JWT_SECRET` is set, expect `Authorization: Bearer <token>` and validate JWT.
     - Otherwise, if `BACKEND_API_KEY` is set, accept `X-API-Key: <value>` header.
@@ -285,6 +408,24 @@ async def require_auth(request: Request) -> None:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
 
+async def _end_span_after(body: AsyncGenerator[bytes, None], span: "tracing.Span") -> AsyncGenerator[bytes, None]:
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        span.end()
+
+
+def _route_template(scope) -> str:
+    """Route template (e.g. ``/debug/trace/{request_id}``) a request will be routed to."""
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope["path"])
+    # 404s share one key, however many distinct paths are probed
+    return "unmatched"
+
+
 @app.middleware("http")
 async def add_request_id_and_count(request: Request, call_next):
     # Add a request id and increment metrics
@@ -293,24 +434,49 @@ async def add_request_id_and_count(request: Request, call_next):
     REQUEST_COUNT.inc()
     # Add request_id to structlog context for the duration of the request
     structlog.contextvars.bind_contextvars(request_id=rid)
+    path = request.url.path
+    client = request.client.host if request.client else None
+    stats = app.state.request_stats
+    # Aggregate by route template so path parameters don't explode cardinality
+    route = _route_template(request.scope)
+    stats.begin(route, client)
+    # Root span of the request's trace; handlers (and tasks they spawn)
+    # inherit it through the context
+    root_span = tracing.start_trace(rid, "http.request", method=request.method, path=path)
+    span_token = tracing.attach(root_span)
     start = time.time()
+    response = None
     try:
         response = await call_next(request)
+    except Exception as exc:
+        root_span.record_error(exc)
+        raise
     finally:
+        tracing.detach(span_token)
         structlog.contextvars.clear_contextvars()
+        duration_ms = (time.time() - start) * 1000
+        status = getattr(response, 'status_code', 500)
+        stats.end(route, client, duration_ms, error=status >= 500)
+        REQUEST_LATENCY.labels(route, request.method, str(status)).observe(duration_ms / 1000)
+        root_span.set_attribute("route", route)
+        root_span.set_attribute("status_code", status)
+        if response is None or not root_span.recording:
+            root_span.end()
+        else:
+            # Streaming bodies run after call_next returns; keep the request
+            # span open until the last chunk is sent
+            response.body_iterator = _end_span_after(response.body_iterator, root_span)
     # Record a minimal request entry (prompt is recorded in /query)
     try:
-        entry = {
+        app.state.recent_requests.add({
             "timestamp": time.time(),
             "method": request.method,
-            "path": request.url.path,
-            "status": getattr(response, 'status_code', None),
+            "path": path,
+            "status": status,
             "request_id": rid,
-            "duration_ms": int((time.time() - start) * 1000),
-            "client": request.client.host if request.client else None,
-        }
-        # Append to rolling deque
-        app.state.recent_requests.appendleft(entry)
+            "duration_ms": int(duration_ms),
+            "client": client,
+        })
     except Exception:
         pass
     response.headers["X-Request-Id"] = rid
@@ -322,8 +488,9 @@ async def add_request_id_and_count(request: Request, call_next):
 async def query(request: Request, q: Query):
     """Stream the LLM response for the given prompt as Server-Sent Events (SSE).
 
-    Each token/chunk is framed as an SSE `data:` event containing a JSON
-    object with fields like `token`, `role`, and `request_id`.
+    Tokens are coalesced into SSE `data:` frames (see `SSEConfig`), each a
+    JSON object with fields like `token`, `role`, and `request_id`.
+    Concurrent identical prompts share one upstream stream (single-flight).
     """
     # Enforce authentication if configured
     await require_auth(request)
@@ -331,12 +498,12 @@ async def query(request: Request, q: Query):
     request_id = getattr(request.state, "request_id", None)
 
     # Log received data
-    logger.info("Received query", prompt=q.prompt, request_id=request_id)
+    logger.info("Received query", prompt_chars=len(q.prompt), request_id=request_id)
 
     # Record the incoming prompt in recent requests for dashboarding
     try:
         prompt_snippet = (q.prompt[:400] + '...') if len(q.prompt) > 400 else q.prompt
-        app.state.recent_requests.appendleft({
+        app.state.recent_requests.add({
             "timestamp": time.time(),
             "request_id": request_id,
             "path": request.url.path,
@@ -348,27 +515,28 @@ async def query(request: Request, q: Query):
         # best-effort; don't fail the request if logging fails
         pass
 
+    writer = SSEWriter(
+        static_fields={"role": "assistant", "request_id": request_id},
+        config=SSE_CONFIG,
+        logger=logger,
+    )
+
+    # Identical prompts already streaming share one upstream call
+    tokens = get_stream_single_flight().stream(
+        llm_request_key(q.prompt),
+        lambda: call_llm_stream(q.prompt),
+    )
+
     async def event_stream() -> AsyncGenerator[bytes, None]:
-        try:
-            async for chunk in call_llm_stream(q.prompt):
-                if chunk is None or chunk == "":
-                    continue
-                payload = {
-                    "token": chunk,
-                    "role": "assistant",
-                    "request_id": request_id,
-                }
-                s = f"data: {json.dumps(payload)}\n\n"
-                # Log sent data
-                logger.debug("Sending token", token=chunk, request_id=request_id)
-                yield s.encode("utf-8")
-        except Exception as e:
-            logger.exception("Error during LLM streaming", error=str(e))
-            err_payload = {"error": str(e), "request_id": request_id}
-            err = f"data: {json.dumps(err_payload)}\n\n"
-            yield err.encode("utf-8")
-
-    return StreamingResponse(event_stream(), media_type="text/event-stream; charset=utf-8")
+        with SSE_STREAMS_OPEN.labels("/query").track_inprogress():
+            try:
+                async for frame in writer.stream_tokens(tokens):
+                    yield frame
+            except Exception as e:
+                logger.exception("Error during LLM streaming", error=str(e))
+                yield writer.error_frame(str(e))
+
+    return SSEResponse(event_stream())
 
 
 # ============================================================================
@@ -381,6 +549,24 @@ class AgentQuery(BaseModel):
     session_id: Optional[str] = None  # Auto-generated if not provided
 
 
+class AgentBatchItem(BaseModel):
+    """One query of an agent batch."""
+    query: str
+    session_id: Optional[str] = None  # Runs statelessly if not provided
+    id: Optional[str] = None  # Echoed back to correlate results
+
+
+class AgentBatch(BaseModel):
+    """Request body for /agent/batch."""
+    items: List[AgentBatchItem] = Field(..., min_length=1, max_length=int(os.getenv("AGENT_BATCH_MAX_ITEMS", "500")))
+    concurrency: Optional[int] = Field(None, ge=1)  # Defaults to AGENT_BATCH_CONCURRENCY
+
+
+def _resolve_session_id(explicit: Optional[str], cookies: dict) -> str:
+    """Session for an agent request: explicit id, then the cookie, else a new one."""
+    return explicit or cookies.get("session_id") or str(uuid.uuid4())
+
+
 @app.post("/agent/query")
 @limiter.limit("10/minute")
 async def agent_query(request: Request, q: AgentQuery):
@@ -394,22 +580,20 @@ async def agent_query(request: Request, q: AgentQuery):
     - session_id: Optional session ID (UUID). If not provided, generates new one.
     
     Returns:
-        SSE stream with agent response chunks
+        SSE stream of agent events (phase_start, plan, task_result,
+        reflection, answer_token, done) emitted as the run progresses, or
+        503 with Retry-After when the run admission queue is saturated
     """
     await require_auth(request)
     
     request_id = getattr(request.state, "request_id", None)
     
     # Determine session ID: from param, cookie, or generate new
-    session_id = q.session_id
-    if not session_id:
-        session_id = request.cookies.get("session_id")
-    if not session_id:
-        session_id = str(uuid.uuid4())
+    session_id = _resolve_session_id(q.session_id, request.cookies)
     
     logger.info(
         "Agent query received",
-        query=q.query[:200],
+        query_chars=len(q.query),
         session_id=session_id,
         request_id=request_id,
     )
@@ -421,40 +605,53 @@ async def agent_query(request: Request, q: AgentQuery):
     # Load message history from session
     message_history = session_store.get(session_id)
     
+    # Wait (bounded) for a run slot; a saturated queue answers 503 + Retry-After
+    run_permit = await get_admission_controller().runs.acquire()
+    
+    writer = SSEWriter(
+        static_fields={"session_id": session_id, "request_id": request_id},
+        config=SSE_CONFIG,
+        logger=logger,
+    )
+    token_run_id: Optional[str] = None
+
+    def token_of(event: AgentEvent) -> Optional[str]:
+        nonlocal token_run_id
+        if event.type is not AgentEventType.ANSWER_TOKEN:
+            return None
+        if event.run_id != token_run_id:
+            token_run_id = event.run_id
+            writer.set_token_head({"type": event.type.value, "run_id": event.run_id})
+        return event.data.get("token", "")
+
+    def frame_of(event: AgentEvent) -> bytes:
+        return writer.event_frame(event.to_dict())
+
     async def event_stream() -> AsyncGenerator[bytes, None]:
-        try:
-            # Run agent with session context
-            final_answer = await orchestrator.run(
-                query=q.query,
-                message_history=message_history,
-                session_id=session_id,
-                session_store=session_store,
-            )
-            
-            # Stream the final answer
-            payload = {
-                "type": "answer",
-                "content": final_answer,
-                "session_id": session_id,
-                "request_id": request_id,
-            }
-            s = f"data: {json.dumps(payload)}\n\n"
-            logger.debug("Streaming agent answer", request_id=request_id)
-            yield s.encode("utf-8")
-            
-        except Exception as e:
-            logger.exception("Error during agent query", error=str(e), session_id=session_id)
-            err_payload = {
-                "type": "error",
-                "error": str(e),
-                "session_id": session_id,
-                "request_id": request_id,
-            }
-            err = f"data: {json.dumps(err_payload)}\n\n"
-            yield err.encode("utf-8")
-    
-    # Create response with session ID in cookie
-    response = StreamingResponse(event_stream(), media_type="text/event-stream; charset=utf-8")
+        with SSE_STREAMS_OPEN.labels("/agent/query").track_inprogress():
+            try:
+                # Run agent with session context, forwarding each event as it happens
+                events = orchestrator.run_stream(
+                    query=q.query,
+                    message_history=message_history,
+                    session_id=session_id,
+                    session_store=session_store,
+                )
+                async for frame in writer.stream(events, token_of=token_of, frame_of=frame_of):
+                    yield frame
+                
+            except Exception as e:
+                logger.exception("Error during agent query", error=str(e), session_id=session_id)
+                yield writer.error_frame(str(e), type="error")
+            finally:
+                run_permit.release()
+    
+    # Create response with session ID in cookie; the background task releases
+    # the run slot if the stream body was never started
+    response = SSEResponse(
+        event_stream(),
+        background=BackgroundTask(run_permit.release),
+    )
     response.set_cookie(
         key="session_id",
         value=session_id,
@@ -466,15 +663,128 @@ async def agent_query(request: Request, q: AgentQuery):
     return response
 
 
+@app.websocket("/agent/ws")
+async def agent_ws(websocket: WebSocket):
+    """Run several agent queries concurrently over one WebSocket.
+    
+    Client messages are JSON: ``{"type": "run", "query", "run_id"?, "session_id"?}``,
+    ``{"type": "cancel", "run_id"}`` and ``{"type": "ping"}``. Every frame sent
+    back carries the ``run_id`` it belongs to (see ``RunMultiplexer``). Runs
+    without a session_id use the connection's session cookie. Closing the
+    socket cancels all of its runs.
+    """
+    try:
+        await require_auth(websocket)
+    except HTTPException as exc:
+        # 1008: policy violation (authentication failed)
+        await websocket.close(code=1008, reason=str(exc.detail))
+        return
+    
+    await websocket.accept()
+    session_store = getattr(app.state, "session_store", get_session_store())
+    mux = RunMultiplexer(
+        orchestrator=getattr(app.state, "orchestrator"),
+        send=websocket.send_text,
+        session_store=session_store,
+        default_session_id=websocket.cookies.get("session_id"),
+        sse_config=SSE_CONFIG,
+    )
+    logger.info("Agent websocket connected", client=websocket.client.host if websocket.client else None)
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                await mux.send({"type": "error", "error": "messages must be JSON"})
+                continue
+            await mux.handle(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await mux.close()
+        logger.info("Agent websocket closed")
+
+
+@app.post("/agent/batch")
+@limiter.limit("10/minute")
+async def agent_batch(request: Request, batch: AgentBatch):
+    """Run many agent queries with bounded parallelism.
+    
+    Items run through the shared orchestrator, at most `concurrency` at a time
+    (and within the global run admission limit). Items sharing a session_id
+    run sequentially so their turns are appended in order.
+    
+    Returns:
+        NDJSON stream: one `{"type": "result", ...}` line per item as it
+        completes (index, id, session_id, status, answer or error, queued_ms,
+        run_ms, duration_ms), then a `{"type": "summary", ...}` line
+    """
+    await require_auth(request)
+    
+    request_id = getattr(request.state, "request_id", None)
+    session_store = getattr(app.state, "session_store", get_session_store())
+    orchestrator = getattr(app.state, "orchestrator")
+    items = [BatchItem(query=i.query, session_id=i.session_id, id=i.id) for i in batch.items]
+    
+    logger.info("Agent batch received", items=len(items), concurrency=batch.concurrency, request_id=request_id)
+    
+    async def ndjson_stream() -> AsyncGenerator[bytes, None]:
+        results = run_batch(orchestrator, items, concurrency=batch.concurrency, session_store=session_store)
+        try:
+            async for result in results:
+                result["request_id"] = request_id
+                yield (json.dumps(result) + "\n").encode("utf-8")
+        finally:
+            # Cancels outstanding runs if the client goes away
+            await results.aclose()
+    
+    return ClosingStreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+
+HISTORY_FIELDS = ("id", "query", "answer", "summary", "timestamp")
+HISTORY_DEFAULT_FIELDS = "id,query,answer,summary"
+
+
+def _project_message(msg, fields: List[str], answer_chars: int) -> dict:
+    row = {}
+    for name in fields:
+        value = getattr(msg, name)
+        if name == "timestamp":
+            value = value.isoformat()
+        elif name == "answer" and answer_chars:
+            value = value[:answer_chars]
+        row[name] = value
+    return row
+
+
 @app.get("/agent/history")
-async def get_history(request: Request, session_id: Optional[str] = None):
+async def get_history(
+    request: Request,
+    session_id: Optional[str] = None,
+    limit: int = QueryParam(50, ge=1, le=500),
+    before_id: Optional[int] = None,
+    fields: str = HISTORY_DEFAULT_FIELDS,
+    answer_chars: int = QueryParam(500, ge=0),
+    format: str = QueryParam("json", pattern="^(json|ndjson)$"),
+):
     """Get conversation history for a session.
     
     Query Parameters:
     - session_id: Optional session ID (defaults to cookie)
+    - limit: Page size; the newest ``limit`` messages before ``before_id``
+    - before_id: Cursor from a previous page's ``next_before_id``
+    - fields: Comma-separated subset of id,query,answer,summary,timestamp
+    - answer_chars: Truncate answers to this many chars (0 = full answer)
+    - format: ``json`` (one page) or ``ndjson`` (stream every message, one per
+      line, ignoring ``limit``/``before_id``)
+    
+    Responses carry an ETag derived from the session's version counter;
+    sending it back in If-None-Match returns 304 while the history is unchanged.
     
     Returns:
-        JSON with conversation history, turns count, and model info
+        JSON with the page of messages (oldest first), total turns, model,
+        version and ``next_before_id`` (null on the first page of the session)
     """
     await require_auth(request)
     
@@ -483,32 +793,49 @@ async def get_history(request: Request, session_id: Optional[str] = None):
     if not session_id:
         raise HTTPException(status_code=400, detail="session_id required")
     
+    projection = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(projection) - set(HISTORY_FIELDS))
+    if unknown or not projection:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {unknown}; allowed: {list(HISTORY_FIELDS)}")
+    
     session_store = getattr(app.state, "session_store", get_session_store())
-    history = session_store.get(session_id)
     
-    if not history.has_messages():
-        return JSONResponse({
-            "session_id": session_id,
-            "turns": 0,
-            "messages": [],
-        })
+    # The ETag covers the session version and everything shaping the body
+    variant = hashlib.sha1(
+        f"{limit}:{before_id}:{','.join(projection)}:{answer_chars}:{format}".encode()
+    ).hexdigest()[:12]
+    etag = f'"{session_store.version(session_id)}-{variant}"'
+    if etag in (request.headers.get("if-none-match") or ""):
+        return Response(status_code=304, headers={"ETag": etag})
     
-    messages = [
-        {
-            "id": msg.id,
-            "query": msg.query,
-            "answer": msg.answer[:500],  # Truncate for preview
-            "summary": msg.summary,
-        }
-        for msg in history.get_all()
-    ]
+    if format == "ndjson":
+        version, model, messages = session_store.snapshot(session_id)
+        etag = f'"{version}-{variant}"'
+        
+        async def ndjson_stream() -> AsyncGenerator[bytes, None]:
+            for i, msg in enumerate(messages):
+                yield (json.dumps(_project_message(msg, projection, answer_chars)) + "\n").encode("utf-8")
+                if i % 100 == 99:
+                    await asyncio.sleep(0)
+        
+        return ClosingStreamingResponse(
+            ndjson_stream(),
+            media_type="application/x-ndjson",
+            headers={"ETag": etag, "X-History-Turns": str(len(messages))},
+        )
+    
+    page = session_store.get_page(session_id, limit=limit, before_id=before_id)
+    # Re-key on the version actually read, in case a write landed in between
+    etag = f'"{page.version}-{variant}"'
     
     return JSONResponse({
         "session_id": session_id,
-        "turns": len(history),
-        "messages": messages,
-        "model": history._model,
-    })
+        "turns": page.total,
+        "messages": [_project_message(msg, projection, answer_chars) for msg in page.messages],
+        "model": page.model,
+        "version": page.version,
+        "next_before_id": page.next_before_id,
+    }, headers={"ETag": etag})
 
 
 @app.delete("/agent/history")
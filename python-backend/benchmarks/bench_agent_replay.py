@@ -0,0 +1,105 @@
+"""Benchmark end-to-end /agent/query runs against a recorded LLM cassette.
+
+Record a cassette once against a live provider, then replay it offline (CI)
+with the original or scaled provider timing. Every request goes through the
+real app: middleware, admission control, the orchestrator phases and SSE
+framing. Reports time to first answer token and total run time per request.
+
+Usage:
+    # Record (needs provider credentials)
+    python benchmarks/bench_agent_replay.py --cassette runs.jsonl --record
+
+    # Replay offline, original timing, 8 concurrent clients
+    python benchmarks/bench_agent_replay.py --cassette runs.jsonl --requests 40 --concurrency 8
+
+    # Replay 10x faster
+    python benchmarks/bench_agent_replay.py --cassette runs.jsonl --timing-scale 0.1
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+QUERIES = [
+    "What was Apple's revenue growth over the last four quarters?",
+    "Compare Microsoft and Alphabet operating margins for 2024.",
+    "Summarize NVIDIA's latest earnings call.",
+]
+
+
+async def _one(client, query: str) -> dict:
+    start = time.perf_counter()
+    first_token = None
+    status = None
+    async with client.stream("POST", "/agent/query", json={"query": query}) as response:
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            # Token frames are coalesced by the SSE writer; match on the type field only
+            if first_token is None and '"answer_token"' in line:
+                first_token = time.perf_counter() - start
+            for terminal in ("done", "error"):
+                if f'"type": "{terminal}"' in line or f'"type":"{terminal}"' in line:
+                    status = terminal
+    return {"ttft": first_token, "total": time.perf_counter() - start, "status": status}
+
+
+async def _run(args) -> None:
+    import httpx
+    from app import main
+
+    main.limiter.enabled = False
+    await main.startup()
+    transport = httpx.ASGITransport(app=main.app)
+    headers = {"x-api-key": os.getenv("BACKEND_API_KEY", "")}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=None) as client:
+        async def bounded(i: int) -> dict:
+            async with semaphore:
+                return await _one(client, QUERIES[i % len(QUERIES)])
+
+        wall_start = time.perf_counter()
+        results = await asyncio.gather(*(bounded(i) for i in range(args.requests)))
+        wall = time.perf_counter() - wall_start
+    await main.shutdown()
+
+    totals = sorted(r["total"] for r in results)
+    ttfts = sorted(r["ttft"] for r in results if r["ttft"] is not None)
+    failed = sum(1 for r in results if r["status"] != "done")
+
+    def pct(values, q):
+        return values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else float("nan")
+
+    print(f"{args.requests} runs, concurrency {args.concurrency}, mode {os.environ['LLM_CASSETTE_MODE']}, timing x{args.timing_scale}")
+    print(f"  total ms   p50={pct(totals, 0.5):8.1f}  p95={pct(totals, 0.95):8.1f}  mean={statistics.mean(totals) * 1000:8.1f}")
+    print(f"  ttft ms    p50={pct(ttfts, 0.5):8.1f}  p95={pct(ttfts, 0.95):8.1f}")
+    print(f"  runs/sec={args.requests / wall:.2f}  failed={failed}  wall={wall:.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cassette", required=True)
+    parser.add_argument("--record", action="store_true", help="record against the live provider instead of replaying")
+    parser.add_argument("--requests", type=int, default=len(QUERIES))
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--timing-scale", type=float, default=1.0)
+    args = parser.parse_args()
+
+    # Set before the app (and the cassette singleton) is imported
+    os.environ["LLM_CASSETTE_MODE"] = "record" if args.record else "replay"
+    os.environ["LLM_CASSETTE_PATH"] = args.cassette
+    os.environ["LLM_CASSETTE_TIMING_SCALE"] = str(args.timing_scale)
+    os.environ.setdefault("WARMUP_ENABLED", "0")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Cold-start import profile for the API process.
+
+Runs ``python -X importtime -c "import app.main"`` in fresh interpreters and
+reports the median wall time plus the slowest imports by cumulative time, so
+regressions (a provider SDK or numpy creeping back into the import path) are
+easy to spot.
+
+Usage:
+    python benchmarks/bench_import_time.py [--runs 5] [--top 20] [--module app.main]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_import(module: str = "app.main") -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """
+    Import ``module`` in a fresh interpreter with ``-X importtime``.
+
+    Returns:
+        (wall milliseconds, {module: (self_us, cumulative_us)})
+    """
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    modules: Dict[str, Tuple[int, int]] = {}
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return wall_ms, modules
+
+
+def slowest(modules: Dict[str, Tuple[int, int]], top: int) -> List[Tuple[str, int]]:
+    """Modules sorted by cumulative import time (microseconds)."""
+    return sorted(((m, c) for m, (_, c) in modules.items()), key=lambda x: -x[1])[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--module", default="app.main")
+    args = parser.parse_args()
+
+    walls = []
+    cumulative = []
+    modules: Dict[str, Tuple[int, int]] = {}
+    for _ in range(args.runs):
+        wall_ms, modules = profile_import(args.module)
+        walls.append(wall_ms)
+        cumulative.append(modules.get(args.module, (0, 0))[1] / 1000)
+
+    print(f"{args.module}: median wall {statistics.median(walls):.0f} ms "
+          f"(interpreter incl.), median import {statistics.median(cumulative):.0f} ms over {args.runs} runs")
+    print(f"\nslowest imports (last run, cumulative):")
+    for name, cum_us in slowest(modules, args.top):
+        print(f"  {cum_us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Benchmark structured-output extraction on malformed LLM outputs.
+
+Runs every case in ``data/llm_json_outputs.jsonl`` (fenced and prose-wrapped
+JSON, trailing commas, Python dict reprs, stray quotes, truncated output,
+...) through:
+
+- tolerant: the single-pass scanner (``utils/json_repair.py``)
+- legacy: the previous four-strategy chain (direct, strip fences, nested
+  regex, quote-rewriting repair), kept here for comparison
+
+A case succeeds when the decoded object equals ``expected`` (``null`` means
+nothing should be decoded). Reports the success rate and microseconds per
+parse, per case with ``--verbose``, plus a large fenced plan with trailing
+commas (``--tasks``) to show how each scales with output length.
+
+Usage:
+    python benchmarks/bench_json_repair.py [--repeat 200] [--tasks 400] [--verbose]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from dexter_py.utils.json_repair import loads_lenient  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(__file__), "data", "llm_json_outputs.jsonl")
+
+
+def _legacy_parse(content: str):
+    """The strategies ``_parse_structured_output`` used to try in turn."""
+
+    def direct(text):
+        return json.loads(text.strip())
+
+    def strip_markdown(text):
+        cleaned = text.strip()
+        if cleaned.startswith("```"):
+            lines = cleaned.split("\n")
+            if lines[0].strip().startswith("```"):
+                lines = lines[1:]
+            if lines and lines[-1].strip() == "```":
+                lines = lines[:-1]
+            cleaned = "\n".join(lines)
+        return json.loads(cleaned.strip())
+
+    def extract(text):
+        for match in re.findall(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', text, re.DOTALL):
+            try:
+                return json.loads(match)
+            except Exception:
+                continue
+        raise ValueError("No valid JSON object found")
+
+    def repair(text):
+        match = re.search(r'\{.*\}', text, re.DOTALL)
+        if not match:
+            raise ValueError("No JSON-like content found")
+        json_str = match.group(0)
+        for pattern, replacement in [
+            (r"'", '"'), (r',\s*}', '}'), (r',\s*]', ']'),
+            (r':\s*None', ': null'), (r':\s*True', ': true'), (r':\s*False', ': false'),
+        ]:
+            json_str = re.sub(pattern, replacement, json_str)
+        return json.loads(json_str)
+
+    for strategy in (direct, strip_markdown, extract, repair):
+        try:
+            return strategy(content)
+        except Exception:
+            continue
+    raise ValueError("All parsing strategies failed")
+
+
+PARSERS = {"tolerant": loads_lenient, "legacy": _legacy_parse}
+
+
+def _decode(parse, text):
+    try:
+        return parse(text)
+    except ValueError:
+        return None
+
+
+def _time(parse, text: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        _decode(parse, text)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def _large_plan(tasks: int) -> str:
+    lines = ",\n".join(
+        f'    {{"id": "task_{i}", "description": "Fetch segment {i} revenue", '
+        f'"toolCalls": [{{"tool": "get_segments", "args": {{"ticker": "AAPL", "filters": {{"segment": {i}}}}}}}],}}'
+        for i in range(tasks)
+    )
+    return f'Here is the plan:\n```json\n{{\n  "summary": "Segment review",\n  "tasks": [\n{lines},\n  ],\n}}\n```'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--tasks", type=int, default=400)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    with open(CORPUS, encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+
+    print(f"{len(cases)} cases, {args.repeat} parses each")
+    totals = {}
+    for name, parse in PARSERS.items():
+        ok, elapsed, failed = 0, 0.0, []
+        for case in cases:
+            if _decode(parse, case["text"]) == case["expected"]:
+                ok += 1
+            else:
+                failed.append(case["case"])
+            us = _time(parse, case["text"], args.repeat)
+            elapsed += us
+            if args.verbose:
+                print(f"  {name:<9} {case['case']:<28} {us:8.1f} us")
+        totals[name] = elapsed / len(cases)
+        print(f"  {name:<9} success {ok}/{len(cases)} ({ok / len(cases):.0%}), {totals[name]:7.1f} us/parse")
+        if failed:
+            print(f"            failed: {', '.join(failed)}")
+
+    text = _large_plan(args.tasks)
+    print(f"large plan: {args.tasks} tasks, {len(text) / 1024:.0f} KiB")
+    for name, parse in PARSERS.items():
+        decoded = _decode(parse, text)
+        tasks = len(decoded.get("tasks", [])) if isinstance(decoded, dict) else 0
+        us = _time(parse, text, max(1, args.repeat // 20))
+        print(f"  {name:<9} {us / 1000:8.2f} ms/parse, {tasks} tasks decoded")
+
+
+if __name__ == "__main__":
+    main()
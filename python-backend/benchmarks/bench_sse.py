@@ -0,0 +1,96 @@
+"""Benchmark SSE framing cost for the /query and /agent/query streams.
+
+Compares the legacy per-token encoder (fresh dict + json.dumps + f-string +
+encode + debug log per token) against SSEWriter with and without coalescing.
+Reports frames/sec, tokens/sec and CPU milliseconds per stream.
+
+Usage:
+    python benchmarks/bench_sse.py [--streams 200] [--tokens 500]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import structlog
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from dexter_py.utils.sse import SSEWriter, SSEConfig  # noqa: E402
+
+
+TOKENS = ["The", " quick", " brown", " fox", " jumps", " over", " the", " lazy", " dog", "."]
+
+
+async def _token_source(count: int):
+    for i in range(count):
+        yield TOKENS[i % len(TOKENS)]
+        if i % 16 == 0:
+            # Let other streams interleave, as real network reads would
+            await asyncio.sleep(0)
+
+
+async def _legacy_stream(request_id: str, count: int, logger) -> int:
+    frames = 0
+    async for chunk in _token_source(count):
+        payload = {"token": chunk, "role": "assistant", "request_id": request_id}
+        s = f"data: {json.dumps(payload)}\n\n"
+        logger.debug("Sending token", token=chunk, request_id=request_id)
+        s.encode("utf-8")
+        frames += 1
+    return frames
+
+
+async def _writer_stream(request_id: str, count: int, logger, config: SSEConfig) -> int:
+    writer = SSEWriter(static_fields={"role": "assistant", "request_id": request_id}, config=config, logger=logger)
+    frames = 0
+    async for _ in writer.stream_tokens(_token_source(count)):
+        frames += 1
+    return frames
+
+
+async def _run(label: str, factory, streams: int, tokens: int) -> None:
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    counts = await asyncio.gather(*(factory(f"req-{i}") for i in range(streams)))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    frames = sum(counts)
+    print(
+        f"{label:<28} frames={frames:>8}  frames/sec={frames / wall:>11,.0f}  "
+        f"tokens/sec={streams * tokens / wall:>11,.0f}  "
+        f"cpu/stream={cpu * 1000 / streams:>7.2f} ms  wall={wall:.2f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--tokens", type=int, default=500)
+    args = parser.parse_args()
+
+    # Mirror the app's JSON logging, but discard the output
+    devnull = open(os.devnull, "w")
+    structlog.configure(
+        processors=[
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.add_log_level,
+            structlog.processors.JSONRenderer(),
+        ],
+        logger_factory=structlog.PrintLoggerFactory(file=devnull),
+    )
+    logger = structlog.get_logger("bench")
+
+    print(f"{args.streams} concurrent streams x {args.tokens} tokens")
+    asyncio.run(_run("legacy (per-token)", lambda rid: _legacy_stream(rid, args.tokens, logger), args.streams, args.tokens))
+    no_coalesce = SSEConfig(flush_interval=0.0, max_buffer_bytes=1, log_sample_every=100)
+    asyncio.run(_run("SSEWriter (no coalescing)", lambda rid: _writer_stream(rid, args.tokens, logger, no_coalesce), args.streams, args.tokens))
+    coalesce = SSEConfig()
+    asyncio.run(_run("SSEWriter (coalesced)", lambda rid: _writer_stream(rid, args.tokens, logger, coalesce), args.streams, args.tokens))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Run many agent queries with bounded parallelism.
+
+``run_batch()`` feeds a list of ``BatchItem`` to a fixed number of workers and
+yields one result dict per item as soon as it finishes (completion order, not
+submission order), followed by a summary. A failing item is reported with its
+error and never affects the others. Items sharing a ``session_id`` run one
+after another in submission order so their conversation turns don't interleave.
+
+Every run holds a slot of the shared ``runs`` admission pool. Workers are
+capped at the pool's limit and wait for a slot without a deadline, so a large
+batch, or one sharing the pool with interactive runs, queues instead of failing
+items on the admission timeout; only a full admission queue rejects an item.
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Optional
+from dataclasses import dataclass
+import asyncio
+import math
+import os
+import time
+
+import structlog
+
+from .orchestrator import AgentEventType
+from ..utils.admission import get_admission_controller
+
+
+DEFAULT_BATCH_CONCURRENCY = int(os.getenv("AGENT_BATCH_CONCURRENCY", "4"))
+MAX_BATCH_CONCURRENCY = int(os.getenv("AGENT_BATCH_MAX_CONCURRENCY", "16"))
+
+
+@dataclass
+class BatchItem:
+    """One query in a batch."""
+    query: str
+    session_id: Optional[str] = None
+    id: Optional[str] = None  # Caller-supplied correlation id, echoed back
+
+
+async def _run_item(
+    orchestrator: Any,
+    index: int,
+    item: BatchItem,
+    session_store: Optional[Any],
+    submitted_at: float,
+) -> Dict[str, Any]:
+    """Run one item to completion and describe the outcome."""
+    started = time.perf_counter()
+    result: Dict[str, Any] = {
+        "type": "result",
+        "index": index,
+        "id": item.id,
+        "session_id": item.session_id,
+        "queued_ms": round((started - submitted_at) * 1000, 1),
+    }
+    permit = None
+    try:
+        permit = await get_admission_controller().runs.acquire(timeout=math.inf)
+        run_started = time.perf_counter()
+        done: Optional[Dict[str, Any]] = None
+        async for event in orchestrator.run_stream(
+            query=item.query,
+            session_id=item.session_id,
+            session_store=session_store if item.session_id else None,
+        ):
+            if event.type is AgentEventType.DONE:
+                done = event.data
+        run_metrics = (done or {}).get("metrics") or {}
+        result.update(
+            status="ok",
+            answer=(done or {}).get("answer", ""),
+            run_id=run_metrics.get("run_id"),
+            iterations=run_metrics.get("iterations"),
+            stop_reason=run_metrics.get("stop_reason"),
+            run_ms=round((time.perf_counter() - run_started) * 1000, 1),
+        )
+    except Exception as exc:
+        result.update(status="error", error=str(exc), error_type=type(exc).__name__)
+    finally:
+        if permit is not None:
+            permit.release()
+    result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+async def run_batch(
+    orchestrator: Any,
+    items: List[BatchItem],
+    concurrency: Optional[int] = None,
+    session_store: Optional[Any] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run ``items`` through ``orchestrator`` with at most ``concurrency`` in flight.
+
+    Args:
+        orchestrator: Orchestrator (anything with ``run_stream``)
+        items: Queries to run
+        concurrency: Max concurrent runs (default AGENT_BATCH_CONCURRENCY,
+            capped at AGENT_BATCH_MAX_CONCURRENCY and the run admission limit)
+        session_store: Store used to load/save history for items with a session_id
+
+    Yields:
+        ``{"type": "result", ...}`` per item as it completes, then one
+        ``{"type": "summary", ...}``
+
+    Closing the iterator early cancels all outstanding runs.
+    """
+    logger = structlog.get_logger(__name__)
+    concurrency = max(1, min(concurrency or DEFAULT_BATCH_CONCURRENCY, MAX_BATCH_CONCURRENCY))
+    run_limit = get_admission_controller().runs.limit
+    if run_limit > 0:
+        # More workers than run slots would only queue on admission
+        concurrency = min(concurrency, run_limit)
+    submitted_at = time.perf_counter()
+
+    pending: asyncio.Queue = asyncio.Queue()
+    for index, item in enumerate(items):
+        pending.put_nowait((index, item))
+    results: asyncio.Queue = asyncio.Queue()
+    session_locks: Dict[str, asyncio.Lock] = {}
+
+    async def worker() -> None:
+        while True:
+            try:
+                index, item = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if item.session_id:
+                lock = session_locks.setdefault(item.session_id, asyncio.Lock())
+                async with lock:
+                    result = await _run_item(orchestrator, index, item, session_store, submitted_at)
+            else:
+                result = await _run_item(orchestrator, index, item, session_store, submitted_at)
+            results.put_nowait(result)
+
+    logger.info("batch_start", items=len(items), concurrency=concurrency)
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(items)))]
+    succeeded = failed = 0
+    try:
+        for _ in range(len(items)):
+            result = await results.get()
+            if result["status"] == "ok":
+                succeeded += 1
+            else:
+                failed += 1
+            yield result
+
+        duration_ms = round((time.perf_counter() - submitted_at) * 1000, 1)
+        logger.info("batch_complete", items=len(items), succeeded=succeeded, failed=failed, duration_ms=duration_ms)
+        yield {
+            "type": "summary",
+            "total": len(items),
+            "succeeded": succeeded,
+            "failed": failed,
+            "concurrency": concurrency,
+            "duration_ms": duration_ms,
+        }
+    finally:
+        for task in workers:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,183 @@
+"""Multiplex concurrent agent runs over one bidirectional connection.
+
+``RunMultiplexer`` is the transport-independent core of ``/agent/ws``: the
+endpoint feeds it decoded client messages and gives it a ``send`` coroutine for
+outgoing JSON text. Client messages:
+
+- ``{"type": "run", "query": "...", "run_id"?: "...", "session_id"?: "..."}``
+- ``{"type": "cancel", "run_id": "..."}``
+- ``{"type": "ping"}``
+
+Every server frame for a run carries its ``run_id`` (the client's id, or one
+generated and announced in the ``accepted`` frame). Run events have the same
+shape as the ``/agent/query`` SSE payloads, tokens coalesced the same way.
+Terminal frames are ``done`` (from the orchestrator), ``cancelled`` or
+``error``. Runs on the same session execute one after another, like
+``/agent/batch``, so their turns don't interleave in the history.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional
+from contextlib import aclosing
+import asyncio
+import json
+import os
+import uuid
+
+import structlog
+
+from .orchestrator import AgentEvent, AgentEventType
+from ..utils.admission import AdmissionRejected, get_admission_controller
+from ..utils.sse import SSEConfig, SSEWriter, frame_payload
+
+
+MAX_RUNS_PER_CONNECTION = int(os.getenv("AGENT_WS_MAX_RUNS", "8"))
+
+
+class RunMultiplexer:
+    """
+    Runs agent queries concurrently for one connection.
+
+    Args:
+        orchestrator: Orchestrator (anything with ``run_stream``)
+        send: Coroutine sending one JSON text frame to the client
+        session_store: Store used to load/save session history
+        default_session_id: Session used when a run names none (e.g. the cookie)
+        max_runs: Concurrent runs allowed on the connection
+        sse_config: Token coalescing settings shared with the SSE endpoints
+    """
+
+    def __init__(
+        self,
+        orchestrator: Any,
+        send: Callable[[str], Awaitable[None]],
+        session_store: Optional[Any] = None,
+        default_session_id: Optional[str] = None,
+        max_runs: int = MAX_RUNS_PER_CONNECTION,
+        sse_config: Optional[SSEConfig] = None,
+    ) -> None:
+        self.orchestrator = orchestrator
+        self.session_store = session_store
+        self.default_session_id = default_session_id
+        self.max_runs = max_runs
+        self.sse_config = sse_config or SSEConfig.from_env()
+        self.logger = structlog.get_logger(__name__)
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self._runs: Dict[str, asyncio.Task] = {}
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._closed = False
+
+    @property
+    def active_runs(self) -> int:
+        return len(self._runs)
+
+    async def send(self, payload: Dict[str, Any]) -> None:
+        await self.send_text(json.dumps(payload))
+
+    async def send_text(self, text: str) -> None:
+        if self._closed:
+            return
+        # Runs send concurrently; one frame at a time on the wire
+        async with self._send_lock:
+            try:
+                await self._send(text)
+            except Exception:
+                # Connection is gone: stop sending, let the caller's run unwind
+                self._closed = True
+                raise
+
+    async def handle(self, message: Any) -> None:
+        """Dispatch one decoded client message."""
+        kind = message.get("type") if isinstance(message, dict) else None
+        if kind == "run":
+            await self._start(message)
+        elif kind == "cancel":
+            run_id = message.get("run_id")
+            if not self.cancel(run_id):
+                await self.send({"type": "error", "run_id": run_id, "error": "unknown run_id"})
+        elif kind == "ping":
+            await self.send({"type": "pong"})
+        else:
+            await self.send({"type": "error", "error": f"unsupported message type: {kind!r}"})
+
+    async def _start(self, message: Dict[str, Any]) -> None:
+        run_id = str(message.get("run_id") or uuid.uuid4())
+        query = message.get("query")
+        if not isinstance(query, str) or not query.strip():
+            await self.send({"type": "error", "run_id": run_id, "error": "query required"})
+            return
+        if run_id in self._runs:
+            await self.send({"type": "error", "run_id": run_id, "error": "run_id already active"})
+            return
+        if len(self._runs) >= self.max_runs:
+            await self.send({"type": "error", "run_id": run_id, "error": f"at most {self.max_runs} concurrent runs per connection"})
+            return
+
+        session_id = message.get("session_id") or self.default_session_id or str(uuid.uuid4())
+        await self.send({"type": "accepted", "run_id": run_id, "session_id": session_id})
+        self._runs[run_id] = asyncio.create_task(self._run(run_id, query, session_id))
+
+    def cancel(self, run_id: Optional[str]) -> bool:
+        """Cancel a run; returns False if it is not active."""
+        task = self._runs.get(run_id) if run_id else None
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def _run(self, run_id: str, query: str, session_id: str) -> None:
+        writer = SSEWriter(static_fields={"session_id": session_id}, config=self.sse_config, logger=self.logger)
+        writer.set_token_head({"type": AgentEventType.ANSWER_TOKEN.value, "run_id": run_id})
+
+        def token_of(event: AgentEvent) -> Optional[str]:
+            if event.type is AgentEventType.ANSWER_TOKEN:
+                return event.data.get("token", "")
+            return None
+
+        def frame_of(event: AgentEvent) -> bytes:
+            return writer.event_frame(event.to_dict())
+
+        permit = None
+        try:
+            lock = self._session_locks.setdefault(session_id, asyncio.Lock())
+            async with lock:
+                permit = await get_admission_controller().runs.acquire()
+                history = self.session_store.get(session_id) if self.session_store is not None else None
+                events = self.orchestrator.run_stream(
+                    query=query,
+                    message_history=history,
+                    session_id=session_id,
+                    session_store=self.session_store,
+                    run_id=run_id,
+                )
+                # aclosing: a cancel can land while the stream is suspended at
+                # a yield; closing it stops the orchestrator run right away
+                async with aclosing(writer.stream(events, token_of=token_of, frame_of=frame_of)) as frames:
+                    async for frame in frames:
+                        await self.send_text(frame_payload(frame))
+        except asyncio.CancelledError:
+            self.logger.info("ws_run_cancelled", run_id=run_id, session_id=session_id)
+            await self.send({"type": "cancelled", "run_id": run_id, "session_id": session_id})
+        except AdmissionRejected as exc:
+            await self.send({
+                "type": "error",
+                "run_id": run_id,
+                "error": str(exc),
+                "retry_after": exc.retry_after,
+            })
+        except Exception as exc:
+            self.logger.exception("ws_run_failed", run_id=run_id, error=str(exc))
+            await self.send({"type": "error", "run_id": run_id, "error": str(exc)})
+        finally:
+            if permit is not None:
+                permit.release()
+            self._runs.pop(run_id, None)
+
+    async def close(self) -> None:
+        """Cancel every active run (the connection is gone) and wait for them."""
+        self._closed = True
+        tasks = list(self._runs.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -12,7 +12,8 @@ import uuid
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 from ..utils.context import ToolContextManager
-from ..utils.message_history import MessageHistory
+from ..utils.message_history import Message, MessageHistory
+from ..utils.tokens import get_token_counter
 from ..tools import TOOLS
 from .phases.understand import UnderstandPhase
 from .phases.plan import PlanPhase
@@ -22,12 +23,16 @@ from .phases.answer import AnswerPhase
 from .tool_executor import ToolExecutor
 from .task_executor import TaskExecutor
 from ..utils._utils import get_production_llm_client
+from ..model.cassette import CassetteMissError
+from ..utils import metrics as prom
+from ..utils import tracing
 
 
 # Constants
 DEFAULT_MAX_ITERATIONS = 5
 MAX_HISTORY_MESSAGES = 20
 HISTORY_SUMMARY_THRESHOLD = 15
+HISTORY_TOKEN_BUDGET = 4000  # Tokens of recent turns kept verbatim
 
 # Phase timeouts in seconds
 PHASE_TIMEOUTS = {
@@ -47,6 +52,7 @@ class StopReason(Enum):
     HIGH_CONFIDENCE = "high_confidence"
     TIMEOUT = "timeout"
     ERROR = "error"
+    CANCELLED = "cancelled"
 
 
 @dataclass
@@ -67,6 +73,7 @@ class RunMetrics:
         """Record phase execution metrics"""
         self.phase_timings[phase] = self.phase_timings.get(phase, 0) + duration
         self.phase_attempts[phase] = self.phase_attempts.get(phase, 0) + 1
+        prom.PHASE_DURATION.labels(phase, "success" if success else "failure").observe(duration)
         
     def record_error(self, phase: str, error: str, context: Optional[dict] = None):
         """Record an error occurrence"""
@@ -81,6 +88,13 @@ class RunMetrics:
         """Finalize metrics at end of run"""
         self.end_time = time()
         self.stop_reason = stop_reason
+
+    def observe(self):
+        """Export per-run totals to the Prometheus histograms"""
+        prom.RUN_ITERATIONS.observe(self.iterations)
+        prom.RUN_TOOL_CALLS.observe(self.tool_calls)
+        reason = self.stop_reason.value if self.stop_reason else "incomplete"
+        prom.RUN_STOP_REASONS.labels(reason).inc()
         
     def to_dict(self) -> dict:
         """Export metrics as dictionary"""
@@ -98,6 +112,88 @@ class RunMetrics:
         }
 
 
+class AgentEventType(Enum):
+    """Types of events emitted by Orchestrator.run_stream()"""
+    PHASE_START = "phase_start"
+    PLAN = "plan"
+    TASK_RESULT = "task_result"
+    REFLECTION = "reflection"
+    ANSWER_TOKEN = "answer_token"
+    DONE = "done"
+
+
+@dataclass
+class AgentEvent:
+    """A single event in an orchestrator run stream"""
+    type: AgentEventType
+    run_id: str
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        """Export event as a JSON-serializable dictionary"""
+        payload = {'type': self.type.value, 'run_id': self.run_id}
+        for key, value in self.data.items():
+            payload[key] = _to_jsonable(value)
+        return payload
+
+
+def _to_jsonable(value: Any) -> Any:
+    """Convert pydantic models and nested containers into plain JSON types"""
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(mode='json')
+    if isinstance(value, dict):
+        return {str(k): _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    if isinstance(value, Enum):
+        return value.value
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _plan_as_dict(plan: Any) -> dict:
+    """Task executors index plans as dicts; accept pydantic Plan objects too"""
+    if hasattr(plan, 'model_dump'):
+        return plan.model_dump()
+    return plan if isinstance(plan, dict) else {}
+
+
+class _TaskEventRelay:
+    """
+    Callback proxy handed to the task executor during run_stream().
+
+    Emits a task_result event for every completed or failed task and forwards
+    the hook to the user-supplied callbacks when they implement it.
+    """
+
+    def __init__(self, callbacks: Any, run_id: str, emit: callable):
+        self._callbacks = callbacks
+        self._run_id = run_id
+        self._emit = emit
+
+    def on_task_start(self, task_id: str, task: Any) -> None:
+        hook = getattr(self._callbacks, 'on_task_start', None)
+        if callable(hook):
+            hook(task_id, task)
+
+    def on_task_complete(self, task_id: str, result: Any) -> None:
+        self._emit(AgentEvent(AgentEventType.TASK_RESULT, self._run_id, {'task_id': task_id, 'result': result}))
+        hook = getattr(self._callbacks, 'on_task_complete', None)
+        if callable(hook):
+            hook(task_id, result)
+
+    def on_task_error(self, task_id: str, exc: Exception) -> None:
+        self._emit(AgentEvent(
+            AgentEventType.TASK_RESULT,
+            self._run_id,
+            {'task_id': task_id, 'result': {'error': str(exc), 'failed': True}}
+        ))
+        hook = getattr(self._callbacks, 'on_task_error', None)
+        if callable(hook):
+            hook(task_id, exc)
+
+
 class SessionStore(Protocol):
     """Protocol for session storage backends"""
     
@@ -193,49 +289,65 @@ class ReflectionAnalyzer:
 class HistorySummarizer:
     """Handles message history summarization and pruning"""
     
-    def __init__(self, model: str, max_messages: int = MAX_HISTORY_MESSAGES):
+    def __init__(self, model: str, max_messages: int = MAX_HISTORY_MESSAGES, max_tokens: int = HISTORY_TOKEN_BUDGET):
         self.model = model
         self.max_messages = max_messages
+        self.max_tokens = max_tokens
+        self.token_counter = get_token_counter(model)
     
-    async def get_context_window(self, history: MessageHistory) -> List[dict]:
+    async def get_context_window(self, history: MessageHistory) -> List[Message]:
         """
         Returns pruned/summarized history that fits context window.
-        Keeps recent messages, summarizes older ones.
+        Keeps the most recent turns that fit in ``max_tokens`` (and
+        ``max_messages``) verbatim and replaces older ones with one summary turn.
         """
         messages = history.get_messages()
         
-        if len(messages) <= self.max_messages:
+        # Newest first, keep whole turns while they fit
+        recent: List[Message] = []
+        used = 0
+        for msg in reversed(messages):
+            tokens = self.token_counter.count(msg.query) + self.token_counter.count(msg.answer)
+            if len(recent) >= self.max_messages or used + tokens > self.max_tokens:
+                break
+            recent.append(msg)
+            used += tokens
+        recent.reverse()
+        
+        if len(recent) == len(messages):
             return messages
         
-        # Keep recent messages, summarize older ones
-        recent_count = min(10, self.max_messages // 2)
-        recent = messages[-recent_count:]
-        older = messages[:-recent_count]
+        older = messages[:len(messages) - len(recent)]
         
-        # Create summary of older messages
-        summary = await self._summarize_messages(older)
+        # Create summary of older messages, within what the recent turns left
+        summary = self.token_counter.truncate(
+            await self._summarize_messages(older),
+            max(32, self.max_tokens - used),
+            "..."
+        )
         
-        summary_message = {
-            "role": "system",
-            "content": f"Previous conversation summary: {summary}"
-        }
+        summary_message = Message(
+            id=older[-1].id,
+            query="Earlier conversation",
+            answer=f"Previous conversation summary: {summary}",
+            summary=summary,
+            timestamp=older[-1].timestamp,
+        )
         
         return [summary_message] + recent
     
-    async def _summarize_messages(self, messages: List[dict]) -> str:
+    async def _summarize_messages(self, messages: List[Message]) -> str:
         """Summarize a list of messages into a concise overview"""
         # Simple implementation - could be enhanced with LLM summarization
         if not messages:
             return "No previous context."
         
-        user_queries = [m['content'] for m in messages if m.get('role') == 'user']
-        assistant_responses = [m['content'] for m in messages if m.get('role') == 'assistant']
+        user_queries = [m.query for m in messages]
         
         summary_parts = []
         if user_queries:
             summary_parts.append(f"User asked about: {', '.join(user_queries[:3])}")
-        if assistant_responses:
-            summary_parts.append(f"Assistant provided {len(assistant_responses)} responses")
+        summary_parts.append(f"Assistant provided {len(messages)} responses")
         
         return ". ".join(summary_parts) + "."
 
@@ -264,6 +376,37 @@ class AgentOptions:
     enable_history_summarization: bool = True
     phase_timeouts: Optional[Dict[str, int]] = None
     custom_phases: Optional[Dict[str, Phase]] = None
+    # Per-phase model overrides, e.g. {"understand": "claude-3-5-haiku-latest"};
+    # phases not listed use ``model``
+    phase_models: Optional[Dict[str, str]] = None
+
+
+def parse_phase_models(spec: Optional[str]) -> Dict[str, str]:
+    """
+    Parse a per-phase model map such as
+    ``"understand=claude-3-5-haiku-latest,reflect=claude-3-5-haiku-latest"``
+    (the AGENT_PHASE_MODELS format).
+
+    Raises:
+        ValueError: On a malformed entry or an unknown phase
+    """
+    models: Dict[str, str] = {}
+    for entry in (spec or "").split(","):
+        if not entry.strip():
+            continue
+        phase, sep, model_name = entry.partition("=")
+        phase, model_name = phase.strip(), model_name.strip()
+        if not sep or not model_name:
+            raise ValueError(f"Expected phase=model, got {entry.strip()!r}")
+        models[phase] = model_name
+    _check_phase_names(models)
+    return models
+
+
+def _check_phase_names(models: Dict[str, str]) -> None:
+    unknown = set(models) - set(PHASE_TIMEOUTS)
+    if unknown:
+        raise ValueError(f"Unknown phase(s) in model map: {', '.join(sorted(unknown))}")
 
 
 class Orchestrator:
@@ -281,10 +424,12 @@ class Orchestrator:
 
     def __init__(self, options: AgentOptions) -> None:
         self.model = options.model
-    # Initialize a production LLM client wrapper (convenience adapter)
-    # This returns an object exposing async `complete` and `stream` methods
-    # suitable for the AnswerPhase protocol.
-    self.llm_client = get_production_llm_client()
+        _check_phase_names(options.phase_models or {})
+        self.phase_models = dict(options.phase_models or {})
+        # Initialize a production LLM client wrapper (convenience adapter)
+        # This returns an object exposing async `complete` and `stream` methods
+        # suitable for the AnswerPhase protocol.
+        self.llm_client = get_production_llm_client()
         self.callbacks = options.callbacks or AgentCallbacks()
         self.max_iterations = options.max_iterations or DEFAULT_MAX_ITERATIONS
         self.phase_timeouts = options.phase_timeouts or PHASE_TIMEOUTS
@@ -305,11 +450,11 @@ class Orchestrator:
         custom_phases = options.custom_phases or {}
         
         self.phases = {
-            'understand': custom_phases.get('understand', UnderstandPhase(model=self.model)),
-            'plan': custom_phases.get('plan', PlanPhase(model=self.model)),
-            'execute': custom_phases.get('execute', ExecutePhase(model=self.model)),
-            'reflect': custom_phases.get('reflect', ReflectPhase(model=self.model, max_iterations=self.max_iterations)),
-            'answer': custom_phases.get('answer', AnswerPhase(model=self.model, context_manager=self.context_manager, llm_client=self.llm_client)),
+            'understand': custom_phases.get('understand', UnderstandPhase(model=self.model_for('understand'))),
+            'plan': custom_phases.get('plan', PlanPhase(model=self.model_for('plan'))),
+            'execute': custom_phases.get('execute', ExecutePhase(model=self.model_for('execute'))),
+            'reflect': custom_phases.get('reflect', ReflectPhase(model=self.model_for('reflect'), max_iterations=self.max_iterations)),
+            'answer': custom_phases.get('answer', AnswerPhase(model=self.model_for('answer'), context_manager=self.context_manager, llm_client=self.llm_client)),
         }
         
         # Tool execution with retry logic
@@ -317,12 +462,16 @@ class Orchestrator:
         self.tool_executor_with_retry = self._wrap_tool_executor_with_retry(tool_executor)
         
         self.task_executor = TaskExecutor(
-            model=self.model,
+            model=self.model_for('execute'),
             tool_executor=self.tool_executor_with_retry,
             execute_phase=self.phases['execute'],
             context_manager=self.context_manager,
         )
 
+    def model_for(self, phase: str) -> str:
+        """Model used by ``phase``: its entry in the phase model map, else the default."""
+        return self.phase_models.get(phase, self.model)
+
     def _wrap_tool_executor_with_retry(self, tool_executor: ToolExecutor) -> ToolExecutor:
         """Wrap tool executor methods with retry logic"""
         
@@ -378,70 +527,82 @@ class Orchestrator:
             timeout=timeout
         )
         
-        try:
-            result = await asyncio.wait_for(phase.run(**kwargs), timeout=timeout)
-            duration = time() - start
+        # Span is current inside the phase, so LLM/tool spans nest under it
+        with tracing.span(f"phase.{phase_name}", run_id=metrics.run_id, timeout_s=timeout) as phase_span:
+            try:
+                result = await asyncio.wait_for(phase.run(**kwargs), timeout=timeout)
+                duration = time() - start
             
-            metrics.record_phase(phase_name, duration, success=True)
+                metrics.record_phase(phase_name, duration, success=True)
             
-            self.logger.info(
-                "phase_complete",
-                phase=phase_name,
-                run_id=metrics.run_id,
-                duration=duration
-            )
+                self.logger.info(
+                    "phase_complete",
+                    phase=phase_name,
+                    run_id=metrics.run_id,
+                    duration=duration
+                )
             
-            return result
+                return result
             
-        except AsyncTimeoutError:
-            duration = time() - start
-            error_msg = f"{phase_name} phase timeout after {timeout}s"
+            except AsyncTimeoutError:
+                duration = time() - start
+                error_msg = f"{phase_name} phase timeout after {timeout}s"
             
-            metrics.record_phase(phase_name, duration, success=False)
-            metrics.record_error(phase_name, error_msg)
+                metrics.record_phase(phase_name, duration, success=False)
+                metrics.record_error(phase_name, error_msg)
             
-            self.logger.error(
-                "phase_timeout",
-                phase=phase_name,
-                run_id=metrics.run_id,
-                timeout=timeout
-            )
+                self.logger.error(
+                    "phase_timeout",
+                    phase=phase_name,
+                    run_id=metrics.run_id,
+                    timeout=timeout
+                )
             
-            return {"error": error_msg, "failed": True, "timeout": True}
+                phase_span.set_attribute("timeout", True)
+                phase_span.record_error(AsyncTimeoutError(error_msg))
+                return {"error": error_msg, "failed": True, "timeout": True}
             
-        except Exception as exc:
-            duration = time() - start
-            error_msg = str(exc)
+            except Exception as exc:
+                duration = time() - start
+                error_msg = str(exc)
+                phase_span.record_error(exc)
             
-            metrics.record_phase(phase_name, duration, success=False)
-            metrics.record_error(phase_name, error_msg, {'exception_type': type(exc).__name__})
+                metrics.record_phase(phase_name, duration, success=False)
+                metrics.record_error(phase_name, error_msg, {'exception_type': type(exc).__name__})
             
-            self.logger.error(
-                "phase_failed",
-                phase=phase_name,
-                run_id=metrics.run_id,
-                error=error_msg,
-                duration=duration
-            )
+                self.logger.error(
+                    "phase_failed",
+                    phase=phase_name,
+                    run_id=metrics.run_id,
+                    error=error_msg,
+                    duration=duration
+                )
+                if isinstance(exc, CassetteMissError):
+                    # Replay must fail loudly rather than continue on a fallback
+                    raise
             
-            return {"error": error_msg, "failed": True}
+                return {"error": error_msg, "failed": True}
 
     async def _get_or_create_history(
         self,
         session_id: Optional[str],
-        run_id: str
+        run_id: str,
+        ext_store: Optional[Any] = None,
+        ext_history: Optional[MessageHistory] = None,
     ) -> MessageHistory:
         """
         Get existing history from session store or create new one.
         Thread-safe with session locking.
+
+        ``ext_store``/``ext_history`` are the per-run overrides passed to
+        ``run_stream``; they are threaded through as arguments (not instance
+        state) so concurrent runs on one orchestrator stay isolated.
         """
         # If an external message_history was supplied for this run, use it directly
-        ext_history = getattr(self, "_external_message_history", None)
         if ext_history is not None:
             return ext_history
 
         # If an external session_store was supplied, attempt to use it.
-        ext_store = getattr(self, "_external_session_store", None)
         if ext_store is not None:
             # No session id -> isolated history
             if not session_id:
@@ -530,14 +691,14 @@ class Orchestrator:
         self,
         session_id: Optional[str],
         history: MessageHistory,
-        run_id: str
+        run_id: str,
+        ext_store: Optional[Any] = None,
     ) -> None:
         """Save history back to session store if session_id provided"""
         if not session_id:
             return
 
         # If external session store was provided for this run, use it
-        ext_store = getattr(self, "_external_session_store", None)
         if ext_store is not None:
             try:
                 if asyncio.iscoroutinefunction(ext_store.set):
@@ -561,27 +722,203 @@ class Orchestrator:
                 message_count=len(history.get_messages())
             )
 
-    async def run(
+    async def _stream_phase_with_timeout(
+        self,
+        phase_name: str,
+        phase: Phase,
+        metrics: RunMetrics,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Execute a streaming phase, yielding its chunks as they arrive.
+
+        The phase timeout bounds the whole stream rather than each chunk, so a
+        slow provider cannot keep the phase open indefinitely. Phases whose
+        ``run()`` returns an awaitable instead of an async iterator are awaited
+        and their string result yielded as a single chunk.
+        """
+        timeout = self.phase_timeouts.get(phase_name, 60)
+        start = time()
+        deadline = start + timeout
+
+        self.logger.info(
+            "phase_start",
+            phase=phase_name,
+            run_id=metrics.run_id,
+            timeout=timeout
+        )
+
+        # Not attached across yields (see utils/tracing.py); it is made
+        # current only while the phase runs, so LLM spans nest under it
+        phase_span = tracing.start_span(f"phase.{phase_name}", run_id=metrics.run_id, timeout_s=timeout)
+        result = phase.run(**kwargs)
+        stream = None
+        try:
+            if hasattr(result, '__aiter__'):
+                stream = result.__aiter__()
+                while True:
+                    remaining = deadline - time()
+                    if remaining <= 0:
+                        raise AsyncTimeoutError()
+                    token = tracing.attach(phase_span)
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), timeout=remaining)
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        tracing.detach(token)
+                    if isinstance(chunk, str) and chunk:
+                        yield chunk
+            else:
+                token = tracing.attach(phase_span)
+                try:
+                    value = await asyncio.wait_for(result, timeout=timeout)
+                finally:
+                    tracing.detach(token)
+                if isinstance(value, str) and value:
+                    yield value
+
+            duration = time() - start
+            metrics.record_phase(phase_name, duration, success=True)
+            self.logger.info(
+                "phase_complete",
+                phase=phase_name,
+                run_id=metrics.run_id,
+                duration=duration
+            )
+
+        except AsyncTimeoutError:
+            duration = time() - start
+            error_msg = f"{phase_name} phase timeout after {timeout}s"
+
+            metrics.record_phase(phase_name, duration, success=False)
+            metrics.record_error(phase_name, error_msg)
+
+            self.logger.error(
+                "phase_timeout",
+                phase=phase_name,
+                run_id=metrics.run_id,
+                timeout=timeout
+            )
+
+            phase_span.set_attribute("timeout", True)
+            phase_span.record_error(AsyncTimeoutError(error_msg))
+
+        except Exception as exc:
+            duration = time() - start
+            error_msg = str(exc)
+            phase_span.record_error(exc)
+
+            metrics.record_phase(phase_name, duration, success=False)
+            metrics.record_error(phase_name, error_msg, {'exception_type': type(exc).__name__})
+
+            self.logger.error(
+                "phase_failed",
+                phase=phase_name,
+                run_id=metrics.run_id,
+                error=error_msg,
+                duration=duration
+            )
+            if isinstance(exc, CassetteMissError):
+                raise
+        except (asyncio.CancelledError, GeneratorExit):
+            phase_span.set_attribute("cancelled", True)
+            raise
+        finally:
+            aclose = getattr(stream, 'aclose', None)
+            if callable(aclose):
+                try:
+                    await aclose()
+                except Exception:
+                    pass
+            phase_span.end()
+
+    async def _execute_with_events(
+        self,
+        run_id: str,
+        query: str,
+        plan: Any,
+        understanding: Any,
+        task_results: Dict[str, Any],
+    ) -> AsyncIterator[AgentEvent]:
+        """
+        Run the task executor and yield a ``task_result`` event for every task
+        as soon as the executor reports it complete or failed.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        relay = _TaskEventRelay(self.callbacks, run_id, queue.put_nowait)
+
+        execution = asyncio.create_task(
+            self.task_executor.execute_tasks(
+                query=query,
+                plan=_plan_as_dict(plan),
+                understanding=understanding,
+                task_results=task_results,
+                callbacks=relay
+            )
+        )
+
+        getter: Optional[asyncio.Future] = None
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait(
+                    {getter, execution},
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if getter in done:
+                    yield getter.result()
+                    continue
+                getter.cancel()
+                break
+
+            # Drain anything reported in the same tick the executor finished
+            while not queue.empty():
+                yield queue.get_nowait()
+
+            # Surface executor failures to the caller
+            execution.result()
+        finally:
+            if getter is not None and not getter.done():
+                getter.cancel()
+            if not execution.done():
+                execution.cancel()
+
+    async def run_stream(
         self,
         query: str,
         session_id: Optional[str] = None,
         skip_phases: Optional[List[str]] = None,
         session_store: Optional[Any] = None,
         message_history: Optional[MessageHistory] = None,
-    ) -> str:
+        run_id: Optional[str] = None,
+    ) -> AsyncIterator[AgentEvent]:
         """
-        Run the agent with a query.
-        
+        Run the agent with a query, yielding typed events as they happen.
+
+        Events are emitted in order: ``phase_start`` for each phase, ``plan``
+        when a plan is produced, ``task_result`` per executed task,
+        ``reflection`` after each reflect pass, ``answer_token`` for every
+        chunk of the final answer and a terminal ``done`` event carrying the
+        full answer and run metrics.
+
         Args:
             query: The user's query
             session_id: Optional session ID for persistent conversation
             skip_phases: Optional list of phase names to skip
-            
-        Returns:
-            The final answer as a string
+            session_store: Optional external session store for this run
+            message_history: Optional preloaded history for this run
+            run_id: Optional caller-chosen run ID (e.g. a WebSocket client's
+                id for the run); generated when omitted
+
+        Yields:
+            AgentEvent instances
+
+        Closing the iterator or cancelling its consumer ends the run with
+        stop reason ``cancelled``.
         """
         # Generate unique run ID
-        run_id = str(uuid.uuid4())
+        run_id = run_id or str(uuid.uuid4())
         
         # Initialize metrics
         metrics = RunMetrics(run_id=run_id, query=query)
@@ -589,19 +926,19 @@ class Orchestrator:
         self.logger.info(
             "run_start",
             run_id=run_id,
-            query=query,
+            query_chars=len(query),
             session_id=session_id,
             max_iterations=self.max_iterations
         )
         
-        # Allow caller to pass an external session store or a preloaded message_history.
-        # These will be used for the duration of this run only.
-        self._external_session_store = session_store
-        self._external_message_history = message_history
-
+        prom.RUNS_IN_FLIGHT.inc()
+        done_emitted = False
         try:
-            # Get or create isolated history for this run
-            history = await self._get_or_create_history(session_id, run_id)
+            # Get or create isolated history for this run; an external session
+            # store or preloaded message_history applies to this run only
+            history = await self._get_or_create_history(
+                session_id, run_id, ext_store=session_store, ext_history=message_history
+            )
             
             # Apply history summarization if enabled
             if self.history_summarizer:
@@ -621,6 +958,7 @@ class Orchestrator:
             # Phase 1: UNDERSTAND
             if 'understand' not in skip_phases:
                 self._safe_callback(self.callbacks.on_phase_start, 'understand')
+                yield AgentEvent(AgentEventType.PHASE_START, run_id, {'phase': 'understand'})
                 
                 understanding = await self._run_phase_with_timeout(
                     'understand',
@@ -652,6 +990,7 @@ class Orchestrator:
                 # Phase 2: PLAN
                 if 'plan' not in skip_phases:
                     self._safe_callback(self.callbacks.on_phase_start, 'plan')
+                    yield AgentEvent(AgentEventType.PHASE_START, run_id, {'phase': 'plan', 'iteration': iteration})
                     
                     plan = await self._run_phase_with_timeout(
                         'plan',
@@ -667,21 +1006,18 @@ class Orchestrator:
                     
                     self._safe_callback(self.callbacks.on_plan_created, plan, iteration)
                     self._safe_callback(self.callbacks.on_phase_complete, 'plan')
+                    yield AgentEvent(AgentEventType.PLAN, run_id, {'plan': plan, 'iteration': iteration})
                 else:
                     plan = {"skipped": True}
                 
                 # Phase 3: EXECUTE
                 if 'execute' not in skip_phases:
                     self._safe_callback(self.callbacks.on_phase_start, 'execute')
+                    yield AgentEvent(AgentEventType.PHASE_START, run_id, {'phase': 'execute', 'iteration': iteration})
                     
                     try:
-                        await self.task_executor.execute_tasks(
-                            query=query,
-                            plan=plan,
-                            understanding=understanding,
-                            task_results=task_results,
-                            callbacks=self.callbacks
-                        )
+                        async for event in self._execute_with_events(run_id, query, plan, understanding, task_results):
+                            yield event
                         
                         # Count tool calls
                         metrics.tool_calls = len([k for k in task_results.keys() if not k.startswith('__')])
@@ -701,6 +1037,7 @@ class Orchestrator:
                 # Phase 4: REFLECT
                 if 'reflect' not in skip_phases:
                     self._safe_callback(self.callbacks.on_phase_start, 'reflect')
+                    yield AgentEvent(AgentEventType.PHASE_START, run_id, {'phase': 'reflect', 'iteration': iteration})
                     
                     reflection = await self._run_phase_with_timeout(
                         'reflect',
@@ -715,6 +1052,7 @@ class Orchestrator:
                     
                     self._safe_callback(self.callbacks.on_reflection_complete, reflection, iteration)
                     self._safe_callback(self.callbacks.on_phase_complete, 'reflect')
+                    yield AgentEvent(AgentEventType.REFLECTION, run_id, {'reflection': reflection, 'iteration': iteration})
                     
                     # Check if we should continue iterating
                     should_continue, stop_reason = ReflectionAnalyzer.should_continue(
@@ -748,8 +1086,11 @@ class Orchestrator:
             if 'answer' not in skip_phases:
                 self._safe_callback(self.callbacks.on_phase_start, 'answer')
                 self._safe_callback(self.callbacks.on_answer_start)
+                yield AgentEvent(AgentEventType.PHASE_START, run_id, {'phase': 'answer'})
                 
-                stream = await self._run_phase_with_timeout(
+                # Forward answer tokens as they are produced
+                answer_chunks: List[str] = []
+                async for chunk in self._stream_phase_with_timeout(
                     'answer',
                     self.phases['answer'],
                     metrics,
@@ -757,27 +1098,22 @@ class Orchestrator:
                     completed_plans=completed_plans,
                     task_results=task_results,
                     message_history=working_history,
-                )
-                
-                # Collect the final answer from the stream
-                final_answer = ""
-                if isinstance(stream, str):
-                    final_answer = stream
-                elif hasattr(stream, '__aiter__'):
-                    async for chunk in stream:
-                        if isinstance(chunk, str):
-                            final_answer += chunk
+                ):
+                    answer_chunks.append(chunk)
+                    self._safe_callback(self.callbacks.on_answer_stream, chunk)
+                    yield AgentEvent(AgentEventType.ANSWER_TOKEN, run_id, {'token': chunk})
                 
-                self._safe_callback(self.callbacks.on_answer_stream, stream)
+                final_answer = "".join(answer_chunks)
                 self._safe_callback(self.callbacks.on_phase_complete, 'answer')
             else:
                 final_answer = "Answer phase skipped"
             
             # Update the actual history (not the summarized working history)
-            history.add_agent_message(query, final_answer)
+            if final_answer:
+                await history.add_message(query, final_answer)
             
             # Save history back to session store
-            await self._save_history(session_id, history, run_id)
+            await self._save_history(session_id, history, run_id, ext_store=session_store)
             
             # Emit final metrics
             self._safe_callback(self.callbacks.on_metrics_update, metrics)
@@ -788,7 +1124,22 @@ class Orchestrator:
                 metrics=metrics.to_dict()
             )
             
-            return final_answer
+            done_emitted = True
+            yield AgentEvent(AgentEventType.DONE, run_id, {'answer': final_answer, 'metrics': metrics.to_dict()})
+
+        except (asyncio.CancelledError, GeneratorExit):
+            if done_emitted:
+                raise
+            # Consumer went away (e.g. SSE client disconnected); in-flight phase
+            # tasks and LLM streams are cancelled as this unwinds
+            metrics.finalize(StopReason.CANCELLED)
+            prom.RUNS_CANCELLED.inc()
+            self.logger.info(
+                "run_cancelled",
+                run_id=run_id,
+                metrics=metrics.to_dict()
+            )
+            raise
 
         except Exception as exc:
             metrics.record_error('orchestrator', str(exc))
@@ -804,17 +1155,39 @@ class Orchestrator:
             # Re-raise to caller
             raise
         finally:
-            # Clean up any external session store/message history bindings
-            if hasattr(self, '_external_session_store'):
-                try:
-                    del self._external_session_store
-                except Exception:
-                    pass
-            if hasattr(self, '_external_message_history'):
-                try:
-                    del self._external_message_history
-                except Exception:
-                    pass
+            prom.RUNS_IN_FLIGHT.dec()
+            metrics.observe()
+
+    async def run(
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        skip_phases: Optional[List[str]] = None,
+        session_store: Optional[Any] = None,
+        message_history: Optional[MessageHistory] = None,
+    ) -> str:
+        """
+        Run the agent with a query.
+        
+        Args:
+            query: The user's query
+            session_id: Optional session ID for persistent conversation
+            skip_phases: Optional list of phase names to skip
+            
+        Returns:
+            The final answer as a string
+        """
+        final_answer = ""
+        async for event in self.run_stream(
+            query=query,
+            session_id=session_id,
+            skip_phases=skip_phases,
+            session_store=session_store,
+            message_history=message_history,
+        ):
+            if event.type is AgentEventType.DONE:
+                final_answer = event.data['answer']
+        return final_answer
 
     async def clear_session(self, session_id: str) -> None:
         """Clear a session from the store"""
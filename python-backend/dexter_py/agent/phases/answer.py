@@ -10,6 +10,7 @@ Production-ready Answer Phase with:
 """
 
 import asyncio
+from contextlib import aclosing
 from typing import Any, AsyncGenerator, Optional, List, Dict, Protocol
 from dataclasses import dataclass
 import json
@@ -18,6 +19,10 @@ from pathlib import Path
 import structlog
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from ...model.cassette import CassetteMissError
+from ...utils.metrics import LLMStreamTimer
+from ...utils.tokens import TokenBudget, TokenCounter, get_token_counter
+
 
 # ============================================================================
 # Configuration & Constants
@@ -26,7 +31,7 @@ from tenacity import retry, stop_after_attempt, wait_exponential
 @dataclass
 class AnswerConfig:
     """Configuration for answer generation."""
-    max_context_tokens: int = 8000  # Max tokens for context assembly
+    max_context_tokens: int = 8000  # Max tokens for context assembly (counted with the model's tokenizer)
     max_file_analysis_size: int = 2000  # Max chars per file analysis
     max_conversation_history_tokens: int = 2000
     max_task_result_size: int = 1000  # Max chars per task result
@@ -43,6 +48,7 @@ class StreamMetrics:
     errors_encountered: int = 0
     chunks_yielded: int = 0
     duration_ms: float = 0
+    first_token_ms: Optional[float] = None
 
 
 # ============================================================================
@@ -139,7 +145,7 @@ class FilePathExtractor:
                     found_paths.append(path)
                     seen.add(path)
         
-        self.logger.info("paths_extracted", count=len(found_paths), paths=found_paths)
+        self.logger.info("paths_extracted", count=len(found_paths), paths=found_paths[:5])
         return found_paths
     
     def _is_valid_path(self, path: str) -> bool:
@@ -160,16 +166,18 @@ class FilePathExtractor:
 
 class ContextAssembler:
     """
-    Assembles context from plans and results with token budget management.
+    Assembles context from plans and results within a token budget.
     """
     
     def __init__(
         self,
         config: AnswerConfig,
-        logger: Optional[structlog.BoundLogger] = None
+        logger: Optional[structlog.BoundLogger] = None,
+        token_counter: Optional[TokenCounter] = None
     ):
         self.config = config
         self.logger = logger or structlog.get_logger(__name__)
+        self.token_counter = token_counter or get_token_counter()
     
     def assemble(
         self,
@@ -177,7 +185,9 @@ class ContextAssembler:
         task_results: Dict[str, Any]
     ) -> str:
         """
-        Assemble context with intelligent truncation.
+        Assemble context, packing plans then task results into
+        ``max_context_tokens`` tokens. The entry that crosses the budget is
+        cut at a token boundary; the rest are counted in a truncation note.
         
         Args:
             completed_plans: List of completed plan objects
@@ -187,35 +197,42 @@ class ContextAssembler:
             Assembled context string within token budget
         """
         parts: List[str] = []
-        current_size = 0
+        # Room for up to two "... [n more truncated]" notes
+        budget = TokenBudget(self.token_counter, max(0, self.config.max_context_tokens - 24))
         
         # Add plans
         if completed_plans:
-            parts.append("## Completed Plans\n")
+            parts.append(budget.add("## Completed Plans\n") or "")
             for i, plan in enumerate(completed_plans, 1):
                 plan_str = self._serialize_safely(plan, max_size=500)
-                parts.append(f"{i}. {plan_str}\n")
-                current_size += len(plan_str)
-                
-                if current_size > self.config.max_context_tokens * 4:  # ~4 chars per token
-                    parts.append(f"... [{len(completed_plans) - i} more plans truncated]\n")
+                text = f"{i}. {plan_str}\n"
+                entry = budget.add(text, truncation_suffix=self.config.truncation_suffix + "\n")
+                if entry is not None:
+                    parts.append(entry)
+                if entry != text:
+                    # Budget exhausted: this plan was cut or dropped
+                    omitted = len(completed_plans) - i + (entry is None)
+                    if omitted:
+                        parts.append(f"... [{omitted} more plans truncated]\n")
                     break
         
         # Add task results
         if task_results:
-            parts.append("\n## Task Results\n")
-            for key, value in task_results.items():
-                if current_size > self.config.max_context_tokens * 4:
-                    remaining = len(task_results) - len(parts) + 2
-                    parts.append(f"... [{remaining} more results truncated]\n")
-                    break
-                
+            parts.append(budget.add("\n## Task Results\n") or "")
+            for i, (key, value) in enumerate(task_results.items(), 1):
                 result_str = self._serialize_safely(
                     value,
                     max_size=self.config.max_task_result_size
                 )
-                parts.append(f"**{key}:**\n{result_str}\n\n")
-                current_size += len(result_str)
+                text = f"**{key}:**\n{result_str}\n\n"
+                entry = budget.add(text, truncation_suffix=self.config.truncation_suffix + "\n\n")
+                if entry is not None:
+                    parts.append(entry)
+                if entry != text:
+                    omitted = len(task_results) - i + (entry is None)
+                    if omitted:
+                        parts.append(f"... [{omitted} more results truncated]\n")
+                    break
         
         context = "".join(parts) if parts else "No context available."
         
@@ -223,7 +240,9 @@ class ContextAssembler:
             "context_assembled",
             plans_count=len(completed_plans) if completed_plans else 0,
             results_count=len(task_results) if task_results else 0,
-            context_size=len(context)
+            context_size=len(context),
+            context_tokens=budget.used,
+            tokenizer=self.token_counter.encoding_name
         )
         
         return context
@@ -507,40 +526,54 @@ class StreamingResponseHandler:
         """
         metrics = StreamMetrics()
         start_time = asyncio.get_event_loop().time()
+        timer = LLMStreamTimer("answer", model)
         
         try:
-            async for token in self.llm_client.stream(
+            # aclosing: closing this stream (client disconnect) closes the
+            # provider stream now rather than whenever it is collected
+            async with aclosing(self.llm_client.stream(
                 prompt=prompt,
                 system_prompt=system_prompt,
                 model=model,
                 **kwargs
-            ):
-                # Validate token
-                if not isinstance(token, str):
-                    self.logger.warning("invalid_token_type", token_type=type(token))
-                    continue
-                
-                # Filter and sanitize
-                sanitized_token = self._sanitize_token(token)
-                if sanitized_token:
-                    metrics.tokens_streamed += len(sanitized_token)
-                    metrics.chunks_yielded += 1
-                    yield sanitized_token
+            )) as tokens:
+                async for token in tokens:
+                    # Validate token
+                    if not isinstance(token, str):
+                        self.logger.warning("invalid_token_type", token_type=type(token))
+                        continue
+                    
+                    # Filter and sanitize
+                    sanitized_token = self._sanitize_token(token)
+                    if sanitized_token:
+                        timer.on_token()
+                        metrics.tokens_streamed += len(sanitized_token)
+                        metrics.chunks_yielded += 1
+                        yield sanitized_token
             
             # Record success metrics
             metrics.duration_ms = (asyncio.get_event_loop().time() - start_time) * 1000
+            if timer.first_token_s is not None:
+                metrics.first_token_ms = timer.first_token_s * 1000
             self.logger.info("streaming_complete", metrics=metrics.__dict__)
             
         except asyncio.CancelledError:
             self.logger.info("streaming_cancelled")
             raise
             
+        except CassetteMissError:
+            # A replay miss must fail the run, not become the answer text
+            raise
+            
         except Exception as e:
             metrics.errors_encountered += 1
             self.logger.error("streaming_error", error=str(e), metrics=metrics.__dict__)
             
             # Yield error message to user
             yield f"\n\n[Error: Response generation failed - {str(e)}]"
+
+        finally:
+            timer.finish()
     
     def _sanitize_token(self, token: str) -> str:
         """
@@ -654,12 +687,15 @@ class AnswerPhase:
         # Initialize components
         self.logger = structlog.get_logger(__name__)
         self.path_extractor = FilePathExtractor(self.logger)
-        self.context_assembler = ContextAssembler(self.config, self.logger)
+        self.token_counter = get_token_counter(model)
+        self.context_assembler = ContextAssembler(self.config, self.logger, self.token_counter)
         self.file_analyzer = AsyncFileAnalyzer(file_analyzer, self.config, self.logger)
         self.injection_protector = PromptInjectionProtector(self.logger)
         self.prompt_builder = SystemPromptBuilder(self.logger)
         self.stream_handler = StreamingResponseHandler(llm_client, self.logger)
         self.validator = InputValidator(self.logger)
+        # Static for the phase's lifetime, so the prompt prefix stays cacheable
+        self.system_prompt = self.prompt_builder.build(self.tools)
     
     async def run(
         self,
@@ -712,10 +748,11 @@ class AnswerPhase:
                 conversation_context = message_history.format_for_planning()
                 
                 # Truncate if too large
-                max_size = self.config.max_conversation_history_tokens * 4
-                if len(conversation_context) > max_size:
-                    conversation_context = conversation_context[:max_size] + \
-                                          self.config.truncation_suffix
+                conversation_context = self.token_counter.truncate(
+                    conversation_context,
+                    self.config.max_conversation_history_tokens,
+                    self.config.truncation_suffix
+                )
             
             # 4. Analyze files if enabled
             file_analyses_text = ""
@@ -730,23 +767,25 @@ class AnswerPhase:
             prompt = self._build_final_prompt(
                 sanitized_query,
                 research_context,
-                conversation_context,
                 file_analyses_text
             )
             
-            # 6. Build system prompt
-            system_prompt = self.prompt_builder.build(self.tools)
-            
-            # 7. Stream response with error handling
+            # 6. Stream response with error handling; the conversation
+            # history goes between the system prompt and the prompt, with a
+            # cache breakpoint (model/prompt_layout.py)
             async for token in self.stream_handler.stream_with_recovery(
                 prompt=prompt,
-                system_prompt=system_prompt,
-                model=self.model
+                system_prompt=self.system_prompt,
+                model=self.model,
+                context=conversation_context
             ):
                 yield token
             
             self.logger.info("answer_phase_complete")
             
+        except CassetteMissError:
+            raise
+            
         except Exception as e:
             self.logger.error("answer_phase_failed", error=str(e), query_length=len(query))
             yield f"\n\n[Error: Failed to generate answer - {str(e)}]"
@@ -755,28 +794,22 @@ class AnswerPhase:
         self,
         query: str,
         research_context: str,
-        conversation_context: str,
         file_analyses: str
     ) -> str:
         """
-        Build final prompt with all components.
+        Build the per-call part of the prompt (conversation history is sent
+        separately as the layout's context).
         
         Args:
             query: Sanitized user query
             research_context: Context from research
-            conversation_context: Conversation history
             file_analyses: File analysis results
             
         Returns:
-            Complete prompt string
+            Prompt string
         """
         parts = []
         
-        # Add conversation history first (earliest context)
-        if conversation_context:
-            parts.append(conversation_context)
-            parts.append("\n---\n")
-        
         # Add research context
         if research_context:
             parts.append("## Research Context\n")
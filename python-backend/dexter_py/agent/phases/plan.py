@@ -1,9 +1,11 @@
-from typing import Optional, Any, List, AsyncGenerator
+from typing import Optional, Any, Callable, List, AsyncGenerator
+from contextlib import aclosing
+from ...model.cassette import CassetteMissError
 from ...model.llm import call_llm_stream
+from ...utils.json_stream import StreamingJSONParser
 from .. import schemas
 from ..schemas import Plan, PlanTask
 import json
-import re
 
 
 class PlanPhase:
@@ -12,6 +14,7 @@ class PlanPhase:
 
     Features:
     - Yields partial plan text as tokens
+    - Hands each task to ``on_task`` as soon as it is streamed
     - Returns final Plan object
     - Handles errors and fallbacks
     - Generates unique task IDs per iteration
@@ -29,50 +32,52 @@ class PlanPhase:
         prior_results: Optional[dict] = None,
         guidance_from_reflection: Optional[str] = None,
         conversation_history: Optional[Any] = None,
+        on_task: Optional[Callable[[PlanTask], Any]] = None,
     ) -> Plan:
         """
-        Generate a final Plan object by collecting streamed LLM tokens.
+        Generate a final Plan object by parsing streamed LLM tokens as they arrive.
+
+        Args:
+            on_task: Called with each task (final ID included) as soon as its
+                JSON object closes in the stream, before the plan is complete
         """
-        # Collect tokens into buffer
-        collected_output = ""
-        async for token in self.stream(
+        # Unique plan and task IDs per iteration
+        iteration = len(prior_plans) + 1 if prior_plans else 1
+        plan_id = f"iter{iteration}"
+        id_prefix = f"{plan_id}_"
+
+        parser = StreamingJSONParser(items=("tasks",))
+        async with aclosing(self.stream(
             query=query,
             understanding=understanding,
             prior_plans=prior_plans,
             prior_results=prior_results,
             guidance_from_reflection=guidance_from_reflection,
             conversation_history=conversation_history,
-        ):
-            collected_output += token
+            complete=lambda: parser.complete,
+        )) as tokens:
+            async for token in tokens:
+                for item in parser.feed(token):
+                    if on_task is not None:
+                        self._emit_task(on_task, item.value, id_prefix)
+                if parser.complete:
+                    # Anything after the plan object is commentary
+                    break
 
-        # Attempt to extract JSON
         try:
-            json_text = self._extract_json(collected_output)
-            plan_obj = Plan.parse_raw(json_text)
+            raw_plan = parser.value()
+            raw_plan.setdefault("plan_id", plan_id)
+            plan_obj = Plan.model_validate(raw_plan)
         except Exception:
             # Fallback minimal plan
             plan_obj = Plan(
+                plan_id=plan_id,
                 summary="Fallback plan due to LLM or parsing error",
                 tasks=[PlanTask(id="task-1", description=f"Answer query: {query}")]
             )
 
-        # Generate unique task IDs
-        iteration = len(prior_plans) + 1 if prior_plans else 1
-        id_prefix = f"iter{iteration}_"
-        tasks: List[PlanTask] = []
-        for t in plan_obj.tasks:
-            tasks.append(
-                PlanTask(
-                    id=id_prefix + t.id,
-                    description=t.description,
-                    status=t.status,
-                    taskType=getattr(t, "taskType", None),
-                    toolCalls=getattr(t, "toolCalls", []),
-                    dependsOn=[id_prefix + d for d in getattr(t, "dependsOn", [])],
-                )
-            )
-
-        return Plan(summary=plan_obj.summary, tasks=tasks)
+        tasks = [self._with_prefix(t, id_prefix) for t in plan_obj.tasks]
+        return Plan(plan_id=plan_obj.plan_id, summary=plan_obj.summary, tasks=tasks)
 
     async def stream(
         self,
@@ -83,9 +88,13 @@ class PlanPhase:
         prior_results: Optional[dict] = None,
         guidance_from_reflection: Optional[str] = None,
         conversation_history: Optional[Any] = None,
+        complete: Optional[Callable[[], bool]] = None,
     ) -> AsyncGenerator[str, None]:
         """
         Streaming version: yields tokens from the LLM as they arrive.
+
+        ``complete`` reports when the caller has its result (see
+        ``call_llm_stream``).
         """
         # ----------------------------
         # Build conversation context
@@ -120,14 +129,16 @@ class PlanPhase:
         # ----------------------------
         try:
             from .. import prompts as _prompts
-            system_prompt = _prompts.get_plan_system_prompt()
+            # Static system prompt; date and conversation context travel
+            # separately so the prompt prefix stays cacheable
+            system_prompt = _prompts.get_plan_system_prompt(include_date=False)
             user_prompt = _prompts.build_plan_user_prompt(
                 query=query,
                 intent=getattr(understanding, "intent", ""),
                 entities=entities_str,
                 prior_work_summary=prior_work_summary,
                 guidance_from_reflection=guidance_from_reflection,
-                conversation_context=conversation_context,
+                current_date=_prompts.get_current_date(),
             )
         except Exception:
             system_prompt = "You are a financial research assistant."
@@ -137,8 +148,19 @@ class PlanPhase:
         # Stream LLM tokens
         # ----------------------------
         try:
-            async for token in call_llm_stream(prompt=user_prompt, model=self.model, system_prompt=system_prompt):
-                yield token
+            async with aclosing(call_llm_stream(
+                prompt=user_prompt,
+                model=self.model,
+                system_prompt=system_prompt,
+                context=f"Previous conversation context:\n{conversation_context.strip()}" if conversation_context else None,
+                phase="plan",
+                complete=complete,
+            )) as tokens:
+                async for token in tokens:
+                    yield token
+        except CassetteMissError:
+            # A replay miss must fail the run, not take the fallback path
+            raise
         except Exception:
             # Fallback: yield minimal JSON for plan
             fallback_plan = {
@@ -147,16 +169,32 @@ class PlanPhase:
             }
             yield json.dumps(fallback_plan)
 
-    def _extract_json(self, text: str) -> str:
+    def _with_prefix(self, t: PlanTask, id_prefix: str) -> PlanTask:
         """
-        Extract the first JSON object from streamed LLM output.
+        Copy a task with its own and its dependencies' IDs prefixed.
         """
-        json_pattern = re.compile(r"\{.*\}", re.DOTALL)
-        match = json_pattern.search(text)
-        if match:
-            return match.group(0)
-        # Fallback minimal JSON
-        return json.dumps({"summary": "Fallback plan", "tasks": [{"id": "task-1", "description": "Answer query"}]})
+        return PlanTask(
+            id=id_prefix + t.id,
+            description=t.description,
+            status=t.status,
+            taskType=getattr(t, "taskType", None),
+            toolCalls=getattr(t, "toolCalls", []),
+            dependsOn=[id_prefix + d for d in getattr(t, "dependsOn", [])],
+        )
+
+    def _emit_task(self, on_task: Callable[[PlanTask], Any], raw: Any, id_prefix: str) -> None:
+        """
+        Hand a streamed task to ``on_task``; malformed tasks wait for the full plan.
+        """
+        try:
+            task = PlanTask.model_validate(raw)
+        except Exception:
+            return
+        try:
+            on_task(self._with_prefix(task, id_prefix))
+        except Exception:
+            # Callback failures must not break planning
+            pass
 
     def _format_prior_work(self, plans: List[Plan], task_results: Optional[dict]) -> str:
         """
@@ -1,8 +1,10 @@
 import json
-from typing import Any, Dict, List, Optional, AsyncGenerator
+from contextlib import aclosing
+from typing import Any, Callable, Dict, List, Optional, AsyncGenerator
+from ...model.cassette import CassetteMissError
 from ...model.llm import call_llm_stream
+from ...utils.json_stream import StreamingJSONParser
 from ..schemas import Plan, PlanTask
-import re
 
 
 class ReflectPhase:
@@ -29,20 +31,24 @@ class ReflectPhase:
         Returns:
             Dict with keys: is_complete, reasoning, missing_info, suggested_next_steps
         """
-        collected_output = ""
-        async for token in self.stream(
+        parser = StreamingJSONParser()
+        async with aclosing(self.stream(
             query=query,
             understanding=understanding,
             completed_plans=completed_plans,
             task_results=task_results,
-            iteration=iteration
-        ):
-            collected_output += token
+            iteration=iteration,
+            complete=lambda: parser.complete,
+        )) as tokens:
+            async for token in tokens:
+                parser.feed(token)
+                if parser.complete:
+                    # Anything after the reflection object is commentary
+                    break
 
-        # Attempt to parse JSON from streamed output
+        # Parse the reflection object from the streamed output
         try:
-            json_text = self._extract_json(collected_output)
-            reflection_dict = json.loads(json_text)
+            reflection_dict = parser.value() if parser.started else self._no_json_reflection()
         except Exception:
             # Fallback heuristic reflection
             missing_tasks = self._identify_missing_tasks(completed_plans, task_results)
@@ -68,9 +74,13 @@ class ReflectPhase:
         completed_plans: List[Plan],
         task_results: Dict[str, Any],
         iteration: int,
+        complete: Optional[Callable[[], bool]] = None,
     ) -> AsyncGenerator[str, None]:
         """
         Streaming generator: yields tokens from the LLM as they arrive.
+
+        ``complete`` reports when the caller has its result (see
+        ``call_llm_stream``).
         """
         # Stop if max iterations reached
         if iteration >= self.max_iterations:
@@ -105,8 +115,14 @@ class ReflectPhase:
         )
 
         try:
-            async for token in call_llm_stream(prompt=user_prompt, model=self.model, system_prompt=system_prompt):
-                yield token
+            async with aclosing(call_llm_stream(
+                prompt=user_prompt, model=self.model, system_prompt=system_prompt, phase="reflect", complete=complete,
+            )) as tokens:
+                async for token in tokens:
+                    yield token
+        except CassetteMissError:
+            # A replay miss must fail the run, not take the fallback path
+            raise
         except Exception:
             # Fallback minimal JSON
             missing_tasks = self._identify_missing_tasks(completed_plans, task_results)
@@ -123,21 +139,16 @@ class ReflectPhase:
     def build_planning_guidance(self, reflection: Dict[str, Any]) -> Optional[str]:
         return reflection.get("suggested_next_steps")
 
-    def _extract_json(self, text: str) -> str:
+    def _no_json_reflection(self) -> Dict[str, Any]:
         """
-        Extract the first JSON object from streamed text.
+        Reflection used when the streamed text contains no JSON object.
         """
-        pattern = re.compile(r"\{.*\}", re.DOTALL)
-        match = pattern.search(text)
-        if match:
-            return match.group(0)
-        # fallback minimal JSON
-        return json.dumps({
+        return {
             "isComplete": False,
             "reasoning": "No JSON extracted",
             "missingInfo": [],
             "suggestedNextSteps": None
-        })
+        }
 
     def _identify_missing_tasks(self, completed_plans: List[Plan], task_results: Dict[str, Any]) -> List[str]:
         missing_tasks = []
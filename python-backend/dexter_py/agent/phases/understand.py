@@ -1,9 +1,12 @@
 import asyncio
 import json
 import logging
-from typing import Optional, Any, AsyncGenerator
+from contextlib import aclosing
+from typing import Optional, Any, AsyncGenerator, Callable
 
+from ...model.cassette import CassetteMissError
 from ...model.llm import call_llm_stream
+from ...utils.json_stream import StreamingJSONParser
 from ..schemas import Understanding
 
 logger = logging.getLogger(__name__)
@@ -12,7 +15,7 @@ logger = logging.getLogger(__name__)
 class UnderstandPhase:
     """
     Production-grade Understanding Phase with:
-      - brace-aware JSON extraction
+      - incremental brace-aware JSON parsing (stops reading once the object closes)
       - timeout on LLM streaming
       - strict JSON-only prompting
       - structured logging
@@ -37,7 +40,7 @@ class UnderstandPhase:
         """
 
         try:
-            collected = await self._collect_stream_output(
+            json_text = await self._collect_json(
                 query=query,
                 conversation_history=conversation_history
             )
@@ -46,7 +49,6 @@ class UnderstandPhase:
             return Understanding(intent=query, entities=[])
 
         try:
-            json_text = self._extract_balanced_json(collected)
             if not json_text:
                 raise ValueError("No balanced JSON found in output")
 
@@ -62,26 +64,37 @@ class UnderstandPhase:
         self,
         *,
         query: str,
-        conversation_history: Optional[Any] = None
+        conversation_history: Optional[Any] = None,
+        complete: Optional[Callable[[], bool]] = None,
     ) -> AsyncGenerator[str, None]:
         """
         Stream LLM output token-by-token with timeout guard.
+
+        ``complete`` reports when the caller has its result (see
+        ``call_llm_stream``).
         """
 
-        system_prompt, user_prompt = self._build_prompts(query, conversation_history)
+        system_prompt, user_prompt, context = self._build_prompts(query, conversation_history)
 
         try:
             async with asyncio.timeout(self.STREAM_TIMEOUT):
-                async for token in call_llm_stream(
+                async with aclosing(call_llm_stream(
                     prompt=user_prompt,
                     model=self.model,
-                    system_prompt=system_prompt
-                ):
-                    yield token
+                    system_prompt=system_prompt,
+                    context=context,
+                    phase="understand",
+                    complete=complete,
+                )) as tokens:
+                    async for token in tokens:
+                        yield token
         except asyncio.TimeoutError:
             logger.warning("LLM streaming timed out")
             # Output minimal JSON token stream so run() has something
             yield '{"intent": "%s", "entities": []}' % query.replace('"', "'")
+        except CassetteMissError:
+            # A replay miss must fail the run, not take the fallback path
+            raise
         except Exception as exc:
             logger.error("Error during LLM streaming: %s", exc)
             yield '{"intent": "%s", "entities": []}' % query.replace('"', "'")
@@ -90,27 +103,39 @@ class UnderstandPhase:
     # Internal helpers
     # -------------------------
 
-    async def _collect_stream_output(
+    async def _collect_json(
         self,
         *,
         query: str,
         conversation_history: Optional[Any]
-    ) -> str:
+    ) -> Optional[str]:
         """
-        Collect streamed tokens into a single string buffer.
+        Feed streamed tokens to an incremental parser and return the first
+        balanced JSON object, closing the stream as soon as it is complete.
         """
-        buffer = []
-
-        async for token in self.stream(query=query, conversation_history=conversation_history):
-            # Only append text (ignore None or binary chunks)
-            if isinstance(token, str):
-                buffer.append(token)
-
-        return "".join(buffer)
+        parser = StreamingJSONParser()
+
+        async with aclosing(self.stream(
+            query=query,
+            conversation_history=conversation_history,
+            complete=lambda: parser.complete,
+        )) as tokens:
+            async for token in tokens:
+                # Only scan text (ignore None or binary chunks)
+                if isinstance(token, str):
+                    parser.feed(token)
+                    if parser.complete:
+                        break
+
+        if not parser.complete or len(parser.text) < self.MIN_VALID_JSON_LENGTH:
+            return None
+        return parser.text
 
     def _build_prompts(self, query: str, conversation_history: Optional[Any]):
         """
-        Build system + user prompts with robust fallback.
+        Build system prompt, user prompt and conversation context with robust
+        fallback. The context is sent ahead of the query (see
+        ``call_llm_stream(context=...)``) so the prompt prefix stays cacheable.
         """
 
         context_block = ""
@@ -135,50 +160,8 @@ Output only JSON.
 
 Query: "{query}"
 
-Context:
-{context_block}
-
 Respond strictly with JSON.
 """.strip()
 
-        return system_prompt, user_prompt
-
-    def _extract_balanced_json(self, text: str) -> Optional[str]:
-        """
-        Extract the first balanced JSON object from stream output using brace counting.
-        More reliable than regex for incremental or noisy LLM output.
-        """
-
-        start = text.find("{")
-        if start == -1:
-            return None
-
-        brace_count = 0
-        in_string = False
-        escape = False
-
-        for i in range(start, len(text)):
-            char = text[i]
-
-            if in_string:
-                if escape:
-                    escape = False
-                elif char == "\\":
-                    escape = True
-                elif char == '"':
-                    in_string = False
-            else:
-                if char == '"':
-                    in_string = True
-                elif char == "{":
-                    brace_count += 1
-                elif char == "}":
-                    brace_count -= 1
-                    if brace_count == 0:
-                        candidate = text[start : i + 1]
-                        if len(candidate) >= self.MIN_VALID_JSON_LENGTH:
-                            return candidate
-                        else:
-                            return None
-
-        return None
+        context = f"Context:\n{context_block}" if context_block else None
+        return system_prompt, user_prompt, context
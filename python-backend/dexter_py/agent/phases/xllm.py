@@ -20,7 +20,11 @@ from tenacity import (
     retry_if_exception_type
 )
 from pydantic import BaseModel, ValidationError
-from ..utils._utils import get_llm_config, get_llm_client
+from ...utils._utils import get_llm_config, get_llm_client, LLMCircuitOpenError
+from ...model.cassette import CassetteMissError, cassette_key, get_cassette
+from ...model.circuit_breaker import get_circuit_breakers
+from ...model.prompt_layout import assemble_prompt, supports_cache_control
+from ...utils.admission import AdmissionRejected, get_admission_controller
 
 
 # ============================================================================
@@ -110,11 +114,17 @@ class ProductionLLMClient:
             self.config = config
         self.logger = logger or structlog.get_logger(__name__)
         
-        # Initialize API client (example using Anthropic)
+        # Initialize API client (example using Anthropic) on the shared
+        # provider connection pool
         try:
             from anthropic import AsyncAnthropic
-            self.client = AsyncAnthropic(api_key=api_key)
+            from ...utils.http_pool import pooled_async_client
+            self.client = AsyncAnthropic(api_key=api_key, http_client=pooled_async_client())
         except ImportError:
+            if get_cassette().replaying:
+                # Replayed streams never reach the provider
+                self.client = None
+                return
             self.logger.error("anthropic_not_installed")
             raise ImportError("anthropic package required: pip install anthropic")
     
@@ -166,18 +176,21 @@ class ProductionLLMClient:
             # Build messages
             messages = [{"role": "user", "content": prompt}]
             
-            # Make API call with timeout
-            response = await asyncio.wait_for(
-                self.client.messages.create(
-                    model=model,
-                    max_tokens=max_tokens,
-                    temperature=temperature,
-                    system=system_prompt or "",
-                    messages=messages,
-                    **kwargs
-                ),
-                timeout=self.config.api_timeout
-            )
+            # Make API call with timeout; each attempt takes an llm_calls
+            # slot, counts on the model's circuit breaker and fails fast
+            # while it is open
+            async with get_admission_controller().llm_calls.slot(), get_circuit_breakers().guard(model):
+                response = await asyncio.wait_for(
+                    self.client.messages.create(
+                        model=model,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        system=system_prompt or "",
+                        messages=messages,
+                        **kwargs
+                    ),
+                    timeout=self.config.api_timeout
+                )
             
             # Extract text from response
             text = self._extract_text(response)
@@ -192,6 +205,9 @@ class ProductionLLMClient:
             self.logger.error("llm_request_timeout", model=model)
             raise LLMTimeoutError(f"Request timeout after {self.config.api_timeout}s")
             
+        except (LLMCircuitOpenError, AdmissionRejected):
+            raise
+            
         except Exception as e:
             error_type = type(e).__name__
             self.logger.error("llm_request_failed", error=str(e), error_type=error_type)
@@ -207,6 +223,7 @@ class ProductionLLMClient:
         prompt: str,
         system_prompt: Optional[str] = None,
         model: Optional[str] = None,
+        context: Optional[str] = None,
         **kwargs
     ) -> AsyncGenerator[str, None]:
         """
@@ -216,6 +233,8 @@ class ProductionLLMClient:
             prompt: User prompt
             system_prompt: Optional system prompt
             model: Optional model override
+            context: Optional conversation history, sent before ``prompt``
+                behind a cache breakpoint (model/prompt_layout.py)
             **kwargs: Additional API parameters
             
         Yields:
@@ -225,15 +244,50 @@ class ProductionLLMClient:
         
         self.logger.info("llm_stream_start", model=model, prompt_length=len(prompt))
         
+        def provider() -> AsyncGenerator[str, None]:
+            # Anthropic-only client: the breaker fails fast, there is no fallback chain
+            return get_circuit_breakers().stream(
+                model, lambda target: self._stream_provider(prompt, system_prompt, target, context=context, **kwargs), fallback=False,
+            )
+
+        cassette = get_cassette()
         try:
-            messages = [{"role": "user", "content": prompt}]
+            if cassette.active:
+                key = cassette_key(
+                    model, system_prompt or "", prompt, self.config.max_tokens, self.config.temperature,
+                    json.dumps(dict(kwargs, context=context) if context else kwargs, sort_keys=True, default=repr),
+                )
+                async for text in cassette.stream(key, "ProductionLLMClient.stream", model, provider):
+                    yield text
+            else:
+                async for text in provider():
+                    yield text
+            
+        except (CassetteMissError, AdmissionRejected):
+            raise
             
+        except Exception as e:
+            self.logger.error("llm_stream_failed", error=str(e))
+            raise LLMError(f"Streaming failed: {str(e)}")
+    
+    async def _stream_provider(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        model: str,
+        context: Optional[str] = None,
+        **kwargs
+    ) -> AsyncGenerator[str, None]:
+        """Stream tokens from the Anthropic API (see ``stream``)."""
+        layout = assemble_prompt(system_prompt or "", prompt, context=context)
+        
+        # The llm_calls slot is held for the lifetime of the stream
+        async with get_admission_controller().llm_calls.slot():
             async with self.client.messages.stream(
                 model=model,
                 max_tokens=self.config.max_tokens,
                 temperature=self.config.temperature,
-                system=system_prompt or "",
-                messages=messages,
+                **layout.anthropic_request(cache=supports_cache_control(self.client)),
                 **kwargs
             ) as stream:
                 async for text in stream.text_stream:
@@ -242,10 +296,6 @@ class ProductionLLMClient:
             # Log final metrics
             final_message = await stream.get_final_message()
             self._log_usage(final_message, 0)
-            
-        except Exception as e:
-            self.logger.error("llm_stream_failed", error=str(e))
-            raise LLMError(f"Streaming failed: {str(e)}")
     
     async def complete_structured(
         self,
@@ -1,5 +1,6 @@
 from __future__ import annotations
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional
 
 
@@ -7,8 +8,13 @@ def get_current_date() -> str:
     """
     Returns the current date as a human-readable string in UTC.
     Format: Weekday, Month Day, Year (e.g., Tuesday, January 6, 2026)
+
+    While an LLM cassette is active this is the date it was recorded on, so
+    replayed prompts hash the same as recorded ones.
     """
-    now = datetime.now(timezone.utc)
+    from ..model.cassette import get_cassette
+
+    now = get_cassette().date or datetime.now(timezone.utc)
     return now.strftime('%A, %B %d, %Y')
 
 
@@ -21,12 +27,17 @@ DEFAULT_SYSTEM_PROMPT = (
 )
 
 
-UNDERSTAND_SYSTEM_PROMPT_TEMPLATE = (
+# System prompts are kept free of per-call content (the date included) so
+# their bytes never change and provider prompt caches can serve them; the date
+# is appended at the end, or sent with the user prompt (``current_date=``).
+CURRENT_DATE_SUFFIX = "\nCurrent date: {current_date}\n"
+
+
+UNDERSTAND_SYSTEM_PROMPT = (
     "You are the understanding component for Dexter, a financial research agent.\n\n"
     "Your job is to analyze the user's query and extract:\n"
     "1. The user's intent — what they want to accomplish\n"
     "2. Key entities — tickers, companies, dates, metrics, time periods\n\n"
-    "Current date: {current_date}\n\n"
     "Guidelines:\n"
     "- Be precise about what the user is asking for\n"
     "- Identify ALL relevant entities (companies, tickers, dates, metrics)\n"
@@ -38,23 +49,35 @@ UNDERSTAND_SYSTEM_PROMPT_TEMPLATE = (
     "  entities: Array of extracted entities with type and value\n"
 )
 
+UNDERSTAND_SYSTEM_PROMPT_TEMPLATE = UNDERSTAND_SYSTEM_PROMPT + CURRENT_DATE_SUFFIX
+
+
+@lru_cache(maxsize=16)
+def _render_system_prompt(template: str, current_date: str) -> str:
+    """Format a system prompt template; memoized per (template, date)."""
+    return template.format(current_date=current_date)
 
-def get_understand_system_prompt(date_override: Optional[str] = None) -> str:
+
+def get_understand_system_prompt(date_override: Optional[str] = None, include_date: bool = True) -> str:
     """
     Builds the understanding system prompt with a safe date substitution.
     Allows an optional date override for testing or reproducibility.
+    With ``include_date=False`` the static, cache-friendly prompt is returned.
     """
+    if not include_date:
+        return UNDERSTAND_SYSTEM_PROMPT
     date_value = date_override or get_current_date()
-    return UNDERSTAND_SYSTEM_PROMPT_TEMPLATE.format(current_date=date_value)
+    return _render_system_prompt(UNDERSTAND_SYSTEM_PROMPT_TEMPLATE, date_value)
 
 
 def build_understand_user_prompt(
     query: str,
-    conversation_context: Optional[str] = None
+    conversation_context: Optional[str] = None,
+    current_date: Optional[str] = None
 ) -> str:
     """
     Builds the user prompt for the understanding module.
-    Includes previous conversation context when provided.
+    Includes previous conversation context and the current date when provided.
     """
     if not query or not isinstance(query, str):
         raise ValueError("Query must be a non-empty string.")
@@ -67,17 +90,19 @@ def build_understand_user_prompt(
             f"{conversation_context.strip()}\n\n---\n"
         )
 
+    if current_date:
+        sections.append(f"Current date: {current_date}\n")
+
     sections.append(f"User query: \"{query.strip()}\"\n")
     sections.append("Extract the intent and entities from this query.")
 
     return "\n".join(sections)
 
 
-PLAN_SYSTEM_PROMPT_TEMPLATE = (
+PLAN_SYSTEM_PROMPT = (
     "You are the planning component for Dexter, a financial research agent.\n\n"
     "Your job is to create a structured plan for answering the user's query.\n"
     "Break down the query into specific, actionable research tasks.\n\n"
-    "Current date: {current_date}\n\n"
     "Guidelines:\n"
     "- Create specific, actionable tasks that can be executed\n"
     "- Identify data sources and tools needed (APIs, databases, etc.)\n"
@@ -89,14 +114,19 @@ PLAN_SYSTEM_PROMPT_TEMPLATE = (
     "  tasks: Array of tasks with id, description, taskType, toolCalls, dependsOn\n"
 )
 
+PLAN_SYSTEM_PROMPT_TEMPLATE = PLAN_SYSTEM_PROMPT + CURRENT_DATE_SUFFIX
+
 
-def get_plan_system_prompt(date_override: Optional[str] = None) -> str:
+def get_plan_system_prompt(date_override: Optional[str] = None, include_date: bool = True) -> str:
     """
     Builds the planning system prompt with a safe date substitution.
     Allows an optional date override for testing or reproducibility.
+    With ``include_date=False`` the static, cache-friendly prompt is returned.
     """
+    if not include_date:
+        return PLAN_SYSTEM_PROMPT
     date_value = date_override or get_current_date()
-    return PLAN_SYSTEM_PROMPT_TEMPLATE.format(current_date=date_value)
+    return _render_system_prompt(PLAN_SYSTEM_PROMPT_TEMPLATE, date_value)
 
 
 def build_plan_user_prompt(
@@ -105,11 +135,13 @@ def build_plan_user_prompt(
     entities: str,
     prior_work_summary: Optional[str] = None,
     guidance_from_reflection: Optional[str] = None,
-    conversation_context: Optional[str] = None
+    conversation_context: Optional[str] = None,
+    current_date: Optional[str] = None
 ) -> str:
     """
     Builds the user prompt for the planning module.
-    Includes conversation context, prior work, and reflection guidance.
+    Includes conversation context, the current date, prior work, and
+    reflection guidance.
     """
     sections = []
 
@@ -119,6 +151,9 @@ def build_plan_user_prompt(
             f"{conversation_context.strip()}\n\n"
         )
 
+    if current_date:
+        sections.append(f"Current date: {current_date}\n")
+
     sections.append(f"User Query: {query}\n")
     sections.append(f"Intent: {intent}\n")
     sections.append(f"Key Entities: {entities}\n")
@@ -136,3 +171,8 @@ def build_plan_user_prompt(
 
     return "\n".join(sections)
 
+
+def prime_prompt_cache() -> None:
+    """Render today's system prompts so the first request finds them cached."""
+    get_understand_system_prompt()
+    get_plan_system_prompt()
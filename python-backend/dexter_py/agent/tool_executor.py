@@ -1,5 +1,7 @@
 from typing import Any, List, Optional, Dict, Callable, Awaitable
 
+from ..utils import tracing
+
 
 class ToolExecutor:
     def __init__(self, *, tools: List[Any], context_manager: Any) -> None:
@@ -26,6 +28,15 @@ class ToolExecutor:
         return registry
 
     async def execute_tool(self, tool_name: str, args: Optional[dict]) -> dict:
+        """Executes a tool by name (see ``_execute_tool``), recording a trace span."""
+        with tracing.span("tool.execute", tool=tool_name) as tool_span:
+            outcome = await self._execute_tool(tool_name, args)
+            if outcome.get("failed"):
+                tool_span.set_attribute("failed", True)
+                tool_span.set_attribute("error", outcome.get("error"))
+            return outcome
+
+    async def _execute_tool(self, tool_name: str, args: Optional[dict]) -> dict:
         """
         Executes a tool by name, if found.
 
@@ -1,14 +1,25 @@
 """Tool for reading and analyzing files."""
 
-from typing import Optional, Dict, Any, List
+from __future__ import annotations
+
+from typing import Optional, Dict, Any, List, TYPE_CHECKING
+import importlib.util
 import os
 import json
 import re
-try:
+
+from .utils.providers import optional_import
+
+if TYPE_CHECKING:
     import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
+
+# pandas is imported on first table analysis, not when the tool module loads
+PANDAS_AVAILABLE = importlib.util.find_spec("pandas") is not None
+
+
+def _pandas():
+    """Return the pandas module (imported once, on first use)."""
+    return optional_import("pandas")
 
 
 class FileReaderTool:
@@ -102,6 +113,7 @@ class FileReaderTool:
             return {"error": "pandas not available for CSV analysis"}
         
         try:
+            pd = _pandas()
             df = pd.read_csv(file_path)
             result = {
                 "file_type": "csv",
@@ -155,6 +167,7 @@ class FileReaderTool:
                 # Try to parse as CSV-like
                 try:
                     from io import StringIO
+                    pd = _pandas()
                     df = pd.read_csv(StringIO(content), sep=None, engine='python')
                     result["parsed_as_table"] = True
                     result["table_shape"] = {"rows": int(df.shape[0]), "columns": int(df.shape[1])}
@@ -237,6 +250,7 @@ class FileReaderTool:
 
     def _analyze_timeseries(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Basic time series analysis."""
+        pd = _pandas()
         analysis = {}
         
         # Try to detect date columns
@@ -0,0 +1,176 @@
+"""Content-addressed LLM response cache.
+
+Responses are stored under ``llm_request_key()`` (model, system prompt, prompt,
+temperature, max_tokens). The in-memory tier is an LRU with a per-entry TTL; an
+optional on-disk tier (one JSON file per key) survives restarts and is shared by
+workers on the same host. Streamed responses are cached as their full text and
+replayed by ``replay_chunks()`` in small pieces, so SSE clients see the usual
+token frames on a cache hit.
+
+Configure with LLM_CACHE_ENABLED, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SECONDS,
+LLM_CACHE_DIR and LLM_CACHE_REPLAY_CHUNK_CHARS.
+"""
+
+from typing import AsyncIterator, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+import asyncio
+import json
+import os
+import time
+
+import structlog
+
+from ..utils.metrics import LLM_CACHE_REQUESTS
+
+
+@dataclass
+class ResponseCacheConfig:
+    """Configuration for the LLM response cache."""
+    enabled: bool = True
+    max_entries: int = 512  # In-memory LRU capacity
+    ttl_seconds: float = 3600  # Entry lifetime (0 disables expiry)
+    disk_path: Optional[str] = None  # Directory for the on-disk tier
+    replay_chunk_chars: int = 16  # Characters per replayed stream chunk
+
+    @classmethod
+    def from_env(cls) -> "ResponseCacheConfig":
+        """Build config from LLM_CACHE_* environment variables."""
+        return cls(
+            enabled=os.getenv("LLM_CACHE_ENABLED", "1").lower() not in ("0", "false", "no"),
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512")),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600")),
+            disk_path=os.getenv("LLM_CACHE_DIR") or None,
+            replay_chunk_chars=int(os.getenv("LLM_CACHE_REPLAY_CHUNK_CHARS", "16")),
+        )
+
+
+class DiskCacheBackend:
+    """One JSON file per key under a directory; writes are atomic renames."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data["text"], float(data["expires_at"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(self, key: str, text: str, expires_at: float) -> None:
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"text": text, "expires_at": expires_at}, f)
+        os.replace(tmp, path)
+
+    def delete(self, key: str) -> None:
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of LLM response texts with an optional disk tier.
+
+    Args:
+        config: Cache configuration (defaults to ResponseCacheConfig.from_env())
+    """
+
+    def __init__(self, config: Optional[ResponseCacheConfig] = None) -> None:
+        self.config = config or ResponseCacheConfig.from_env()
+        self.logger = structlog.get_logger(__name__)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._disk = DiskCacheBackend(self.config.disk_path) if self.config.disk_path else None
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled
+
+    def _expiry(self, now: float) -> float:
+        return now + self.config.ttl_seconds if self.config.ttl_seconds > 0 else float("inf")
+
+    def _remember(self, key: str, text: str, expires_at: float) -> None:
+        self._entries[key] = (text, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.config.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str, kind: str = "call") -> Optional[str]:
+        """Return the cached text for ``key`` or None; ``kind`` labels metrics."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            text, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                LLM_CACHE_REQUESTS.labels(kind, "hit").inc()
+                return text
+            del self._entries[key]
+
+        if self._disk is not None:
+            found = await asyncio.to_thread(self._disk.get, key)
+            if found is not None and found[1] > now:
+                self._remember(key, found[0], found[1])
+                LLM_CACHE_REQUESTS.labels(kind, "hit").inc()
+                return found[0]
+
+        LLM_CACHE_REQUESTS.labels(kind, "miss").inc()
+        return None
+
+    async def set(self, key: str, text: str) -> None:
+        """Store a response text under ``key``."""
+        expires_at = self._expiry(time.time())
+        self._remember(key, text, expires_at)
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk.set, key, text, expires_at)
+            except OSError as e:
+                self.logger.warning("llm_cache_disk_write_failed", error=str(e))
+
+    def invalidate(self, key: str) -> None:
+        """Drop ``key`` from both tiers."""
+        self._entries.pop(key, None)
+        if self._disk is not None:
+            self._disk.delete(key)
+
+    def clear(self) -> None:
+        """Drop all in-memory entries (the disk tier is left alone)."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def replay_chunks(self, text: str) -> AsyncIterator[str]:
+        """Yield cached text in stream-sized chunks, yielding to the loop between them."""
+        size = max(1, self.config.replay_chunk_chars)
+        for start in range(0, len(text), size):
+            yield text[start:start + size]
+            await asyncio.sleep(0)
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide LLM response cache."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+
+def configure_response_cache(config: ResponseCacheConfig) -> ResponseCache:
+    """Replace the process-wide cache (e.g. in tests or at startup)."""
+    global _response_cache
+    _response_cache = ResponseCache(config)
+    return _response_cache
@@ -0,0 +1,257 @@
+"""Record/replay of LLM exchanges ("cassettes") for benchmarks and tests.
+
+In ``record`` mode every ``call_llm``/``call_llm_stream`` exchange, every
+answer-phase ``ProductionLLMClient.complete``/``stream`` exchange
+(``utils._utils``) and every ``agent.phases.xllm.ProductionLLMClient.stream``
+exchange that reaches the provider is appended to a cassette file (JSON
+lines): the request hash, the response chunks and the delay before each
+chunk (time to first token, then inter-token gaps). In ``replay`` mode the
+same requests are served from the cassette with no provider (and no
+network), with the recorded timing multiplied by ``timing_scale``: 1
+replays the original pacing, 0.1 runs ten times faster, and 0 means no
+delays at all. That makes end-to-end ``/agent/query`` runs
+deterministic and realistic enough to benchmark in CI.
+
+A request that is not on the cassette raises ``CassetteMissError`` in replay
+mode, so prompt drift shows up as a failure instead of a silent live call.
+Repeated identical requests are replayed in recorded order; the last recording
+is reused once they are exhausted. The response cache is bypassed while a
+cassette is active so every exchange is recorded and replayed.
+
+Prompts carry today's date (``agent.prompts.get_current_date``), which would
+change every request hash the day after recording. While a cassette is
+active that date is pinned: recordings store the UTC date they were made on
+and replay reuses it (or LLM_CASSETTE_DATE, ``YYYY-MM-DD``, when set).
+
+Configure with LLM_CASSETTE_MODE (``off``, ``record``, ``replay``),
+LLM_CASSETTE_PATH, LLM_CASSETTE_TIMING_SCALE and LLM_CASSETTE_DATE.
+"""
+
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+
+import structlog
+
+from ..utils._utils import LLMError
+
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMissError(LLMError):
+    """Replay mode received a request that was never recorded."""
+
+
+@dataclass
+class CassetteConfig:
+    """Configuration for LLM record/replay."""
+    mode: str = OFF
+    path: str = "llm_cassette.jsonl"
+    timing_scale: float = 1.0  # Multiplier on recorded delays during replay
+    date: Optional[str] = None  # YYYY-MM-DD prompt date; default: recording day
+
+    @classmethod
+    def from_env(cls) -> "CassetteConfig":
+        """Build config from LLM_CASSETTE_* environment variables."""
+        return cls(
+            mode=os.getenv("LLM_CASSETTE_MODE", OFF).lower(),
+            path=os.getenv("LLM_CASSETTE_PATH", "llm_cassette.jsonl"),
+            timing_scale=float(os.getenv("LLM_CASSETTE_TIMING_SCALE", "1")),
+            date=os.getenv("LLM_CASSETTE_DATE") or None,
+        )
+
+
+def cassette_key(*parts: Any) -> str:
+    """Hash of request parts, for callers without an ``llm_request_key``."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class Cassette:
+    """
+    Records or replays LLM exchanges.
+
+    Args:
+        config: Cassette configuration (defaults to CassetteConfig.from_env())
+    """
+
+    def __init__(self, config: Optional[CassetteConfig] = None) -> None:
+        self.config = config or CassetteConfig.from_env()
+        self.logger = structlog.get_logger(__name__)
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._served: Dict[str, int] = {}
+        self._write_lock = threading.Lock()
+        self._date: Optional[date] = date.fromisoformat(self.config.date) if self.config.date else None
+        if self.config.mode == RECORD and self._date is None:
+            self._date = datetime.now(timezone.utc).date()
+        if self.config.mode == REPLAY:
+            self._load()
+
+    @property
+    def active(self) -> bool:
+        return self.config.mode in (RECORD, REPLAY)
+
+    @property
+    def replaying(self) -> bool:
+        return self.config.mode == REPLAY
+
+    @property
+    def recording(self) -> bool:
+        return self.config.mode == RECORD
+
+    @property
+    def date(self) -> Optional[date]:
+        """Date prompts use while the cassette is active (None: today's)."""
+        return self._date if self.active else None
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def _load(self) -> None:
+        try:
+            with open(self.config.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["key"], []).append(entry)
+                        if self._date is None and entry.get("date"):
+                            self._date = date.fromisoformat(entry["date"])
+        except FileNotFoundError:
+            self.logger.warning("llm_cassette_missing", path=self.config.path)
+        self.logger.info("llm_cassette_loaded", path=self.config.path, exchanges=len(self), date=str(self._date))
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        entry["date"] = self._date.isoformat()
+        self._entries.setdefault(entry["key"], []).append(entry)
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._write_lock:
+            with open(self.config.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def _next(self, key: str, source: str) -> Dict[str, Any]:
+        entries = self._entries.get(key)
+        if not entries:
+            raise CassetteMissError(f"No recorded {source} exchange for request {key[:12]} in {self.config.path}")
+        index = self._served.get(key, 0)
+        self._served[key] = index + 1
+        return entries[min(index, len(entries) - 1)]
+
+    async def _pause(self, seconds: float) -> None:
+        delay = seconds * self.config.timing_scale
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    # ------------------------------------------------------------------
+    # Exchanges
+    # ------------------------------------------------------------------
+
+    async def call(
+        self,
+        key: str,
+        source: str,
+        model: Optional[str],
+        fetch: Callable[[], Awaitable[str]],
+    ) -> str:
+        """Replay a recorded completion, or run ``fetch()`` and record it."""
+        if self.replaying:
+            entry = self._next(key, source)
+            await self._pause(entry.get("duration", 0.0))
+            return "".join(entry["chunks"])
+
+        start = time.perf_counter()
+        text = await fetch()
+        if self.recording and text is not None:
+            self._append({
+                "key": key,
+                "source": source,
+                "model": model,
+                "chunks": [text],
+                "delays": [],
+                "duration": round(time.perf_counter() - start, 6),
+            })
+        return text
+
+    async def stream(
+        self,
+        key: str,
+        source: str,
+        model: Optional[str],
+        upstream: Callable[[], AsyncIterator[str]],
+        complete: Optional[Callable[[], bool]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Replay a recorded stream chunk by chunk with its (scaled) timing, or
+        stream from ``upstream()`` and record it once it completes (or once
+        the caller closes it while ``complete()`` is True).
+        """
+        if self.replaying:
+            entry = self._next(key, source)
+            for chunk, delay in zip(entry["chunks"], entry["delays"]):
+                await self._pause(delay)
+                yield chunk
+            return
+
+        chunks: List[str] = []
+        delays: List[float] = []
+        start = last = time.perf_counter()
+        tokens = upstream()
+
+        def record() -> None:
+            if self.recording:
+                self._append({
+                    "key": key,
+                    "source": source,
+                    "model": model,
+                    "chunks": chunks,
+                    "delays": delays,
+                    "duration": round(time.perf_counter() - start, 6),
+                })
+
+        try:
+            async for chunk in tokens:
+                now = time.perf_counter()
+                chunks.append(chunk)
+                delays.append(round(now - last, 6))
+                last = now
+                yield chunk
+        except GeneratorExit:
+            # Closed by a caller that already has its result: as good as complete
+            if complete is not None and complete():
+                record()
+            raise
+        finally:
+            aclose = getattr(tokens, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        # Only completed streams are recorded; a cancelled one never gets here
+        record()
+
+
+_cassette: Optional[Cassette] = None
+
+
+def get_cassette() -> Cassette:
+    """Get the process-wide cassette (inactive unless LLM_CASSETTE_MODE is set)."""
+    global _cassette
+    if _cassette is None:
+        _cassette = Cassette()
+    return _cassette
+
+
+def configure_cassette(config: Optional[CassetteConfig] = None) -> Cassette:
+    """Replace the process-wide cassette (e.g. in tests or benchmarks)."""
+    global _cassette
+    _cassette = Cassette(config or CassetteConfig())
+    return _cassette
@@ -0,0 +1,387 @@
+"""Circuit breakers per (provider, model) around LLM calls.
+
+When a provider degrades, every call would otherwise wait out the request
+timeout on each retry. A breaker counts consecutive provider failures per
+(provider, model); after LLM_BREAKER_FAILURES (default 5) it opens, and calls
+fail fast with ``LLMCircuitOpenError`` instead of holding a connection and an
+admission slot. After LLM_BREAKER_RESET_SECONDS (default 30) it turns
+half-open and lets LLM_BREAKER_HALF_OPEN_CALLS (default 1) probe calls
+through: a successful probe closes it, a failed one opens it again.
+
+Calls made through ``CircuitBreakers.call``/``stream`` fall back along
+LLM_FALLBACK_MODELS (comma-separated, e.g. ``gpt-4o-mini,claude-3-5-haiku-latest``)
+when the requested model's breaker is open or its call fails. A stream only
+falls back before its first token; once output has been yielded the error
+propagates. Only errors that say the provider is unhealthy count as failures
+(timeouts, connection errors, 429 and 5xx: what ``_classify_error`` treats
+as retryable). Caller errors (4xx, auth, invalid requests) and structured-
+output parse errors are passed through without counting or falling back, so
+one bad request pattern cannot open a model's breaker for everyone.
+
+Metrics:
+    dexter_llm_breaker_state{provider, model}: 0 closed, 1 half-open, 2 open
+    dexter_llm_breaker_transitions_total{provider, model, state}
+    dexter_llm_breaker_rejected_total{provider, model}: calls failed fast
+    dexter_llm_fallbacks_total{model, fallback}: calls served by a fallback
+
+Usage:
+    breakers = get_circuit_breakers()
+    text = await breakers.call(model, lambda target: request(target))
+    async for token in breakers.stream(model, lambda target: stream(target)):
+        ...
+"""
+
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import asyncio
+import os
+import time
+
+import structlog
+
+from ..utils.admission import AdmissionRejected
+from ..utils.metrics import LLM_BREAKER_STATE, LLM_BREAKER_TRANSITIONS, LLM_BREAKER_REJECTED, LLM_FALLBACKS
+from ..utils._utils import (
+    LLMCircuitOpenError,
+    LLMParseError,
+    LLMRateLimitError,
+    LLMTimeoutError,
+    _classify_error,
+)
+from .client_pool import provider_for_model
+
+
+R = TypeVar("R")
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Raised inside a guarded call without saying anything about the provider
+NOT_PROVIDER_FAILURES: Tuple[type, ...] = (LLMParseError, LLMCircuitOpenError, AdmissionRejected)
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status of a provider error, looking through wrapping exceptions."""
+    seen = 0
+    while exc is not None and seen < 5:
+        status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+        if isinstance(status, int):
+            return status
+        exc = exc.__cause__ or exc.__context__
+        seen += 1
+    return None
+
+
+def is_provider_failure(exc: BaseException) -> bool:
+    """
+    Whether ``exc`` says the provider is unhealthy: a timeout, connection
+    error, 429 or 5xx (the errors ``_classify_error`` treats as retryable).
+    """
+    if isinstance(exc, NOT_PROVIDER_FAILURES):
+        return False
+    if isinstance(exc, (LLMRateLimitError, LLMTimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = _status_code(exc)
+    if status is not None:
+        return status == 429 or status >= 500
+    return _classify_error(exc) is not exc
+
+
+@dataclass
+class BreakerConfig:
+    """Configuration for LLM circuit breakers."""
+    enabled: bool = True
+    failure_threshold: int = 5  # Consecutive failures that open the breaker
+    reset_timeout: float = 30.0  # Seconds open before half-open probing
+    half_open_max_calls: int = 1  # Concurrent probe calls while half-open
+    fallback_models: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_env(cls) -> "BreakerConfig":
+        """Build config from LLM_BREAKER_* and LLM_FALLBACK_MODELS environment variables."""
+        fallbacks = os.getenv("LLM_FALLBACK_MODELS", "")
+        return cls(
+            enabled=os.getenv("LLM_BREAKER_ENABLED", "1").lower() not in ("0", "false", "no"),
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30")),
+            half_open_max_calls=int(os.getenv("LLM_BREAKER_HALF_OPEN_CALLS", "1")),
+            fallback_models=tuple(m.strip() for m in fallbacks.split(",") if m.strip()),
+        )
+
+
+class CircuitBreaker:
+    """
+    Breaker for one (provider, model).
+
+    Args:
+        provider: Provider name (metric label)
+        model: Model name (metric label)
+        config: Thresholds and timeouts
+        clock: Monotonic time source (tests)
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        config: BreakerConfig,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.provider = provider
+        self.model = model
+        self.config = config
+        self.clock = clock
+        self.logger = structlog.get_logger(__name__)
+        self.failures = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        LLM_BREAKER_STATE.labels(provider, model).set(0)
+
+    @property
+    def state(self) -> str:
+        """Current state; an open breaker past its reset timeout reads half-open."""
+        if self._state == OPEN and self.clock() - self._opened_at >= self.config.reset_timeout:
+            self._set_state(HALF_OPEN)
+        return self._state
+
+    def _set_state(self, state: str) -> None:
+        if state == self._state:
+            return
+        self._state = state
+        if state == OPEN:
+            self._opened_at = self.clock()
+        if state != HALF_OPEN:
+            self._probes = 0
+        LLM_BREAKER_STATE.labels(self.provider, self.model).set(_STATE_VALUES[state])
+        LLM_BREAKER_TRANSITIONS.labels(self.provider, self.model, state).inc()
+        log = self.logger.warning if state == OPEN else self.logger.info
+        log("llm_breaker_state", provider=self.provider, model=self.model, state=state, failures=self.failures)
+
+    def allow(self) -> bool:
+        """
+        Admit a call.
+
+        Returns:
+            True if the call is a half-open probe
+
+        Raises:
+            LLMCircuitOpenError: If the breaker is open or its probes are taken
+        """
+        state = self.state
+        if state == CLOSED:
+            return False
+        if state == HALF_OPEN and self._probes < self.config.half_open_max_calls:
+            self._probes += 1
+            return True
+        LLM_BREAKER_REJECTED.labels(self.provider, self.model).inc()
+        raise LLMCircuitOpenError(f"Circuit open for {self.provider}/{self.model}")
+
+    def record_success(self, probe: bool = False) -> None:
+        self.failures = 0
+        if probe:
+            self._probes = max(0, self._probes - 1)
+        if self._state == HALF_OPEN:
+            self._set_state(CLOSED)
+
+    def record_failure(self, probe: bool = False) -> None:
+        self.failures += 1
+        if probe:
+            self._probes = max(0, self._probes - 1)
+        if self._state == HALF_OPEN or (self._state == CLOSED and self.failures >= self.config.failure_threshold):
+            self._set_state(OPEN)
+
+    def release(self, probe: bool = False) -> None:
+        """End a call that says nothing about the provider (cancelled, parse error)."""
+        if probe:
+            self._probes = max(0, self._probes - 1)
+
+    @asynccontextmanager
+    async def guard(self):
+        """Run the body as one call; see ``is_provider_failure`` for what counts."""
+        probe = self.allow()
+        try:
+            yield
+        except Exception as exc:
+            if is_provider_failure(exc):
+                self.record_failure(probe)
+            else:
+                self.release(probe)
+            raise
+        except BaseException:
+            self.release(probe)
+            raise
+        self.record_success(probe)
+
+
+class CircuitBreakers:
+    """
+    Breakers keyed by (provider, model) plus the fallback chain.
+
+    Args:
+        config: Breaker configuration (defaults to BreakerConfig.from_env())
+        clock: Monotonic time source (tests)
+    """
+
+    def __init__(self, config: Optional[BreakerConfig] = None, clock: Callable[[], float] = time.monotonic) -> None:
+        self.config = config or BreakerConfig.from_env()
+        self.clock = clock
+        self.logger = structlog.get_logger(__name__)
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        """Breaker for ``model``'s (provider, model), created on first use."""
+        key = (provider_for_model(model), model)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(key[0], model, self.config, self.clock)
+        return breaker
+
+    def guard(self, model: str):
+        """``breaker(model).guard()``, or a no-op when breakers are disabled."""
+        return self.breaker(model).guard() if self.config.enabled else _unguarded()
+
+    def states(self) -> Dict[Tuple[str, str], str]:
+        """Current state of every breaker created so far."""
+        return {key: breaker.state for key, breaker in self._breakers.items()}
+
+    def chain(self, model: str) -> List[str]:
+        """``model`` followed by the configured fallbacks."""
+        return [model] + [m for m in self.config.fallback_models if m != model]
+
+    def _on_fallback(self, model: str, target: str) -> None:
+        if target != model:
+            LLM_FALLBACKS.labels(model, target).inc()
+            self.logger.warning("llm_fallback", model=model, fallback=target)
+
+    async def call(self, model: str, fn: Callable[[str], Awaitable[R]], guard: bool = True) -> R:
+        """
+        Await ``fn(target)`` for the first model in the chain whose breaker
+        admits it and whose call succeeds. Errors that are not provider
+        failures propagate without trying the fallbacks.
+
+        Args:
+            model: Requested model
+            fn: One call to ``target``
+            guard: Count each ``fn`` call on the target's breaker; False when
+                ``fn`` guards its own attempts (``call_llm`` guards every
+                retry attempt so a retry loop stops once the breaker opens)
+
+        Raises:
+            LLMCircuitOpenError: If every breaker in the chain is open
+            Exception: The last provider failure, or the first caller error
+        """
+        if not self.config.enabled:
+            return await fn(model)
+        last_error: Optional[Exception] = None
+        for target in self.chain(model):
+            try:
+                async with (self.guard(target) if guard else _unguarded()):
+                    self._on_fallback(model, target)
+                    return await fn(target)
+            except LLMCircuitOpenError as exc:
+                last_error = last_error or exc
+            except Exception as exc:
+                if not is_provider_failure(exc):
+                    raise
+                last_error = exc
+        raise last_error
+
+    async def stream(
+        self,
+        model: str,
+        factory: Callable[[str], AsyncIterator[str]],
+        fallback: bool = True,
+    ) -> AsyncIterator[str]:
+        """
+        Stream from ``factory(target)`` along the chain like ``call``,
+        falling back only before the first token.
+
+        A stream the caller closes after some output counts as a success.
+
+        Args:
+            model: Requested model
+            factory: Starts a stream from ``target``
+            fallback: False to use ``model``'s breaker only (hedge secondaries,
+                whose failure already falls back to the primary)
+        """
+        if not self.config.enabled:
+            tokens = factory(model)
+            try:
+                async for token in tokens:
+                    yield token
+            finally:
+                await _aclose(tokens)
+            return
+
+        last_error: Optional[Exception] = None
+        for target in self.chain(model) if fallback else [model]:
+            breaker = self.breaker(target)
+            try:
+                probe = breaker.allow()
+            except LLMCircuitOpenError as exc:
+                last_error = last_error or exc
+                continue
+            self._on_fallback(model, target)
+            tokens = factory(target)
+            started = False
+            try:
+                async for token in tokens:
+                    started = True
+                    yield token
+            except Exception as exc:
+                if not is_provider_failure(exc):
+                    breaker.release(probe)
+                    raise
+                breaker.record_failure(probe)
+                if started:
+                    raise
+                last_error = exc
+                continue
+            except BaseException:
+                # Closed or cancelled by the caller
+                if started:
+                    breaker.record_success(probe)
+                else:
+                    breaker.release(probe)
+                raise
+            finally:
+                await _aclose(tokens)
+            breaker.record_success(probe)
+            return
+        raise last_error
+
+
+@asynccontextmanager
+async def _unguarded():
+    yield
+
+
+async def _aclose(tokens: AsyncIterator[str]) -> None:
+    aclose = getattr(tokens, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+_breakers: Optional[CircuitBreakers] = None
+
+
+def get_circuit_breakers() -> CircuitBreakers:
+    """Get the process-wide breakers (configured from the environment)."""
+    global _breakers
+    if _breakers is None:
+        _breakers = CircuitBreakers()
+    return _breakers
+
+
+def configure_circuit_breakers(
+    config: Optional[BreakerConfig] = None,
+    clock: Callable[[], float] = time.monotonic,
+) -> CircuitBreakers:
+    """Replace the process-wide breakers (e.g. in tests or after env changes)."""
+    global _breakers
+    _breakers = CircuitBreakers(config or BreakerConfig(), clock)
+    return _breakers
@@ -0,0 +1,148 @@
+"""LLM clients keyed by (provider, model).
+
+``get_llm_client()`` is one process-wide client for ``LLMConfig.default_model``.
+Calls for any other model (the per-phase model map in ``AgentOptions``, the
+hedging secondary) are served from a ``ClientPool``: clients are created
+lazily on first use and evicted least-recently-used beyond
+LLM_CLIENT_POOL_SIZE (default 8). Every pooled client shares the provider HTTP
+transport (``utils/http_pool.py``), so eviction only drops the wrapper object,
+not connections.
+
+A model whose provider package or API key is missing falls back to the
+default client with a warning, logged once per model until the pool is
+reconfigured.
+
+Usage:
+    client = await resolve_llm_client("claude-3-5-haiku-latest")
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+import os
+
+import structlog
+
+from ..utils.metrics import LLM_CLIENT_POOL_SIZE, LLM_CLIENT_POOL_EVENTS
+from ..utils._utils import get_llm_client, get_llm_config
+
+
+ClientKey = Tuple[str, str]
+
+
+def provider_for_model(model: str) -> str:
+    """Provider a model name routes to, by the prefixes ``get_chat_model`` understands."""
+    if model.startswith("ollama-"):
+        return "ollama"
+    if model.startswith("claude-"):
+        return "anthropic"
+    if model.startswith("gemini-"):
+        return "google"
+    return "openai"
+
+
+def _default_factory(model: str) -> Any:
+    # Local import: llm.py imports this module
+    from .llm import get_chat_model
+    return get_chat_model(model, streaming=True)
+
+
+class ClientPool:
+    """
+    Lazily created chat model clients with LRU eviction.
+
+    Clients are built with ``streaming=True``; LangChain chat models in that
+    mode still serve non-streaming ``agenerate`` calls.
+
+    Args:
+        max_size: Clients kept before the least recently used is evicted
+        factory: ``model -> client`` (defaults to ``get_chat_model``)
+    """
+
+    def __init__(self, max_size: int = 8, factory: Optional[Callable[[str], Any]] = None) -> None:
+        self.max_size = max(1, max_size)
+        self.factory = factory or _default_factory
+        self.logger = structlog.get_logger(__name__)
+        self._clients: "OrderedDict[ClientKey, Any]" = OrderedDict()
+        self._unavailable: Dict[ClientKey, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def keys(self) -> List[ClientKey]:
+        """Pooled keys, least recently used first."""
+        return list(self._clients)
+
+    def get(self, model: str) -> Any:
+        """
+        Client for ``model``, created on first use.
+
+        Raises:
+            RuntimeError: If the model's provider is not installed or configured
+        """
+        key = (provider_for_model(model), model)
+        client = self._clients.get(key)
+        if client is not None:
+            self._clients.move_to_end(key)
+            LLM_CLIENT_POOL_EVENTS.labels("hit").inc()
+            return client
+
+        if key in self._unavailable:
+            raise RuntimeError(self._unavailable[key])
+        try:
+            client = self.factory(model)
+        except Exception as exc:
+            self._unavailable[key] = str(exc)
+            LLM_CLIENT_POOL_EVENTS.labels("unavailable").inc()
+            self.logger.warning("llm_client_unavailable", provider=key[0], model=model, error=str(exc))
+            raise RuntimeError(str(exc)) from exc
+
+        LLM_CLIENT_POOL_EVENTS.labels("miss").inc()
+        self._clients[key] = client
+        while len(self._clients) > self.max_size:
+            evicted, _ = self._clients.popitem(last=False)
+            LLM_CLIENT_POOL_EVENTS.labels("evict").inc()
+            self.logger.info("llm_client_evicted", provider=evicted[0], model=evicted[1])
+        LLM_CLIENT_POOL_SIZE.set(len(self._clients))
+        self.logger.info("llm_client_created", provider=key[0], model=model, pooled=len(self._clients))
+        return client
+
+    def clear(self) -> None:
+        self._clients.clear()
+        self._unavailable.clear()
+        LLM_CLIENT_POOL_SIZE.set(0)
+
+
+_pool: Optional[ClientPool] = None
+
+
+def get_client_pool() -> ClientPool:
+    """Get the process-wide client pool."""
+    global _pool
+    if _pool is None:
+        _pool = ClientPool(max_size=int(os.getenv("LLM_CLIENT_POOL_SIZE", "8")))
+    return _pool
+
+
+def configure_client_pool(
+    max_size: int = 8,
+    factory: Optional[Callable[[str], Any]] = None,
+) -> ClientPool:
+    """Replace the process-wide client pool (e.g. in tests or after env changes)."""
+    global _pool
+    _pool = ClientPool(max_size=max_size, factory=factory)
+    LLM_CLIENT_POOL_SIZE.set(0)
+    return _pool
+
+
+async def resolve_llm_client(model: Optional[str] = None) -> Any:
+    """
+    Client that serves ``model``: the default client for the configured
+    default model (or no model), otherwise a pooled one.
+    """
+    if not model or model == get_llm_config().default_model:
+        return await get_llm_client()
+    try:
+        return get_client_pool().get(model)
+    except RuntimeError:
+        # Already logged once by the pool
+        return await get_llm_client()
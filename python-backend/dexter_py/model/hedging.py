@@ -0,0 +1,245 @@
+"""Hedged LLM streams: race a secondary provider when the primary is slow.
+
+If the primary provider has not produced a first token within the hedge
+delay, the same request is started on a secondary provider/model
+(LLM_HEDGE_MODEL, served from the client pool in ``client_pool.py``).
+Whichever stream yields a first token first is used; the other is closed,
+which cancels its provider call. The delay is a percentile
+(LLM_HEDGE_PERCENTILE, default p95) of recent primary time-to-first-token
+samples per phase, clamped to [LLM_HEDGE_MIN_DELAY_MS,
+LLM_HEDGE_MAX_DELAY_MS]; until LLM_HEDGE_MIN_SAMPLES samples have been
+seen, LLM_HEDGE_DELAY_MS is used. At p95 roughly one request in twenty is
+hedged, in exchange for cutting the slowest first tokens.
+
+Hedging only applies to the phases listed in LLM_HEDGE_PHASES (callers pass
+``phase=`` to ``call_llm_stream``). It is skipped while the LLM call pool is
+saturated, where a second request would only add load, and while a cassette
+is active, so record/replay stays deterministic.
+
+Metrics:
+    dexter_llm_hedge_requests_total{phase, outcome}: outcome is ``unhedged``
+        (primary answered within the delay), ``skipped`` (delay passed but no
+        hedge was sent), or the winner of a hedged race: ``primary`` or
+        ``secondary``
+    dexter_llm_hedge_delay_seconds{phase}: the current hedge delay
+"""
+
+from typing import AsyncIterator, Callable, Deque, Dict, FrozenSet, Optional
+from collections import deque
+from dataclasses import dataclass
+import asyncio
+import math
+import os
+import time
+
+import structlog
+
+from ..utils.metrics import LLM_HEDGE_REQUESTS, LLM_HEDGE_DELAY_SECONDS
+
+
+PRIMARY = "primary"
+SECONDARY = "secondary"
+
+DEFAULT_HEDGE_PHASES = frozenset({"understand", "plan", "reflect"})
+
+
+@dataclass
+class HedgeConfig:
+    """Configuration for hedged streams."""
+    enabled: bool = False
+    secondary_model: Optional[str] = None
+    phases: FrozenSet[str] = DEFAULT_HEDGE_PHASES
+    percentile: float = 95.0
+    initial_delay: float = 2.0  # Seconds, until min_samples are collected
+    min_delay: float = 0.25
+    max_delay: float = 10.0
+    min_samples: int = 20
+    window: int = 200  # Recent first-token samples kept per phase
+
+    @classmethod
+    def from_env(cls) -> "HedgeConfig":
+        """Build config from LLM_HEDGE_* environment variables."""
+        secondary = os.getenv("LLM_HEDGE_MODEL") or None
+        phases = os.getenv("LLM_HEDGE_PHASES")
+        return cls(
+            enabled=bool(secondary) and os.getenv("LLM_HEDGE_ENABLED", "1").lower() not in ("0", "false", "no"),
+            secondary_model=secondary,
+            phases=frozenset(p.strip() for p in phases.split(",") if p.strip()) if phases is not None else DEFAULT_HEDGE_PHASES,
+            percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+            initial_delay=float(os.getenv("LLM_HEDGE_DELAY_MS", "2000")) / 1000,
+            min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "250")) / 1000,
+            max_delay=float(os.getenv("LLM_HEDGE_MAX_DELAY_MS", "10000")) / 1000,
+            min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20")),
+            window=int(os.getenv("LLM_HEDGE_WINDOW", "200")),
+        )
+
+
+class FirstTokenLatency:
+    """Rolling window of primary time-to-first-token samples (seconds)."""
+
+    def __init__(self, window: int) -> None:
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank ``q``-th percentile, or None without samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(q / 100 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
+
+
+class StreamHedger:
+    """
+    Races a secondary stream against a slow primary.
+
+    Args:
+        config: Hedge configuration (defaults to HedgeConfig.from_env())
+    """
+
+    def __init__(self, config: Optional[HedgeConfig] = None) -> None:
+        self.config = config or HedgeConfig.from_env()
+        self.logger = structlog.get_logger(__name__)
+        self._latency: Dict[str, FirstTokenLatency] = {}
+
+    def applies(self, phase: Optional[str]) -> bool:
+        """True when streams for ``phase`` should be hedged."""
+        return self.config.enabled and phase is not None and phase in self.config.phases
+
+    def _tracker(self, phase: str) -> FirstTokenLatency:
+        tracker = self._latency.get(phase)
+        if tracker is None:
+            tracker = self._latency[phase] = FirstTokenLatency(self.config.window)
+        return tracker
+
+    def delay(self, phase: str) -> float:
+        """Seconds to wait for the primary's first token before hedging."""
+        cfg = self.config
+        tracker = self._tracker(phase)
+        if len(tracker) < cfg.min_samples:
+            return cfg.initial_delay
+        return min(cfg.max_delay, max(cfg.min_delay, tracker.percentile(cfg.percentile)))
+
+    async def stream(
+        self,
+        phase: str,
+        primary: Callable[[], AsyncIterator[str]],
+        secondary: Callable[[], AsyncIterator[str]],
+        can_hedge: Optional[Callable[[], bool]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream from ``primary()``, hedging with ``secondary()`` after the delay.
+
+        An error from one side of a hedged race is ignored while the other may
+        still answer; an error before the hedge is sent (or from both sides)
+        propagates.
+
+        Args:
+            phase: Phase label for the latency window and metrics
+            primary: Factory for the primary token stream
+            secondary: Factory for the same request on the secondary provider
+            can_hedge: Checked when the delay passes; False skips the hedge
+        """
+        start = time.perf_counter()
+        delay = self.delay(phase)
+        LLM_HEDGE_DELAY_SECONDS.labels(phase).set(delay)
+
+        streams: Dict[str, AsyncIterator[str]] = {PRIMARY: primary()}
+        firsts: Dict[str, asyncio.Future] = {PRIMARY: asyncio.ensure_future(streams[PRIMARY].__anext__())}
+        errors: Dict[str, BaseException] = {}
+        decided = False  # Hedge sent or skipped
+        hedged = False
+        winner: Optional[str] = None
+        first_token: Optional[str] = None
+        try:
+            while winner is None:
+                pending = [task for name, task in firsts.items() if name not in errors]
+                if not pending:
+                    raise errors.get(PRIMARY) or errors[SECONDARY]
+                timeout = None if decided else max(0.0, start + delay - time.perf_counter())
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    decided = True
+                    if can_hedge is not None and not can_hedge():
+                        continue
+                    try:
+                        streams[SECONDARY] = secondary()
+                    except Exception as exc:
+                        self.logger.warning("llm_hedge_unavailable", phase=phase, error=str(exc))
+                        continue
+                    firsts[SECONDARY] = asyncio.ensure_future(streams[SECONDARY].__anext__())
+                    hedged = True
+                    self.logger.info("llm_hedge_sent", phase=phase, delay_ms=round(delay * 1000, 1))
+                    continue
+
+                # Primary wins ties
+                for name in (PRIMARY, SECONDARY):
+                    task = firsts.get(name)
+                    if task is None or task not in done:
+                        continue
+                    exc = task.exception()
+                    if exc is None or isinstance(exc, StopAsyncIteration):
+                        winner = name
+                        first_token = None if exc is not None else task.result()
+                        break
+                    errors[name] = exc
+                    if hedged:
+                        self.logger.warning("llm_hedge_side_failed", phase=phase, side=name, error=str(exc))
+
+            elapsed = time.perf_counter() - start
+            if winner == PRIMARY or PRIMARY not in errors:
+                # A primary that lost is recorded at the moment it lost: a lower bound
+                self._tracker(phase).observe(elapsed)
+            outcome = winner if hedged else ("skipped" if decided else "unhedged")
+            LLM_HEDGE_REQUESTS.labels(phase, outcome).inc()
+            if hedged:
+                self.logger.info("llm_hedge_won", phase=phase, winner=winner, first_token_ms=round(elapsed * 1000, 1))
+
+            for name in list(streams):
+                if name != winner:
+                    await self._discard(firsts[name], streams.pop(name))
+            if first_token is None:
+                return
+            yield first_token
+            async for token in streams[winner]:
+                yield token
+        finally:
+            for name, tokens in streams.items():
+                await self._discard(firsts[name], tokens)
+
+    @staticmethod
+    async def _discard(first: asyncio.Future, tokens: AsyncIterator[str]) -> None:
+        # The generator is still running inside ``first`` until it is cancelled
+        if not first.done():
+            first.cancel()
+            await asyncio.wait([first])
+        elif not first.cancelled():
+            first.exception()  # Retrieved, so it is not logged as unhandled
+        aclose = getattr(tokens, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+_hedger: Optional[StreamHedger] = None
+
+
+def get_stream_hedger() -> StreamHedger:
+    """Get the process-wide hedger (disabled unless LLM_HEDGE_MODEL is set)."""
+    global _hedger
+    if _hedger is None:
+        _hedger = StreamHedger()
+    return _hedger
+
+
+def configure_hedging(config: Optional[HedgeConfig] = None) -> StreamHedger:
+    """Replace the process-wide hedger (e.g. in tests)."""
+    global _hedger
+    _hedger = StreamHedger(config or HedgeConfig())
+    return _hedger
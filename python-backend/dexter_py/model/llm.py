@@ -5,14 +5,13 @@ It intentionally supports OpenAI by default; other providers may be added later.
 """
 import os
 import asyncio
+import hashlib
 import json
+import time
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, retry_if_not_exception_type, RetryError
-from openai import RateLimitError
-import pybreaker
-from typing import Any, Optional, List, AsyncGenerator, Type, TypeVar
+from typing import Any, Callable, Optional, List, AsyncGenerator, Type, TypeVar
 from dataclasses import dataclass
-import os
-import json
+from functools import lru_cache
 import structlog
 from pydantic import BaseModel
 T = TypeVar("T", bound=BaseModel)
@@ -22,43 +21,30 @@ DEFAULT_MAX_TOKENS = 4096
 DEFAULT_TEMPERATURE = 0.7
 DEFAULT_TIMEOUT = 120
 
-# Try to import langchain providers; set None when not available so checks are safe
-ChatOpenAI = None
-ChatAnthropic = None
-ChatGoogleGenerativeAI = None
-ChatOllama = None
-HumanMessage = None
-SystemMessage = None
-try:
-    from langchain_openai import ChatOpenAI
-except Exception:
-    ChatOpenAI = None
-
-try:
-    from langchain_anthropic import ChatAnthropic  # type: ignore
-except Exception:
-    ChatAnthropic = None  # type: ignore
-
-try:
-    from langchain_google_genai import ChatGoogleGenerativeAI  # type: ignore
-except Exception:
-    ChatGoogleGenerativeAI = None  # type: ignore
-
-try:
-    from langchain_ollama import ChatOllama  # type: ignore
-except Exception:
-    ChatOllama = None  # type: ignore
-
-try:
-    from langchain_core.messages import HumanMessage, SystemMessage
-except Exception:
-    HumanMessage = None
-    SystemMessage = None
-try:
-    from langchain.callbacks.base import AsyncCallbackHandler
-except Exception:
-    AsyncCallbackHandler = None
+# LangChain providers are imported lazily on first use (see utils/providers.py);
+# ChatOpenAI, HumanMessage etc. remain available as module attributes via
+# __getattr__ for existing callers.
 
+
+def __getattr__(name: str) -> Any:
+    try:
+        return legacy_attr(name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+
+from ..utils.metrics import LLMStreamTimer, LLM_STREAMS_CANCELLED, LLM_TOKENS_SAVED, LLM_REQUEST_DURATION
+from .cache import get_response_cache
+from .prompt_layout import assemble_prompt, fit_to_context_window, record_prompt_usage, supports_cache_control
+from .cassette import get_cassette
+from .hedging import get_stream_hedger
+from .client_pool import get_client_pool, resolve_llm_client
+from .circuit_breaker import get_circuit_breakers
+from ..utils.admission import get_admission_controller
+from ..utils import tracing
+from ..utils.providers import chat_model_class, message_classes, async_callback_handler, legacy_attr
+from ..utils.http_pool import provider_client_kwargs
+from ..utils.json_repair import iter_json_objects
 from ..utils._utils import (
     _classify_error,
     _build_system_prompt_with_tools,
@@ -69,6 +55,7 @@ from ..utils._utils import (
     LLMRateLimitError,
     LLMTimeoutError,
     LLMParseError,
+    LLMCircuitOpenError,
 )
 DEFAULT_PROVIDER = "openai"
 DEFAULT_MODEL = "ollama-qwen3-coder:480b-cloud" # Local Ollama by default
@@ -82,16 +69,35 @@ DEFAULT_SYSTEM_PROMPT = (
 )
 
 
-import os
+@lru_cache(maxsize=64)
+def structured_output_instructions(output_model: Type[BaseModel]) -> str:
+    """
+    Prompt suffix asking for JSON matching ``output_model``'s schema.
+
+    Rendering a pydantic JSON schema takes milliseconds for nested models, so
+    the text is built once per model class (and primed at startup).
+    """
+    schema_str = json.dumps(output_model.model_json_schema(), indent=2)
+    return (
+        "IMPORTANT: Respond with valid JSON only. No markdown, no explanations, "
+        "just the JSON object.\n"
+        f"Follow this exact schema:\n```json\n{schema_str}\n```"
+    )
+
 
 def get_chat_model(model_name: str = DEFAULT_MODEL, streaming: bool = False):
     """
-    Return a chat model instance. Supports Ollama (local/cloud), Anthropic, OpenAI,
+    Return a new chat model instance. Supports Ollama (local/cloud), Anthropic, OpenAI,
     and can be extended for other providers.
+
+    Instances share the provider connection pool (utils/http_pool.py) instead
+    of opening their own. For a shared instance per (provider, model) use
+    ``get_client_pool().get(model_name)`` (client_pool.py).
     
     Raises RuntimeError if required API keys are missing.
     """
     # --- Ensure OpenAI is available ---
+    ChatOpenAI = chat_model_class("openai")
     if ChatOpenAI is None:
         raise RuntimeError("langchain is required for the Python backend. Install from requirements.txt")
 
@@ -99,22 +105,25 @@ def get_chat_model(model_name: str = DEFAULT_MODEL, streaming: bool = False):
     providers = {}
 
     # Ollama
-    if 'ChatOllama' in globals() and ChatOllama is not None and model_name.startswith("ollama-"):
+    if model_name.startswith("ollama-") and chat_model_class("ollama") is not None:
+        ChatOllama = chat_model_class("ollama")
         is_cloud = model_name.endswith("-cloud")
         base_url = os.getenv("OLLAMA_BASE_URL", "https://ollama.com" if is_cloud else "http://localhost:11434")
         api_key = os.getenv("OLLAMA_API_KEY") if is_cloud else None
         model_clean = model_name.replace("ollama-", "")
-        return ChatOllama(model=model_clean, base_url=base_url, api_key=api_key, streaming=streaming)
+        return ChatOllama(model=model_clean, base_url=base_url, api_key=api_key, streaming=streaming, **provider_client_kwargs(ChatOllama))
 
     # Anthropic
-    if 'ChatAnthropic' in globals() and ChatAnthropic is not None and model_name.startswith("claude-"):
+    if model_name.startswith("claude-") and chat_model_class("anthropic") is not None:
+        ChatAnthropic = chat_model_class("anthropic")
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
             raise RuntimeError("ANTHROPIC_API_KEY not set in environment")
-        return ChatAnthropic(model=model_name, streaming=streaming, anthropic_api_key=api_key)
+        return ChatAnthropic(model=model_name, streaming=streaming, anthropic_api_key=api_key, **provider_client_kwargs(ChatAnthropic))
 
     # Google (optional, only if installed)
-    if 'ChatGoogleGenerativeAI' in globals() and ChatGoogleGenerativeAI is not None and model_name.startswith("gemini-"):
+    if model_name.startswith("gemini-") and chat_model_class("google") is not None:
+        ChatGoogleGenerativeAI = chat_model_class("google")
         api_key = os.getenv("GOOGLE_API_KEY")
         if not api_key:
             raise RuntimeError("GOOGLE_API_KEY not set in environment")
@@ -124,7 +133,45 @@ def get_chat_model(model_name: str = DEFAULT_MODEL, streaming: bool = False):
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY not set in environment")
-    return ChatOpenAI(model_name=model_name, openai_api_key=api_key, streaming=streaming)
+    return ChatOpenAI(model_name=model_name, openai_api_key=api_key, streaming=streaming, **provider_client_kwargs(ChatOpenAI))
+
+
+def llm_request_key(
+    prompt: str,
+    model: Optional[str] = None,
+    system_prompt: Optional[str] = None,
+    tools: Optional[List[Any]] = None,
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    context: Optional[str] = None,
+) -> str:
+    """
+    Content-addressed identity of an LLM request.
+
+    Defaults are resolved exactly as ``call_llm``/``call_llm_stream`` resolve
+    them, so a call that relies on defaults and one that spells them out map to
+    the same key.
+
+    Returns:
+        Hex SHA-256 digest of model, system prompt (with tools), prompt,
+        temperature, max_tokens and conversation context (if any)
+    """
+    config = get_llm_config()
+    model = model or config.default_model
+    system_prompt = _build_system_prompt_with_tools(system_prompt or DEFAULT_SYSTEM_PROMPT, tools)
+    max_tokens = max_tokens or config.default_max_tokens
+    temperature = temperature or config.default_temperature
+
+    parts = [model, system_prompt, prompt, repr(float(temperature)), str(max_tokens)]
+    if context:
+        # Appended only when present, so context-free keys are unchanged
+        parts.append(context)
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
 
 async def call_llm(
     prompt: str,
@@ -134,10 +181,20 @@ async def call_llm(
     output_model: Optional[Type[T]] = None,
     max_tokens: Optional[int] = None,
     temperature: Optional[float] = None,
+    use_cache: bool = True,
+    context: Optional[str] = None,
     **kwargs
 ) -> Any:
     """
     Call LLM with robust error handling and optional structured output.
+
+    The request is laid out prefix-stable (system prompt and tools, then
+    ``context``, then ``prompt``) with prompt-cache breakpoints for providers
+    that support them; see ``prompt_layout.py``. Every attempt is counted by
+    the (provider, model) circuit breaker; when it is open, or the model
+    keeps failing with provider errors, the call moves along
+    LLM_FALLBACK_MODELS (see ``circuit_breaker.py``). A fallback's response
+    is not stored in the response cache.
     
     Args:
         prompt: User prompt
@@ -147,13 +204,18 @@ async def call_llm(
         output_model: Optional Pydantic model for structured output
         max_tokens: Max tokens to generate
         temperature: Sampling temperature
-        **kwargs: Additional API parameters
+        use_cache: Read from and write to the response cache (raw text is
+            cached, structured output is parsed on every call)
+        context: Older conversation history, sent between the system prompt
+            and ``prompt`` so it can be served from the provider's prompt cache
+        **kwargs: Additional API parameters (bypass the cache when given)
         
     Returns:
         String response or parsed output_model instance
         
     Raises:
         LLMError: On API failures after retries
+        LLMCircuitOpenError: If the breakers of the model and every fallback are open
         LLMParseError: If output_model parsing fails
         
     Examples:
@@ -179,20 +241,15 @@ async def call_llm(
     max_tokens = max_tokens or config.default_max_tokens
     temperature = temperature or config.default_temperature
     
-    # Build system prompt with tools
-    enhanced_system_prompt = _build_system_prompt_with_tools(system_prompt, tools)
-    
     # Enhance prompt for structured output
     if output_model:
-        schema_str = json.dumps(output_model.model_json_schema(), indent=2)
-        enhanced_prompt = (
-            f"{prompt}\n\n"
-            "IMPORTANT: Respond with valid JSON only. No markdown, no explanations, "
-            "just the JSON object.\n"
-            f"Follow this exact schema:\n```json\n{schema_str}\n```"
-        )
+        enhanced_prompt = f"{prompt}\n\n{structured_output_instructions(output_model)}"
     else:
         enhanced_prompt = prompt
+
+    # Static system prompt and tools first, then history, then this call's prompt,
+    # trimmed to the model's context window
+    layout = fit_to_context_window(assemble_prompt(system_prompt, enhanced_prompt, tools, context), model, max_tokens)
     
     logger.info(
         "llm_call_start",
@@ -202,6 +259,11 @@ async def call_llm(
         structured_output=bool(output_model)
     )
     
+    breakers = get_circuit_breakers()
+    # Model whose response is returned; a fallback's answer is not cached
+    # under the requested model's key
+    answered_by = [model]
+
     # Define retry decorator
     @retry(
         stop=stop_after_attempt(config.retry_attempts),
@@ -213,32 +275,41 @@ async def call_llm(
         retry=retry_if_exception_type((LLMRateLimitError, LLMTimeoutError, ConnectionError)),
         reraise=True
     )
-    async def _make_request() -> str:
+    async def _make_request(target: str) -> str:
         """Inner function with retry logic."""
-        client = await get_llm_client()
+        # Each attempt counts on the breaker; once it opens, LLMCircuitOpenError
+        # (not retried) ends the loop and the call moves down the fallback chain
+        async with breakers.guard(target):
+            content = await _send_request(target)
+        answered_by[0] = target
+        return content
+
+    async def _send_request(target: str) -> str:
+        """One request to ``target`` (the requested model or a fallback)."""
+        request_layout = layout if target == model else fit_to_context_window(
+            assemble_prompt(system_prompt, enhanced_prompt, tools, context), target, max_tokens
+        )
+        client = await resolve_llm_client(target)
+        cache_breakpoints = supports_cache_control(client)
 
         # Build a messages structure that we can pass to different clients.
         # Use HumanMessage/SystemMessage when available, otherwise fall back to
         # role/content dicts which some lower-level SDKs accept.
+        HumanMessage, SystemMessage = message_classes()
         if HumanMessage is not None and SystemMessage is not None:
-            msg_system = SystemMessage(content=enhanced_system_prompt)
-            msg_user = HumanMessage(content=enhanced_prompt)
-            messages_for_client = [msg_system, msg_user]
-            messages_wrapper = [[msg_system, msg_user]]
+            messages_wrapper = [request_layout.langchain_messages(SystemMessage, HumanMessage, cache=cache_breakpoints)]
         else:
-            messages_for_client = [{"role": "system", "content": enhanced_system_prompt}, {"role": "user", "content": enhanced_prompt}]
-            messages_wrapper = [[{"role": "system", "content": enhanced_system_prompt}, {"role": "user", "content": enhanced_prompt}]]
+            messages_wrapper = [request_layout.dict_messages()]
 
         try:
             # Primary: some provider SDKs expose a messages.create API (original code)
             if hasattr(client, 'messages') and hasattr(client.messages, 'create'):
                 response = await asyncio.wait_for(
                     client.messages.create(
-                        model=model,
+                        model=target,
                         max_tokens=max_tokens,
                         temperature=temperature,
-                        system=enhanced_system_prompt,
-                        messages=[{"role": "user", "content": enhanced_prompt}],
+                        **request_layout.anthropic_request(cache=cache_breakpoints),
                         **kwargs
                     ),
                     timeout=config.timeout
@@ -270,7 +341,7 @@ async def call_llm(
             # Synchronous/async predict fallback
             elif hasattr(client, 'apredict'):
                 resp_text = await asyncio.wait_for(
-                    client.apredict(enhanced_prompt, **kwargs),
+                    client.apredict(request_layout.user_text, **kwargs),
                     timeout=config.timeout
                 )
                 response = resp_text
@@ -278,7 +349,7 @@ async def call_llm(
             elif hasattr(client, 'predict'):
                 # run blocking predict in a thread
                 resp_text = await asyncio.wait_for(
-                    asyncio.to_thread(lambda: client.predict(enhanced_prompt, **kwargs)),
+                    asyncio.to_thread(lambda: client.predict(request_layout.user_text, **kwargs)),
                     timeout=config.timeout
                 )
                 response = resp_text
@@ -315,14 +386,13 @@ async def call_llm(
                 # Fallback to string conversion
                 content = str(response)
 
-            # Log usage if available
-            if hasattr(response, 'usage'):
-                usage = response.usage
-                logger.info(
-                    "llm_usage",
-                    input_tokens=getattr(usage, 'input_tokens', 0),
-                    output_tokens=getattr(usage, 'output_tokens', 0)
-                )
+            # Log usage (including prompt-cache reads) if available
+            usage = record_prompt_usage(target, response)
+            if usage is not None:
+                logger.info("llm_usage", model=target, **usage.to_dict())
+                span = tracing.current_span()
+                if span is not None:
+                    span.set_attribute("cache_read_tokens", usage.cache_read_tokens)
 
             return content
 
@@ -338,32 +408,62 @@ async def call_llm(
             )
             raise classified
     
-    # Execute with retry
-    try:
-        content = await _make_request()
+    with tracing.span("llm.call", model=model, structured=bool(output_model)) as llm_span:
+        cache = get_response_cache()
+        # Record/replay mode sees every exchange, so the response cache is bypassed
+        cassette = get_cassette()
+        cache_key = None
+        content = None
+        if use_cache and cache.enabled and not kwargs and not cassette.active:
+            cache_key = llm_request_key(enhanced_prompt, model, system_prompt, tools, max_tokens, temperature, context)
+            content = await cache.get(cache_key)
+            if content is not None:
+                logger.info("llm_cache_hit", model=model, chars=len(content))
+        llm_span.set_attribute("cache_hit", content is not None)
+    
+        # Execute with retry
+        if content is None:
+            try:
+                # Retries stay inside the slot so backoff doesn't let a burst through
+                async with get_admission_controller().llm_calls.slot():
+                    request_start = time.perf_counter()
+                    if cassette.active:
+                        content = await cassette.call(
+                            llm_request_key(enhanced_prompt, model, system_prompt, tools, max_tokens, temperature, context),
+                            "call_llm",
+                            model,
+                            lambda: breakers.call(model, _make_request, guard=False),
+                        )
+                    else:
+                        content = await breakers.call(model, _make_request, guard=False)
+                    LLM_REQUEST_DURATION.labels("call_llm", model).observe(time.perf_counter() - request_start)
+            
+            except RetryError as e:
+                # All retries exhausted
+                logger.error("llm_retries_exhausted", attempts=config.retry_attempts)
+                raise LLMError(
+                    f"Failed after {config.retry_attempts} attempts: {e.last_attempt.exception()}"
+                )
         
-    except RetryError as e:
-        # All retries exhausted
-        logger.error("llm_retries_exhausted", attempts=config.retry_attempts)
-        raise LLMError(
-            f"Failed after {config.retry_attempts} attempts: {e.last_attempt.exception()}"
-        )
+            if cache_key and content and answered_by[0] == model:
+                await cache.set(cache_key, content)
+        llm_span.set_attribute("response_chars", len(content or ""))
     
-    # Parse structured output if requested
-    if output_model:
-        try:
-            return _parse_structured_output(content, output_model)
-        except Exception as e:
-            logger.error(
-                "structured_output_parsing_failed",
-                error=str(e),
-                content_preview=content[:200]
-            )
-            raise LLMParseError(
-                f"Failed to parse output as {output_model.__name__}: {str(e)}"
-            )
+        # Parse structured output if requested
+        if output_model:
+            try:
+                return _parse_structured_output(content, output_model)
+            except Exception as e:
+                logger.error(
+                    "structured_output_parsing_failed",
+                    error=str(e),
+                    content_preview=content[:200]
+                )
+                raise LLMParseError(
+                    f"Failed to parse output as {output_model.__name__}: {str(e)}"
+                )
     
-    return content
+        return content
 
 # Use centralized LLMConfig via utils._utils.get_llm_config()
 
@@ -375,11 +475,24 @@ async def call_llm_stream(
     tools: Optional[List[Any]] = None,
     max_tokens: Optional[int] = None,
     temperature: Optional[float] = None,
+    use_cache: bool = True,
+    context: Optional[str] = None,
+    phase: Optional[str] = None,
+    complete: Optional[Callable[[], bool]] = None,
     **kwargs
 ) -> AsyncGenerator[str, None]:
     """
     Stream LLM response with error handling.
     
+    Completed streams are stored in the response cache; a cache hit is
+    replayed as a sequence of small chunks, so callers see the same shape
+    of output as a live stream. Streams for latency-critical phases are
+    hedged against a secondary provider when one is configured (see
+    ``hedging.py``). Provider streams go through the (provider, model)
+    circuit breaker and fall back along LLM_FALLBACK_MODELS before their
+    first token (see ``circuit_breaker.py``); a fallback's output is not
+    cached.
+    
     Args:
         prompt: User prompt
         model: Model name (uses config default if not provided)
@@ -387,7 +500,15 @@ async def call_llm_stream(
         tools: Optional list of tools to include in system prompt
         max_tokens: Max tokens to generate
         temperature: Sampling temperature
-        **kwargs: Additional API parameters
+        use_cache: Read from and write to the response cache
+        context: Older conversation history (see ``call_llm``)
+        phase: Agent phase issuing the call (``understand``, ``plan``, ...),
+            used to decide whether the stream is hedged
+        complete: Reports whether the caller already has its complete
+            result (e.g. ``lambda: parser.complete``). A stream the caller
+            closes while it returns True finished its job: the chunks so far
+            are cached and it is not counted as cancelled
+        **kwargs: Additional API parameters (bypass the cache when given)
         
     Yields:
         Token strings
@@ -399,6 +520,131 @@ async def call_llm_stream(
         async for token in call_llm_stream("Write a story"):
             print(token, end="", flush=True)
     """
+    cache = get_response_cache()
+    cassette = get_cassette()
+    hedger = get_stream_hedger()
+    # Not attached to the context: this generator suspends at every yield
+    requested_model = model or get_llm_config().default_model
+    stream_span = tracing.start_span("llm.stream", model=requested_model)
+    chunk_count = 0
+    chunks: Optional[List[str]] = None
+
+    breakers = get_circuit_breakers()
+    # Models the provider stream was started on; the last one answered
+    started_on: List[str] = []
+
+    def start_stream(target: str) -> AsyncGenerator[str, None]:
+        started_on.append(target)
+        return _stream_llm(
+            prompt,
+            model=target,
+            system_prompt=system_prompt,
+            tools=tools,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            context=context,
+            complete=complete,
+            **kwargs
+        )
+
+    def provider_stream() -> AsyncGenerator[str, None]:
+        return breakers.stream(requested_model, start_stream)
+
+    def served_by_fallback() -> bool:
+        # A fallback's answer is not cached under the requested model's key
+        return bool(started_on) and started_on[-1] != requested_model
+
+    def secondary_stream() -> AsyncGenerator[str, None]:
+        hedge_model = hedger.config.secondary_model
+        return breakers.stream(hedge_model, lambda target: _stream_llm(
+            prompt,
+            model=target,
+            system_prompt=system_prompt,
+            tools=tools,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            context=context,
+            client=get_client_pool().get(target),
+            complete=complete,
+            **kwargs
+        ), fallback=False)
+
+    if cassette.active:
+        upstream = cassette.stream(
+            llm_request_key(prompt, model, system_prompt, tools, max_tokens, temperature, context),
+            "call_llm_stream",
+            model,
+            provider_stream,
+            complete=complete,
+        )
+    elif hedger.applies(phase):
+        # A hedge is only worth sending while the call pool has room for it
+        llm_calls = get_admission_controller().llm_calls
+        upstream = hedger.stream(phase, provider_stream, secondary_stream, can_hedge=lambda: not llm_calls.saturated)
+    else:
+        upstream = provider_stream()
+    try:
+        if not (use_cache and cache.enabled) or kwargs or cassette.active:
+            async for token in upstream:
+                chunk_count += 1
+                yield token
+            return
+
+        key = llm_request_key(prompt, model, system_prompt, tools, max_tokens, temperature, context)
+        cached = await cache.get(key, kind="stream")
+        stream_span.set_attribute("cache_hit", cached is not None)
+        if cached is not None:
+            structlog.get_logger(__name__).info("llm_stream_cache_hit", model=model, chars=len(cached))
+            async for chunk in cache.replay_chunks(cached):
+                chunk_count += 1
+                yield chunk
+            return
+
+        chunks = []
+        async for token in upstream:
+            chunks.append(token)
+            chunk_count += 1
+            yield token
+        if chunks and not served_by_fallback():
+            await cache.set(key, "".join(chunks))
+    except Exception as exc:
+        stream_span.record_error(exc)
+        raise
+    except GeneratorExit:
+        if complete is not None and complete():
+            if chunks and not served_by_fallback():
+                await cache.set(key, "".join(chunks))
+        else:
+            stream_span.set_attribute("cancelled", True)
+        raise
+    except asyncio.CancelledError:
+        stream_span.set_attribute("cancelled", True)
+        raise
+    finally:
+        stream_span.set_attribute("chunks", chunk_count)
+        stream_span.end()
+        await upstream.aclose()
+
+
+async def _stream_llm(
+    prompt: str,
+    model: Optional[str] = None,
+    system_prompt: Optional[str] = None,
+    tools: Optional[List[Any]] = None,
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    context: Optional[str] = None,
+    client: Any = None,
+    complete: Optional[Callable[[], bool]] = None,
+    **kwargs
+) -> AsyncGenerator[str, None]:
+    """
+    Stream tokens from the provider (uncached); see ``call_llm_stream``.
+
+    ``client`` overrides the client resolved for ``model`` (client_pool.py),
+    e.g. for the secondary side of a hedged stream. Closing the stream while
+    ``complete()`` is True is a normal finish, not a cancellation.
+    """
     logger = structlog.get_logger(__name__)
     config = get_llm_config()
     
@@ -408,8 +654,9 @@ async def call_llm_stream(
     max_tokens = max_tokens or config.default_max_tokens
     temperature = temperature or config.default_temperature
     
-    # Build system prompt with tools
-    enhanced_system_prompt = _build_system_prompt_with_tools(system_prompt, tools)
+    # Static system prompt and tools first, then history, then this call's prompt,
+    # trimmed to the model's context window
+    layout = fit_to_context_window(assemble_prompt(system_prompt, prompt, tools, context), model, max_tokens)
     
     logger.info(
         "llm_stream_start",
@@ -418,19 +665,23 @@ async def call_llm_stream(
         has_tools=bool(tools)
     )
     
-    client = await get_llm_client()
+    if client is None:
+        client = await resolve_llm_client(model)
+    cache_breakpoints = supports_cache_control(client)
+    timer = LLMStreamTimer("call_llm_stream", model)
+    permit = await get_admission_controller().llm_calls.acquire()
 
     # Try provider-specific streaming where available
     try:
         # Prepare message wrapper for LangChain-style calls
+        HumanMessage, SystemMessage = message_classes()
         if HumanMessage is not None and SystemMessage is not None:
-            msg_system = SystemMessage(content=enhanced_system_prompt)
-            msg_user = HumanMessage(content=prompt)
-            messages_wrapper = [[msg_system, msg_user]]
+            messages_wrapper = [layout.langchain_messages(SystemMessage, HumanMessage, cache=cache_breakpoints)]
         else:
-            messages_wrapper = [[{"role": "system", "content": enhanced_system_prompt}, {"role": "user", "content": prompt}]]
+            messages_wrapper = [layout.dict_messages()]
 
         # If LangChain async callback handler is available, attempt true streaming
+        AsyncCallbackHandler = async_callback_handler()
         if AsyncCallbackHandler is not None and hasattr(client, 'agenerate'):
             q: asyncio.Queue = asyncio.Queue()
 
@@ -438,7 +689,10 @@ async def call_llm_stream(
                 async def on_llm_new_token(self, token: str, **kwargs):
                     await q.put(token)
 
-                async def on_llm_end(self, *args, **kwargs):
+                async def on_llm_end(self, response, **kwargs):
+                    usage = record_prompt_usage(model, response)
+                    if usage is not None:
+                        logger.info("llm_stream_usage", model=model, **usage.to_dict())
                     # signal end of stream
                     await q.put(None)
 
@@ -468,13 +722,16 @@ async def call_llm_stream(
                     if token is None:
                         break
                     if token:
+                        timer.on_token()
                         yield token
                 # ensure task finished
                 await task
                 return
-            except asyncio.CancelledError:
-                task.cancel()
-                raise
+            finally:
+                # Cancellation or the consumer closing us at a yield must not
+                # leave the provider call running
+                if not task.done():
+                    task.cancel()
 
         # Primary: provider SDK with messages.stream (original approach)
         if hasattr(client, 'messages') and hasattr(client.messages, 'stream'):
@@ -482,24 +739,20 @@ async def call_llm_stream(
                 model=model,
                 max_tokens=max_tokens,
                 temperature=temperature,
-                system=enhanced_system_prompt,
-                messages=[{"role": "user", "content": prompt}],
+                **layout.anthropic_request(cache=cache_breakpoints),
                 **kwargs
             ) as stream:
                 async for text in stream.text_stream:
                     if text:
+                        timer.on_token()
                         yield text
 
             # Try to log final usage (best-effort)
             try:
                 final_message = await stream.get_final_message()
-                if hasattr(final_message, 'usage'):
-                    usage = final_message.usage
-                    logger.info(
-                        "llm_stream_complete",
-                        input_tokens=getattr(usage, 'input_tokens', 0),
-                        output_tokens=getattr(usage, 'output_tokens', 0)
-                    )
+                usage = record_prompt_usage(model, final_message)
+                if usage is not None:
+                    logger.info("llm_stream_complete", model=model, **usage.to_dict())
             except Exception:
                 pass
 
@@ -507,21 +760,39 @@ async def call_llm_stream(
             # Fallback: streaming not supported by client interface. Call non-streaming
             # and yield the full content as a single chunk so callers still get a result.
             logger.debug("llm_stream_fallback_to_non_streaming", model=model)
-            content = await call_llm(prompt, model=model, system_prompt=system_prompt, tools=tools, max_tokens=max_tokens, temperature=temperature, **kwargs)
+            # call_llm takes its own slot
+            permit.release()
+            content = await call_llm(prompt, model=model, system_prompt=system_prompt, tools=tools, max_tokens=max_tokens, temperature=temperature, context=context, **kwargs)
             if content:
+                timer.on_token()
                 yield content
 
-    except asyncio.CancelledError:
-        logger.info("llm_stream_cancelled")
+    except (asyncio.CancelledError, GeneratorExit):
+        if complete is not None and complete():
+            # The caller stopped reading once it had its result
+            logger.debug("llm_stream_closed_complete", model=model, tokens_streamed=timer.tokens)
+            raise
+        # Upper bound: the rest of the max_tokens budget was not generated
+        saved = max(0, max_tokens - timer.tokens)
+        LLM_STREAMS_CANCELLED.labels("call_llm_stream").inc()
+        LLM_TOKENS_SAVED.labels("call_llm_stream").inc(saved)
+        logger.info("llm_stream_cancelled", tokens_streamed=timer.tokens, tokens_saved_estimate=saved)
         raise
     except Exception as e:
         logger.error("llm_stream_failed", error=str(e), error_type=type(e).__name__)
         raise LLMError(f"Streaming failed: {str(e)}")
+    finally:
+        permit.release()
+        timer.finish()
 
 
 def _parse_structured_output(content: str, output_model: Type[T]) -> T:
     """
-    Parse structured output with multiple fallback strategies.
+    Parse structured output from raw LLM text.
+    
+    Objects are found and repaired in a single scan (markdown fences,
+    surrounding prose, trailing commas, Python literals, single quotes; see
+    ``utils/json_repair.py``); the first one that validates is returned.
     
     Args:
         content: Raw LLM output
@@ -531,97 +802,14 @@ def _parse_structured_output(content: str, output_model: Type[T]) -> T:
         Parsed model instance
         
     Raises:
-        Exception: If all parsing strategies fail
+        Exception: If no object in the output validates
     """
-    strategies = [
-        _parse_direct,
-        _parse_strip_markdown,
-        _parse_extract_json,
-        _parse_repair_json,
-    ]
-    
-    last_error = None
-    for strategy in strategies:
+    last_error: Optional[Exception] = None
+    for data in iter_json_objects(content):
         try:
-            return strategy(content, output_model)
+            return output_model.model_validate(data)
         except Exception as e:
             last_error = e
             continue
     
-    # All strategies failed
-    raise last_error or ValueError("All parsing strategies failed")
-
-
-def _parse_direct(content: str, model: Type[T]) -> T:
-    """Parse directly as JSON."""
-    data = json.loads(content.strip())
-    return model.model_validate(data)
-
-
-def _parse_strip_markdown(content: str, model: Type[T]) -> T:
-    """Strip markdown code fences and parse."""
-    cleaned = content.strip()
-    
-    # Remove ```json and ``` markers
-    if cleaned.startswith("```"):
-        lines = cleaned.split("\n")
-        # Remove first line if it's a fence
-        if lines[0].strip().startswith("```"):
-            lines = lines[1:]
-        # Remove last line if it's a fence
-        if lines and lines[-1].strip() == "```":
-            lines = lines[:-1]
-        cleaned = "\n".join(lines)
-    
-    data = json.loads(cleaned.strip())
-    return model.model_validate(data)
-
-
-def _parse_extract_json(content: str, model: Type[T]) -> T:
-    """Extract JSON object from text."""
-    import re
-    
-    # Look for JSON object
-    json_pattern = r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}'
-    matches = re.findall(json_pattern, content, re.DOTALL)
-    
-    if not matches:
-        raise ValueError("No JSON object found in content")
-    
-    # Try each match (in case there are multiple)
-    for match in matches:
-        try:
-            data = json.loads(match)
-            return model.model_validate(data)
-        except Exception:
-            continue
-    
-    raise ValueError("No valid JSON object found")
-
-
-def _parse_repair_json(content: str, model: Type[T]) -> T:
-    """Attempt to repair common JSON issues."""
-    import re
-    
-    # Extract potential JSON
-    json_match = re.search(r'\{.*\}', content, re.DOTALL)
-    if not json_match:
-        raise ValueError("No JSON-like content found")
-    
-    json_str = json_match.group(0)
-    
-    # Common repairs
-    repairs = [
-        (r"'", '"'),  # Single to double quotes
-        (r',\s*}', '}'),  # Trailing commas in objects
-        (r',\s*]', ']'),  # Trailing commas in arrays
-        (r':\s*None', ': null'),  # Python None to JSON null
-        (r':\s*True', ': true'),  # Python True to JSON true
-        (r':\s*False', ': false'),  # Python False to JSON false
-    ]
-    
-    for pattern, replacement in repairs:
-        json_str = re.sub(pattern, replacement, json_str)
-    
-    data = json.loads(json_str)
-    return model.model_validate(data)
+    raise last_error or ValueError("No JSON object found in content")
@@ -0,0 +1,241 @@
+"""Prefix-stable prompt layout and provider prompt caching.
+
+Provider prompt caches (Anthropic ``cache_control`` breakpoints, OpenAI's
+automatic prefix cache) only hit when a request starts with exactly the same
+bytes as an earlier one. ``PromptLayout`` therefore orders every request as
+
+1. ``system``: static instructions and the tool catalog, identical on every call
+2. ``context``: older conversation history, stable for the rest of a turn
+3. ``dynamic``: whatever changes per call (date, query, prior work, schema)
+
+and, for providers that support it, marks a cache breakpoint after the system
+block and after the context block. ``record_prompt_usage()`` normalizes the
+usage each provider reports and exports uncached, cache-read and cache-write
+input tokens as ``dexter_llm_prompt_tokens_total{model, kind}`` (output tokens
+as ``dexter_llm_output_tokens_total{model}``).
+
+Disable the breakpoints with LLM_PROMPT_CACHING=0.
+
+``fit_to_context_window()`` packs a layout into the model's context window
+(utils/tokens.py): when system, context and prompt plus the output reservation
+do not fit, the oldest part of the context is dropped.
+"""
+
+from typing import Any, Dict, List, Optional
+from dataclasses import asdict, dataclass, replace
+import os
+
+import structlog
+
+from ..utils.metrics import LLM_PROMPT_TOKENS, LLM_OUTPUT_TOKENS
+from ..utils.tokens import context_window, get_token_counter
+from ..utils._utils import _build_system_prompt_with_tools
+
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def prompt_caching_enabled() -> bool:
+    return os.getenv("LLM_PROMPT_CACHING", "1").lower() not in ("0", "false", "no")
+
+
+@dataclass(frozen=True)
+class PromptLayout:
+    """One request's prompt, split by how often each part changes."""
+    system: str
+    dynamic: str
+    context: str = ""
+
+    @property
+    def user_text(self) -> str:
+        """Context followed by the dynamic part, for clients without content blocks."""
+        if not self.context:
+            return self.dynamic
+        return f"{self.context}\n\n{self.dynamic}"
+
+    def system_blocks(self) -> List[Dict[str, Any]]:
+        return [{"type": "text", "text": self.system, "cache_control": CACHE_CONTROL}]
+
+    def user_blocks(self) -> List[Dict[str, Any]]:
+        blocks: List[Dict[str, Any]] = []
+        if self.context:
+            blocks.append({"type": "text", "text": self.context, "cache_control": CACHE_CONTROL})
+        blocks.append({"type": "text", "text": self.dynamic})
+        return blocks
+
+    def anthropic_request(self, cache: bool = True) -> Dict[str, Any]:
+        """``system`` and ``messages`` arguments for Anthropic ``messages.create``/``stream``."""
+        if not cache:
+            return {"system": self.system, "messages": [{"role": "user", "content": self.user_text}]}
+        return {"system": self.system_blocks(), "messages": [{"role": "user", "content": self.user_blocks()}]}
+
+    def langchain_messages(self, system_cls: Any, human_cls: Any, cache: bool = False) -> List[Any]:
+        """System and human messages; content blocks with breakpoints when ``cache``."""
+        if cache:
+            return [system_cls(content=self.system_blocks()), human_cls(content=self.user_blocks())]
+        return [system_cls(content=self.system), human_cls(content=self.user_text)]
+
+    def dict_messages(self) -> List[Dict[str, str]]:
+        return [{"role": "system", "content": self.system}, {"role": "user", "content": self.user_text}]
+
+
+def assemble_prompt(
+    system_prompt: str,
+    prompt: str,
+    tools: Optional[List[Any]] = None,
+    context: Optional[str] = None,
+) -> PromptLayout:
+    """
+    Lay out a request: system prompt plus tool catalog, then conversation
+    context, then the per-call prompt.
+    """
+    return PromptLayout(
+        system=_build_system_prompt_with_tools(system_prompt, tools),
+        dynamic=prompt,
+        context=(context or "").strip(),
+    )
+
+
+HISTORY_TRUNCATED = "[Earlier conversation truncated]\n"
+
+
+def fit_to_context_window(layout: PromptLayout, model: Optional[str], reserve_tokens: int) -> PromptLayout:
+    """
+    Fit ``layout`` into ``model``'s context window, leaving ``reserve_tokens``
+    for the response.
+
+    Only the context is trimmed (its most recent end is kept); a system
+    prompt plus prompt that alone overflow are sent as-is with a warning,
+    for the provider to reject.
+    """
+    counter = get_token_counter(model)
+    available = context_window(model) - reserve_tokens
+    fixed = counter.count(layout.system) + counter.count(layout.dynamic)
+    context_tokens = counter.count(layout.context)
+    if fixed + context_tokens <= available:
+        return layout
+
+    logger = structlog.get_logger(__name__)
+    context = counter.truncate(layout.context, max(0, available - fixed), HISTORY_TRUNCATED, keep="tail")
+    logger.warning(
+        "llm_prompt_trimmed",
+        model=model,
+        context_window=available + reserve_tokens,
+        prompt_tokens=fixed,
+        context_tokens=context_tokens,
+        kept_context_tokens=counter.count(context),
+        exact=counter.exact,
+    )
+    if fixed > available:
+        logger.warning("llm_prompt_exceeds_context_window", model=model, prompt_tokens=fixed, available=available)
+    return replace(layout, context=context)
+
+
+def supports_cache_control(client: Any) -> bool:
+    """True for clients that accept Anthropic ``cache_control`` content blocks."""
+    if not prompt_caching_enabled():
+        return False
+    if hasattr(client, "messages") and hasattr(client.messages, "create"):
+        return True
+    try:
+        return str(getattr(client, "_llm_type", "")).startswith("anthropic")
+    except Exception:
+        return False
+
+
+# ============================================================================
+# Usage reporting
+# ============================================================================
+
+@dataclass
+class PromptUsage:
+    """Input tokens of one request split by prompt-cache outcome."""
+    input_tokens: int = 0  # Not served from the cache
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    output_tokens: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def _field(obj: Any, name: str) -> Any:
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def _from_usage(usage: Any) -> Optional[PromptUsage]:
+    # Anthropic: input_tokens excludes cache reads and writes
+    if _field(usage, "input_tokens") is not None or _field(usage, "cache_read_input_tokens") is not None:
+        return PromptUsage(
+            input_tokens=int(_field(usage, "input_tokens") or 0),
+            cache_read_tokens=int(_field(usage, "cache_read_input_tokens") or 0),
+            cache_write_tokens=int(_field(usage, "cache_creation_input_tokens") or 0),
+            output_tokens=int(_field(usage, "output_tokens") or 0),
+        )
+    # OpenAI: prompt_tokens includes the cached prefix
+    prompt_tokens = _field(usage, "prompt_tokens")
+    if prompt_tokens is not None:
+        cached = int(_field(_field(usage, "prompt_tokens_details"), "cached_tokens") or 0)
+        return PromptUsage(
+            input_tokens=max(0, int(prompt_tokens) - cached),
+            cache_read_tokens=cached,
+            output_tokens=int(_field(usage, "completion_tokens") or 0),
+        )
+    return None
+
+
+def _from_usage_metadata(meta: Dict[str, Any]) -> PromptUsage:
+    # LangChain: input_tokens includes cache reads and writes
+    details = meta.get("input_token_details") or {}
+    read = int(details.get("cache_read") or 0)
+    write = int(details.get("cache_creation") or 0)
+    return PromptUsage(
+        input_tokens=max(0, int(meta.get("input_tokens") or 0) - read - write),
+        cache_read_tokens=read,
+        cache_write_tokens=write,
+        output_tokens=int(meta.get("output_tokens") or 0),
+    )
+
+
+def extract_usage(response: Any) -> Optional[PromptUsage]:
+    """
+    Token usage from an Anthropic/OpenAI SDK response or a LangChain
+    ``LLMResult``; None when the response carries none.
+    """
+    usage = _field(response, "usage")
+    if usage is not None:
+        return _from_usage(usage)
+    generations = _field(response, "generations")
+    if generations:
+        try:
+            meta = getattr(generations[0][0].message, "usage_metadata", None)
+        except (AttributeError, IndexError, TypeError):
+            meta = None
+        if meta:
+            return _from_usage_metadata(meta)
+    llm_output = _field(response, "llm_output") or {}
+    for key in ("usage", "token_usage"):
+        if llm_output.get(key):
+            return _from_usage(llm_output[key])
+    return None
+
+
+def record_prompt_usage(model: str, response: Any) -> Optional[PromptUsage]:
+    """Extract usage from ``response`` and add it to the prompt and output token counters."""
+    usage = extract_usage(response)
+    if usage is None:
+        return None
+    for kind, tokens in (
+        ("uncached", usage.input_tokens),
+        ("cache_read", usage.cache_read_tokens),
+        ("cache_write", usage.cache_write_tokens),
+    ):
+        if tokens:
+            LLM_PROMPT_TOKENS.labels(model or "unknown", kind).inc(tokens)
+    if usage.output_tokens:
+        LLM_OUTPUT_TOKENS.labels(model or "unknown").inc(usage.output_tokens)
+    return usage
@@ -0,0 +1,152 @@
+"""Single-flight coalescing for identical concurrent LLM streams.
+
+When the same request (same model, system prompt, prompt and temperature) is
+streamed several times concurrently, only the first caller (the *leader*)
+starts an upstream stream. Every other caller (a *follower*) subscribes to the
+leader's flight: it first replays the chunks already received, then receives
+new chunks as they arrive. The upstream stream is cancelled once the last
+subscriber goes away, and the flight is forgotten when it finishes, so a later
+identical request starts a fresh upstream call.
+
+Usage:
+    flights = get_stream_single_flight()
+    key = llm_request_key(prompt, model=model)
+    async for token in flights.stream(key, lambda: call_llm_stream(prompt, model=model)):
+        ...
+"""
+
+from typing import AsyncIterator, Callable, Dict, List, Optional
+import asyncio
+import os
+
+import structlog
+
+from ..utils.metrics import SINGLE_FLIGHT_REQUESTS, SINGLE_FLIGHT_ACTIVE
+
+
+class _Flight:
+    """One upstream stream and the chunks it has produced so far."""
+
+    __slots__ = ("key", "chunks", "done", "error", "subscribers", "task", "_changed")
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def notify(self) -> None:
+        """Wake every subscriber waiting for the next chunk."""
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def wait_event(self) -> asyncio.Event:
+        return self._changed
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical streams onto one upstream iterator.
+
+    Args:
+        name: Label used for metrics and logs
+        enabled: When False every call runs its own upstream stream
+    """
+
+    def __init__(self, name: str = "llm_stream", enabled: bool = True) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.logger = structlog.get_logger(__name__)
+        self._flights: Dict[str, _Flight] = {}
+
+    def in_flight(self) -> int:
+        """Number of upstream streams currently running."""
+        return len(self._flights)
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """
+        Yield chunks for ``key``, sharing one upstream stream per key.
+
+        Args:
+            key: Request identity (see ``llm_request_key``)
+            factory: Zero-argument callable returning the upstream async iterator;
+                only called by the leader
+
+        Yields:
+            Chunks in upstream order; followers first receive the buffered prefix
+
+        Raises:
+            Whatever the upstream stream raised, for every subscriber
+        """
+        if not self.enabled:
+            async for chunk in factory():
+                yield chunk
+            return
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(key)
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(flight, factory))
+            SINGLE_FLIGHT_REQUESTS.labels(self.name, "leader").inc()
+        else:
+            SINGLE_FLIGHT_REQUESTS.labels(self.name, "follower").inc()
+            self.logger.debug("single_flight_joined", key=key[:16], buffered=len(flight.chunks))
+
+        flight.subscribers += 1
+        index = 0
+        try:
+            while True:
+                if index < len(flight.chunks):
+                    chunk = flight.chunks[index]
+                    index += 1
+                    yield chunk
+                    continue
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.wait_event().wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done and flight.task is not None:
+                # Nobody is listening any more; stop paying for the upstream stream
+                # and make sure later callers start a fresh flight
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+
+    async def _run(self, flight: _Flight, factory: Callable[[], AsyncIterator[str]]) -> None:
+        """Drain the upstream iterator into the flight buffer."""
+        # Counted here, next to the finally that uncounts it: a task cancelled
+        # before its first step never runs either
+        SINGLE_FLIGHT_ACTIVE.labels(self.name).inc()
+        try:
+            async for chunk in factory():
+                flight.chunks.append(chunk)
+                flight.notify()
+        except asyncio.CancelledError:
+            flight.error = asyncio.CancelledError()
+        except Exception as exc:
+            flight.error = exc
+        finally:
+            flight.done = True
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            SINGLE_FLIGHT_ACTIVE.labels(self.name).dec()
+            flight.notify()
+
+
+_stream_single_flight: Optional[SingleFlight] = None
+
+
+def get_stream_single_flight() -> SingleFlight:
+    """Get the process-wide single-flight group for LLM streams (LLM_SINGLE_FLIGHT=0 disables)."""
+    global _stream_single_flight
+    if _stream_single_flight is None:
+        enabled = os.getenv("LLM_SINGLE_FLIGHT", "1").lower() not in ("0", "false", "no")
+        _stream_single_flight = SingleFlight(enabled=enabled)
+    return _stream_single_flight
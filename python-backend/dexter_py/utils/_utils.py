@@ -5,6 +5,11 @@ import os
 import json
 import structlog
 from pydantic import BaseModel
+from .providers import chat_model_class, async_callback_handler, legacy_attr, message_classes
+from . import tracing
+from .admission import get_admission_controller
+from .http_pool import provider_client_kwargs
+from .metrics import LLM_STREAMS_CANCELLED, LLM_TOKENS_SAVED
 from tenacity import (
     retry,
     stop_after_attempt,
@@ -87,32 +92,16 @@ _client_instance = None
 _client_lock = asyncio.Lock()
 
 
-# LangChain provider imports - make optional so module can be imported even if
-# some provider packages are not installed. Each provider var is initialized
-# to None and set only when the import succeeds.
-ChatAnthropic = None
-ChatOpenAI = None
-ChatOllama = None
-try:
-    from langchain_anthropic import ChatAnthropic
-except Exception:
-    ChatAnthropic = None
+# LangChain provider packages are imported lazily the first time a provider is
+# tried (see providers.py); module attributes such as ChatOpenAI resolve via
+# __getattr__ for existing callers.
 
-try:
-    from langchain_openai import ChatOpenAI
-except Exception:
-    ChatOpenAI = None
 
-try:
-    from langchain_ollama import ChatOllama
-except Exception:
-    ChatOllama = None
-
-# Optional LangChain async callback handler (used for streaming tokens)
-try:
-    from langchain.callbacks.base import AsyncCallbackHandler
-except Exception:
-    AsyncCallbackHandler = None
+def __getattr__(name: str) -> Any:
+    try:
+        return legacy_attr(name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
 
 
 async def get_llm_client():
@@ -141,11 +130,15 @@ async def get_llm_client():
             api_key = config.api_key or os.getenv("ANTHROPIC_API_KEY")
 
             if api_key:
+                ChatAnthropic = chat_model_class("anthropic")
+                if ChatAnthropic is None:
+                    raise RuntimeError("langchain-anthropic not installed")
                 _client_instance = ChatAnthropic(
                     model=config.default_model,
                     api_key=api_key,
                     base_url=config.base_url,
-                    timeout=config.timeout
+                    timeout=config.timeout,
+                    **provider_client_kwargs(ChatAnthropic)
                 )
                 logger.info("llm_client_initialized", provider="anthropic")
                 return _client_instance
@@ -166,10 +159,13 @@ async def get_llm_client():
             except Exception:
                 raise RuntimeError("Ollama daemon not running")
 
+            ChatOllama = chat_model_class("ollama")
+            if ChatOllama is None:
+                raise RuntimeError("langchain-ollama not installed")
             _client_instance = ChatOllama(
                 model=config.default_model or "llama2",
-                temperature=config.default_temperature
-
+                temperature=config.default_temperature,
+                **provider_client_kwargs(ChatOllama)
             )
             logger.info("llm_client_initialized", provider="ollama")
             return _client_instance
@@ -184,12 +180,15 @@ async def get_llm_client():
             openai_key = os.getenv("OPENAI_API_KEY")
 
             if openai_key:
+                ChatOpenAI = chat_model_class("openai")
+                if ChatOpenAI is None:
+                    raise RuntimeError("langchain-openai not installed")
                 _client_instance = ChatOpenAI(
                     model=config.default_model or "gpt-4o-mini",
                     api_key=openai_key,
                     timeout=config.timeout,
-                    temperature=config.default_temperature
-
+                    temperature=config.default_temperature,
+                    **provider_client_kwargs(ChatOpenAI)
                 )
                 logger.info("llm_client_initialized", provider="openai")
                 return _client_instance
@@ -211,6 +210,12 @@ async def get_llm_client():
         )
 
 
+def reset_llm_client() -> None:
+    """Drop the ``get_llm_client()`` singleton; the next call builds a new one."""
+    global _client_instance
+    _client_instance = None
+
+
 # ============================================================================
 # Exceptions
 # ============================================================================
@@ -235,6 +240,11 @@ class LLMParseError(LLMError):
     pass
 
 
+class LLMCircuitOpenError(LLMError):
+    """Provider circuit breaker is open; the call failed fast."""
+    pass
+
+
 # ============================================================================
 # Helper Functions
 # ============================================================================
@@ -329,32 +339,113 @@ T = TypeVar('T', bound=BaseModel)
 class ProductionLLMClient:
     """A production-grade client wrapper that exposes `complete` and
     `stream` async methods and implements retry, timeout handling and
-    structured-output helpers. Internally uses `get_llm_client()`.
+    structured-output helpers. Internally uses `get_llm_client()`, or the
+    pooled client for a non-default `model` (model/client_pool.py). Calls go
+    through the (provider, model) circuit breakers and fallback chain
+    (model/circuit_breaker.py), and each provider request or stream holds
+    an ``llm_calls`` admission slot (utils/admission.py).
     """
 
     def __init__(self, config: Optional[LLMConfig] = None, logger: Optional[Any] = None):
         self.config = config or get_llm_config()
         self.logger = logger or structlog.get_logger(__name__)
 
+    @staticmethod
+    def _cassette_key(source: str, prompt: str, system_prompt: Optional[str], model: str,
+                      max_tokens: int, temperature: float, context: Optional[str], kwargs: dict) -> str:
+        # Local import: the cassette module imports from this one
+        from ..model.cassette import cassette_key
+        if context:
+            kwargs = dict(kwargs, context=context)
+        return cassette_key(source, model, system_prompt or "", prompt, max_tokens, temperature,
+                            json.dumps(kwargs, sort_keys=True, default=repr))
+
+    @staticmethod
+    def _layout(prompt: str, system_prompt: Optional[str], model: str, max_tokens: int,
+                context: Optional[str], tools: Optional[List[Any]]) -> Any:
+        """The request's ``PromptLayout``, fitted to ``model``'s context window."""
+        # Local import: the prompt layout module imports from this one
+        from ..model.prompt_layout import assemble_prompt, fit_to_context_window
+        return fit_to_context_window(
+            assemble_prompt(system_prompt or DEFAULT_SYSTEM_PROMPT, prompt, tools, context), model, max_tokens,
+        )
+
+    @staticmethod
+    def _messages_wrapper(layout: Any, cache: bool) -> List[Any]:
+        """LangChain ``agenerate`` input: one message list for ``layout``."""
+        HumanMessage, SystemMessage = message_classes()
+        if HumanMessage is not None and SystemMessage is not None:
+            return [layout.langchain_messages(SystemMessage, HumanMessage, cache=cache)]
+        return [layout.dict_messages()]
+
+    def _record_usage(self, model: str, response: Any) -> None:
+        """Export token usage, including prompt-cache reads, like ``call_llm``."""
+        from ..model.prompt_layout import record_prompt_usage
+        usage = record_prompt_usage(model, response)
+        if usage is not None:
+            self.logger.info("llm_usage", model=model, **usage.to_dict())
+
     async def complete(self,
                        prompt: str,
                        system_prompt: Optional[str] = None,
                        model: Optional[str] = None,
                        max_tokens: Optional[int] = None,
                        temperature: Optional[float] = None,
+                       context: Optional[str] = None,
                        **kwargs) -> str:
-        """Return a full completion as text."""
+        """Return a full completion as text (recorded/replayed in cassette mode).
+
+        ``context`` (conversation history) is laid out between the system
+        prompt and ``prompt`` with a cache breakpoint (model/prompt_layout.py).
+        """
+        from ..model.cassette import get_cassette
+        # Local import: the breaker module imports from this one
+        from ..model.circuit_breaker import get_circuit_breakers
         cfg = self.config
         model = model or cfg.default_model
-        system_prompt = system_prompt or DEFAULT_SYSTEM_PROMPT
         max_tokens = max_tokens or cfg.default_max_tokens
         temperature = temperature or cfg.default_temperature
 
-        enhanced_system = _build_system_prompt_with_tools(system_prompt, kwargs.get('tools'))
+        def provider() -> Any:
+            return get_circuit_breakers().call(
+                model, lambda target: self._complete_provider(prompt, system_prompt, target, max_tokens, temperature, context, **kwargs),
+            )
+
+        cassette = get_cassette()
+        if cassette.active:
+            key = self._cassette_key("complete", prompt, system_prompt, model, max_tokens, temperature, context, kwargs)
+            return await cassette.call(key, "ProductionLLMClient.complete", model, provider)
+        return await provider()
+
+    async def _complete_provider(self,
+                                 prompt: str,
+                                 system_prompt: Optional[str],
+                                 model: str,
+                                 max_tokens: int,
+                                 temperature: float,
+                                 context: Optional[str] = None,
+                                 **kwargs) -> str:
+        # Provider requests share the llm_calls pool with model/llm.py
+        async with get_admission_controller().llm_calls.slot():
+            return await self._request_completion(prompt, system_prompt, model, max_tokens, temperature, context, **kwargs)
+
+    async def _request_completion(self,
+                                  prompt: str,
+                                  system_prompt: Optional[str],
+                                  model: str,
+                                  max_tokens: int,
+                                  temperature: float,
+                                  context: Optional[str] = None,
+                                  **kwargs) -> str:
+        cfg = self.config
+        layout = self._layout(prompt, system_prompt, model, max_tokens, context, kwargs.get('tools'))
 
-        client = await get_llm_client()
+        # Local imports: the client pool and prompt layout modules import from this one
+        from ..model.client_pool import resolve_llm_client
+        from ..model.prompt_layout import supports_cache_control
+        client = await resolve_llm_client(model)
+        cache_breakpoints = supports_cache_control(client)
 
-        # Build messages wrapper for langchain-style apis
         try:
             # Prefer ChatModel-style generation when available
             if hasattr(client, 'messages') and hasattr(client.messages, 'create'):
@@ -363,25 +454,25 @@ class ProductionLLMClient:
                         model=model,
                         max_tokens=max_tokens,
                         temperature=temperature,
-                        system=enhanced_system,
-                        messages=[{"role": "user", "content": prompt}],
+                        **layout.anthropic_request(cache=cache_breakpoints),
                         **kwargs
                     ),
                     timeout=cfg.timeout
                 )
             elif hasattr(client, 'agenerate'):
                 # LangChain agenerate accepts a list of message lists
-                messages_wrapper = [[{"role": "system", "content": enhanced_system}, {"role": "user", "content": prompt}]]
+                messages_wrapper = self._messages_wrapper(layout, cache_breakpoints)
                 try:
                     resp = await asyncio.wait_for(client.agenerate(messages_wrapper, **kwargs), timeout=cfg.timeout)
                 except TypeError:
                     resp = await asyncio.wait_for(client.agenerate(messages=messages_wrapper, **kwargs), timeout=cfg.timeout)
             elif hasattr(client, 'apredict'):
-                resp = await asyncio.wait_for(client.apredict(prompt, **kwargs), timeout=cfg.timeout)
+                resp = await asyncio.wait_for(client.apredict(layout.user_text, **kwargs), timeout=cfg.timeout)
             elif hasattr(client, 'predict'):
-                resp = await asyncio.wait_for(asyncio.to_thread(lambda: client.predict(prompt, **kwargs)), timeout=cfg.timeout)
+                resp = await asyncio.wait_for(asyncio.to_thread(lambda: client.predict(layout.user_text, **kwargs)), timeout=cfg.timeout)
             else:
                 raise RuntimeError("No supported API on underlying LLM client")
+            self._record_usage(model, resp)
 
             # Normalize response to string
             if isinstance(resp, str):
@@ -413,80 +504,154 @@ class ProductionLLMClient:
                      model: Optional[str] = None,
                      max_tokens: Optional[int] = None,
                      temperature: Optional[float] = None,
+                     context: Optional[str] = None,
                      **kwargs) -> AsyncGenerator[str, None]:
         """Attempt to stream tokens from the underlying client. Falls back to
         returning the full completion as a single chunk if true streaming is
-        not available.
+        not available. Recorded/replayed with inter-token timing in cassette
+        mode (see model/cassette.py). ``context`` is laid out as in
+        ``complete``.
         """
+        from ..model.cassette import get_cassette
+        from ..model.circuit_breaker import get_circuit_breakers
         cfg = self.config
         model = model or cfg.default_model
-        system_prompt = system_prompt or DEFAULT_SYSTEM_PROMPT
         max_tokens = max_tokens or cfg.default_max_tokens
         temperature = temperature or cfg.default_temperature
 
-        enhanced_system = _build_system_prompt_with_tools(system_prompt, kwargs.get('tools'))
-
-        client = await get_llm_client()
+        def provider() -> AsyncGenerator[str, None]:
+            return get_circuit_breakers().stream(
+                model, lambda target: self._stream_provider(prompt, system_prompt, target, max_tokens, temperature, context, **kwargs),
+            )
 
-        # Try LangChain callback streaming
-        if 'AsyncCallbackHandler' in globals() and AsyncCallbackHandler is not None and hasattr(client, 'agenerate'):
-            q: asyncio.Queue = asyncio.Queue()
+        # Not attached to the context: this generator suspends at every yield
+        stream_span = tracing.start_span("llm.stream", model=model)
+        chunk_count = 0
+        cassette = get_cassette()
+        if cassette.active:
+            key = self._cassette_key("stream", prompt, system_prompt, model, max_tokens, temperature, context, kwargs)
+            tokens = cassette.stream(key, "ProductionLLMClient.stream", model, provider)
+        else:
+            tokens = provider()
+        try:
+            async for token in tokens:
+                chunk_count += 1
+                yield token
+        except Exception as exc:
+            stream_span.record_error(exc)
+            raise
+        except (asyncio.CancelledError, GeneratorExit):
+            stream_span.set_attribute("cancelled", True)
+            raise
+        finally:
+            stream_span.set_attribute("chunks", chunk_count)
+            stream_span.end()
+            await tokens.aclose()
+
+    async def _stream_provider(self,
+                               prompt: str,
+                               system_prompt: Optional[str],
+                               model: str,
+                               max_tokens: int,
+                               temperature: float,
+                               context: Optional[str] = None,
+                               **kwargs) -> AsyncGenerator[str, None]:
+        layout = self._layout(prompt, system_prompt, model, max_tokens, context, kwargs.get('tools'))
+
+        # Local imports: the client pool and prompt layout modules import from this one
+        from ..model.client_pool import resolve_llm_client
+        from ..model.prompt_layout import supports_cache_control
+        client = await resolve_llm_client(model)
+        cache_breakpoints = supports_cache_control(client)
+        record_usage = self._record_usage
+
+        # Held for the lifetime of the stream
+        permit = await get_admission_controller().llm_calls.acquire()
+        streamed = 0
+        try:
+            # Try LangChain callback streaming
+            AsyncCallbackHandler = async_callback_handler()
+            if AsyncCallbackHandler is not None and hasattr(client, 'agenerate'):
+                q: asyncio.Queue = asyncio.Queue()
 
-            class _QHandler(AsyncCallbackHandler):
-                async def on_llm_new_token(self, token: str, **_):
-                    await q.put(token)
+                class _QHandler(AsyncCallbackHandler):
+                    async def on_llm_new_token(self, token: str, **_):
+                        await q.put(token)
 
-                async def on_llm_end(self, **_):
-                    await q.put(None)
+                    async def on_llm_end(self, response: Any = None, **_):
+                        record_usage(model, response)
+                        await q.put(None)
 
-            handler = _QHandler()
+                handler = _QHandler()
+                messages_wrapper = self._messages_wrapper(layout, cache_breakpoints)
 
-            async def _runner():
-                try:
+                async def _runner():
                     try:
-                        await client.agenerate([[{"role": "system", "content": enhanced_system}, {"role": "user", "content": prompt}]], callbacks=[handler])
-                    except TypeError:
-                        await client.agenerate(messages=[[{"role": "system", "content": enhanced_system}, {"role": "user", "content": prompt}]], callbacks=[handler])
-                except Exception:
-                    try:
-                        await q.put(None)
+                        try:
+                            await client.agenerate(messages_wrapper, callbacks=[handler])
+                        except TypeError:
+                            await client.agenerate(messages=messages_wrapper, callbacks=[handler])
                     except Exception:
-                        pass
+                        # Unblock the consumer, then fail the stream via ``await task``
+                        # so the breaker counts it and the chain can fall back
+                        try:
+                            await q.put(None)
+                        except Exception:
+                            pass
+                        raise
 
-            task = asyncio.create_task(_runner())
+                task = asyncio.create_task(_runner())
 
-            try:
-                while True:
-                    token = await q.get()
-                    if token is None:
-                        break
-                    if token:
-                        yield token
-                await task
+                try:
+                    while True:
+                        token = await q.get()
+                        if token is None:
+                            break
+                        if token:
+                            streamed += 1
+                            yield token
+                    await task
+                    return
+                finally:
+                    # Cancellation or the consumer closing us at a yield must not
+                    # leave the provider call running
+                    if not task.done():
+                        task.cancel()
+
+            # Provider SDK streaming
+            if hasattr(client, 'messages') and hasattr(client.messages, 'stream'):
+                async with client.messages.stream(
+                    model=model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    **layout.anthropic_request(cache=cache_breakpoints),
+                    **kwargs
+                ) as stream:
+                    async for text in stream.text_stream:
+                        if text:
+                            streamed += 1
+                            yield text
+                # Best-effort usage report
+                try:
+                    self._record_usage(model, await stream.get_final_message())
+                except Exception:
+                    pass
                 return
-            except asyncio.CancelledError:
-                task.cancel()
-                raise
-
-        # Provider SDK streaming
-        if hasattr(client, 'messages') and hasattr(client.messages, 'stream'):
-            async with client.messages.stream(
-                model=model,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                system=enhanced_system,
-                messages=[{"role": "user", "content": prompt}],
-                **kwargs
-            ) as stream:
-                async for text in stream.text_stream:
-                    if text:
-                        yield text
-            return
-
-        # Fallback: non-streaming
-        content = await self.complete(prompt, system_prompt=system_prompt, model=model, max_tokens=max_tokens, temperature=temperature, **kwargs)
-        if content:
-            yield content
+
+            # Fallback: non-streaming, under this stream's permit
+            content = await self._request_completion(prompt, system_prompt, model, max_tokens, temperature, context, **kwargs)
+            if content:
+                streamed += 1
+                yield content
+        except (asyncio.CancelledError, GeneratorExit):
+            # Upper bound: the rest of the max_tokens budget was not generated
+            saved = max(0, max_tokens - streamed)
+            LLM_STREAMS_CANCELLED.labels("answer").inc()
+            LLM_TOKENS_SAVED.labels("answer").inc(saved)
+            self.logger.info("llm_stream_cancelled", model=model, tokens_streamed=streamed, tokens_saved_estimate=saved)
+            raise
+        finally:
+            permit.release()
 
 
 class MockLLMClient:
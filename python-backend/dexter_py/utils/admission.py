@@ -0,0 +1,199 @@
+"""Admission control for agent runs and LLM calls.
+
+Each pool (``runs``, ``llm_calls``) admits up to ``limit`` concurrent holders.
+Further callers wait in a bounded FIFO queue until a slot frees up or their
+deadline passes; when the queue itself is full they are rejected immediately,
+so the API can answer 503 with ``Retry-After`` instead of piling more work onto
+a saturated provider.
+
+Usage:
+    permit = await get_admission_controller().runs.acquire()
+    try:
+        ...
+    finally:
+        permit.release()
+
+    async with get_admission_controller().llm_calls.slot():
+        ...
+"""
+
+from typing import Optional
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import asyncio
+import math
+import os
+import time
+
+import structlog
+
+from .metrics import ADMISSION_ACTIVE, ADMISSION_QUEUE_DEPTH, ADMISSION_WAIT_SECONDS, ADMISSION_REJECTED
+
+
+class AdmissionRejected(Exception):
+    """Raised when a pool is saturated: queue full or wait deadline exceeded."""
+
+    def __init__(self, pool: str, reason: str, retry_after: int) -> None:
+        super().__init__(f"{pool} at capacity ({reason}); retry after {retry_after}s")
+        self.pool = pool
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class AdmissionConfig:
+    """Limits for admission control (0 disables a limit)."""
+    max_concurrent_runs: int = 8
+    max_concurrent_llm_calls: int = 16
+    max_queue: int = 32  # Waiters per pool before rejecting outright
+    queue_timeout: float = 15.0  # Seconds a caller may wait for a slot
+    retry_after: int = 5  # Seconds suggested to rejected clients
+
+    @classmethod
+    def from_env(cls) -> "AdmissionConfig":
+        """Build config from AGENT_MAX_CONCURRENT_RUNS, LLM_MAX_CONCURRENT_CALLS, ADMISSION_* vars."""
+        return cls(
+            max_concurrent_runs=int(os.getenv("AGENT_MAX_CONCURRENT_RUNS", "8")),
+            max_concurrent_llm_calls=int(os.getenv("LLM_MAX_CONCURRENT_CALLS", "16")),
+            max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "32")),
+            queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_S", "15")),
+            retry_after=int(os.getenv("ADMISSION_RETRY_AFTER_S", "5")),
+        )
+
+
+class Permit:
+    """A held slot; ``release()`` is idempotent."""
+
+    __slots__ = ("_limiter", "_released")
+
+    def __init__(self, limiter: Optional["AdmissionLimiter"]) -> None:
+        self._limiter = limiter
+        self._released = limiter is None
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._limiter._release()
+
+
+class AdmissionLimiter:
+    """
+    Concurrency limit with a bounded, deadline-aware wait queue.
+
+    Args:
+        name: Pool name used in metrics and errors
+        limit: Max concurrent holders (0 means unlimited)
+        max_queue: Max waiters before new callers are rejected
+        queue_timeout: Default seconds to wait for a slot
+        retry_after: Seconds reported on rejection
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        max_queue: int = 32,
+        queue_timeout: float = 15.0,
+        retry_after: int = 5,
+    ) -> None:
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit) if limit > 0 else None
+        self.logger = structlog.get_logger(__name__)
+
+    @property
+    def saturated(self) -> bool:
+        """True when a new caller would have to queue."""
+        return self._semaphore is not None and (self._semaphore.locked() or self.waiting > 0)
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        ADMISSION_REJECTED.labels(self.name, reason).inc()
+        self.logger.warning("admission_rejected", pool=self.name, reason=reason, active=self.active, waiting=self.waiting)
+        return AdmissionRejected(self.name, reason, self.retry_after)
+
+    async def acquire(self, timeout: Optional[float] = None) -> Permit:
+        """
+        Wait for a slot.
+
+        Args:
+            timeout: Max seconds to wait (defaults to ``queue_timeout``;
+                ``math.inf`` waits without a deadline)
+
+        Returns:
+            Permit that must be released
+
+        Raises:
+            AdmissionRejected: If the queue is full or the deadline passes
+        """
+        if self._semaphore is None:
+            return Permit(None)
+
+        if self._semaphore.locked() or self.waiting:
+            if self.waiting >= self.max_queue:
+                raise self._reject("queue_full")
+            self.waiting += 1
+            ADMISSION_QUEUE_DEPTH.labels(self.name).inc()
+            start = time.perf_counter()
+            deadline = self.queue_timeout if timeout is None else timeout
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), None if deadline == math.inf else deadline)
+            except asyncio.TimeoutError:
+                raise self._reject("queue_timeout")
+            finally:
+                self.waiting -= 1
+                ADMISSION_QUEUE_DEPTH.labels(self.name).dec()
+                ADMISSION_WAIT_SECONDS.labels(self.name).observe(time.perf_counter() - start)
+        else:
+            await self._semaphore.acquire()
+            ADMISSION_WAIT_SECONDS.labels(self.name).observe(0.0)
+
+        self.active += 1
+        ADMISSION_ACTIVE.labels(self.name).inc()
+        return Permit(self)
+
+    def _release(self) -> None:
+        self.active -= 1
+        ADMISSION_ACTIVE.labels(self.name).dec()
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self, timeout: Optional[float] = None):
+        """Hold a slot for the duration of the ``async with`` block."""
+        permit = await self.acquire(timeout)
+        try:
+            yield permit
+        finally:
+            permit.release()
+
+
+class AdmissionController:
+    """The run and LLM call pools shared by the whole process."""
+
+    def __init__(self, config: Optional[AdmissionConfig] = None) -> None:
+        self.config = config or AdmissionConfig.from_env()
+        c = self.config
+        self.runs = AdmissionLimiter("runs", c.max_concurrent_runs, c.max_queue, c.queue_timeout, c.retry_after)
+        self.llm_calls = AdmissionLimiter("llm_calls", c.max_concurrent_llm_calls, c.max_queue, c.queue_timeout, c.retry_after)
+
+
+_admission_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get the process-wide admission controller."""
+    global _admission_controller
+    if _admission_controller is None:
+        _admission_controller = AdmissionController()
+    return _admission_controller
+
+
+def configure_admission(config: AdmissionConfig) -> AdmissionController:
+    """Replace the process-wide admission controller (e.g. at startup or in tests)."""
+    global _admission_controller
+    _admission_controller = AdmissionController(config)
+    return _admission_controller
@@ -0,0 +1,260 @@
+"""Push-based dashboard feed: one aggregation per tick, fanned out to every tab.
+
+Polling dashboards cost one ``/api/recent`` + ``/api/stats`` + full
+``/metrics`` scrape per open tab every few seconds. ``DashboardBroadcaster``
+instead runs a single task that, every ``interval``:
+
+- reads requests newer than its cursor from the ``RecentRequestLog``,
+- takes one ``RollingStats`` snapshot (per-route/per-client percentiles),
+- reads in-flight runs and per-phase timings from the Prometheus collectors,
+
+diffs that against the previous tick and encodes the *delta* once as an SSE
+frame, which is queued to every subscriber. A new subscriber first receives a
+``snapshot`` frame with the full current state. A subscriber whose queue fills
+up (a stalled tab) has its backlog replaced by a fresh snapshot rather than
+slowing the broadcaster. The task runs only while someone is subscribed.
+
+Frames are ``data: {"type": "snapshot"|"delta", "seq": n, "ts": ..., ...}``
+with optional ``requests`` (new entries, newest first), ``latency``
+(``routes``/``clients`` whose summary changed), ``in_flight``
+(``requests``/``runs``) and ``phases`` (``count``, ``avg_ms`` over all runs and
+``recent_avg_ms`` over the last tick). A ``: keepalive`` comment is sent when
+nothing changed for ``heartbeat`` seconds.
+
+Configure with DASHBOARD_STREAM_INTERVAL_MS, DASHBOARD_STREAM_MAX_RECENT and
+DASHBOARD_STREAM_HEARTBEAT_S.
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import asyncio
+import json
+import os
+import time
+
+import structlog
+
+from .metrics import PHASE_DURATION, RUNS_IN_FLIGHT
+from .request_stats import RecentRequestLog, RollingStats
+
+
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+@dataclass
+class DashboardFeedConfig:
+    """Configuration for the dashboard broadcaster."""
+    interval: float = 1.0  # Seconds between aggregations
+    max_recent: int = 50  # New requests sent per frame (and kept for snapshots)
+    heartbeat: float = 15.0  # Keepalive after this many idle seconds
+    queue_size: int = 16  # Frames buffered per subscriber before it is resynced
+
+    @classmethod
+    def from_env(cls) -> "DashboardFeedConfig":
+        """Build config from DASHBOARD_STREAM_* environment variables."""
+        return cls(
+            interval=float(os.getenv("DASHBOARD_STREAM_INTERVAL_MS", "1000")) / 1000.0,
+            max_recent=int(os.getenv("DASHBOARD_STREAM_MAX_RECENT", "50")),
+            heartbeat=float(os.getenv("DASHBOARD_STREAM_HEARTBEAT_S", "15")),
+        )
+
+
+def _encode(payload: Dict[str, Any]) -> bytes:
+    return f"data: {json.dumps(payload, separators=(',', ':'), default=repr)}\n\n".encode("utf-8")
+
+
+def _gauge_value(gauge: Any) -> float:
+    for metric in gauge.collect():
+        for sample in metric.samples:
+            return sample.value
+    return 0.0
+
+
+def _phase_totals() -> Dict[str, List[float]]:
+    """``phase -> [count, sum_seconds]`` across outcomes."""
+    totals: Dict[str, List[float]] = {}
+    for metric in PHASE_DURATION.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_count"):
+                totals.setdefault(sample.labels["phase"], [0.0, 0.0])[0] += sample.value
+            elif sample.name.endswith("_sum"):
+                totals.setdefault(sample.labels["phase"], [0.0, 0.0])[1] += sample.value
+    return totals
+
+
+def _round(summary: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: round(v, 1) if isinstance(v, float) else v for k, v in summary.items()}
+
+
+class DashboardBroadcaster:
+    """
+    Shared aggregation task feeding any number of dashboard streams.
+
+    Args:
+        request_stats: Rolling per-route/per-client stats (the middleware's)
+        recent_log: Recent request log (the middleware's)
+        config: Feed configuration (defaults to DashboardFeedConfig.from_env())
+    """
+
+    def __init__(
+        self,
+        request_stats: RollingStats,
+        recent_log: RecentRequestLog,
+        config: Optional[DashboardFeedConfig] = None,
+    ) -> None:
+        self.request_stats = request_stats
+        self.recent_log = recent_log
+        self.config = config or DashboardFeedConfig.from_env()
+        self.logger = structlog.get_logger(__name__)
+        self.ticks = 0  # Aggregations performed (one per interval, not per subscriber)
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._seq = 0
+        self._cursor = recent_log.last_seq
+        self._last_frame_at = 0.0
+        # Current full state, for snapshot frames
+        self._recent: List[Dict[str, Any]] = []
+        self._latency: Dict[str, Dict[str, Any]] = {"routes": {}, "clients": {}}
+        self._in_flight: Dict[str, Any] = {"requests": 0, "runs": 0}
+        self._phases: Dict[str, Dict[str, Any]] = {}
+        self._phase_totals: Dict[str, List[float]] = {}
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    # ------------------------------------------------------------------
+    # Aggregation
+    # ------------------------------------------------------------------
+
+    def aggregate(self) -> Dict[str, Any]:
+        """Fold current stats into the state; returns only what changed."""
+        self.ticks += 1
+        delta: Dict[str, Any] = {}
+
+        new = self.recent_log.since(self._cursor, self.config.max_recent)
+        self._cursor = self.recent_log.last_seq
+        if new:
+            delta["requests"] = new
+            self._recent = (new + self._recent)[:self.config.max_recent]
+
+        stats = self.request_stats.snapshot()
+        latency: Dict[str, Dict[str, Any]] = {}
+        for dimension in ("routes", "clients"):
+            current = self._latency[dimension]
+            for key, summary in stats[dimension].items():
+                summary = _round(summary)
+                if current.get(key) != summary:
+                    current[key] = summary
+                    latency.setdefault(dimension, {})[key] = summary
+        if latency:
+            delta["latency"] = latency
+
+        in_flight = {"requests": stats["in_flight"], "runs": int(_gauge_value(RUNS_IN_FLIGHT))}
+        if in_flight != self._in_flight:
+            self._in_flight = in_flight
+            delta["in_flight"] = in_flight
+
+        phases: Dict[str, Dict[str, Any]] = {}
+        for phase, (count, total) in _phase_totals().items():
+            prev_count, prev_total = self._phase_totals.get(phase, (0.0, 0.0))
+            if count == prev_count:
+                continue
+            self._phase_totals[phase] = [count, total]
+            phases[phase] = self._phases[phase] = {
+                "count": int(count),
+                "avg_ms": round(total / count * 1000, 1),
+                "recent_avg_ms": round((total - prev_total) / (count - prev_count) * 1000, 1),
+            }
+        if phases:
+            delta["phases"] = phases
+        return delta
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Full current state (sent to new and resynced subscribers)."""
+        return {
+            "type": "snapshot",
+            "seq": self._seq,
+            "ts": time.time(),
+            "requests": self._recent,
+            "latency": self._latency,
+            "in_flight": self._in_flight,
+            "phases": self._phases,
+        }
+
+    def tick(self) -> None:
+        """Aggregate once and queue the resulting frame to every subscriber."""
+        delta = self.aggregate()
+        now = time.monotonic()
+        if delta:
+            self._seq += 1
+            frame = _encode({"type": "delta", "seq": self._seq, "ts": time.time(), **delta})
+        elif now - self._last_frame_at >= self.config.heartbeat:
+            frame = KEEPALIVE_FRAME
+        else:
+            return
+        self._last_frame_at = now
+        snapshot: Optional[bytes] = None
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Stalled tab: replace its backlog with the current state
+                if snapshot is None:
+                    snapshot = _encode(self.snapshot())
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(snapshot)
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            try:
+                self.tick()
+            except Exception as e:
+                self.logger.warning("dashboard_feed_tick_failed", error=str(e))
+            await asyncio.sleep(self.config.interval)
+
+    # ------------------------------------------------------------------
+    # Subscriptions
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue]:
+        """
+        Register a subscriber queue of encoded frames, starting with a snapshot.
+        The broadcaster task starts with the first subscriber and stops after
+        the last one leaves.
+        """
+        if not self._subscribers:
+            # Nobody was watching: bring the state up to date before the snapshot
+            self.aggregate()
+        queue: asyncio.Queue = asyncio.Queue(self.config.queue_size)
+        queue.put_nowait(_encode(self.snapshot()))
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+            if not self._subscribers and self._task is not None:
+                self._task.cancel()
+                self._task = None
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """Frames for one SSE response, until the client goes away."""
+        async with self.subscribe() as queue:
+            while True:
+                yield await queue.get()
+
+    async def close(self) -> None:
+        """Stop the broadcaster task (application shutdown)."""
+        self._subscribers.clear()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,316 @@
+"""Shared, instrumented HTTP connection pool for LLM providers.
+
+Every provider SDK used to build its own ``httpx.AsyncClient`` (LangChain even
+builds one per chat model instance), so each client paid its own TCP/TLS
+handshakes and nothing bounded the total number of sockets. This module owns
+one process-wide ``PooledTransport``; providers get thin ``httpx.AsyncClient``
+wrappers around it (``pooled_async_client()``) so keep-alive connections are
+reused across providers, model instances and requests.
+
+``PooledTransport`` adds on top of httpx's pool:
+
+- a per-host connection cap (LLM_HTTP_MAX_PER_HOST); requests beyond it wait,
+  and the wait is exported as ``dexter_llm_http_pool_wait_seconds``,
+- pool utilization per host (in-use connections / cap),
+- TCP connect and TLS handshake times, and new vs reused connection counts,
+  taken from httpcore's ``trace`` extension.
+
+Closing a wrapper client (SDKs do this in ``close()``) never closes the shared
+pool; ``close_http_pool()`` does, at application shutdown. It also drops the
+memoized clients built on the pool (``get_llm_client()`` and the client pool),
+so a restart in the same process rebuilds them on a fresh one.
+
+Configure with LLM_HTTP_POOL_ENABLED, LLM_HTTP_MAX_CONNECTIONS,
+LLM_HTTP_MAX_PER_HOST, LLM_HTTP_KEEPALIVE, LLM_HTTP_KEEPALIVE_EXPIRY_S,
+LLM_HTTP2 (needs the ``h2`` package), LLM_HTTP_CONNECT_TIMEOUT_S and
+LLM_HTTP_POOL_TIMEOUT_S.
+"""
+
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+from dataclasses import dataclass
+import asyncio
+import importlib.util
+import os
+import time
+
+import httpx
+import structlog
+
+from .metrics import (
+    LLM_HTTP_CONNECT_SECONDS,
+    LLM_HTTP_POOL_IN_USE,
+    LLM_HTTP_POOL_UTILIZATION,
+    LLM_HTTP_POOL_WAIT_SECONDS,
+    LLM_HTTP_REQUESTS,
+)
+
+
+@dataclass
+class HTTPPoolConfig:
+    """Configuration for the shared provider connection pool."""
+    enabled: bool = True
+    max_connections: int = 100  # Sockets across all hosts
+    max_per_host: int = 20  # Concurrent requests (connections) per host
+    keepalive_connections: int = 20  # Idle connections kept open
+    keepalive_expiry: float = 30.0  # Seconds an idle connection is kept
+    http2: bool = False  # Multiplex requests over one connection per host
+    connect_timeout: float = 10.0
+    pool_timeout: float = 30.0  # Max wait for a free connection
+    read_timeout: float = 120.0  # Default for clients that set none per request
+
+    @classmethod
+    def from_env(cls) -> "HTTPPoolConfig":
+        """Build config from LLM_HTTP_* environment variables."""
+        return cls(
+            enabled=os.getenv("LLM_HTTP_POOL_ENABLED", "1").lower() not in ("0", "false", "no"),
+            max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100")),
+            max_per_host=int(os.getenv("LLM_HTTP_MAX_PER_HOST", "20")),
+            keepalive_connections=int(os.getenv("LLM_HTTP_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY_S", "30")),
+            http2=os.getenv("LLM_HTTP2", "0").lower() in ("1", "true", "yes"),
+            connect_timeout=float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT_S", "10")),
+            pool_timeout=float(os.getenv("LLM_HTTP_POOL_TIMEOUT_S", "30")),
+            read_timeout=float(os.getenv("LLM_TIMEOUT", "120")),
+        )
+
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout, pool=self.pool_timeout)
+
+
+# ============================================================================
+# Transport
+# ============================================================================
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that frees its host slot when closed (streams hold the connection)."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class _HostSlots:
+    """Per-host connection cap and in-use accounting."""
+
+    def __init__(self, host: str, limit: int) -> None:
+        self.host = host
+        self.limit = limit
+        self.in_use = 0
+        self.semaphore = asyncio.Semaphore(limit)
+        self._in_use = LLM_HTTP_POOL_IN_USE.labels(host)
+        self._utilization = LLM_HTTP_POOL_UTILIZATION.labels(host)
+
+    def acquired(self) -> None:
+        self.in_use += 1
+        self._report()
+
+    def release(self) -> None:
+        self.in_use -= 1
+        self.semaphore.release()
+        self._report()
+
+    def _report(self) -> None:
+        self._in_use.set(self.in_use)
+        self._utilization.set(self.in_use / self.limit)
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """
+    Shared async transport with a per-host cap and pool metrics.
+
+    Args:
+        config: Pool configuration (defaults to HTTPPoolConfig.from_env())
+        transport: Inner transport (defaults to an ``httpx.AsyncHTTPTransport``
+            sized from ``config``); tests pass an ``httpx.MockTransport``
+    """
+
+    def __init__(
+        self,
+        config: Optional[HTTPPoolConfig] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.config = config or HTTPPoolConfig.from_env()
+        self.logger = structlog.get_logger(__name__)
+        self._transport = transport or self._build_transport()
+        self._hosts: Dict[str, _HostSlots] = {}
+        self.closed = False
+
+    def _build_transport(self) -> httpx.AsyncHTTPTransport:
+        http2 = self.config.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            self.logger.warning("http2_unavailable", reason="h2 package not installed")
+            http2 = False
+        limits = httpx.Limits(
+            max_connections=self.config.max_connections,
+            max_keepalive_connections=self.config.keepalive_connections,
+            keepalive_expiry=self.config.keepalive_expiry,
+        )
+        return httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+
+    def _slots(self, host: str) -> _HostSlots:
+        slots = self._hosts.get(host)
+        if slots is None:
+            slots = self._hosts[host] = _HostSlots(host, self.config.max_per_host)
+        return slots
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host or "unknown"
+        slots = self._slots(host)
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(slots.semaphore.acquire(), self.config.pool_timeout)
+        except asyncio.TimeoutError:
+            raise httpx.PoolTimeout(f"no free connection to {host} within {self.config.pool_timeout}s", request=request)
+        LLM_HTTP_POOL_WAIT_SECONDS.labels(host).observe(time.perf_counter() - start)
+        slots.acquired()
+
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                slots.release()
+
+        connection = {"kind": "reused"}
+        request.extensions = {**request.extensions, "trace": self._tracer(host, connection, request.extensions.get("trace"))}
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        LLM_HTTP_REQUESTS.labels(host, connection["kind"]).inc()
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    @staticmethod
+    def _tracer(host: str, connection: Dict[str, str], inner: Optional[Callable[..., Any]]) -> Callable[..., Any]:
+        """httpcore ``trace`` callback timing TCP connect and TLS handshake."""
+        started: Dict[str, float] = {}
+        stages = {"connect_tcp": "tcp", "start_tls": "tls"}
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            _, _, event = event_name.partition(".")
+            step, _, phase = event.rpartition(".")
+            stage = stages.get(step)
+            if stage is not None:
+                if phase == "started":
+                    started[stage] = time.perf_counter()
+                    if stage == "tcp":
+                        connection["kind"] = "new"
+                elif phase == "complete" and stage in started:
+                    LLM_HTTP_CONNECT_SECONDS.labels(host, stage).observe(time.perf_counter() - started.pop(stage))
+            if inner is not None:
+                await inner(event_name, info)
+
+        return trace
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """In-use connections and cap per host."""
+        return {
+            host: {"in_use": slots.in_use, "limit": slots.limit}
+            for host, slots in self._hosts.items()
+        }
+
+    async def aclose(self) -> None:
+        # Called by every wrapper client's aclose(); the pool outlives them
+        return None
+
+    async def close(self) -> None:
+        """Close the pooled connections (application shutdown)."""
+        if not self.closed:
+            self.closed = True
+            await self._transport.aclose()
+
+
+# ============================================================================
+# Shared pool
+# ============================================================================
+
+_transport: Optional[PooledTransport] = None
+
+
+def get_http_transport() -> PooledTransport:
+    """Get the process-wide pooled transport (created on first use)."""
+    global _transport
+    if _transport is None or _transport.closed:
+        _transport = PooledTransport()
+    return _transport
+
+
+def configure_http_pool(
+    config: Optional[HTTPPoolConfig] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> PooledTransport:
+    """Replace the shared pool (e.g. in tests, with a mock inner transport)."""
+    global _transport
+    _transport = PooledTransport(config, transport)
+    return _transport
+
+
+async def close_http_pool() -> None:
+    """
+    Close the shared pool's connections; the next use opens a new pool.
+
+    Memoized LLM clients hold the closed transport, so they are dropped too
+    and rebuilt on first use.
+    """
+    global _transport
+    if _transport is not None:
+        await _transport.close()
+        _transport = None
+    # Local imports: both modules import this one
+    from ._utils import reset_llm_client
+    from ..model.client_pool import get_client_pool
+    reset_llm_client()
+    get_client_pool().clear()
+
+
+def pooled_async_client(**kwargs: Any) -> httpx.AsyncClient:
+    """
+    New ``httpx.AsyncClient`` backed by the shared pool.
+
+    The client is cheap (no sockets of its own); closing it leaves the pool open.
+    Keyword arguments go to ``httpx.AsyncClient`` (base_url, headers, timeout...).
+    """
+    transport = get_http_transport()
+    kwargs.setdefault("timeout", transport.config.timeout())
+    return httpx.AsyncClient(transport=transport, **kwargs)
+
+
+def _model_fields(cls: Any) -> Any:
+    return getattr(cls, "model_fields", None) or getattr(cls, "__fields__", None) or {}
+
+
+def provider_client_kwargs(cls: Any) -> Dict[str, Any]:
+    """
+    Constructor kwargs injecting the shared pool into a LangChain chat model class.
+
+    ChatOpenAI accepts ``http_async_client``; recent ChatOllama versions accept
+    ``async_client_kwargs`` (passed on to ``httpx.AsyncClient``). Classes with
+    neither (or a disabled pool) get ``{}`` and keep their own client.
+    """
+    if cls is None or not HTTPPoolConfig.from_env().enabled:
+        return {}
+    fields = _model_fields(cls)
+    if "http_async_client" in fields:
+        return {"http_async_client": pooled_async_client()}
+    if "async_client_kwargs" in fields:
+        return {"async_client_kwargs": {"transport": get_http_transport()}}
+    return {}
@@ -0,0 +1,193 @@
+"""Tolerant decoding of JSON objects embedded in LLM output.
+
+Models asked for JSON often wrap it in a markdown fence or prose, or emit
+near-JSON: trailing commas, Python literals (``None``, ``True``), single
+quoted strings, stray unescaped quotes inside strings. ``iter_json_objects``
+handles all of these in a single left-to-right scan. It locates each
+candidate object and hands it to the C decoder; only when that fails is the
+object rewritten, defects and all, in one pass and decoded again:
+
+- text outside the object (prose, ``` fences) is skipped
+- ``{`` only starts a candidate when a key or ``}`` follows it, so braces in
+  prose (``use the {ticker} field``) are passed over
+- a quote only closes a string when ``,`` ``:`` ``}`` ``]`` or the end of the
+  text follows it; other quotes are kept as string content
+- when a candidate still fails to decode, scanning resumes after it, so
+  every character is looked at a bounded number of times
+
+Truncated output (an object that never closes) is not completed: a partial
+object would validate against models whose fields are optional.
+
+Usage:
+    for data in iter_json_objects(llm_output):
+        try:
+            return Model.model_validate(data)
+        except ValidationError:
+            continue
+"""
+
+from typing import Any, Iterator, List, Tuple
+import json
+import re
+
+
+# ``{`` that opens an object: followed by a (quoted) key or by ``}``
+_OBJECT_START = re.compile(r"""\{\s*["'}]""")
+# Outside strings: numbers, bare words, structure and quotes
+_TOKEN = re.compile(r"""-?\d[\d.eE+\-]*|[A-Za-z_]\w*|[{}\[\]:,"']""")
+# What may follow the closing quote of a string
+_STRING_END = re.compile(r"""\s*(?:[,:}\]]|$)""")
+# A run of tokens needing no repair (well-formed double-quoted strings,
+# whitespace, colons, non-trailing commas, numbers, JSON literals), copied in
+# one step. Nothing follows the repetition, so a run once matched is never
+# revisited (plain greedy quantifiers; possessive ones need Python 3.11)
+_CLEAN_RUN = re.compile(
+    r"""(?:"[^"\\]*(?:\\[^'][^"\\]*)*"(?=\s*[,:}\]]|\s*$)"""
+    r"""|\s+|:|,(?!\s*[}\]])|-?\d[\d.eE+\-]*|true|false|null)+"""
+)
+_STRING_SPECIAL = {'"': re.compile(r'["\\]'), "'": re.compile(r"""["'\\]""")}
+
+_LITERALS = {
+    "true": "true", "false": "false", "null": "null",
+    "True": "true", "False": "false", "None": "null",
+    "NaN": "NaN", "Infinity": "Infinity",
+}
+_CLOSERS = {"}": "{", "]": "["}
+_DECODER = json.JSONDecoder(strict=False)
+
+
+def _scan_string(text: str, i: int, quote: str, out: List[str]) -> int:
+    """
+    Copy the string starting after the quote at ``i - 1`` to ``out`` as a
+    double-quoted JSON string.
+
+    Returns:
+        Index after the closing quote, or -1 if the string never closes
+    """
+    special = _STRING_SPECIAL[quote]
+    out.append('"')
+    while True:
+        m = special.search(text, i)
+        if m is None:
+            return -1
+        j = m.start()
+        out.append(text[i:j])
+        c = text[j]
+        if c == "\\":
+            if j + 1 >= len(text):
+                return -1
+            escaped = text[j + 1]
+            # \' is not a JSON escape
+            out.append("'" if escaped == "'" else "\\" + escaped)
+            i = j + 2
+        elif c == quote and _STRING_END.match(text, j + 1):
+            out.append('"')
+            return j + 1
+        elif c == '"':
+            # Unescaped double quote inside the string
+            out.append('\\"')
+            i = j + 1
+        else:
+            # Apostrophe inside a single-quoted string
+            out.append("'")
+            i = j + 1
+
+
+def _scan_object(text: str, start: int) -> Tuple[str, int]:
+    """
+    Rewrite the object opening at ``start`` into strict JSON.
+
+    Returns:
+        (repaired text, index after the object); the text is empty when the
+        object is unbalanced or never closes
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    comma_slot = -1  # Index in ``out`` of a comma that may turn out trailing
+    i = start
+    n = len(text)
+    while i < n:
+        run = _CLEAN_RUN.match(text, i)
+        if run is not None:
+            chunk = run.group()
+            if comma_slot >= 0 and not chunk.isspace():
+                comma_slot = -1
+            out.append(chunk)
+            i = run.end()
+        m = _TOKEN.search(text, i)
+        if m is None:
+            break
+        gap = text[i:m.start()]
+        if gap:
+            if comma_slot >= 0 and not gap.isspace():
+                comma_slot = -1
+            out.append(gap)
+        tok = m.group()
+        i = m.end()
+        c = tok[0]
+        if c == '"' or c == "'":
+            comma_slot = -1
+            i = _scan_string(text, i, c, out)
+            if i < 0:
+                break
+        elif c in "{[":
+            comma_slot = -1
+            stack.append(c)
+            out.append(c)
+        elif c in "}]":
+            if not stack or stack.pop() != _CLOSERS[c]:
+                return "", i
+            if comma_slot >= 0:
+                out[comma_slot] = ""
+                comma_slot = -1
+            out.append(c)
+            if not stack:
+                return "".join(out), i
+        elif c == ",":
+            comma_slot = len(out)
+            out.append(",")
+        else:
+            comma_slot = -1
+            out.append(_LITERALS.get(tok, tok))
+    return "", n
+
+
+def iter_json_objects(text: str) -> Iterator[Any]:
+    """
+    Decode, in order, the JSON objects embedded in ``text``, repairing
+    common LLM defects. Candidates that cannot be decoded are skipped.
+    """
+    pos = 0
+    while True:
+        m = _OBJECT_START.search(text, pos)
+        if m is None:
+            return
+        start = m.start()
+        try:
+            # Well-formed objects (wrapped in prose or a fence or not) are the
+            # common case; the C decoder settles them and stops at the close
+            data, end = _DECODER.raw_decode(text, start)
+        except ValueError:
+            repaired, end = _scan_object(text, start)
+            if repaired:
+                try:
+                    data = json.loads(repaired, strict=False)
+                except ValueError:
+                    repaired = ""
+            if not repaired:
+                pos = max(end, start + 1)
+                continue
+        yield data
+        pos = max(end, start + 1)
+
+
+def loads_lenient(text: str) -> Any:
+    """
+    Decode the first JSON object in ``text``.
+
+    Raises:
+        ValueError: If no object can be decoded
+    """
+    for data in iter_json_objects(text):
+        return data
+    raise ValueError("No JSON object found in content")
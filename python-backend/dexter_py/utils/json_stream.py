@@ -0,0 +1,197 @@
+"""Incremental JSON parsing for streamed LLM output.
+
+The structured phases (understand, plan, reflect) ask the model for a single
+JSON object and receive it token by token. ``StreamingJSONParser`` is fed the
+tokens as they arrive and keeps only scanner state (open containers, string
+and escape flags, the current key), so every character is scanned once no
+matter how the stream is chunked:
+
+- prose or a markdown fence before the first ``{`` is skipped
+- each element of a watched top-level array (e.g. ``tasks``) is decoded and
+  returned from ``feed`` as soon as its closing bracket arrives
+- ``complete`` turns true when the top-level object closes; anything after
+  it is ignored, so callers can stop reading the stream there
+
+Usage:
+    parser = StreamingJSONParser(items=("tasks",))
+    async for token in stream:
+        for item in parser.feed(token):
+            handle(item.key, item.index, item.value)
+        if parser.complete:
+            break
+    plan = parser.value()
+"""
+
+from typing import Any, Iterable, List, NamedTuple, Optional
+import json
+import re
+
+
+_STRUCTURAL = re.compile(r'[{}\[\]",:]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class StreamItem(NamedTuple):
+    """A completed element of a watched array."""
+
+    key: str  # Top-level key holding the array, e.g. "tasks"
+    index: int
+    value: Any
+
+
+class _Frame:
+    """One open object or array."""
+
+    __slots__ = ("is_object", "key", "index", "expect_key", "watched")
+
+    def __init__(self, is_object: bool, watched: bool = False) -> None:
+        self.is_object = is_object
+        self.key: Optional[str] = None  # Objects: key of the value being read
+        self.index = 0  # Arrays: index of the element being read
+        self.expect_key = True
+        self.watched = watched
+
+
+class StreamingJSONParser:
+    """
+    Token-fed scanner for the first JSON object in a stream.
+
+    Args:
+        items: Top-level keys whose array elements are emitted as they
+            complete. Only object and array elements are emitted; scalars
+            arrive with the top-level object.
+    """
+
+    def __init__(self, items: Iterable[str] = ()) -> None:
+        self.items = frozenset(items)
+        self.complete = False
+        self._stack: List[_Frame] = []
+        self._parts: List[str] = []
+        self._text: Optional[str] = None
+        self._in_string = False
+        self._escape = False
+        self._key_parts: Optional[List[str]] = None  # Set while reading an object key
+        self._item_parts: Optional[List[str]] = None  # Set while capturing a watched element
+        self._item_depth = 0
+
+    @property
+    def started(self) -> bool:
+        """True once the top-level ``{`` has been seen."""
+        return bool(self._stack) or self.complete
+
+    @property
+    def text(self) -> str:
+        """Raw text of the top-level object so far (all of it once complete)."""
+        if self._text is not None:
+            return self._text
+        return "".join(self._parts)
+
+    def value(self) -> Any:
+        """
+        Decode the top-level object.
+
+        Raises:
+            ValueError: If the object is incomplete or not valid JSON
+        """
+        if not self.complete:
+            raise ValueError("JSON object is incomplete")
+        return json.loads(self.text)
+
+    def feed(self, chunk: str) -> List[StreamItem]:
+        """
+        Scan the next chunk of the stream.
+
+        Returns:
+            Watched array elements that closed within this chunk, in order
+        """
+        emitted: List[StreamItem] = []
+        if self.complete or not chunk:
+            return emitted
+
+        i = 0
+        if not self._stack:
+            i = chunk.find("{")
+            if i == -1:
+                return emitted
+        text_start = i
+        item_start = 0 if self._item_parts is not None else -1
+        stack = self._stack
+        n = len(chunk)
+
+        while i < n:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    if self._key_parts is not None:
+                        self._key_parts.append(chunk[i])
+                    i += 1
+                    continue
+                m = _STRING_SPECIAL.search(chunk, i)
+                end = m.start() if m else n
+                if self._key_parts is not None:
+                    self._key_parts.append(chunk[i:end])
+                if m is None:
+                    break
+                if chunk[end] == "\\":
+                    self._escape = True
+                    if self._key_parts is not None:
+                        self._key_parts.append("\\")
+                else:
+                    self._in_string = False
+                    if self._key_parts is not None:
+                        stack[-1].key = "".join(self._key_parts)
+                        self._key_parts = None
+                i = end + 1
+                continue
+
+            m = _STRUCTURAL.search(chunk, i)
+            if m is None:
+                break
+            j = m.start()
+            c = chunk[j]
+            if c == '"':
+                self._in_string = True
+                top = stack[-1]
+                if top.is_object and top.expect_key:
+                    self._key_parts = []
+            elif c == "{" or c == "[":
+                parent = stack[-1] if stack else None
+                watched = c == "[" and len(stack) == 1 and parent.key in self.items
+                stack.append(_Frame(c == "{", watched))
+                if parent is not None and parent.watched and self._item_parts is None:
+                    self._item_parts = []
+                    self._item_depth = len(stack)
+                    item_start = j
+            elif c == "}" or c == "]":
+                if not stack:
+                    break
+                stack.pop()
+                if self._item_parts is not None and len(stack) == self._item_depth - 1:
+                    self._item_parts.append(chunk[item_start:j + 1])
+                    raw = "".join(self._item_parts)
+                    self._item_parts = None
+                    item_start = -1
+                    try:
+                        emitted.append(StreamItem(stack[0].key, stack[-1].index, json.loads(raw)))
+                    except ValueError:
+                        pass  # Left to the caller's parse of the whole object
+                if not stack:
+                    self._parts.append(chunk[text_start:j + 1])
+                    self._text = "".join(self._parts)
+                    self._parts = [self._text]
+                    self.complete = True
+                    return emitted
+            elif c == ",":
+                top = stack[-1]
+                if top.is_object:
+                    top.expect_key = True
+                else:
+                    top.index += 1
+            else:  # ":"
+                stack[-1].expect_key = False
+            i = j + 1
+
+        self._parts.append(chunk[text_start:])
+        if self._item_parts is not None:
+            self._item_parts.append(chunk[item_start:])
+        return emitted
@@ -0,0 +1,309 @@
+"""Non-blocking, sampled structured logging.
+
+``configure_logging()`` installs a structlog pipeline in which the event loop
+only builds the event dict; JSON rendering and the actual write happen on a
+background thread that drains a bounded queue. When the queue is full the
+event is dropped (and counted) rather than stalling a request. Before an event
+is queued it is
+
+- filtered by level (LOG_LEVEL, default INFO), so debug calls are nearly free,
+- sampled per event name (LOG_SAMPLE_RATES, e.g. ``llm_call_start=0.1``);
+  warnings and errors are never sampled out,
+- truncated: long strings and lists are cut to LOG_MAX_FIELD_CHARS /
+  LOG_MAX_LIST_ITEMS so logging a prompt or a path list stays cheap.
+
+Drops are exported as ``dexter_log_events_dropped_total{reason}``. Set
+LOG_ASYNC=0 to write synchronously (e.g. when debugging the pipeline itself).
+"""
+
+from typing import Any, Dict, IO, List, Optional
+from dataclasses import dataclass, field
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+
+import structlog
+
+from .metrics import LOG_EVENTS_DROPPED, LOG_QUEUE_DEPTH
+
+
+# Event name -> fraction of events kept
+DEFAULT_SAMPLE_RATES: Dict[str, float] = {
+    "sse_frame_sampled": 0.1,
+    "single_flight_joined": 0.1,
+}
+
+# Never truncated (tracebacks are only useful whole)
+_UNTRUNCATED_KEYS = frozenset({"event", "exception", "timestamp", "level"})
+
+_SAMPLED_LEVELS = frozenset({"debug", "info"})
+
+
+def _parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse ``"event=0.1,other=0.5"`` into a rate map (bad entries are ignored)."""
+    rates: Dict[str, float] = {}
+    for part in spec.split(","):
+        name, _, rate = part.partition("=")
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+@dataclass
+class LogConfig:
+    """Configuration for the logging pipeline."""
+    level: str = "INFO"
+    async_writes: bool = True  # Render and write on a background thread
+    queue_size: int = 10000  # Events buffered before new ones are dropped
+    max_field_chars: int = 512  # Longer string fields are truncated
+    max_list_items: int = 20  # Longer list fields are truncated
+    sample_rates: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_SAMPLE_RATES))
+
+    @classmethod
+    def from_env(cls) -> "LogConfig":
+        """Build config from LOG_* environment variables."""
+        rates = dict(DEFAULT_SAMPLE_RATES)
+        rates.update(_parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", "")))
+        return cls(
+            level=os.getenv("LOG_LEVEL", "INFO"),
+            async_writes=os.getenv("LOG_ASYNC", "1").lower() not in ("0", "false", "no"),
+            queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+            max_field_chars=int(os.getenv("LOG_MAX_FIELD_CHARS", "512")),
+            max_list_items=int(os.getenv("LOG_MAX_LIST_ITEMS", "20")),
+            sample_rates=rates,
+        )
+
+
+# ============================================================================
+# Processors
+# ============================================================================
+
+class EventSampler:
+    """Drops a fraction of debug/info events per event name."""
+
+    def __init__(self, rates: Dict[str, float]) -> None:
+        self.rates = rates
+
+    def __call__(self, logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        rate = self.rates.get(event_dict.get("event"))
+        if rate is None or rate >= 1.0 or method_name not in _SAMPLED_LEVELS:
+            return event_dict
+        if random.random() >= rate:
+            LOG_EVENTS_DROPPED.labels("sampled").inc()
+            raise structlog.DropEvent
+        event_dict["sample_rate"] = rate
+        return event_dict
+
+
+class FieldTruncator:
+    """Caps string length and list size of event fields (one level of nesting)."""
+
+    def __init__(self, max_chars: int, max_items: int) -> None:
+        self.max_chars = max_chars
+        self.max_items = max_items
+
+    def _truncate(self, value: Any, depth: int = 0) -> Any:
+        if isinstance(value, str):
+            if len(value) > self.max_chars:
+                return f"{value[:self.max_chars]}...[+{len(value) - self.max_chars} chars]"
+            return value
+        if isinstance(value, (list, tuple)):
+            items = [self._truncate(v, depth + 1) if depth == 0 else v for v in value[:self.max_items]]
+            if len(value) > self.max_items:
+                items.append(f"...[+{len(value) - self.max_items} items]")
+            return items
+        if isinstance(value, dict) and depth == 0:
+            return {k: self._truncate(v, depth + 1) for k, v in value.items()}
+        return value
+
+    def __call__(self, logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        for key, value in event_dict.items():
+            if key not in _UNTRUNCATED_KEYS:
+                event_dict[key] = self._truncate(value)
+        return event_dict
+
+
+def render_event(event_dict: Dict[str, Any]) -> str:
+    """Render an event dict as one JSON line (unserializable values via ``repr``)."""
+    return json.dumps(event_dict, default=repr)
+
+
+# ============================================================================
+# Background writer
+# ============================================================================
+
+_STOP = object()
+
+
+class QueuedLogWriter:
+    """
+    Bounded queue of event dicts drained by a daemon thread.
+
+    Args:
+        stream: File object written to (defaults to the current sys.stdout)
+        maxsize: Queue capacity; events beyond it are dropped
+        batch_size: Max events rendered per write/flush
+
+    After ``close()`` events are written synchronously instead of queued.
+    """
+
+    def __init__(self, stream: Optional[IO[str]] = None, maxsize: int = 10000, batch_size: int = 256) -> None:
+        self._stream = stream
+        self.batch_size = batch_size
+        self.closed = False
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._drain, name="log-writer", daemon=True)
+        self._thread.start()
+        LOG_QUEUE_DEPTH.set_function(self._queue.qsize)
+
+    @property
+    def stream(self) -> IO[str]:
+        return self._stream or sys.stdout
+
+    def submit(self, event_dict: Dict[str, Any]) -> bool:
+        """Queue an event without blocking; returns False if it was dropped."""
+        if self.closed:
+            self._write([event_dict])
+            return True
+        try:
+            self._queue.put_nowait(event_dict)
+            return True
+        except queue.Full:
+            LOG_EVENTS_DROPPED.labels("queue_full").inc()
+            return False
+
+    def _drain(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: List[Dict[str, Any]] = []
+            stop = item is _STOP
+            if not stop:
+                batch.append(item)
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+            if batch:
+                self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        lines = []
+        for event_dict in batch:
+            try:
+                lines.append(render_event(event_dict))
+            except Exception as e:
+                lines.append(json.dumps({"event": "log_render_failed", "error": repr(e)}))
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except Exception:
+            LOG_EVENTS_DROPPED.labels("write_failed").inc(len(batch))
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Flush queued events and stop the writer thread."""
+        if self.closed:
+            return
+        self.closed = True
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+class QueueLogger:
+    """structlog logger that hands the final event dict to a QueuedLogWriter."""
+
+    def __init__(self, writer: QueuedLogWriter) -> None:
+        self._writer = writer
+
+    def msg(self, **event_dict: Any) -> None:
+        self._writer.submit(event_dict)
+
+    log = debug = info = warn = warning = msg
+    err = error = critical = exception = fatal = msg
+
+
+class QueueLoggerFactory:
+    """``logger_factory`` for structlog.configure()."""
+
+    def __init__(self, writer: QueuedLogWriter) -> None:
+        self.writer = writer
+
+    def __call__(self, *args: Any) -> QueueLogger:
+        return QueueLogger(self.writer)
+
+
+# ============================================================================
+# Setup
+# ============================================================================
+
+_writer: Optional[QueuedLogWriter] = None
+
+
+def _pass_to_logger(logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    # Returning the dict makes structlog call ``logger.<method>(**event_dict)``
+    return event_dict
+
+
+def configure_logging(config: Optional[LogConfig] = None, stream: Optional[IO[str]] = None) -> Optional[QueuedLogWriter]:
+    """
+    Install the logging pipeline as the structlog configuration.
+
+    Args:
+        config: Pipeline configuration (defaults to LogConfig.from_env())
+        stream: Output file object (defaults to stdout)
+
+    Returns:
+        The background writer, or None when LOG_ASYNC is off
+    """
+    global _writer
+    config = config or LogConfig.from_env()
+    shutdown_logging()
+
+    level = getattr(logging, config.level.upper(), logging.INFO)
+    processors: List[Any] = [
+        structlog.processors.add_log_level,
+        EventSampler(config.sample_rates),
+        structlog.processors.TimeStamper(fmt="iso"),
+        structlog.processors.format_exc_info,
+        FieldTruncator(config.max_field_chars, config.max_list_items),
+    ]
+    if config.async_writes:
+        _writer = QueuedLogWriter(stream, maxsize=config.queue_size)
+        processors.append(_pass_to_logger)
+        factory: Any = QueueLoggerFactory(_writer)
+    else:
+        processors.append(structlog.processors.JSONRenderer(default=repr))
+        factory = structlog.PrintLoggerFactory(file=stream or sys.stdout)
+
+    structlog.configure(
+        processors=processors,
+        wrapper_class=structlog.make_filtering_bound_logger(level),
+        logger_factory=factory,
+        cache_logger_on_first_use=False,
+    )
+    return _writer
+
+
+def shutdown_logging(timeout: float = 2.0) -> None:
+    """Flush and stop the background writer, if one is running."""
+    global _writer
+    if _writer is not None:
+        _writer.close(timeout)
+        _writer = None
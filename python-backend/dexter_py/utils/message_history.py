@@ -7,19 +7,28 @@ Production-ready message history system with:
 - Bounded memory with pruning
 - Pluggable backends
 - Comprehensive error handling
+
+numpy is only needed for embedding-based relevance selection and is imported
+on first use so that importing this module stays cheap.
 """
 
-from typing import Optional, List, Protocol, Dict, Tuple
+from __future__ import annotations
+
+from typing import Optional, List, Protocol, Dict, Tuple, TYPE_CHECKING
 from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
 import asyncio
 from asyncio import Lock
-import numpy as np
 from datetime import datetime
 import structlog
 from functools import lru_cache
 import hashlib
 
+from .tokens import TokenCounter, get_token_counter
+
+if TYPE_CHECKING:
+    import numpy as np
+
 
 # ============================================================================
 # Core Data Models
@@ -71,7 +80,7 @@ class HistoryConfig:
     max_messages: int = 100  # Hard limit on stored messages
     prune_threshold: int = 120  # Trigger pruning when this is exceeded
     prune_to: int = 80  # Prune down to this many messages
-    token_limit_per_message: int = 400  # Max tokens per message in formatting
+    token_limit_per_message: int = 400  # Max tokens per answer in formatting (model tokenizer)
 
 
 # ============================================================================
@@ -177,11 +186,13 @@ class CachedEmbeddingProvider:
     """
     Embedding provider with caching and batching.
     Loads model once and reuses it.
-    Caches embeddings by content hash.
+    Caches embeddings by content hash (oldest entries are evicted beyond
+    ``max_cache_entries``, since one provider is shared process-wide).
     """
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", max_cache_entries: int = 10000):
         self.model_name = model_name
+        self.max_cache_entries = max_cache_entries
         self._model = None
         self._cache: Dict[str, np.ndarray] = {}
         self._lock = Lock()
@@ -191,6 +202,15 @@ class CachedEmbeddingProvider:
         """Generate cache key from text content."""
         return hashlib.md5(text.encode('utf-8')).hexdigest()
     
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    async def warm_up(self) -> None:
+        """Load the model ahead of the first embed call (e.g. at startup)."""
+        async with self._lock:
+            await self._load_model()
+
     async def _load_model(self):
         """Load embedding model once (lazy loading)."""
         if self._model is None:
@@ -235,8 +255,10 @@ class CachedEmbeddingProvider:
             )
             
             # Convert to numpy and cache
+            import numpy as np
             embedding_array = np.array(embedding)
             self._cache[cache_key] = embedding_array
+            self._evict()
             
             return embedding_array
     
@@ -274,19 +296,37 @@ class CachedEmbeddingProvider:
                 )
                 
                 # Store results and update cache
+                import numpy as np
                 for idx, i in enumerate(uncached_indices):
                     embedding_array = np.array(embeddings[idx])
                     results[i] = embedding_array
                     self._cache[cache_keys[i]] = embedding_array
+                self._evict()
         
         return results
     
+    def _evict(self) -> None:
+        """Drop the oldest cached embeddings beyond ``max_cache_entries``."""
+        while len(self._cache) > self.max_cache_entries:
+            del self._cache[next(iter(self._cache))]
+
     def clear_cache(self):
         """Clear embedding cache (useful for memory management)."""
         self._cache.clear()
         self.logger.info("embedding_cache_cleared")
 
 
+@lru_cache(maxsize=None)
+def get_shared_embedding_provider(model_name: str = "all-MiniLM-L6-v2") -> CachedEmbeddingProvider:
+    """
+    Process-wide embedding provider for ``model_name``.
+
+    The orchestrator creates a MessageHistory per session; sharing the provider
+    means the model is loaded (and warmed at startup) once, not per history.
+    """
+    return CachedEmbeddingProvider(model_name)
+
+
 # ============================================================================
 # Concrete Implementations - Storage
 # ============================================================================
@@ -449,6 +489,7 @@ class RelevanceSelector:
         messages: List[Message]
     ) -> List[Message]:
         """Select by hybrid similarity + recency score (vectorized)."""
+        import numpy as np
         
         # Get embeddings (batch for efficiency)
         query_embedding = await self.embedding_provider.embed(current_query)
@@ -499,8 +540,9 @@ class RelevanceSelector:
 class MessageFormatter:
     """Formats messages for inclusion in prompts."""
     
-    def __init__(self, config: HistoryConfig):
+    def __init__(self, config: HistoryConfig, token_counter: Optional[TokenCounter] = None):
         self.config = config
+        self.token_counter = token_counter or get_token_counter()
     
     def format_for_planning(self, messages: List[Message]) -> str:
         """Format messages for planning/execution prompts."""
@@ -513,9 +555,7 @@ class MessageFormatter:
             lines.append(f"- User: {msg.query}")
             
             # Truncate long answers
-            answer_preview = msg.answer[:self.config.token_limit_per_message]
-            if len(msg.answer) > self.config.token_limit_per_message:
-                answer_preview += "..."
+            answer_preview = self.token_counter.truncate(msg.answer, self.config.token_limit_per_message, "...")
             lines.append(f"- Agent: {answer_preview}")
         
         lines.append("\n---\n")
@@ -568,7 +608,7 @@ class MessageHistory:
         Args:
             model: Model name for context
             summarizer: Message summarizer (defaults to SimpleSummarizer)
-            embedding_provider: Embedding generator (defaults to CachedEmbeddingProvider)
+            embedding_provider: Embedding generator (defaults to the shared CachedEmbeddingProvider)
             message_store: Persistence layer (defaults to InMemoryMessageStore)
             history_config: History management config
             relevance_config: Relevance selection config
@@ -580,7 +620,7 @@ class MessageHistory:
         
         # Pluggable components
         self.summarizer = summarizer or SimpleSummarizer()
-        self.embedding_provider = embedding_provider or CachedEmbeddingProvider()
+        self.embedding_provider = embedding_provider or get_shared_embedding_provider()
         self.message_store = message_store or InMemoryMessageStore()
         
         # Configuration
@@ -592,7 +632,7 @@ class MessageHistory:
             self.embedding_provider,
             self.relevance_config
         )
-        self.formatter = MessageFormatter(self.history_config)
+        self.formatter = MessageFormatter(self.history_config, get_token_counter(model))
         
         # Logging
         self.logger = structlog.get_logger(__name__)
@@ -609,6 +649,7 @@ class MessageHistory:
     def set_model(self, model: str) -> None:
         """Update the model name."""
         self._model = model
+        self.formatter.token_counter = get_token_counter(model)
     
     async def add_message(
         self,
@@ -808,7 +849,7 @@ async def create_message_history(
     else:
         summarizer = SimpleSummarizer()
     
-    embedding_provider = CachedEmbeddingProvider()
+    embedding_provider = get_shared_embedding_provider()
     
     if persistence_path:
         message_store = FileMessageStore(persistence_path)
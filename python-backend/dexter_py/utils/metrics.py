@@ -0,0 +1,323 @@
+"""Prometheus metrics shared by the API, orchestrator and LLM wrappers.
+
+All collectors register on the default registry, so everything defined here is
+exported by the ``/metrics`` endpoint. Keep label values low-cardinality
+(route templates, phase names, model names) — never request or session ids.
+"""
+
+from typing import Optional
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+
+# Latency buckets in seconds, shared by route and phase histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TOKEN_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+# ============================================================================
+# HTTP
+# ============================================================================
+
+REQUEST_LATENCY = Histogram(
+    "dexter_request_duration_seconds",
+    "HTTP request latency by route template (time until response headers)",
+    ["route", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+SSE_STREAMS_OPEN = Gauge(
+    "dexter_sse_streams_open",
+    "Server-Sent Event streams currently open",
+    ["endpoint"],
+)
+
+
+# ============================================================================
+# Admission control
+# ============================================================================
+
+ADMISSION_ACTIVE = Gauge(
+    "dexter_admission_active",
+    "Slots currently held per admission pool",
+    ["pool"],
+)
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "dexter_admission_queue_depth",
+    "Callers waiting for a slot per admission pool",
+    ["pool"],
+)
+
+ADMISSION_WAIT_SECONDS = Histogram(
+    "dexter_admission_wait_seconds",
+    "Time spent waiting for an admission slot",
+    ["pool"],
+    buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+ADMISSION_REJECTED = Counter(
+    "dexter_admission_rejected_total",
+    "Callers rejected by admission control",
+    ["pool", "reason"],
+)
+
+
+# ============================================================================
+# Orchestrator
+# ============================================================================
+
+PHASE_DURATION = Histogram(
+    "dexter_phase_duration_seconds",
+    "Agent phase duration",
+    ["phase", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+
+RUNS_IN_FLIGHT = Gauge(
+    "dexter_agent_runs_in_flight",
+    "Orchestrator runs currently executing",
+)
+
+RUN_ITERATIONS = Histogram(
+    "dexter_agent_run_iterations",
+    "Plan/execute/reflect iterations per orchestrator run",
+    buckets=(1, 2, 3, 4, 5, 7, 10),
+)
+
+RUN_TOOL_CALLS = Histogram(
+    "dexter_agent_run_tool_calls",
+    "Tool calls per orchestrator run",
+    buckets=(0, 1, 2, 5, 10, 20, 50),
+)
+
+RUNS_CANCELLED = Counter(
+    "dexter_agent_runs_cancelled_total",
+    "Orchestrator runs cancelled before completion (e.g. client disconnected)",
+)
+
+RUN_STOP_REASONS = Counter(
+    "dexter_agent_run_stop_reasons_total",
+    "Orchestrator runs by stop reason",
+    ["reason"],
+)
+
+SESSION_STORE_SIZE = Gauge(
+    "dexter_session_store_sessions",
+    "Sessions currently held by the session store",
+)
+
+
+# ============================================================================
+# LLM streaming
+# ============================================================================
+
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "dexter_llm_time_to_first_token_seconds",
+    "Time from stream start to the first token",
+    ["source", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+
+LLM_INTER_TOKEN_LATENCY = Histogram(
+    "dexter_llm_inter_token_latency_seconds",
+    "Gap between consecutive streamed tokens",
+    ["source", "model"],
+    buckets=TOKEN_LATENCY_BUCKETS,
+)
+
+LLM_TOKENS_PER_SECOND = Histogram(
+    "dexter_llm_tokens_per_second",
+    "Streamed chunks per second over a whole stream",
+    ["source", "model"],
+    buckets=(1, 5, 10, 20, 40, 80, 160, 320, 640),
+)
+
+
+SINGLE_FLIGHT_REQUESTS = Counter(
+    "dexter_llm_single_flight_requests_total",
+    "Coalesced stream requests by role; followers / total is the coalescing ratio",
+    ["group", "role"],
+)
+
+SINGLE_FLIGHT_ACTIVE = Gauge(
+    "dexter_llm_single_flight_active",
+    "Upstream streams currently shared through single-flight",
+    ["group"],
+)
+
+LLM_STREAMS_CANCELLED = Counter(
+    "dexter_llm_streams_cancelled_total",
+    "LLM streams cancelled before the provider finished",
+    ["source"],
+)
+
+LLM_TOKENS_SAVED = Counter(
+    "dexter_llm_tokens_saved_total",
+    "Upper-bound estimate of tokens not generated thanks to cancellation (max_tokens minus tokens streamed)",
+    ["source"],
+)
+
+
+LLM_CACHE_REQUESTS = Counter(
+    "dexter_llm_cache_requests_total",
+    "LLM response cache lookups",
+    ["kind", "result"],
+)
+
+LLM_PROMPT_TOKENS = Counter(
+    "dexter_llm_prompt_tokens_total",
+    "Input tokens reported by providers, by prompt-cache outcome (uncached, cache_read, cache_write)",
+    ["model", "kind"],
+)
+
+LLM_OUTPUT_TOKENS = Counter(
+    "dexter_llm_output_tokens_total",
+    "Output tokens reported by providers",
+    ["model"],
+)
+
+LLM_REQUEST_DURATION = Histogram(
+    "dexter_llm_request_duration_seconds",
+    "Provider call latency by source and model (whole completion or stream)",
+    ["source", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+
+LLM_CLIENT_POOL_SIZE = Gauge(
+    "dexter_llm_client_pool_size",
+    "Non-default model clients currently pooled",
+)
+
+LLM_CLIENT_POOL_EVENTS = Counter(
+    "dexter_llm_client_pool_events_total",
+    "Client pool lookups and evictions (hit, miss, evict, unavailable)",
+    ["event"],
+)
+
+LLM_HEDGE_REQUESTS = Counter(
+    "dexter_llm_hedge_requests_total",
+    "Hedge-eligible streams by outcome (unhedged, skipped, primary, secondary); "
+    "(primary + secondary) / total is the hedge rate, secondary / (primary + secondary) the hedge win rate",
+    ["phase", "outcome"],
+)
+
+LLM_HEDGE_DELAY_SECONDS = Gauge(
+    "dexter_llm_hedge_delay_seconds",
+    "Current hedge delay: percentile of recent primary time to first token",
+    ["phase"],
+)
+
+LLM_BREAKER_STATE = Gauge(
+    "dexter_llm_breaker_state",
+    "Circuit breaker state per provider and model (0 closed, 1 half-open, 2 open)",
+    ["provider", "model"],
+)
+
+LLM_BREAKER_TRANSITIONS = Counter(
+    "dexter_llm_breaker_transitions_total",
+    "Circuit breaker state changes by the state entered",
+    ["provider", "model", "state"],
+)
+
+LLM_BREAKER_REJECTED = Counter(
+    "dexter_llm_breaker_rejected_total",
+    "Calls failed fast because the breaker was open (or its half-open probes were taken)",
+    ["provider", "model"],
+)
+
+LLM_FALLBACKS = Counter(
+    "dexter_llm_fallbacks_total",
+    "Calls served by a fallback model after the requested one failed or was open",
+    ["model", "fallback"],
+)
+
+
+
+# ============================================================================
+# LLM HTTP pool
+# ============================================================================
+
+LLM_HTTP_POOL_IN_USE = Gauge(
+    "dexter_llm_http_pool_in_use",
+    "Provider connections currently carrying a request, by host",
+    ["host"],
+)
+
+LLM_HTTP_POOL_UTILIZATION = Gauge(
+    "dexter_llm_http_pool_utilization",
+    "In-use connections divided by the per-host cap",
+    ["host"],
+)
+
+LLM_HTTP_POOL_WAIT_SECONDS = Histogram(
+    "dexter_llm_http_pool_wait_seconds",
+    "Time a provider request waited for a free connection slot",
+    ["host"],
+    buckets=TOKEN_LATENCY_BUCKETS,
+)
+
+LLM_HTTP_CONNECT_SECONDS = Histogram(
+    "dexter_llm_http_connect_seconds",
+    "Time to open a new provider connection, by stage (tcp, tls)",
+    ["host", "stage"],
+    buckets=TOKEN_LATENCY_BUCKETS,
+)
+
+LLM_HTTP_REQUESTS = Counter(
+    "dexter_llm_http_requests_total",
+    "Provider HTTP requests by connection (new or reused keep-alive)",
+    ["host", "connection"],
+)
+
+
+# ============================================================================
+# Logging
+# ============================================================================
+
+LOG_EVENTS_DROPPED = Counter(
+    "dexter_log_events_dropped_total",
+    "Log events not written (sampled out or queue full)",
+    ["reason"],
+)
+
+LOG_QUEUE_DEPTH = Gauge(
+    "dexter_log_queue_depth",
+    "Rendered log events waiting for the writer thread",
+)
+
+
+class LLMStreamTimer:
+    """
+    Records time-to-first-token, inter-token latency, throughput and total
+    duration for one LLM stream. Call ``on_token()`` per chunk and ``finish()`` once at the end.
+    """
+
+    __slots__ = ("_labels", "_start", "_last", "first_token_s", "tokens", "_ttft", "_itl")
+
+    def __init__(self, source: str, model: Optional[str]) -> None:
+        self._labels = (source, model or "unknown")
+        self._start = time.perf_counter()
+        self._last: Optional[float] = None
+        self.first_token_s: Optional[float] = None
+        self.tokens = 0
+        self._ttft = LLM_TIME_TO_FIRST_TOKEN.labels(*self._labels)
+        self._itl = LLM_INTER_TOKEN_LATENCY.labels(*self._labels)
+
+    def on_token(self) -> None:
+        now = time.perf_counter()
+        if self._last is None:
+            self.first_token_s = now - self._start
+            self._ttft.observe(self.first_token_s)
+        else:
+            self._itl.observe(now - self._last)
+        self._last = now
+        self.tokens += 1
+
+    def finish(self) -> None:
+        LLM_REQUEST_DURATION.labels(*self._labels).observe(time.perf_counter() - self._start)
+        if self.tokens and self._last is not None:
+            elapsed = self._last - self._start
+            if elapsed > 0:
+                LLM_TOKENS_PER_SECOND.labels(*self._labels).observe(self.tokens / elapsed)
@@ -0,0 +1,79 @@
+"""Lazy loading of optional LLM provider packages.
+
+Importing every LangChain integration at module import costs hundreds of
+milliseconds of cold start even when only one provider is configured. The
+accessors here import a provider's module the first time that provider is
+actually used and memoize the result; a missing package yields ``None`` so
+callers keep the existing "not installed" fallbacks.
+"""
+
+from typing import Any, Optional, Tuple
+from functools import lru_cache
+import importlib
+
+
+# provider -> (module, class)
+CHAT_MODEL_CLASSES = {
+    "openai": ("langchain_openai", "ChatOpenAI"),
+    "anthropic": ("langchain_anthropic", "ChatAnthropic"),
+    "google": ("langchain_google_genai", "ChatGoogleGenerativeAI"),
+    "ollama": ("langchain_ollama", "ChatOllama"),
+}
+
+# Legacy module attribute names -> provider, for ``module.__getattr__`` shims
+CHAT_MODEL_ATTRS = {cls: provider for provider, (_, cls) in CHAT_MODEL_CLASSES.items()}
+
+
+@lru_cache(maxsize=None)
+def optional_import(module: str, attr: Optional[str] = None) -> Optional[Any]:
+    """
+    Import ``module`` (and return ``module.attr`` if given) on first call.
+
+    Returns:
+        The module/attribute, or None if it cannot be imported
+    """
+    try:
+        mod = importlib.import_module(module)
+    except Exception:
+        return None
+    if attr is None:
+        return mod
+    return getattr(mod, attr, None)
+
+
+def chat_model_class(provider: str) -> Optional[type]:
+    """LangChain chat model class for ``provider`` (openai, anthropic, google, ollama)."""
+    module, cls = CHAT_MODEL_CLASSES[provider]
+    return optional_import(module, cls)
+
+
+def message_classes() -> Tuple[Optional[type], Optional[type]]:
+    """``(HumanMessage, SystemMessage)`` from langchain_core, or ``(None, None)``."""
+    return (
+        optional_import("langchain_core.messages", "HumanMessage"),
+        optional_import("langchain_core.messages", "SystemMessage"),
+    )
+
+
+def async_callback_handler() -> Optional[type]:
+    """LangChain ``AsyncCallbackHandler`` base class used for token streaming."""
+    return optional_import("langchain.callbacks.base", "AsyncCallbackHandler")
+
+
+def legacy_attr(name: str) -> Any:
+    """
+    Resolve the provider names modules used to bind at import time
+    (``ChatOpenAI``, ``HumanMessage``, ``AsyncCallbackHandler``...).
+
+    Raises:
+        AttributeError: For unknown names
+    """
+    if name in CHAT_MODEL_ATTRS:
+        return chat_model_class(CHAT_MODEL_ATTRS[name])
+    if name == "HumanMessage":
+        return message_classes()[0]
+    if name == "SystemMessage":
+        return message_classes()[1]
+    if name == "AsyncCallbackHandler":
+        return async_callback_handler()
+    raise AttributeError(name)
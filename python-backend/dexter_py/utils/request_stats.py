@@ -0,0 +1,247 @@
+"""Fixed-memory rolling request statistics for the dashboard endpoints.
+
+Replaces per-poll copies of the recent-request deque with:
+
+- ``RollingStats``: per-route and per-client latency histograms over a
+  sliding time window (a ring of fixed-size time slots), error rates and
+  in-flight counts, updated once per request by the HTTP middleware.
+- ``RecentRequestLog``: a bounded log of recent requests where each entry
+  carries a monotonically increasing ``seq`` so clients can poll with a cursor
+  and only receive entries they have not seen yet.
+
+Memory is bounded by ``max_keys * slots * len(buckets)`` counters regardless of
+traffic; keys beyond ``max_keys`` are folded into a shared ``"other"`` key.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from collections import deque
+from dataclasses import dataclass
+import itertools
+import threading
+import time
+
+
+# Upper bounds (ms) of latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, float("inf"),
+)
+
+OVERFLOW_KEY = "other"
+
+
+@dataclass
+class StatsConfig:
+    """Configuration for rolling statistics."""
+    window_seconds: int = 300  # Sliding window length
+    slot_seconds: int = 10  # Resolution of the sliding window
+    max_keys: int = 256  # Max distinct routes/clients tracked per dimension
+
+
+class _Slot:
+    """Counters for one time slot of one key."""
+
+    __slots__ = ("epoch", "count", "errors", "total_ms", "buckets")
+
+    def __init__(self, bucket_count: int) -> None:
+        self.epoch = -1
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.buckets = [0] * bucket_count
+
+    def reset(self, epoch: int) -> None:
+        self.epoch = epoch
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        for i in range(len(self.buckets)):
+            self.buckets[i] = 0
+
+
+class LatencyWindow:
+    """Sliding-window latency histogram for a single key."""
+
+    def __init__(self, slots: int, slot_seconds: int, buckets: Tuple[float, ...] = LATENCY_BUCKETS_MS) -> None:
+        self.slot_seconds = slot_seconds
+        self.bucket_bounds = buckets
+        self._slots = [_Slot(len(buckets)) for _ in range(slots)]
+        self.in_flight = 0
+
+    def _slot_for(self, now: float) -> _Slot:
+        epoch = int(now // self.slot_seconds)
+        slot = self._slots[epoch % len(self._slots)]
+        if slot.epoch != epoch:
+            slot.reset(epoch)
+        return slot
+
+    def record(self, duration_ms: float, error: bool, now: float) -> None:
+        """Add one completed request to the current slot."""
+        slot = self._slot_for(now)
+        slot.count += 1
+        slot.total_ms += duration_ms
+        if error:
+            slot.errors += 1
+        for i, bound in enumerate(self.bucket_bounds):
+            if duration_ms <= bound:
+                slot.buckets[i] += 1
+                break
+
+    def summary(self, now: float) -> Dict[str, Any]:
+        """Aggregate all slots still inside the window."""
+        current = int(now // self.slot_seconds)
+        oldest = current - len(self._slots) + 1
+        count = errors = 0
+        total_ms = 0.0
+        buckets = [0] * len(self.bucket_bounds)
+        for slot in self._slots:
+            if slot.epoch < oldest or slot.epoch > current or not slot.count:
+                continue
+            count += slot.count
+            errors += slot.errors
+            total_ms += slot.total_ms
+            for i, n in enumerate(slot.buckets):
+                buckets[i] += n
+
+        return {
+            "count": count,
+            "errors": errors,
+            "error_rate": (errors / count) if count else 0.0,
+            "avg_ms": (total_ms / count) if count else None,
+            "p50_ms": _percentile(buckets, self.bucket_bounds, count, 0.50),
+            "p95_ms": _percentile(buckets, self.bucket_bounds, count, 0.95),
+            "p99_ms": _percentile(buckets, self.bucket_bounds, count, 0.99),
+            "in_flight": self.in_flight,
+        }
+
+
+def _percentile(buckets: List[int], bounds: Tuple[float, ...], count: int, q: float) -> Optional[float]:
+    """Estimate a percentile by linear interpolation inside the matching bucket."""
+    if not count:
+        return None
+    rank = q * count
+    seen = 0
+    lower = 0.0
+    for n, upper in zip(buckets, bounds):
+        if n and seen + n >= rank:
+            if upper == float("inf"):
+                return lower
+            return lower + (upper - lower) * ((rank - seen) / n)
+        seen += n
+        if upper != float("inf"):
+            lower = upper
+    return lower
+
+
+class RollingStats:
+    """
+    Per-route and per-client rolling latency, error and in-flight statistics.
+
+    Call ``begin()`` when a request starts and ``end()`` when it finishes;
+    ``snapshot()`` returns the aggregated view for dashboards.
+    """
+
+    def __init__(self, config: Optional[StatsConfig] = None) -> None:
+        self.config = config or StatsConfig()
+        self._slots = max(1, self.config.window_seconds // self.config.slot_seconds)
+        self._routes: Dict[str, LatencyWindow] = {}
+        self._clients: Dict[str, LatencyWindow] = {}
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def _window(self, table: Dict[str, LatencyWindow], key: Optional[str]) -> LatencyWindow:
+        key = key or "unknown"
+        window = table.get(key)
+        if window is None:
+            if len(table) >= self.config.max_keys:
+                key = OVERFLOW_KEY
+                window = table.get(key)
+            if window is None:
+                window = LatencyWindow(self._slots, self.config.slot_seconds)
+                table[key] = window
+        return window
+
+    def begin(self, route: str, client: Optional[str]) -> None:
+        """Mark a request as in flight."""
+        with self._lock:
+            self.in_flight += 1
+            self._window(self._routes, route).in_flight += 1
+            self._window(self._clients, client).in_flight += 1
+
+    def end(
+        self,
+        route: str,
+        client: Optional[str],
+        duration_ms: float,
+        error: bool,
+        now: Optional[float] = None,
+    ) -> None:
+        """Record a finished request (``route`` and ``client`` as passed to ``begin()``)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self.in_flight -= 1
+            self._window(self._routes, route).in_flight -= 1
+            self._window(self._clients, client).in_flight -= 1
+            self._window(self._routes, route).record(duration_ms, error, now)
+            self._window(self._clients, client).record(duration_ms, error, now)
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Return aggregated per-route and per-client statistics."""
+        now = time.time() if now is None else now
+        with self._lock:
+            return {
+                "window_seconds": self._slots * self.config.slot_seconds,
+                "in_flight": self.in_flight,
+                "routes": {k: w.summary(now) for k, w in self._routes.items()},
+                "clients": {k: w.summary(now) for k, w in self._clients.items()},
+            }
+
+
+class RecentRequestLog:
+    """
+    Bounded log of recent requests with sequence-number cursors.
+
+    Entries are stored newest first. Each entry is stamped with ``seq`` and a
+    precomputed ``ts_iso`` when it is added, so reads never reformat.
+    """
+
+    def __init__(self, maxlen: int = 1000) -> None:
+        self._entries: deque = deque(maxlen=maxlen)
+        self._seq = itertools.count(1)
+        self.last_seq = 0
+
+    def add(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Stamp and store an entry; returns the stored entry."""
+        seq = next(self._seq)
+        entry["seq"] = seq
+        ts = entry.get("timestamp") or time.time()
+        entry["ts_iso"] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(ts))
+        self._entries.appendleft(entry)
+        self.last_seq = seq
+        return entry
+
+    def since(self, seq: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return entries newer than ``seq`` (newest first), at most ``limit``."""
+        out: List[Dict[str, Any]] = []
+        for entry in self._entries:
+            if entry["seq"] <= seq:
+                break
+            out.append(entry)
+            if limit is not None and len(out) >= limit:
+                break
+        return out
+
+    def page(self, seq: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return the oldest ``limit`` entries newer than ``seq`` (newest first),
+        so a cursor moved to the newest returned ``seq`` skips nothing.
+        """
+        out = self.since(seq)
+        if limit is not None and len(out) > limit:
+            out = out[len(out) - max(0, limit):]
+        return out
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
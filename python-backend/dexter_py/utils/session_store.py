@@ -2,16 +2,98 @@
 
 Supports in-memory storage with optional Redis backend for distributed systems.
 Each session is identified by a unique session ID (UUID) and stores MessageHistory objects.
+
+Every write bumps a per-session *version*, so readers can cheaply tell whether a
+history changed (``version()``) and page through it (``get_page()``) without
+copying or re-parsing the whole conversation each time.
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
 import threading
 import json
 import os
-from ..utils.message_history import MessageHistory
+from ..utils.message_history import MessageHistory, Message
+from .tracing import traced
+
+
+# (version, model, messages oldest first)
+HistorySnapshot = Tuple[int, Optional[str], List[Message]]
+
+
+@dataclass
+class HistoryPage:
+    """One page of a session's messages, oldest first."""
+    version: int
+    model: Optional[str]
+    total: int  # Messages in the whole session
+    messages: List[Message]
+    next_before_id: Optional[int]  # Pass as ``before_id`` to fetch the preceding page
+
+
+def paginate_messages(
+    messages: List[Message],
+    limit: Optional[int] = None,
+    before_id: Optional[int] = None,
+) -> Tuple[List[Message], Optional[int]]:
+    """
+    Select the newest ``limit`` messages with ``id < before_id``.
+
+    Args:
+        messages: Messages ordered by ascending id
+        limit: Page size (None for everything before the cursor)
+        before_id: Exclusive upper bound on message ids (None starts at the newest)
+
+    Returns:
+        (page oldest first, cursor for the preceding page or None at the start)
+    """
+    end = len(messages) if before_id is None else bisect_left(messages, before_id, key=lambda m: m.id)
+    start = 0 if limit is None else max(0, end - limit)
+    page = messages[start:end]
+    return page, (page[0].id if start > 0 and page else None)
+
+
+class _HistoryPagingMixin(ABC):
+    """``get_page()`` on top of a store's ``snapshot()``."""
+
+    @abstractmethod
+    def snapshot(self, session_id: str) -> HistorySnapshot:
+        """Version, model and messages (oldest first) of a session, read consistently."""
+
+    def get_page(self, session_id: str, limit: Optional[int] = 50, before_id: Optional[int] = None) -> HistoryPage:
+        """Fetch one page of a session's history (see ``paginate_messages``)."""
+        version, model, messages = self.snapshot(session_id)
+        page, next_before_id = paginate_messages(messages, limit, before_id)
+        return HistoryPage(version, model, len(messages), page, next_before_id)
+
+
+def _message_to_dict(msg: Message) -> Dict[str, Any]:
+    return {
+        "id": msg.id,
+        "query": msg.query,
+        "answer": msg.answer,
+        "summary": msg.summary,
+        "timestamp": msg.timestamp.isoformat(),
+    }
+
+
+def _message_from_dict(data: Dict[str, Any]) -> Message:
+    timestamp = data.get("timestamp")
+    return Message(
+        id=data["id"],
+        query=data["query"],
+        answer=data["answer"],
+        summary=data.get("summary", ""),
+        # Entries written before timestamps were stored get the load time
+        timestamp=datetime.fromisoformat(timestamp) if timestamp else datetime.now(),
+    )
 
 
-class InMemorySessionStore:
+class InMemorySessionStore(_HistoryPagingMixin):
     """Thread-safe in-memory session store for conversation histories.
     
     Perfect for single-instance deployments. For distributed systems,
@@ -25,9 +107,17 @@ class InMemorySessionStore:
             default_expiry: Session expiry time in seconds (default: 24 hours)
         """
         self._store: Dict[str, MessageHistory] = {}
+        self._versions: Dict[str, int] = {}
+        # Store-wide write counter; versions never repeat, even across deletes
+        self._clock = 0
         self._lock = threading.RLock()
         self.default_expiry = default_expiry
+
+    def _bump(self, session_id: str) -> None:
+        self._clock += 1
+        self._versions[session_id] = self._clock
     
+    @traced("session_store.get")
     def get(self, session_id: str, default: Optional[MessageHistory] = None) -> MessageHistory:
         """Retrieve a session's message history.
         
@@ -41,6 +131,7 @@ class InMemorySessionStore:
         with self._lock:
             return self._store.get(session_id, default or MessageHistory())
     
+    @traced("session_store.set")
     def set(self, session_id: str, history: MessageHistory) -> None:
         """Store or update a session's message history.
         
@@ -50,7 +141,9 @@ class InMemorySessionStore:
         """
         with self._lock:
             self._store[session_id] = history
+            self._bump(session_id)
     
+    @traced("session_store.delete")
     def delete(self, session_id: str) -> None:
         """Delete a session's message history.
         
@@ -59,6 +152,22 @@ class InMemorySessionStore:
         """
         with self._lock:
             self._store.pop(session_id, None)
+            self._bump(session_id)
+
+    def version(self, session_id: str) -> int:
+        """Version of a session's history; changes on every set/delete (0 if never written)."""
+        with self._lock:
+            return self._versions.get(session_id, 0)
+
+    @traced("session_store.snapshot")
+    def snapshot(self, session_id: str) -> HistorySnapshot:
+        """Version, model and a copy of the message list, taken atomically."""
+        with self._lock:
+            history = self._store.get(session_id)
+            version = self._versions.get(session_id, 0)
+            if history is None:
+                return version, None, []
+            return version, history._model, history.get_messages()
     
     def exists(self, session_id: str) -> bool:
         """Check if a session exists.
@@ -76,16 +185,24 @@ class InMemorySessionStore:
         """Clear all sessions from store."""
         with self._lock:
             self._store.clear()
+            self._versions.clear()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._store)
     
     def __repr__(self) -> str:
         with self._lock:
             return f"<InMemorySessionStore sessions={len(self._store)}>"
 
 
-class RedisSessionStore:
+class RedisSessionStore(_HistoryPagingMixin):
     """Redis-backed session store for distributed/scalable deployments.
     
     Sessions are stored as JSON in Redis with optional TTL (Time-To-Live).
+    A companion ``session_version:<id>`` counter is incremented on every write;
+    ``snapshot()`` keeps recently parsed histories keyed by that version, so
+    repeated reads of an unchanged session skip fetching and parsing the blob.
     """
     
     def __init__(
@@ -111,7 +228,12 @@ class RedisSessionStore:
         self.default_ttl = default_ttl
         self.client = redis.from_url(redis_url, decode_responses=True)
         self._prefix = "session:"
+        self._version_prefix = "session_version:"
+        self._snapshots: "OrderedDict[str, HistorySnapshot]" = OrderedDict()
+        self._snapshots_max = 128
+        self._snapshots_lock = threading.Lock()
     
+    @traced("session_store.get")
     def get(self, session_id: str, default: Optional[MessageHistory] = None) -> MessageHistory:
         """Retrieve a session's message history from Redis.
         
@@ -127,15 +249,12 @@ class RedisSessionStore:
             data = self.client.get(key)
             if data:
                 # Reconstruct MessageHistory from JSON
-                import json
-                from ..utils.message_history import Message
-                
                 obj = json.loads(data)
                 history = MessageHistory(model=obj.get("model"))
                 
                 # Restore messages
                 for msg_data in obj.get("messages", []):
-                    history._messages.append(Message(**msg_data))
+                    history._messages.append(_message_from_dict(msg_data))
                     history._next_id = max(history._next_id, msg_data["id"] + 1)
                 
                 return history
@@ -144,6 +263,7 @@ class RedisSessionStore:
             print(f"[RedisSessionStore] Warning: failed to retrieve session {session_id}: {e}")
             return default or MessageHistory()
     
+    @traced("session_store.set")
     def set(self, session_id: str, history: MessageHistory) -> None:
         """Store or update a session's message history in Redis.
         
@@ -152,25 +272,21 @@ class RedisSessionStore:
             history: MessageHistory object to store
         """
         try:
-            import json
-            
             key = f"{self._prefix}{session_id}"
             data = {
                 "model": history._model,
-                "messages": [
-                    {
-                        "id": msg.id,
-                        "query": msg.query,
-                        "answer": msg.answer,
-                        "summary": msg.summary,
-                    }
-                    for msg in history._messages
-                ],
+                "messages": [_message_to_dict(msg) for msg in history._messages],
             }
-            self.client.setex(key, self.default_ttl, json.dumps(data))
+            version_key = f"{self._version_prefix}{session_id}"
+            pipe = self.client.pipeline()
+            pipe.setex(key, self.default_ttl, json.dumps(data))
+            pipe.incr(version_key)
+            pipe.expire(version_key, self.default_ttl)
+            pipe.execute()
         except Exception as e:
             print(f"[RedisSessionStore] Warning: failed to store session {session_id}: {e}")
     
+    @traced("session_store.delete")
     def delete(self, session_id: str) -> None:
         """Delete a session from Redis.
         
@@ -179,10 +295,51 @@ class RedisSessionStore:
         """
         try:
             key = f"{self._prefix}{session_id}"
-            self.client.delete(key)
+            pipe = self.client.pipeline()
+            pipe.delete(key)
+            pipe.incr(f"{self._version_prefix}{session_id}")
+            pipe.execute()
         except Exception as e:
             print(f"[RedisSessionStore] Warning: failed to delete session {session_id}: {e}")
     
+    def version(self, session_id: str) -> int:
+        """Version of a session's history; changes on every set/delete (0 if never written)."""
+        try:
+            return int(self.client.get(f"{self._version_prefix}{session_id}") or 0)
+        except Exception as e:
+            print(f"[RedisSessionStore] Warning: failed to read version of session {session_id}: {e}")
+            return 0
+    
+    @traced("session_store.snapshot")
+    def snapshot(self, session_id: str) -> HistorySnapshot:
+        """Version, model and messages of a session, parsed at most once per version."""
+        version = self.version(session_id)
+        with self._snapshots_lock:
+            cached = self._snapshots.get(session_id)
+            if cached is not None and cached[0] == version:
+                self._snapshots.move_to_end(session_id)
+                return cached
+        try:
+            # Blob and version in one round trip so they are consistent
+            data, current = self.client.mget(
+                f"{self._prefix}{session_id}", f"{self._version_prefix}{session_id}"
+            )
+            obj = json.loads(data) if data else {}
+            snap: HistorySnapshot = (
+                int(current or 0),
+                obj.get("model"),
+                [_message_from_dict(m) for m in obj.get("messages", [])],
+            )
+        except Exception as e:
+            print(f"[RedisSessionStore] Warning: failed to read session {session_id}: {e}")
+            return version, None, []
+        with self._snapshots_lock:
+            self._snapshots[session_id] = snap
+            self._snapshots.move_to_end(session_id)
+            while len(self._snapshots) > self._snapshots_max:
+                self._snapshots.popitem(last=False)
+        return snap
+    
     def exists(self, session_id: str) -> bool:
         """Check if a session exists in Redis.
         
@@ -199,6 +356,17 @@ class RedisSessionStore:
             print(f"[RedisSessionStore] Warning: failed to check session {session_id}: {e}")
             return False
     
+    def __len__(self) -> int:
+        """Count stored sessions (SCAN over the key prefix, so O(keyspace)).
+
+        Blocking and slow on large keyspaces: call it off the event loop.
+        """
+        try:
+            return sum(1 for _ in self.client.scan_iter(match=f"{self._prefix}*", count=1000))
+        except Exception as e:
+            print(f"[RedisSessionStore] Warning: failed to count sessions: {e}")
+            return 0
+    
     def __repr__(self) -> str:
         return f"<RedisSessionStore url={self.redis_url}>"
 
@@ -0,0 +1,285 @@
+"""Low-overhead Server-Sent Events frame encoder shared by the streaming endpoints.
+
+Per-token framing (a fresh dict, ``json.dumps``, an f-string, ``encode`` and a
+debug log call for every token) dominates CPU once many streams are open. The
+writer here:
+
+- precomputes the static part of each frame (``role``, ``request_id``,
+  ``session_id``...) once per stream, so a token frame is one string escape
+  plus a byte concatenation;
+- coalesces consecutive tokens into a single frame until a time window or byte
+  threshold is reached;
+- samples debug logging (one in N frames) instead of logging every token.
+
+Frames keep the exact JSON shape clients already parse, e.g.
+``data: {"token": "...", "role": "assistant", "request_id": "..."}``.
+
+``ClosingStreamingResponse`` (and ``SSEResponse``) always close their body
+iterator when the stream ends for any reason (completion, client disconnect,
+failed send), so the work feeding the stream is cancelled right away instead
+of running on for nobody.
+"""
+
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from dataclasses import dataclass
+import asyncio
+import json
+import os
+import time
+
+import anyio
+import structlog
+from starlette.responses import StreamingResponse
+
+
+# C-accelerated string escaper used by json.dumps(ensure_ascii=True)
+_encode_str = json.encoder.encode_basestring_ascii
+
+
+@dataclass
+class SSEConfig:
+    """Configuration for SSE frame coalescing."""
+    flush_interval: float = 0.025  # Max seconds a token may wait in the buffer
+    max_buffer_bytes: int = 512  # Flush once buffered token text reaches this size
+    log_sample_every: int = 100  # Log one in N frames at debug level (0 disables)
+    queue_size: int = 256  # Items read ahead from the upstream iterator
+
+    @classmethod
+    def from_env(cls) -> "SSEConfig":
+        """Build config from SSE_FLUSH_INTERVAL_MS, SSE_MAX_BUFFER_BYTES, SSE_LOG_SAMPLE_EVERY."""
+        return cls(
+            flush_interval=float(os.getenv("SSE_FLUSH_INTERVAL_MS", "25")) / 1000.0,
+            max_buffer_bytes=int(os.getenv("SSE_MAX_BUFFER_BYTES", "512")),
+            log_sample_every=int(os.getenv("SSE_LOG_SAMPLE_EVERY", "100")),
+        )
+
+
+def _encode_fields(fields: Dict[str, Any]) -> str:
+    """Encode dict items as the inner part of a JSON object (no braces)."""
+    return ", ".join(f"{_encode_str(k)}: {json.dumps(v)}" for k, v in fields.items())
+
+
+class SSEWriter:
+    """
+    Encodes token and event frames for a single SSE stream.
+
+    Args:
+        static_fields: Fields appended to every frame (e.g. role, request_id)
+        token_key: JSON key carrying the token text
+        config: Coalescing configuration (defaults to SSEConfig.from_env())
+        logger: Optional structlog logger for sampled debug output
+    """
+
+    def __init__(
+        self,
+        static_fields: Optional[Dict[str, Any]] = None,
+        token_key: str = "token",
+        config: Optional[SSEConfig] = None,
+        logger: Optional[Any] = None,
+    ) -> None:
+        self.config = config or SSEConfig.from_env()
+        self.logger = logger or structlog.get_logger(__name__)
+        self._static_fields = dict(static_fields or {})
+        self._token_key = _encode_str(token_key)
+
+        static = _encode_fields(self._static_fields)
+        self._suffix = (", " + static + "}\n\n") if static else "}\n\n"
+        self._event_suffix = self._suffix.encode("utf-8")
+        self.set_token_head(None)
+
+        self._buffer: List[str] = []
+        self._buffered_bytes = 0
+        self._first_buffered_at = 0.0
+
+        self.frames_sent = 0
+        self.tokens_seen = 0
+
+    def set_token_head(self, head_fields: Optional[Dict[str, Any]]) -> None:
+        """Set fields emitted before the token in token frames (e.g. type, run_id)."""
+        head = _encode_fields(head_fields) if head_fields else ""
+        self._token_prefix = "data: {" + (head + ", " if head else "") + self._token_key + ": "
+
+    # ------------------------------------------------------------------
+    # Frame encoding
+    # ------------------------------------------------------------------
+
+    def token_frame(self, text: str) -> bytes:
+        """Encode a single token frame immediately (no buffering)."""
+        self.frames_sent += 1
+        if self.config.log_sample_every and self.frames_sent % self.config.log_sample_every == 1:
+            self.logger.debug("sse_frame_sampled", frames=self.frames_sent, tokens=self.tokens_seen)
+        return (self._token_prefix + _encode_str(text) + self._suffix).encode("utf-8")
+
+    def event_frame(self, payload: Dict[str, Any]) -> bytes:
+        """Encode an arbitrary event payload followed by the static fields."""
+        self.frames_sent += 1
+        body = json.dumps(payload)
+        if self._static_fields:
+            return b"data: " + body[:-1].encode("utf-8") + self._event_suffix
+        return b"data: " + body.encode("utf-8") + b"\n\n"
+
+    def error_frame(self, error: str, **fields: Any) -> bytes:
+        """Encode an error frame carrying the static fields."""
+        payload = dict(fields)
+        payload["error"] = error
+        return self.event_frame(payload)
+
+    # ------------------------------------------------------------------
+    # Coalescing
+    # ------------------------------------------------------------------
+
+    def push(self, token: str, now: Optional[float] = None) -> Optional[bytes]:
+        """
+        Buffer a token; return a frame when the window or byte threshold is hit.
+        """
+        if not token:
+            return None
+        self.tokens_seen += 1
+        now = time.monotonic() if now is None else now
+        if not self._buffer:
+            self._first_buffered_at = now
+        self._buffer.append(token)
+        self._buffered_bytes += len(token)
+
+        if (
+            self._buffered_bytes >= self.config.max_buffer_bytes
+            or now - self._first_buffered_at >= self.config.flush_interval
+        ):
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[bytes]:
+        """Emit any buffered tokens as one frame."""
+        if not self._buffer:
+            return None
+        text = self._buffer[0] if len(self._buffer) == 1 else "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered_bytes = 0
+        return self.token_frame(text)
+
+    def has_pending(self) -> bool:
+        """True when tokens are waiting in the buffer."""
+        return bool(self._buffer)
+
+    def time_until_flush(self, now: Optional[float] = None) -> float:
+        """Seconds left before the current buffer must be flushed."""
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._first_buffered_at + self.config.flush_interval - now)
+
+    async def stream_tokens(self, tokens: AsyncIterator[str]) -> AsyncIterator[bytes]:
+        """Coalesce an async iterator of token strings into SSE frames."""
+        async for frame in self.stream(tokens, token_of=lambda item: item):
+            yield frame
+
+    async def stream(
+        self,
+        items: AsyncIterator[Any],
+        token_of: Callable[[Any], Optional[str]],
+        frame_of: Optional[Callable[[Any], bytes]] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Coalesce an async iterator into SSE frames.
+
+        ``token_of(item)`` returns the token text for token items and ``None``
+        for anything else; non-token items are encoded with ``frame_of`` after
+        flushing any buffered tokens, so frame order matches item order.
+
+        The source is drained by a pump task into a small bounded queue. Items
+        already queued are consumed without suspending; when the queue is empty
+        and tokens are pending, the wait is bounded by the flush window so a
+        stalled upstream never holds already-received text back from the client.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.config.queue_size)
+        pump = asyncio.create_task(_pump(items, queue))
+        try:
+            while True:
+                try:
+                    kind, item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    if self._buffer:
+                        try:
+                            async with asyncio.timeout(self.time_until_flush()):
+                                kind, item = await queue.get()
+                        except TimeoutError:
+                            frame = self.flush()
+                            if frame:
+                                yield frame
+                            continue
+                    else:
+                        kind, item = await queue.get()
+
+                if kind is _END:
+                    break
+                if kind is _ERROR:
+                    # Deliver what was already received before the caller reports the error
+                    frame = self.flush()
+                    if frame:
+                        yield frame
+                    raise item
+
+                token = token_of(item)
+                if token is not None:
+                    frame = self.push(token)
+                    if frame:
+                        yield frame
+                elif frame_of is not None:
+                    frame = self.flush()
+                    if frame:
+                        yield frame
+                    yield frame_of(item)
+
+            frame = self.flush()
+            if frame:
+                yield frame
+        finally:
+            if not pump.done():
+                pump.cancel()
+
+
+def frame_payload(frame: bytes) -> str:
+    """JSON text of a ``data:`` frame, for transports without SSE framing (WebSocket)."""
+    return frame[len(b"data: "):-2].decode("utf-8")
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """
+    Streaming response that closes its body iterator on every exit path.
+
+    Starlette cancels the body on ``http.disconnect`` but leaves a generator
+    suspended at a ``yield`` when a send fails; closing it here runs the
+    generator's ``finally`` blocks, which cancel upstream runs and LLM streams.
+    """
+
+    async def stream_response(self, send) -> None:
+        try:
+            await super().stream_response(send)
+        finally:
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                # Shielded: the surrounding scope is usually already cancelled
+                with anyio.CancelScope(shield=True):
+                    await aclose()
+
+
+class SSEResponse(ClosingStreamingResponse):
+    """Server-Sent Events response (see ``ClosingStreamingResponse``)."""
+
+    media_type = "text/event-stream; charset=utf-8"
+
+
+_ITEM = object()
+_END = object()
+_ERROR = object()
+
+
+async def _pump(items: AsyncIterator[Any], queue: asyncio.Queue) -> None:
+    """Copy items from an async iterator into a queue, then signal end or error."""
+    try:
+        async for item in items:
+            await queue.put((_ITEM, item))
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        await queue.put((_ERROR, exc))
+        return
+    await queue.put((_END, None))
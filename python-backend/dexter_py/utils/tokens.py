@@ -0,0 +1,205 @@
+"""Token counting and budgeting shared by prompt assembly.
+
+``get_token_counter(model)`` returns a counter backed by a local BPE tokenizer
+(tiktoken) with the encoding for that model: ``o200k_base`` for the GPT-4o/o
+families, ``cl100k_base`` for GPT-4/3.5 and, as the closest public
+approximation, for Claude, Ollama and other models. Counts are memoized per
+encoding, so the system prompt, tool catalog and history that recur on every
+call are tokenized once. Without tiktoken (or its encoding files, offline) the
+counter falls back to ~4 characters per token and reports ``exact=False``.
+
+``context_window(model)`` is the model's context size (LLM_CONTEXT_WINDOW
+overrides it), and ``TokenBudget`` packs a prompt piece by piece against a
+token allowance.
+
+Usage:
+    counter = get_token_counter("claude-sonnet-4-20250514")
+    budget = TokenBudget(counter, 8000)
+    for part in parts:
+        text = budget.add(part, truncation_suffix="... [truncated]")
+        if text is None:
+            break
+"""
+
+from typing import Any, Optional
+from functools import lru_cache
+import math
+import os
+
+import structlog
+
+from .providers import optional_import
+
+
+CHARS_PER_TOKEN = 4  # Fallback estimate when no tokenizer is available
+APPROX_ENCODING = "approx"
+DEFAULT_ENCODING = "cl100k_base"
+
+# Model name prefix -> tiktoken encoding; first match wins
+MODEL_ENCODINGS = (
+    ("gpt-4o", "o200k_base"),
+    ("gpt-4.1", "o200k_base"),
+    ("gpt-5", "o200k_base"),
+    ("o1", "o200k_base"),
+    ("o3", "o200k_base"),
+    ("o4", "o200k_base"),
+    ("gpt-4", "cl100k_base"),
+    ("gpt-3.5", "cl100k_base"),
+)
+
+# Model name prefix -> context window in tokens; first match wins
+CONTEXT_WINDOWS = (
+    ("claude-", 200_000),
+    ("gpt-4o", 128_000),
+    ("gpt-4-turbo", 128_000),
+    ("gpt-4.1", 1_000_000),
+    ("gpt-5", 400_000),
+    ("o1", 200_000),
+    ("o3", 200_000),
+    ("o4", 200_000),
+    ("gpt-4", 8_192),
+    ("gpt-3.5", 16_385),
+    ("gemini-", 1_000_000),
+)
+DEFAULT_CONTEXT_WINDOW = 32_768  # Ollama and other models; set LLM_CONTEXT_WINDOW to match the deployment
+
+
+def _match(model: Optional[str], table: tuple, default: Any) -> Any:
+    name = (model or "").lower()
+    for prefix, value in table:
+        if name.startswith(prefix):
+            return value
+    return default
+
+
+def encoding_for_model(model: Optional[str]) -> str:
+    """tiktoken encoding name used to count tokens for ``model``."""
+    return _match(model, MODEL_ENCODINGS, DEFAULT_ENCODING)
+
+
+def context_window(model: Optional[str]) -> int:
+    """Context window of ``model`` in tokens (LLM_CONTEXT_WINDOW overrides)."""
+    override = os.getenv("LLM_CONTEXT_WINDOW")
+    if override:
+        return int(override)
+    return _match(model, CONTEXT_WINDOWS, DEFAULT_CONTEXT_WINDOW)
+
+
+class TokenCounter:
+    """
+    Counts and truncates text in tokens of one encoding.
+
+    Args:
+        encoding_name: tiktoken encoding name
+        cache_size: Distinct strings whose counts are memoized
+    """
+
+    def __init__(self, encoding_name: str = DEFAULT_ENCODING, cache_size: int = 1024) -> None:
+        self._encoding = None
+        tiktoken = optional_import("tiktoken")
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.get_encoding(encoding_name)
+            except Exception as exc:
+                # Encoding files are downloaded on first use; offline hosts fall back
+                structlog.get_logger(__name__).warning("tokenizer_unavailable", encoding=encoding_name, error=str(exc))
+        self.encoding_name = encoding_name if self._encoding is not None else APPROX_ENCODING
+        self.count = lru_cache(maxsize=cache_size)(self._count)
+
+    @property
+    def exact(self) -> bool:
+        """True when counts come from the BPE tokenizer rather than the estimate."""
+        return self._encoding is not None
+
+    def _encode(self, text: str) -> list:
+        # Special-token text in user content is counted as plain text
+        return self._encoding.encode(text, disallowed_special=())
+
+    def _count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is None:
+            return math.ceil(len(text) / CHARS_PER_TOKEN)
+        return len(self._encode(text))
+
+    def truncate(self, text: str, max_tokens: int, suffix: str = "", keep: str = "head") -> str:
+        """
+        Cut ``text`` to at most ``max_tokens`` tokens, suffix included.
+
+        Args:
+            text: Text to cut
+            max_tokens: Token allowance
+            suffix: Marker added where text was removed (only when cut)
+            keep: ``head`` keeps the start (marker appended), ``tail`` keeps
+                the end (marker prepended)
+
+        Returns:
+            ``text`` unchanged if it fits, otherwise the cut text; empty if
+            not even the marker fits
+        """
+        if self.count(text) <= max_tokens:
+            return text
+        room = max_tokens - self.count(suffix)
+        ids = self._encode(text) if self._encoding is not None else None
+        while room > 0:
+            if ids is None:
+                chars = room * CHARS_PER_TOKEN
+                kept = text[:chars] if keep == "head" else text[-chars:]
+            else:
+                kept = self._encoding.decode(ids[:room] if keep == "head" else ids[-room:])
+            cut = kept + suffix if keep == "head" else suffix + kept
+            # Tokens can merge differently across the cut; shrink until it fits
+            if self._count(cut) <= max_tokens:
+                return cut
+            room -= 1
+        return ""
+
+
+class TokenBudget:
+    """
+    Running token allowance for packing a prompt piece by piece.
+
+    Args:
+        counter: Counter for the target model
+        limit: Total tokens available
+    """
+
+    def __init__(self, counter: TokenCounter, limit: int) -> None:
+        self.counter = counter
+        self.limit = limit
+        self.used = 0
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.limit - self.used)
+
+    def add(self, text: str, truncation_suffix: Optional[str] = None) -> Optional[str]:
+        """
+        Spend tokens on ``text``.
+
+        Returns:
+            ``text`` if it fits; a truncated copy ending in
+            ``truncation_suffix`` if that is given and something fits;
+            otherwise None (nothing is spent)
+        """
+        tokens = self.counter.count(text)
+        if tokens <= self.remaining:
+            self.used += tokens
+            return text
+        if truncation_suffix is None:
+            return None
+        cut = self.counter.truncate(text, self.remaining, truncation_suffix)
+        if not cut:
+            return None
+        self.used += self.counter.count(cut)
+        return cut
+
+
+@lru_cache(maxsize=None)
+def _counter_for_encoding(encoding_name: str) -> TokenCounter:
+    return TokenCounter(encoding_name, cache_size=int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "1024")))
+
+
+def get_token_counter(model: Optional[str] = None) -> TokenCounter:
+    """Shared counter for ``model``'s encoding (one per encoding)."""
+    return _counter_for_encoding(encoding_for_model(model))
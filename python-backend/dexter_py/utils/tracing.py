@@ -0,0 +1,362 @@
+"""Request-scoped span tracing.
+
+The HTTP middleware opens a root span per request (trace id = request id).
+The current span lives in a ``ContextVar``, so anything awaited during the
+request — including tasks created from it, which copy the context — records
+child spans with ``span()``. Finished spans are buffered per trace in an
+in-process ``TraceCollector`` (bounded; oldest traces are evicted) and can be
+rendered as a waterfall, plain JSON, or OTLP/JSON
+(``ExportTraceServiceRequest``) for an OpenTelemetry collector.
+
+When no trace is active (scripts, tests, batch runs without a request) spans
+are no-ops, so instrumented code pays almost nothing.
+
+Usage:
+    with span("phase.plan", iteration=2) as s:
+        ...
+        s.set_attribute("tasks", 3)
+
+    # Async generators must not change the caller's context across yields:
+    s = start_span("llm.stream", model=model)
+    try:
+        ...
+    finally:
+        s.end()
+
+Configure with TRACING_ENABLED, TRACE_MAX_TRACES, TRACE_EXPORT_PATH and
+TRACE_EXPORT_FORMAT (``otlp`` or ``json``).
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+import asyncio
+import functools
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+
+import structlog
+
+
+SERVICE_NAME = "dexter-python-backend"
+
+
+@dataclass
+class Span:
+    """One timed operation within a trace."""
+    trace_id: str
+    name: str
+    span_id: str = field(default_factory=lambda: secrets.token_hex(8))
+    parent_id: Optional[str] = None
+    start: float = field(default_factory=time.time)
+    end_time: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+    error: Optional[str] = None
+    _collector: Optional["TraceCollector"] = field(default=None, repr=False, compare=False)
+
+    @property
+    def recording(self) -> bool:
+        return self._collector is not None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_time is None:
+            return None
+        return round((self.end_time - self.start) * 1000, 3)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self.recording:
+            self.attributes[key] = value
+
+    def record_error(self, exc: BaseException) -> None:
+        if self.recording:
+            self.status = "error"
+            self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self) -> None:
+        """Finish the span (idempotent) and hand it to the collector."""
+        if self.end_time is not None or self._collector is None:
+            return
+        self.end_time = time.time()
+        self._collector.record(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+_NOOP_SPAN = Span(trace_id="", name="noop", span_id="", start=0.0)
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("dexter_current_span", default=None)
+
+
+# ============================================================================
+# Collector and exporters
+# ============================================================================
+
+class TraceCollector:
+    """
+    Keeps finished spans of the most recent traces in memory.
+
+    Args:
+        max_traces: Traces retained before the oldest is evicted
+        max_spans_per_trace: Spans kept per trace (later ones are counted, not stored)
+        exporter: Optional TraceFileExporter fed each trace when its root span ends
+    """
+
+    def __init__(
+        self,
+        max_traces: int = 500,
+        max_spans_per_trace: int = 2000,
+        exporter: Optional["TraceFileExporter"] = None,
+    ) -> None:
+        self.max_traces = max_traces
+        self.max_spans_per_trace = max_spans_per_trace
+        self.exporter = exporter
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._dropped: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, span: Span) -> None:
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    evicted, _ = self._traces.popitem(last=False)
+                    self._dropped.pop(evicted, None)
+            if len(spans) < self.max_spans_per_trace:
+                spans.append(span)
+            else:
+                self._dropped[span.trace_id] = self._dropped.get(span.trace_id, 0) + 1
+        if span.parent_id is None and self.exporter is not None:
+            self.exporter.submit(self.get(span.trace_id))
+
+    def get(self, trace_id: str) -> List[Span]:
+        """Finished spans of ``trace_id`` ordered by start time."""
+        with self._lock:
+            spans = list(self._traces.get(trace_id, ()))
+        return sorted(spans, key=lambda s: s.start)
+
+    def dropped(self, trace_id: str) -> int:
+        return self._dropped.get(trace_id, 0)
+
+    def trace_ids(self) -> List[str]:
+        """Retained trace ids, most recent last."""
+        with self._lock:
+            return list(self._traces)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+            self._dropped.clear()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: List[Span], service_name: str = SERVICE_NAME) -> Dict[str, Any]:
+    """Render spans as an OTLP/JSON ``ExportTraceServiceRequest``."""
+    otlp_spans = []
+    for s in spans:
+        otlp = {
+            "traceId": s.trace_id.replace("-", "")[:32].rjust(32, "0"),
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 2 if s.parent_id is None else 1,  # SERVER for the request, INTERNAL otherwise
+            "startTimeUnixNano": str(int(s.start * 1e9)),
+            "endTimeUnixNano": str(int((s.end_time or s.start) * 1e9)),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+            "status": {"code": 2, "message": s.error or ""} if s.status == "error" else {"code": 1},
+        }
+        if s.parent_id:
+            otlp["parentSpanId"] = s.parent_id
+        otlp_spans.append(otlp)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{"scope": {"name": "dexter_py"}, "spans": otlp_spans}],
+        }]
+    }
+
+
+def waterfall(spans: List[Span]) -> Dict[str, Any]:
+    """
+    Describe a trace as a waterfall: each span with its depth and offset from
+    the trace start, in start order.
+    """
+    if not spans:
+        return {"trace_id": None, "duration_ms": 0, "spans": []}
+    depth: Dict[str, int] = {}
+    origin = min(s.start for s in spans)
+    finish = max((s.end_time or s.start) for s in spans)
+    rows = []
+    for s in spans:
+        depth[s.span_id] = depth.get(s.parent_id, -1) + 1 if s.parent_id else 0
+        row = s.to_dict()
+        row["depth"] = depth[s.span_id]
+        row["offset_ms"] = round((s.start - origin) * 1000, 3)
+        rows.append(row)
+    return {
+        "trace_id": spans[0].trace_id,
+        "duration_ms": round((finish - origin) * 1000, 3),
+        "spans": rows,
+    }
+
+
+class TraceFileExporter:
+    """
+    Appends finished traces to a file, one JSON document per line, from a
+    background thread (``otlp``: ExportTraceServiceRequest; ``json``: waterfall).
+    """
+
+    def __init__(self, path: str, fmt: str = "otlp", maxsize: int = 1000) -> None:
+        self.path = path
+        self.fmt = fmt
+        self._queue: "queue.Queue[List[Span]]" = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._drain, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, spans: List[Span]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            pass
+
+    def render(self, spans: List[Span]) -> str:
+        doc = to_otlp(spans) if self.fmt == "otlp" else waterfall(spans)
+        return json.dumps(doc, default=repr)
+
+    def _drain(self) -> None:
+        while True:
+            spans = self._queue.get()
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(self.render(spans) + "\n")
+            except Exception as e:
+                structlog.get_logger(__name__).warning("trace_export_failed", error=str(e))
+
+
+# ============================================================================
+# Span API
+# ============================================================================
+
+_collector: Optional[TraceCollector] = None
+_enabled = os.getenv("TRACING_ENABLED", "1").lower() not in ("0", "false", "no")
+
+
+def get_trace_collector() -> TraceCollector:
+    """Get the process-wide collector (TRACE_MAX_TRACES, TRACE_EXPORT_PATH, TRACE_EXPORT_FORMAT)."""
+    global _collector
+    if _collector is None:
+        path = os.getenv("TRACE_EXPORT_PATH")
+        exporter = TraceFileExporter(path, os.getenv("TRACE_EXPORT_FORMAT", "otlp")) if path else None
+        _collector = TraceCollector(max_traces=int(os.getenv("TRACE_MAX_TRACES", "500")), exporter=exporter)
+    return _collector
+
+
+def configure_tracing(enabled: bool = True, collector: Optional[TraceCollector] = None) -> TraceCollector:
+    """Enable/disable tracing and replace the collector (e.g. in tests)."""
+    global _collector, _enabled
+    _enabled = enabled
+    _collector = collector or TraceCollector()
+    return _collector
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_trace(trace_id: str, name: str, **attributes: Any) -> Span:
+    """Create the root span of a new trace (not attached to the context)."""
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(trace_id=trace_id, name=name, attributes=attributes, _collector=get_trace_collector())
+
+
+def start_span(name: str, **attributes: Any) -> Span:
+    """
+    Create a child of the current span without making it current. Use this in
+    async generators; call ``end()`` when done. A no-op outside a trace.
+    """
+    parent = _current_span.get()
+    if parent is None or not parent.recording:
+        return _NOOP_SPAN
+    return Span(
+        trace_id=parent.trace_id,
+        name=name,
+        parent_id=parent.span_id,
+        attributes=attributes,
+        _collector=parent._collector,
+    )
+
+
+def attach(s: Span) -> Token:
+    """Make ``s`` the current span; pass the token to ``detach()``."""
+    return _current_span.set(s)
+
+
+def detach(token: Token) -> None:
+    _current_span.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Record a child span around the block and make it current inside it."""
+    s = start_span(name, **attributes)
+    if not s.recording:
+        yield s
+        return
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as exc:
+        if not isinstance(exc, (GeneratorExit, asyncio.CancelledError)):
+            s.record_error(exc)
+        else:
+            s.set_attribute("cancelled", True)
+        raise
+    finally:
+        _current_span.reset(token)
+        s.end()
+
+
+def traced(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator recording a span around each call of a sync or async function."""
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
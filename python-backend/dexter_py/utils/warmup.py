@@ -0,0 +1,214 @@
+"""Startup warm-up and readiness tracking.
+
+Expensive one-time work (building the LLM client, loading the embedding model,
+opening the provider's connection pool, rendering prompt/schema text) is done
+once at startup instead of inside the first user request. Each piece is a named
+*component* run concurrently by ``WarmupManager``; ``report()`` describes every
+component's state and how long it took, and ``ready`` becomes True once all
+*required* components have finished successfully. ``/ready`` serves that report.
+
+``build_default_warmup()`` registers the standard components:
+
+- ``llm_client``: construct the LangChain client (provider probing included)
+- ``embedding_model``: load the shared sentence-transformers model
+- ``prompt_cache``: render system prompts and structured-output schemas
+- ``llm_connection``: one tiny completion to open the provider's HTTP pool
+  (opt-in with WARMUP_LLM_PING=1, since it is a billed call)
+
+Configure with WARMUP_ENABLED, WARMUP_TIMEOUT_S, WARMUP_EMBEDDINGS,
+WARMUP_LLM_PING and READY_REQUIRED_COMPONENTS (comma-separated component
+names; default ``llm_client``).
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from dataclasses import dataclass, field
+import asyncio
+import importlib.util
+import os
+import time
+
+import structlog
+
+
+PENDING = "pending"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class ComponentUnavailable(Exception):
+    """Raised by a warm-up step when its component is not configured/installed."""
+
+
+@dataclass
+class WarmupConfig:
+    """Configuration for the startup warm-up."""
+    enabled: bool = True
+    timeout: float = 60.0  # Seconds allowed per component
+    required: List[str] = field(default_factory=lambda: ["llm_client"])
+    embeddings: bool = True  # Load the embedding model
+    llm_ping: bool = False  # Send one tiny completion to open provider connections
+
+    @classmethod
+    def from_env(cls) -> "WarmupConfig":
+        """Build config from WARMUP_* and READY_REQUIRED_COMPONENTS."""
+        required = os.getenv("READY_REQUIRED_COMPONENTS", "llm_client")
+        return cls(
+            enabled=os.getenv("WARMUP_ENABLED", "1").lower() not in ("0", "false", "no"),
+            timeout=float(os.getenv("WARMUP_TIMEOUT_S", "60")),
+            required=[name.strip() for name in required.split(",") if name.strip()],
+            embeddings=os.getenv("WARMUP_EMBEDDINGS", "1").lower() not in ("0", "false", "no"),
+            llm_ping=os.getenv("WARMUP_LLM_PING", "0").lower() in ("1", "true", "yes"),
+        )
+
+
+@dataclass
+class ComponentStatus:
+    """Warm-up state of one component."""
+    name: str
+    required: bool = False
+    state: str = PENDING
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "required": self.required,
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+        }
+
+
+class WarmupManager:
+    """
+    Runs registered warm-up steps and tracks readiness.
+
+    Args:
+        config: Warm-up configuration (defaults to WarmupConfig.from_env())
+    """
+
+    def __init__(self, config: Optional[WarmupConfig] = None) -> None:
+        self.config = config or WarmupConfig.from_env()
+        self.logger = structlog.get_logger(__name__)
+        self.components: Dict[str, ComponentStatus] = {}
+        self._steps: Dict[str, Callable[[], Awaitable[Any]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.duration_ms: Optional[float] = None
+
+    def register(self, name: str, step: Callable[[], Awaitable[Any]]) -> None:
+        """Register an async warm-up step; required-ness comes from the config."""
+        self._steps[name] = step
+        self.components[name] = ComponentStatus(name, required=name in self.config.required)
+
+    async def _run_step(self, name: str) -> None:
+        status = self.components[name]
+        status.state = RUNNING
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._steps[name](), self.config.timeout)
+            status.state = READY
+        except ComponentUnavailable as e:
+            status.state = SKIPPED
+            status.error = str(e)
+        except asyncio.TimeoutError:
+            status.state = FAILED
+            status.error = f"timed out after {self.config.timeout}s"
+        except Exception as e:
+            status.state = FAILED
+            status.error = f"{type(e).__name__}: {e}"
+        status.duration_ms = round((time.perf_counter() - start) * 1000, 1)
+        log = self.logger.warning if status.state == FAILED else self.logger.info
+        log("warmup_component", component=name, state=status.state, duration_ms=status.duration_ms, error=status.error)
+
+    async def run(self) -> None:
+        """Run every registered step concurrently and wait for all of them."""
+        if not self.config.enabled:
+            for status in self.components.values():
+                status.state = SKIPPED
+                status.error = "warm-up disabled"
+            self.duration_ms = 0.0
+            return
+        start = time.perf_counter()
+        await asyncio.gather(*(self._run_step(name) for name in self._steps))
+        self.duration_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.logger.info("warmup_complete", ready=self.ready, duration_ms=self.duration_ms)
+
+    def start(self) -> asyncio.Task:
+        """Run warm-up in the background (so startup does not block on it)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        """Cancel a warm-up still in progress."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    @property
+    def ready(self) -> bool:
+        """True once every required component is ready (always True when disabled)."""
+        if not self.config.enabled:
+            return True
+        return all(
+            status.state == READY
+            for status in self.components.values()
+            if status.required
+        )
+
+    def report(self) -> Dict[str, Any]:
+        """Readiness plus per-component state and warm-up durations."""
+        return {
+            "ready": self.ready,
+            "warmup_ms": self.duration_ms,
+            "components": {name: status.to_dict() for name, status in self.components.items()},
+        }
+
+
+# ============================================================================
+# Standard components
+# ============================================================================
+# Imports are local so that importing this module stays cheap and free of
+# cycles (the model layer itself imports from utils).
+
+async def _warm_llm_client() -> None:
+    from ._utils import get_llm_client
+    await get_llm_client()
+
+
+async def _warm_embedding_model() -> None:
+    if importlib.util.find_spec("sentence_transformers") is None:
+        raise ComponentUnavailable("sentence-transformers not installed")
+    from .message_history import get_shared_embedding_provider
+    await get_shared_embedding_provider().warm_up()
+
+
+async def _warm_prompt_cache() -> None:
+    from ..agent.prompts import prime_prompt_cache
+    from ..agent.schemas import Understanding, Plan
+    from ..model.llm import structured_output_instructions
+    prime_prompt_cache()
+    for model in (Understanding, Plan):
+        structured_output_instructions(model)
+
+
+async def _warm_llm_connection() -> None:
+    from ..model.llm import call_llm
+    await call_llm("ping", max_tokens=1, use_cache=False)
+
+
+def build_default_warmup(config: Optional[WarmupConfig] = None) -> WarmupManager:
+    """Create a WarmupManager with the standard components registered."""
+    manager = WarmupManager(config)
+    manager.register("llm_client", _warm_llm_client)
+    if manager.config.embeddings:
+        manager.register("embedding_model", _warm_embedding_model)
+    manager.register("prompt_cache", _warm_prompt_cache)
+    if manager.config.llm_ping:
+        manager.register("llm_connection", _warm_llm_connection)
+    return manager
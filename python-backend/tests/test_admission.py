@@ -0,0 +1,112 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from dexter_py.utils.admission import AdmissionConfig, AdmissionLimiter, AdmissionRejected, configure_admission
+
+
+def test_waiters_are_admitted_in_order_when_slots_free():
+    limiter = AdmissionLimiter("test", limit=1, max_queue=4, queue_timeout=1.0)
+    order = []
+
+    async def worker(name):
+        async with limiter.slot():
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        await asyncio.gather(*(worker(i) for i in range(3)))
+
+    asyncio.run(scenario())
+    assert order == [0, 1, 2]
+    assert limiter.active == 0 and limiter.waiting == 0
+
+
+def test_full_queue_rejects_immediately():
+    limiter = AdmissionLimiter("test", limit=1, max_queue=1, queue_timeout=5.0, retry_after=7)
+
+    async def scenario():
+        held = await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as exc_info:
+            await limiter.acquire()
+        held.release()
+        (await waiter).release()
+        return exc_info.value
+
+    exc = asyncio.run(scenario())
+    assert exc.reason == "queue_full"
+    assert exc.retry_after == 7
+
+
+def test_queue_deadline_rejects():
+    limiter = AdmissionLimiter("test", limit=1, max_queue=4)
+
+    async def scenario():
+        held = await limiter.acquire()
+        try:
+            with pytest.raises(AdmissionRejected) as exc_info:
+                await limiter.acquire(timeout=0.01)
+        finally:
+            held.release()
+        return exc_info.value
+
+    assert asyncio.run(scenario()).reason == "queue_timeout"
+    assert limiter.waiting == 0
+
+
+def test_permit_release_is_idempotent():
+    limiter = AdmissionLimiter("test", limit=1)
+
+    async def scenario():
+        permit = await limiter.acquire()
+        permit.release()
+        permit.release()
+        return limiter.active
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_answer_client_calls_share_the_llm_call_pool(monkeypatch):
+    from dexter_py.model import client_pool
+    from dexter_py.utils import _utils
+
+    active = []
+    peak = []
+
+    async def provider_call():
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.01)
+        active.pop()
+
+    async def agenerate(messages, callbacks=()):
+        await provider_call()
+        for handler in callbacks:
+            await handler.on_llm_new_token("ok")
+            await handler.on_llm_end()
+        return "ok"
+
+    async def resolve(model):
+        return SimpleNamespace(agenerate=agenerate)
+
+    monkeypatch.setattr(_utils, "async_callback_handler", lambda: object)
+    monkeypatch.setattr(client_pool, "resolve_llm_client", resolve)
+    controller = configure_admission(AdmissionConfig(max_concurrent_llm_calls=1))
+    client = _utils.ProductionLLMClient()
+
+    async def stream():
+        return "".join([t async for t in client.stream("q", model="m")])
+
+    async def scenario():
+        return await asyncio.gather(*(stream() for _ in range(3)), *(client.complete("q", model="m") for _ in range(3)))
+
+    try:
+        assert asyncio.run(scenario()) == ["ok"] * 6
+    finally:
+        configure_admission(AdmissionConfig())
+
+    assert max(peak) == 1
+    assert controller.llm_calls.active == 0
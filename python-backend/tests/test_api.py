@@ -1,5 +1,6 @@
 import os
 import sys
+import json
 import pytest
 from fastapi.testclient import TestClient
 import importlib
@@ -47,13 +48,274 @@ def test_query_streams(monkeypatch):
     monkeypatch.setattr(main_mod, "call_llm_stream", fake_stream)
 
     client = TestClient(main_mod.app)
-    r = client.post("/query", headers={"x-api-key": "testkey"}, json={"prompt": "hi"}, stream=True)
+    r = client.post("/query", headers={"x-api-key": "testkey"}, json={"prompt": "hi"})
     assert r.status_code == 200
-    # Read stream content
-    content = b""
-    for chunk in r.iter_content(chunk_size=None):
-        content += chunk
-    # SSE framed, so should contain 'data: hello' and 'data: world'
-    text = content.decode('utf-8')
-    assert "data: hello" in text
-    assert "data: world" in text
+    # SSE framed; tokens may be coalesced into fewer frames
+    frames = [json.loads(f[len("data: "):]) for f in r.text.split("\n\n") if f.startswith("data: ")]
+    assert frames
+    assert "".join(f["token"] for f in frames) == "hello world"
+    assert all(f["role"] == "assistant" and f["request_id"] for f in frames)
+
+
+def test_agent_query_streams_events():
+    from dexter_py.agent.orchestrator import AgentEvent, AgentEventType
+
+    class FakeOrchestrator:
+        async def run_stream(self, **kwargs):
+            yield AgentEvent(AgentEventType.PHASE_START, "run-1", {"phase": "answer"})
+            yield AgentEvent(AgentEventType.ANSWER_TOKEN, "run-1", {"token": "hi"})
+            yield AgentEvent(AgentEventType.DONE, "run-1", {"answer": "hi"})
+
+    main_mod = _import_app_module()
+    with TestClient(main_mod.app) as client:
+        main_mod.app.state.orchestrator = FakeOrchestrator()
+        r = client.post("/agent/query", headers={"x-api-key": "testkey"}, json={"query": "hi"})
+    assert r.status_code == 200
+    frames = [line[len("data: "):] for line in r.text.split("\n\n") if line.startswith("data: ")]
+    types = [json.loads(f)["type"] for f in frames]
+    assert types == ["phase_start", "answer_token", "done"]
+
+
+def test_agent_query_rejects_when_run_queue_full():
+    import asyncio
+    from dexter_py.utils.admission import AdmissionConfig, configure_admission
+
+    main_mod = _import_app_module()
+    controller = configure_admission(AdmissionConfig(max_concurrent_runs=1, max_queue=0))
+    held = asyncio.run(controller.runs.acquire())
+    try:
+        with TestClient(main_mod.app) as client:
+            r = client.post("/agent/query", headers={"x-api-key": "testkey"}, json={"query": "hi"})
+    finally:
+        held.release()
+        configure_admission(AdmissionConfig())
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "5"
+    assert r.json()["reason"] == "queue_full"
+
+
+def test_api_recent_cursor():
+    main_mod = _import_app_module()
+    client = TestClient(main_mod.app)
+    client.get("/health")
+    first = client.get("/api/recent").json()
+    assert first["recent"]
+    cursor = first["next_since"]
+
+    client.get("/health")
+    second = client.get(f"/api/recent?since={cursor}").json()
+    # Only the /health call and the previous /api/recent call are new
+    assert {e["path"] for e in second["recent"]} == {"/health", "/api/recent"}
+    assert all(e["seq"] > cursor for e in second["recent"])
+
+
+def test_api_recent_limited_pages_skip_nothing():
+    main_mod = _import_app_module()
+    client = TestClient(main_mod.app)
+    cursor = client.get("/api/recent").json()["next_since"]
+    for _ in range(4):
+        client.get("/health")
+
+    seen = []
+    pages = 0
+    while True:
+        page = client.get(f"/api/recent?since={cursor}&limit=2").json()
+        assert len(page["recent"]) <= 2
+        seen.extend(e["seq"] for e in page["recent"])
+        cursor = page["next_since"]
+        pages += 1
+        if not page["has_more"]:
+            break
+    # The first /api/recent call, four /health calls and every poll but the last
+    assert sorted(seen) == list(range(min(seen), min(seen) + len(seen)))
+    assert len(seen) == 1 + 4 + pages - 1
+
+    stats = client.get("/api/stats").json()
+    assert stats["routes"]["/health"]["count"] >= 2
+
+
+def test_api_stats_key_routes_by_template():
+    main_mod = _import_app_module()
+    client = TestClient(main_mod.app)
+    for i in range(3):
+        client.get(f"/debug/trace/req-{i}")
+        client.get(f"/wp-admin/probe-{i}.php")
+
+    routes = client.get("/api/stats").json()["routes"]
+    assert routes["/debug/trace/{request_id}"]["count"] >= 3
+    assert routes["unmatched"]["count"] >= 3 and routes["unmatched"]["in_flight"] == 0
+    assert not any(r.startswith(("/debug/trace/req-", "/wp-admin")) for r in routes)
+
+
+def test_agent_batch_streams_ndjson():
+    from dexter_py.agent.orchestrator import AgentEvent, AgentEventType
+
+    class FakeOrchestrator:
+        async def run_stream(self, query, **kwargs):
+            if query == "bad":
+                raise RuntimeError("nope")
+            yield AgentEvent(AgentEventType.DONE, "run-1", {"answer": "ok " + query, "metrics": {}})
+
+    main_mod = _import_app_module()
+    with TestClient(main_mod.app) as client:
+        main_mod.app.state.orchestrator = FakeOrchestrator()
+        r = client.post(
+            "/agent/batch",
+            headers={"x-api-key": "testkey"},
+            json={"items": [{"query": "a", "id": "x"}, {"query": "bad"}], "concurrency": 2},
+        )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.text.splitlines() if line]
+    assert lines[-1]["type"] == "summary" and lines[-1]["failed"] == 1
+    results = {line["index"]: line for line in lines[:-1]}
+    assert results[0]["answer"] == "ok a" and results[0]["id"] == "x"
+    assert results[1]["status"] == "error"
+
+
+def test_ready_reports_warmup_components(monkeypatch):
+    import asyncio
+    import time
+    from dexter_py.utils.warmup import WarmupConfig, WarmupManager
+
+    main_mod = _import_app_module()
+    gate = {"open": False}
+
+    async def client_step():
+        while not gate["open"]:
+            await asyncio.sleep(0.01)
+
+    def build():
+        manager = WarmupManager(WarmupConfig(timeout=5.0, required=["llm_client"]))
+        manager.register("llm_client", client_step)
+        return manager
+
+    monkeypatch.setattr(main_mod, "build_default_warmup", build)
+    with TestClient(main_mod.app) as client:
+        r = client.get("/ready")
+        assert r.status_code == 503
+        assert r.json()["components"]["llm_client"]["state"] == "running"
+
+        gate["open"] = True
+        for _ in range(100):
+            r = client.get("/ready")
+            if r.status_code == 200:
+                break
+            time.sleep(0.01)
+        assert r.status_code == 200
+        body = r.json()
+        assert body["ready"] is True
+        assert body["components"]["llm_client"]["state"] == "ready"
+        assert body["warmup_ms"] is not None
+
+
+def test_debug_trace_shows_request_waterfall(monkeypatch):
+    from dexter_py.utils import tracing
+
+    async def fake_stream(prompt):
+        with tracing.span("fake.llm"):
+            yield "hello"
+
+    main_mod = _import_app_module()
+    monkeypatch.setattr(main_mod, "call_llm_stream", fake_stream)
+    client = TestClient(main_mod.app)
+    r = client.post("/query", headers={"x-api-key": "testkey"}, json={"prompt": "trace me"})
+    assert r.status_code == 200
+    request_id = r.headers["X-Request-Id"]
+
+    trace = client.get(f"/debug/trace/{request_id}", headers={"x-api-key": "testkey"})
+    assert trace.status_code == 200
+    spans = {s["name"]: s for s in trace.json()["spans"]}
+    assert spans["http.request"]["attributes"]["route"] == "/query"
+    assert spans["fake.llm"]["parent_id"] == spans["http.request"]["span_id"]
+    # The request span covers the streamed body, not just the headers
+    assert spans["http.request"]["duration_ms"] >= spans["fake.llm"]["duration_ms"]
+
+    otlp = client.get(f"/debug/trace/{request_id}?format=otlp", headers={"x-api-key": "testkey"})
+    assert otlp.json()["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+    assert client.get("/debug/trace/unknown", headers={"x-api-key": "testkey"}).status_code == 404
+
+
+def test_history_endpoint_pages_projects_and_revalidates():
+    from datetime import datetime
+    from dexter_py.utils.message_history import Message, MessageHistory
+
+    def _history(n):
+        history = MessageHistory(model="test-model")
+        for i in range(n):
+            history._messages.append(Message(i, f"q{i}", f"answer {i} " * 100, f"s{i}", datetime(2026, 1, 1)))
+        return history
+
+    main_mod = _import_app_module()
+    headers = {"x-api-key": "testkey"}
+    with TestClient(main_mod.app) as client:
+        store = main_mod.app.state.session_store
+        store.set("paged", _history(5))
+
+        r = client.get("/agent/history?session_id=paged&limit=2&fields=id,summary", headers=headers)
+        assert r.status_code == 200
+        body = r.json()
+        assert body["turns"] == 5
+        assert body["messages"] == [{"id": 3, "summary": "s3"}, {"id": 4, "summary": "s4"}]
+        assert body["next_before_id"] == 3
+        etag = r.headers["ETag"]
+
+        older = client.get("/agent/history?session_id=paged&limit=2&before_id=3&fields=id", headers=headers)
+        assert [m["id"] for m in older.json()["messages"]] == [1, 2]
+
+        cached = client.get(
+            "/agent/history?session_id=paged&limit=2&fields=id,summary",
+            headers={**headers, "If-None-Match": etag},
+        )
+        assert cached.status_code == 304
+
+        store.set("paged", _history(6))
+        changed = client.get(
+            "/agent/history?session_id=paged&limit=2&fields=id,summary",
+            headers={**headers, "If-None-Match": etag},
+        )
+        assert changed.status_code == 200
+        assert changed.json()["messages"][-1]["id"] == 5
+
+        export = client.get("/agent/history?session_id=paged&format=ndjson&fields=id,answer&answer_chars=0", headers=headers)
+        assert export.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in export.text.splitlines()]
+        assert [line["id"] for line in lines] == list(range(6))
+        assert lines[0]["answer"] == "answer 0 " * 100
+
+        assert client.get("/agent/history?session_id=paged&fields=secret", headers=headers).status_code == 400
+
+
+def test_agent_ws_multiplexes_runs():
+    from dexter_py.agent.orchestrator import AgentEvent, AgentEventType
+
+    class FakeOrchestrator:
+        async def run_stream(self, query, run_id, **kwargs):
+            yield AgentEvent(AgentEventType.ANSWER_TOKEN, run_id, {"token": query})
+            yield AgentEvent(AgentEventType.DONE, run_id, {"answer": query})
+
+    main_mod = _import_app_module()
+    with TestClient(main_mod.app) as client:
+        main_mod.app.state.orchestrator = FakeOrchestrator()
+        with client.websocket_connect("/agent/ws", headers={"x-api-key": "testkey"}) as ws:
+            ws.send_json({"type": "run", "run_id": "r1", "query": "alpha", "session_id": "ws-s"})
+            ws.send_json({"type": "run", "run_id": "r2", "query": "beta", "session_id": "ws-s"})
+            frames = []
+            while sum(f["type"] == "done" for f in frames) < 2:
+                frames.append(ws.receive_json())
+
+    done = {f["run_id"]: f["answer"] for f in frames if f["type"] == "done"}
+    assert done == {"r1": "alpha", "r2": "beta"}
+    assert all(f["session_id"] == "ws-s" for f in frames)
+
+
+def test_agent_ws_requires_auth():
+    from starlette.websockets import WebSocketDisconnect
+
+    main_mod = _import_app_module()
+    client = TestClient(main_mod.app)
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with client.websocket_connect("/agent/ws") as ws:
+            ws.receive_json()
+    assert exc_info.value.code == 1008
@@ -0,0 +1,85 @@
+import asyncio
+
+from dexter_py.agent.batch import BatchItem, run_batch
+from dexter_py.agent.orchestrator import AgentEvent, AgentEventType
+from dexter_py.utils.admission import AdmissionConfig, configure_admission, get_admission_controller
+
+
+class _FakeOrchestrator:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.order = []
+
+    async def run_stream(self, query, session_id=None, session_store=None):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.02 if query != "fast" else 0)
+            if query == "boom":
+                raise RuntimeError("provider down")
+            self.order.append(query)
+            yield AgentEvent(AgentEventType.DONE, "run", {"answer": query.upper(), "metrics": {"iterations": 1}})
+        finally:
+            self.active -= 1
+
+
+def _collect(orchestrator, items, concurrency):
+    async def scenario():
+        return [r async for r in run_batch(orchestrator, items, concurrency=concurrency)]
+    return asyncio.run(scenario())
+
+
+def test_batch_bounds_concurrency_and_isolates_failures():
+    orchestrator = _FakeOrchestrator()
+    items = [BatchItem(query=q, id=str(i)) for i, q in enumerate(["a", "boom", "c", "d", "e"])]
+
+    results = _collect(orchestrator, items, concurrency=2)
+
+    assert orchestrator.peak == 2
+    summary = results[-1]
+    assert summary["type"] == "summary"
+    assert (summary["total"], summary["succeeded"], summary["failed"]) == (5, 4, 1)
+    by_id = {r["id"]: r for r in results[:-1]}
+    assert by_id["1"]["status"] == "error" and "provider down" in by_id["1"]["error"]
+    assert by_id["0"]["answer"] == "A"
+    assert all("duration_ms" in r for r in results[:-1])
+
+
+def test_batch_streams_in_completion_order():
+    orchestrator = _FakeOrchestrator()
+    items = [BatchItem(query="slow"), BatchItem(query="fast")]
+
+    results = _collect(orchestrator, items, concurrency=2)
+
+    assert [r["index"] for r in results[:-1]] == [1, 0]
+
+
+def test_items_sharing_a_session_run_in_order():
+    orchestrator = _FakeOrchestrator()
+    items = [BatchItem(query=q, session_id="s1") for q in ["first", "fast"]]
+
+    _collect(orchestrator, items, concurrency=2)
+
+    assert orchestrator.order == ["first", "fast"]
+    assert orchestrator.peak == 1
+
+
+def test_batch_waits_for_run_slots_instead_of_timing_out():
+    orchestrator = _FakeOrchestrator()
+    items = [BatchItem(query=q) for q in "abcdef"]
+    configure_admission(AdmissionConfig(max_concurrent_runs=2, queue_timeout=0.01))
+
+    async def scenario():
+        # An interactive run holds one of the two slots throughout
+        async with get_admission_controller().runs.slot():
+            return [r async for r in run_batch(orchestrator, items, concurrency=8)]
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        configure_admission(AdmissionConfig())
+
+    summary = results[-1]
+    assert (summary["succeeded"], summary["failed"], summary["concurrency"]) == (6, 0, 2)
+    assert orchestrator.peak == 1
@@ -0,0 +1,58 @@
+import asyncio
+
+from dexter_py.model import llm
+from dexter_py.model.cache import ResponseCache, ResponseCacheConfig, configure_response_cache
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = ResponseCache(ResponseCacheConfig(max_entries=2, ttl_seconds=10))
+    now = [1000.0]
+    monkeypatch.setattr("dexter_py.model.cache.time.time", lambda: now[0])
+
+    async def scenario():
+        await cache.set("a", "A")
+        await cache.set("b", "B")
+        assert await cache.get("a") == "A"  # "a" becomes most recent
+        await cache.set("c", "C")  # evicts "b"
+        assert await cache.get("b") is None
+        now[0] += 11
+        assert await cache.get("a") is None  # expired
+
+    asyncio.run(scenario())
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    config = ResponseCacheConfig(disk_path=str(tmp_path))
+
+    async def scenario():
+        await ResponseCache(config).set("k", "persisted")
+        return await ResponseCache(config).get("k")
+
+    assert asyncio.run(scenario()) == "persisted"
+
+
+def test_stream_cache_hit_replays_chunks(monkeypatch):
+    configure_response_cache(ResponseCacheConfig(replay_chunk_chars=4))
+    calls = 0
+
+    async def fake_stream(prompt, **kwargs):
+        nonlocal calls
+        calls += 1
+        for token in ["Hello ", "cached ", "world"]:
+            yield token
+
+    monkeypatch.setattr(llm, "_stream_llm", fake_stream)
+
+    async def collect():
+        return [t async for t in llm.call_llm_stream("faq question", model="m")]
+
+    try:
+        first = asyncio.run(collect())
+        second = asyncio.run(collect())
+    finally:
+        configure_response_cache(ResponseCacheConfig())
+
+    assert calls == 1
+    assert first == ["Hello ", "cached ", "world"]
+    assert "".join(second) == "Hello cached world"
+    assert all(len(chunk) <= 4 for chunk in second)
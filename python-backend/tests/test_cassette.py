@@ -0,0 +1,127 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from dexter_py.model import llm
+from dexter_py.model.cassette import CassetteConfig, CassetteMissError, configure_cassette
+
+
+@pytest.fixture(autouse=True)
+def reset_cassette():
+    yield
+    configure_cassette()
+
+
+async def _collect(stream):
+    return [token async for token in stream]
+
+
+def test_stream_is_recorded_with_timings_and_replayed_offline(tmp_path, monkeypatch):
+    path = str(tmp_path / "cassette.jsonl")
+
+    async def provider(prompt, **kwargs):
+        for token in ("Revenue", " grew", " 12%"):
+            await asyncio.sleep(0.02)
+            yield token
+
+    monkeypatch.setattr(llm, "_stream_llm", provider)
+    configure_cassette(CassetteConfig(mode="record", path=path))
+    recorded = asyncio.run(_collect(llm.call_llm_stream("How did AAPL do?", model="m")))
+
+    entry = json.loads(open(path).read().splitlines()[0])
+    assert entry["source"] == "call_llm_stream"
+    assert entry["chunks"] == recorded == ["Revenue", " grew", " 12%"]
+    assert len(entry["delays"]) == 3 and min(entry["delays"]) >= 0.015
+
+    async def offline(prompt, **kwargs):
+        raise AssertionError("replay must not reach the provider")
+        yield
+
+    monkeypatch.setattr(llm, "_stream_llm", offline)
+    configure_cassette(CassetteConfig(mode="replay", path=path, timing_scale=0))
+    start = time.perf_counter()
+    replayed = asyncio.run(_collect(llm.call_llm_stream("How did AAPL do?", model="m")))
+    assert replayed == recorded
+    assert time.perf_counter() - start < 0.05
+
+
+def test_replay_scales_recorded_timing(tmp_path):
+    path = tmp_path / "cassette.jsonl"
+    key = llm.llm_request_key("q", "m")
+    path.write_text(json.dumps({"key": key, "source": "call_llm_stream", "chunks": ["a", "b"], "delays": [0.1, 0.1]}) + "\n")
+    configure_cassette(CassetteConfig(mode="replay", path=str(path), timing_scale=0.5))
+
+    start = time.perf_counter()
+    assert asyncio.run(_collect(llm.call_llm_stream("q", model="m"))) == ["a", "b"]
+    elapsed = time.perf_counter() - start
+    assert 0.09 <= elapsed < 0.19
+
+
+def test_call_llm_record_replay_and_miss(tmp_path, monkeypatch):
+    path = str(tmp_path / "cassette.jsonl")
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(content=[SimpleNamespace(text=f"answer {len(calls)}")])
+
+    monkeypatch.setattr("dexter_py.utils._utils._client_instance", SimpleNamespace(messages=SimpleNamespace(create=create)))
+    configure_cassette(CassetteConfig(mode="record", path=path))
+    first = asyncio.run(llm.call_llm("What is EBITDA?", model="m"))
+    second = asyncio.run(llm.call_llm("What is EBITDA?", model="m"))
+    # The response cache is bypassed while recording
+    assert (first, second, len(calls)) == ("answer 1", "answer 2", 2)
+
+    configure_cassette(CassetteConfig(mode="replay", path=path, timing_scale=0))
+    replayed = [asyncio.run(llm.call_llm("What is EBITDA?", model="m")) for _ in range(3)]
+    assert replayed == ["answer 1", "answer 2", "answer 2"]
+    assert len(calls) == 2
+    with pytest.raises(CassetteMissError):
+        asyncio.run(llm.call_llm("Something new", model="m"))
+
+
+def test_production_client_stream_replays_without_provider(tmp_path):
+    from dexter_py.agent.phases.xllm import ProductionLLMClient
+
+    path = str(tmp_path / "cassette.jsonl")
+    configure_cassette(CassetteConfig(mode="replay", path=path))
+    client = ProductionLLMClient(api_key="unused")
+
+    async def provider(prompt, system_prompt, model, **kwargs):
+        yield "Buy"
+        yield " rating"
+
+    client._stream_provider = provider
+    configure_cassette(CassetteConfig(mode="record", path=path))
+    recorded = asyncio.run(_collect(client.stream("Rate MSFT", system_prompt="analyst")))
+
+    async def offline(*args, **kwargs):
+        raise AssertionError("replay must not reach the provider")
+        yield
+
+    client._stream_provider = offline
+    configure_cassette(CassetteConfig(mode="replay", path=path, timing_scale=0))
+    assert asyncio.run(_collect(client.stream("Rate MSFT", system_prompt="analyst"))) == recorded == ["Buy", " rating"]
+
+
+def test_replay_pins_recorded_date_and_misses_fail_the_phase(tmp_path, monkeypatch):
+    from dexter_py.agent import prompts
+    from dexter_py.agent.phases.plan import PlanPhase
+
+    path = tmp_path / "cassette.jsonl"
+    configure_cassette(CassetteConfig(mode="record", path=str(path), date="2026-01-06"))
+    assert prompts.get_current_date() == "Tuesday, January 06, 2026"
+    key = llm.llm_request_key("q", "m")
+    path.write_text(json.dumps({"key": key, "chunks": ["a"], "delays": [0], "date": "2026-01-06"}) + "\n")
+
+    configure_cassette(CassetteConfig(mode="replay", path=str(path)))
+    assert prompts.get_current_date() == "Tuesday, January 06, 2026"
+    configure_cassette()
+    assert prompts.get_current_date() != "Tuesday, January 06, 2026"
+
+    configure_cassette(CassetteConfig(mode="replay", path=str(path)))
+    with pytest.raises(CassetteMissError):
+        asyncio.run(PlanPhase(model="m").run(query="compare margins", understanding=None))
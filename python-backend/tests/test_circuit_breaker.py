@@ -0,0 +1,192 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from dexter_py.model import llm
+from dexter_py.model.cache import ResponseCacheConfig, configure_response_cache
+from dexter_py.model.circuit_breaker import BreakerConfig, CircuitBreakers, configure_circuit_breakers
+from dexter_py.utils._utils import LLMCircuitOpenError
+from dexter_py.utils.metrics import LLM_BREAKER_STATE, LLM_FALLBACKS
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+async def _fail():
+    raise ConnectionError("connection refused")
+
+
+async def _ok():
+    return "ok"
+
+
+def _run(breaker, fn):
+    async def scenario():
+        async with breaker.guard():
+            return await fn()
+    return asyncio.run(scenario())
+
+
+def test_breaker_opens_probes_half_open_and_closes():
+    clock = Clock()
+    breaker = CircuitBreakers(BreakerConfig(failure_threshold=2, reset_timeout=30), clock).breaker("gpt-4o-mini")
+    state = LLM_BREAKER_STATE.labels("openai", "gpt-4o-mini")
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            _run(breaker, _fail)
+    assert breaker.state == "open" and state._value.get() == 2
+    with pytest.raises(LLMCircuitOpenError):
+        _run(breaker, _ok)
+
+    # A failed probe reopens the breaker for another reset timeout
+    clock.now += 30
+    assert breaker.state == "half_open"
+    with pytest.raises(ConnectionError):
+        _run(breaker, _fail)
+    assert breaker.state == "open"
+
+    clock.now += 30
+    probe = breaker.allow()
+    with pytest.raises(LLMCircuitOpenError):
+        breaker.allow()  # Only one probe at a time
+    breaker.record_success(probe)
+    assert breaker.state == "closed" and state._value.get() == 0
+    assert _run(breaker, _ok) == "ok"
+
+
+def test_call_llm_falls_back_and_stops_calling_open_model(monkeypatch):
+    calls = []
+
+    def client(model):
+        async def apredict(text, **kwargs):
+            calls.append(model)
+            if model == "gpt-4o":
+                raise ConnectionError("connection refused")
+            return f"from {model}"
+        return SimpleNamespace(apredict=apredict)
+
+    async def resolve(model):
+        return client(model)
+
+    monkeypatch.setattr(llm, "resolve_llm_client", resolve)
+    configure_circuit_breakers(BreakerConfig(failure_threshold=2, fallback_models=("claude-3-5-haiku-latest",)))
+    before = LLM_FALLBACKS.labels("gpt-4o", "claude-3-5-haiku-latest")._value.get()
+    try:
+        answers = [asyncio.run(llm.call_llm("q", model="gpt-4o", use_cache=False)) for _ in range(3)]
+    finally:
+        configure_circuit_breakers()
+
+    assert answers == ["from claude-3-5-haiku-latest"] * 3
+    # The third call failed fast on the open breaker instead of reaching gpt-4o
+    assert calls.count("gpt-4o") == 2
+    assert LLM_FALLBACKS.labels("gpt-4o", "claude-3-5-haiku-latest")._value.get() - before == 3
+
+
+def test_stream_falls_back_only_before_first_token():
+    breakers = CircuitBreakers(BreakerConfig(fallback_models=("claude-3-5-haiku-latest",)))
+
+    def factory(fail_after):
+        async def stream(target):
+            if target == "claude-3-5-haiku-latest":
+                yield "fallback"
+                return
+            for i in range(fail_after):
+                yield f"t{i}"
+            raise llm.LLMError("Streaming failed: connection reset")
+        return lambda target: stream(target)
+
+    async def collect(fail_after):
+        return [t async for t in breakers.stream("gpt-4o", factory(fail_after))]
+
+    assert asyncio.run(collect(0)) == ["fallback"]
+    with pytest.raises(llm.LLMError):
+        asyncio.run(collect(1))
+    assert breakers.breaker("gpt-4o").failures == 2
+
+
+def test_caller_errors_do_not_open_breaker_and_fallbacks_are_not_cached(monkeypatch):
+    class BadRequest(Exception):
+        status_code = 400
+
+    calls = []
+
+    def client(model):
+        async def apredict(text, **kwargs):
+            calls.append((model, text))
+            if "bad" in text:
+                raise BadRequest("invalid_request_error: prompt is too long")
+            if model == "gpt-4o":
+                raise ConnectionError("connection refused")
+            return f"from {model}"
+        return SimpleNamespace(apredict=apredict)
+
+    async def resolve(model):
+        return client(model)
+
+    monkeypatch.setattr(llm, "resolve_llm_client", resolve)
+    breakers = configure_circuit_breakers(BreakerConfig(failure_threshold=1, fallback_models=("claude-3-5-haiku-latest",)))
+    configure_response_cache(ResponseCacheConfig())
+    try:
+        for _ in range(3):
+            with pytest.raises(BadRequest):
+                asyncio.run(llm.call_llm("bad request", model="gpt-4o-mini"))
+        # Caller errors neither count against the model nor try the fallbacks
+        assert breakers.breaker("gpt-4o-mini").state == "closed"
+        assert [m for m, _ in calls] == ["gpt-4o-mini"] * 3
+
+        answers = [asyncio.run(llm.call_llm("good request", model="gpt-4o")) for _ in range(2)]
+    finally:
+        configure_circuit_breakers()
+        configure_response_cache(ResponseCacheConfig())
+
+    assert answers == ["from claude-3-5-haiku-latest"] * 2
+    # The fallback's answer was not cached under gpt-4o's key: the second call asked again
+    assert [m for m, t in calls if "good" in t] == ["gpt-4o", "claude-3-5-haiku-latest", "claude-3-5-haiku-latest"]
+
+
+def test_answer_stream_provider_errors_open_breaker_and_fall_back(monkeypatch):
+    from dexter_py.model import client_pool
+    from dexter_py.utils import _utils
+
+    class Unavailable(Exception):
+        status_code = 503
+
+    calls = []
+
+    def client(model):
+        async def agenerate(messages, callbacks):
+            calls.append(model)
+            if model == "gpt-4o":
+                raise Unavailable("overloaded")
+            for handler in callbacks:
+                await handler.on_llm_new_token("from ")
+                await handler.on_llm_new_token(model)
+                await handler.on_llm_end()
+        return SimpleNamespace(agenerate=agenerate)
+
+    async def resolve(model):
+        return client(model)
+
+    monkeypatch.setattr(_utils, "async_callback_handler", lambda: object)
+    monkeypatch.setattr(client_pool, "resolve_llm_client", resolve)
+    breakers = configure_circuit_breakers(BreakerConfig(failure_threshold=2, fallback_models=("claude-3-5-haiku-latest",)))
+    answer_client = _utils.ProductionLLMClient()
+
+    async def collect():
+        return [t async for t in answer_client.stream("hi", model="gpt-4o")]
+
+    try:
+        answers = [asyncio.run(collect()) for _ in range(3)]
+    finally:
+        configure_circuit_breakers()
+
+    assert answers == [["from ", "claude-3-5-haiku-latest"]] * 3
+    assert breakers.breaker("gpt-4o").state == "open"
+    assert calls.count("gpt-4o") == 2
@@ -0,0 +1,69 @@
+import asyncio
+from types import SimpleNamespace
+
+from dexter_py.model import llm
+from dexter_py.model.client_pool import configure_client_pool, resolve_llm_client
+from dexter_py.utils.metrics import LLM_REQUEST_DURATION
+
+
+def _fake_client(name, calls):
+    async def create(**kwargs):
+        calls.append((name, kwargs["model"]))
+        return SimpleNamespace(content=[SimpleNamespace(text=f"from {name}")])
+    return SimpleNamespace(name=name, messages=SimpleNamespace(create=create))
+
+
+def test_pool_creates_lazily_and_evicts_least_recently_used():
+    created = []
+
+    def factory(model):
+        created.append(model)
+        return SimpleNamespace(model=model)
+
+    pool = configure_client_pool(max_size=2, factory=factory)
+    try:
+        a = pool.get("claude-3-5-haiku-latest")
+        pool.get("gpt-4o-mini")
+        assert pool.get("claude-3-5-haiku-latest") is a
+        pool.get("ollama-llama3")
+        assert pool.keys() == [("anthropic", "claude-3-5-haiku-latest"), ("ollama", "ollama-llama3")]
+        pool.get("gpt-4o-mini")
+        assert created == ["claude-3-5-haiku-latest", "gpt-4o-mini", "ollama-llama3", "gpt-4o-mini"]
+    finally:
+        configure_client_pool()
+
+
+def test_unavailable_model_falls_back_to_default_client(monkeypatch):
+    attempts = []
+
+    def factory(model):
+        attempts.append(model)
+        raise RuntimeError("OPENAI_API_KEY not set in environment")
+
+    default = SimpleNamespace(name="default")
+    monkeypatch.setattr("dexter_py.utils._utils._client_instance", default)
+    configure_client_pool(factory=factory)
+    try:
+        assert asyncio.run(resolve_llm_client("gpt-4o-mini")) is default
+        assert asyncio.run(resolve_llm_client("gpt-4o-mini")) is default
+        # The failure is remembered rather than retried on every call
+        assert attempts == ["gpt-4o-mini"]
+    finally:
+        configure_client_pool()
+
+
+def test_call_llm_routes_each_model_to_its_client(monkeypatch):
+    calls = []
+    monkeypatch.setattr("dexter_py.utils._utils._client_instance", _fake_client("default", calls))
+    configure_client_pool(factory=lambda model: _fake_client("pooled", calls))
+    default_model = llm.get_llm_config().default_model
+    before = LLM_REQUEST_DURATION.labels("call_llm", "small-model")._sum.get()
+    try:
+        small = asyncio.run(llm.call_llm("q", model="small-model", use_cache=False))
+        large = asyncio.run(llm.call_llm("q", model=default_model, use_cache=False))
+    finally:
+        configure_client_pool()
+
+    assert (small, large) == ("from pooled", "from default")
+    assert calls == [("pooled", "small-model"), ("default", default_model)]
+    assert LLM_REQUEST_DURATION.labels("call_llm", "small-model")._sum.get() > before
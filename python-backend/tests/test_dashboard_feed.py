@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+from dexter_py.utils.dashboard_feed import KEEPALIVE_FRAME, DashboardBroadcaster, DashboardFeedConfig
+from dexter_py.utils.request_stats import RecentRequestLog, RollingStats
+
+
+def _decode(frame):
+    assert frame.startswith(b"data: ")
+    return json.loads(frame[len(b"data: "):])
+
+
+def _feed(**config):
+    stats = RollingStats()
+    log = RecentRequestLog()
+    feed = DashboardBroadcaster(stats, log, DashboardFeedConfig(**config))
+    return feed, stats, log
+
+
+def _request(stats, log, route="/query", ms=42.0):
+    stats.begin(route, "1.2.3.4")
+    stats.end(route, "1.2.3.4", ms, error=False)
+    log.add({"path": route, "status": 200})
+
+
+def test_snapshot_then_deltas_shared_by_all_subscribers():
+    feed, stats, log = _feed(interval=0.01, heartbeat=60)
+    _request(stats, log)
+
+    async def scenario():
+        async with feed.subscribe() as a, feed.subscribe() as b:
+            first = _decode(a.get_nowait())
+            assert first["type"] == "snapshot"
+            assert first["requests"][0]["path"] == "/query"
+            assert "/query" in first["latency"]["routes"]
+            assert _decode(b.get_nowait())["type"] == "snapshot"
+
+            _request(stats, log, route="/agent/query", ms=300.0)
+            frame_a = await asyncio.wait_for(a.get(), 1)
+            frame_b = await asyncio.wait_for(b.get(), 1)
+            # Encoded once, queued to both
+            assert frame_a is frame_b
+            delta = _decode(frame_a)
+            assert delta["type"] == "delta"
+            assert [r["path"] for r in delta["requests"]] == ["/agent/query"]
+            # Unchanged routes are not resent
+            assert list(delta["latency"]["routes"]) == ["/agent/query"]
+        return feed.ticks
+
+    ticks = asyncio.run(scenario())
+    assert feed.subscribers == 0
+    assert ticks < 50  # one aggregation per interval, not per subscriber
+
+
+def test_idle_feed_sends_keepalive_only_after_heartbeat():
+    feed, _, _ = _feed(heartbeat=0)
+    feed.aggregate()
+
+    async def scenario():
+        async with feed.subscribe() as queue:
+            queue.get_nowait()  # snapshot
+            feed.tick()
+            return queue.get_nowait()
+
+    assert asyncio.run(scenario()) == KEEPALIVE_FRAME
+
+
+def test_stalled_subscriber_is_resynced_with_a_snapshot():
+    feed, stats, log = _feed(interval=60, queue_size=2)
+
+    async def scenario():
+        async with feed.subscribe() as queue:
+            for i in range(5):
+                _request(stats, log, route=f"/r{i}")
+                feed.tick()
+            frames = [_decode(queue.get_nowait()) for _ in range(queue.qsize())]
+        return frames
+
+    frames = asyncio.run(scenario())
+    assert frames[0]["type"] == "snapshot"
+    assert {"/r0", "/r1", "/r2", "/r3"} <= set(frames[0]["latency"]["routes"])
+    assert len(frames) <= 2
@@ -0,0 +1,117 @@
+import asyncio
+
+from dexter_py.model import llm
+from dexter_py.model.client_pool import configure_client_pool
+from dexter_py.model.hedging import HedgeConfig, StreamHedger, configure_hedging
+from dexter_py.utils.metrics import LLM_HEDGE_REQUESTS
+
+
+def _outcomes(phase):
+    return {o: LLM_HEDGE_REQUESTS.labels(phase, o)._value.get() for o in ("unhedged", "skipped", "primary", "secondary")}
+
+
+def _provider(tokens, first_delay, log, name):
+    async def stream():
+        log.append(f"{name}:start")
+        try:
+            await asyncio.sleep(first_delay)
+            for token in tokens:
+                yield token
+                await asyncio.sleep(0)
+        finally:
+            log.append(f"{name}:closed")
+    return stream
+
+
+async def _collect(stream):
+    return [token async for token in stream]
+
+
+def test_fast_primary_is_not_hedged():
+    hedger = StreamHedger(HedgeConfig(enabled=True, initial_delay=0.2))
+    log = []
+    before = _outcomes("t-fast")
+    tokens = asyncio.run(_collect(hedger.stream(
+        "t-fast", _provider(["a", "b"], 0, log, "primary"), _provider(["x"], 0, log, "secondary"),
+    )))
+    assert tokens == ["a", "b"]
+    assert "secondary:start" not in log
+    assert _outcomes("t-fast")["unhedged"] - before["unhedged"] == 1
+
+
+def test_slow_primary_is_hedged_and_loser_cancelled():
+    hedger = StreamHedger(HedgeConfig(enabled=True, initial_delay=0.05))
+    log = []
+    before = _outcomes("t-slow")
+
+    async def scenario():
+        start = asyncio.get_running_loop().time()
+        tokens = await _collect(hedger.stream(
+            "t-slow", _provider(["slow"], 5, log, "primary"), _provider(["fast", "!"], 0.01, log, "secondary"),
+        ))
+        return tokens, asyncio.get_running_loop().time() - start
+
+    tokens, elapsed = asyncio.run(scenario())
+    assert tokens == ["fast", "!"]
+    assert elapsed < 1
+    assert "primary:closed" in log
+    after = _outcomes("t-slow")
+    assert after["secondary"] - before["secondary"] == 1
+
+
+def test_failed_secondary_falls_back_to_primary_and_saturation_skips():
+    hedger = StreamHedger(HedgeConfig(enabled=True, initial_delay=0.02))
+    log = []
+
+    async def broken():
+        raise ConnectionError("secondary down")
+        yield
+
+    tokens = asyncio.run(_collect(hedger.stream("t-fail", _provider(["ok"], 0.1, log, "primary"), broken)))
+    assert tokens == ["ok"]
+
+    before = _outcomes("t-fail")
+    tokens = asyncio.run(_collect(hedger.stream(
+        "t-fail", _provider(["ok"], 0.05, log, "primary"), _provider(["x"], 0, log, "secondary"), can_hedge=lambda: False,
+    )))
+    assert tokens == ["ok"]
+    assert _outcomes("t-fail")["skipped"] - before["skipped"] == 1
+
+
+def test_delay_tracks_percentile_of_primary_first_tokens():
+    hedger = StreamHedger(HedgeConfig(enabled=True, initial_delay=2.0, min_samples=10, percentile=90, min_delay=0.1, max_delay=5))
+    assert hedger.delay("p") == 2.0
+    for i in range(1, 21):
+        hedger._tracker("p").observe(i / 10)
+    assert hedger.delay("p") == 1.8
+    for _ in range(200):
+        hedger._tracker("p").observe(0.01)
+    assert hedger.delay("p") == 0.1
+
+
+def test_call_llm_stream_hedges_configured_phases(monkeypatch):
+    configure_hedging(HedgeConfig(enabled=True, secondary_model="gpt-4o-mini", phases=frozenset({"plan"}), initial_delay=0.02))
+    created = []
+
+    async def fake_stream(prompt, model=None, client=None, **kwargs):
+        if client is None:
+            await asyncio.sleep(1)
+            yield "primary"
+        else:
+            yield f"{client}:{model}"
+
+    def factory(name):
+        created.append(name)
+        return "secondary-client"
+
+    monkeypatch.setattr(llm, "_stream_llm", fake_stream)
+    configure_client_pool(factory=factory)
+    try:
+        hedged = asyncio.run(_collect(llm.call_llm_stream("q", model="m", phase="plan", use_cache=False)))
+        assert hedged == ["secondary-client:gpt-4o-mini"]
+        # Phases outside LLM_HEDGE_PHASES wait for the primary
+        unhedged = asyncio.run(_collect(llm.call_llm_stream("q", model="m", phase="reflect", use_cache=False)))
+        assert unhedged == ["primary"] and created == ["gpt-4o-mini"]
+    finally:
+        configure_hedging()
+        configure_client_pool()
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+import pytest
+
+from dexter_py.utils.message_history import Message, MessageHistory
+from dexter_py.utils.session_store import InMemorySessionStore, _HistoryPagingMixin, paginate_messages
+
+
+def _history(n):
+    history = MessageHistory(model="test-model")
+    for i in range(n):
+        history._messages.append(Message(i, f"q{i}", f"answer {i} " * 100, f"s{i}", datetime(2026, 1, 1)))
+    history._next_id = n
+    return history
+
+
+def test_paginate_walks_backwards_from_newest():
+    messages = _history(5).get_messages()
+    page, cursor = paginate_messages(messages, limit=2)
+    assert [m.id for m in page] == [3, 4] and cursor == 3
+    page, cursor = paginate_messages(messages, limit=2, before_id=cursor)
+    assert [m.id for m in page] == [1, 2] and cursor == 1
+    page, cursor = paginate_messages(messages, limit=2, before_id=cursor)
+    assert [m.id for m in page] == [0] and cursor is None
+
+
+def test_versions_change_on_every_write_and_never_repeat():
+    store = InMemorySessionStore()
+    assert store.version("s") == 0
+    store.set("s", _history(1))
+    v1 = store.version("s")
+    store.set("s", _history(2))
+    v2 = store.version("s")
+    store.delete("s")
+    assert 0 < v1 < v2 < store.version("s")
+    assert store.get_page("s").messages == []
+
+
+def test_store_without_snapshot_fails_at_instantiation():
+    class IncompleteStore(_HistoryPagingMixin):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteStore()
@@ -0,0 +1,120 @@
+import asyncio
+
+import httpx
+from pydantic import BaseModel
+
+from dexter_py.utils.http_pool import (
+    HTTPPoolConfig,
+    PooledTransport,
+    close_http_pool,
+    configure_http_pool,
+    pooled_async_client,
+    provider_client_kwargs,
+)
+
+
+def _mock(delay=0.0, body=b"ok"):
+    state = {"active": 0, "peak": 0, "calls": 0}
+
+    async def handler(request):
+        state["calls"] += 1
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            state["active"] -= 1
+        return httpx.Response(200, content=body)
+
+    return httpx.MockTransport(handler), state
+
+
+def test_per_host_cap_queues_requests_and_frees_slots():
+    inner, state = _mock(delay=0.02)
+    transport = PooledTransport(HTTPPoolConfig(max_per_host=2), transport=inner)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=transport) as client:
+            responses = await asyncio.gather(*(client.get("https://api.example.com/v1") for _ in range(5)))
+        return responses
+
+    responses = asyncio.run(scenario())
+    assert [r.text for r in responses] == ["ok"] * 5
+    assert state["peak"] == 2
+    assert transport.stats() == {"api.example.com": {"in_use": 0, "limit": 2}}
+
+
+def test_streamed_response_holds_slot_until_closed():
+    inner, _ = _mock(body=b"chunk" * 10)
+    transport = PooledTransport(HTTPPoolConfig(max_per_host=1, pool_timeout=0.05), transport=inner)
+
+    async def scenario():
+        client = httpx.AsyncClient(transport=transport)
+        async with client.stream("GET", "https://api.example.com/stream") as response:
+            assert transport.stats()["api.example.com"]["in_use"] == 1
+            try:
+                await client.get("https://api.example.com/other")
+                raise AssertionError("expected PoolTimeout")
+            except httpx.PoolTimeout:
+                pass
+            body = b"".join([chunk async for chunk in response.aiter_bytes()])
+        assert transport.stats()["api.example.com"]["in_use"] == 0
+        assert (await client.get("https://api.example.com/other")).status_code == 200
+        await client.aclose()
+        return body
+
+    assert asyncio.run(scenario()) == b"chunk" * 10
+
+
+def test_closing_a_consumer_client_keeps_the_shared_pool_open():
+    inner, state = _mock()
+    shared = configure_http_pool(HTTPPoolConfig(), transport=inner)
+
+    async def scenario():
+        first = pooled_async_client()
+        await first.get("https://api.example.com/a")
+        await first.aclose()
+        second = pooled_async_client()
+        await second.get("https://api.example.com/b")
+        await second.aclose()
+
+    try:
+        asyncio.run(scenario())
+        assert state["calls"] == 2
+        assert not shared.closed
+    finally:
+        configure_http_pool()
+
+
+def test_provider_client_kwargs_injects_supported_clients():
+    class OpenAILike(BaseModel):
+        model_config = {"arbitrary_types_allowed": True}
+        http_async_client: object = None
+
+    class OllamaLike(BaseModel):
+        async_client_kwargs: dict = {}
+
+    class Other(BaseModel):
+        model: str = ""
+
+    assert isinstance(provider_client_kwargs(OpenAILike)["http_async_client"], httpx.AsyncClient)
+    assert isinstance(provider_client_kwargs(OllamaLike)["async_client_kwargs"]["transport"], PooledTransport)
+    assert provider_client_kwargs(Other) == {}
+    assert provider_client_kwargs(None) == {}
+
+
+def test_closing_the_pool_drops_clients_built_on_it():
+    from dexter_py.model.client_pool import configure_client_pool
+    from dexter_py.utils import _utils
+
+    pool = configure_client_pool(factory=lambda model: pooled_async_client())
+    old_transport = pool.get("claude-3-5-haiku-latest")._transport
+    _utils._client_instance = pooled_async_client()
+
+    asyncio.run(close_http_pool())
+
+    assert old_transport.closed
+    assert _utils._client_instance is None and len(pool) == 0
+    # The next client is built on a fresh, open pool
+    assert not pool.get("claude-3-5-haiku-latest")._transport.closed
+    configure_client_pool()
@@ -0,0 +1,46 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "benchmarks")))
+
+from bench_import_time import profile_import, slowest  # noqa: E402
+
+
+# Optional heavy dependencies that must only load when first used
+LAZY_MODULES = (
+    "langchain",
+    "langchain_core",
+    "langchain_openai",
+    "langchain_anthropic",
+    "langchain_google_genai",
+    "langchain_ollama",
+    "openai",
+    "anthropic",
+    "numpy",
+    "pandas",
+    "pybreaker",
+)
+
+# Generous default so slow CI machines pass; tighten locally with the env var
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "3000"))
+
+
+def test_app_import_is_lazy_and_within_budget():
+    _, modules = profile_import("app.main")
+    report = "\n".join(f"{cum / 1000:8.1f} ms  {name}" for name, cum in slowest(modules, 15))
+
+    eager = sorted(m for m in LAZY_MODULES if m in modules)
+    assert not eager, f"imported at startup: {eager}\n{report}"
+
+    import_ms = modules["app.main"][1] / 1000
+    assert import_ms < IMPORT_BUDGET_MS, f"app.main import took {import_ms:.0f} ms\n{report}"
+
+
+def test_provider_attributes_still_resolve():
+    from dexter_py.model import llm
+    from dexter_py.utils import _utils
+
+    # Missing provider packages resolve to None rather than raising
+    for name in ("ChatOpenAI", "ChatOllama", "HumanMessage", "AsyncCallbackHandler"):
+        getattr(llm, name)
+        getattr(_utils, name)
@@ -0,0 +1,40 @@
+import pytest
+from pydantic import BaseModel
+
+from dexter_py.model.llm import _parse_structured_output
+from dexter_py.utils.json_repair import iter_json_objects, loads_lenient
+
+
+class Understanding(BaseModel):
+    intent: str
+    entities: list
+
+
+def test_repairs_common_llm_defects_in_one_scan():
+    text = (
+        "Use the {ticker} field. Here you go:\n```json\n"
+        "{'intent': 'Compare Apple's margins', 'entities': ['AAPL',], 'done': True, 'next': None,\n"
+        ' "note": "labelled "Services" in the 10-K",\n}\n```\nAnything else?'
+    )
+    assert loads_lenient(text) == {
+        "intent": "Compare Apple's margins",
+        "entities": ["AAPL"],
+        "done": True,
+        "next": None,
+        "note": 'labelled "Services" in the 10-K',
+    }
+
+
+def test_truncated_or_missing_objects_are_not_decoded():
+    with pytest.raises(ValueError):
+        loads_lenient('```json\n{"intent": "Compare", "entities": ["AA')
+    with pytest.raises(ValueError):
+        loads_lenient("I could not find any tickers in that question.")
+    assert list(iter_json_objects('{"a": 1} and {"b": [1, 2,],}')) == [{"a": 1}, {"b": [1, 2]}]
+
+
+def test_structured_output_takes_first_object_that_validates():
+    text = 'Format: {"example": true}\nAnswer: {"intent": "growth", "entities": ["MSFT"],}'
+    assert _parse_structured_output(text, Understanding) == Understanding(intent="growth", entities=["MSFT"])
+    with pytest.raises(Exception):
+        _parse_structured_output('{"example": true}', Understanding)
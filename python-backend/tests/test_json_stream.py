@@ -0,0 +1,132 @@
+import asyncio
+import json
+from contextlib import aclosing
+from types import SimpleNamespace
+
+from dexter_py.agent.phases.plan import PlanPhase
+from dexter_py.agent.schemas import Plan
+from dexter_py.model import llm
+from dexter_py.model.cache import ResponseCacheConfig, configure_response_cache
+from dexter_py.utils.json_stream import StreamingJSONParser
+from dexter_py.utils.metrics import LLM_STREAMS_CANCELLED
+
+
+PLAN = {
+    "summary": "Compare {margins} \"and\" growth",
+    "tasks": [
+        {"id": "task_1", "description": "Fetch AAPL income statement", "toolCalls": [{"args": {"q": "a}b"}}]},
+        {"id": "task_2", "description": "Fetch MSFT income statement", "dependsOn": ["task_1"]},
+    ],
+}
+
+
+def _feed_all(parser, chunks):
+    return [item for chunk in chunks for item in parser.feed(chunk)]
+
+
+def test_items_and_completion_independent_of_chunking():
+    text = "Sure, here is the plan:\n```json\n" + json.dumps(PLAN) + "\n```\nLet me know!"
+    whole = StreamingJSONParser(items=("tasks",))
+    by_char = StreamingJSONParser(items=("tasks",))
+
+    items = _feed_all(whole, [text])
+    assert _feed_all(by_char, list(text)) == items
+    assert [(i.key, i.index, i.value["id"]) for i in items] == [("tasks", 0, "task_1"), ("tasks", 1, "task_2")]
+    assert items[0].value == PLAN["tasks"][0]
+    assert whole.complete and by_char.complete
+    assert by_char.value() == PLAN
+    assert by_char.feed("{}") == []
+
+
+def test_item_is_emitted_before_object_completes():
+    parser = StreamingJSONParser(items=("tasks",))
+    assert parser.feed('{"tasks": [{"id": "a", "x": "\\\\"') == []
+    assert parser.started
+    items = parser.feed('}, {"id"')
+    assert [i.value for i in items] == [{"id": "a", "x": "\\"}]
+    assert not parser.complete
+    assert parser.feed(': "b"}], "note": "[not an item]"}')[0].value == {"id": "b"}
+    assert parser.complete and parser.value()["note"] == "[not an item]"
+
+
+def test_plan_phase_streams_tasks_and_stops_reading_after_plan(monkeypatch):
+    configure_response_cache(ResponseCacheConfig())
+    body = json.dumps(PLAN)
+    consumed = []
+    closed = []
+
+    async def fake_stream(prompt, **kwargs):
+        consumed.clear()
+        try:
+            for token in [body[i:i + 7] for i in range(0, len(body), 7)] + [" Trailing prose."] * 50:
+                consumed.append(token)
+                yield token
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(llm, "_stream_llm", fake_stream)
+    seen = []
+
+    def on_task(task):
+        seen.append((task.id, len(consumed)))
+
+    def run_plan(**kwargs):
+        return asyncio.run(PlanPhase(model="m").run(
+            query="compare margins", understanding=None, prior_plans=[Plan(plan_id="iter1", summary="first pass")], **kwargs,
+        ))
+
+    try:
+        plan = run_plan(on_task=on_task)
+        # The early-closed stream was still cached: the rerun is served from it
+        assert run_plan() == plan and closed == [True]
+    finally:
+        configure_response_cache(ResponseCacheConfig())
+
+    assert plan.plan_id == "iter2" and plan.summary == PLAN["summary"]
+    assert [t.id for t in plan.tasks] == ["iter2_task_1", "iter2_task_2"]
+    assert plan.tasks[1].dependsOn == ["iter2_task_1"]
+    assert [task_id for task_id, _ in seen] == ["iter2_task_1", "iter2_task_2"]
+    # The first task was handed over while the plan was still streaming
+    assert seen[0][1] < seen[1][1]
+    assert "".join(consumed).startswith(body) and len(consumed) <= len(body) // 7 + 2
+
+
+def test_closing_after_complete_result_is_not_a_cancellation(monkeypatch):
+    class Stream:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        @property
+        async def text_stream(self):
+            for token in ['{"isComplete": true}', " Hope", " this", " helps."]:
+                yield token
+
+    client = SimpleNamespace(messages=SimpleNamespace(stream=lambda **kwargs: Stream()))
+
+    async def resolve(model):
+        return client
+
+    monkeypatch.setattr(llm, "resolve_llm_client", resolve)
+    cancelled = LLM_STREAMS_CANCELLED.labels("call_llm_stream")
+
+    async def read(stop_on_complete):
+        parser = StreamingJSONParser()
+        async with aclosing(llm.call_llm_stream(
+            "q", model="m", use_cache=False, complete=lambda: parser.complete,
+        )) as tokens:
+            async for token in tokens:
+                if stop_on_complete:
+                    parser.feed(token)
+                    if parser.complete:
+                        break
+                else:
+                    break
+
+    before = cancelled._value.get()
+    asyncio.run(read(stop_on_complete=True))
+    assert cancelled._value.get() == before
+    asyncio.run(read(stop_on_complete=False))
+    assert cancelled._value.get() == before + 1
@@ -0,0 +1,77 @@
+import io
+import json
+import threading
+
+import structlog
+
+from dexter_py.utils.log_pipeline import (
+    FieldTruncator,
+    LogConfig,
+    QueuedLogWriter,
+    configure_logging,
+    shutdown_logging,
+)
+from dexter_py.utils.metrics import LOG_EVENTS_DROPPED
+
+
+def _dropped(reason):
+    return LOG_EVENTS_DROPPED.labels(reason)._value.get()
+
+
+def test_pipeline_samples_truncates_and_writes_json():
+    out = io.StringIO()
+    config = LogConfig(
+        level="INFO",
+        max_field_chars=10,
+        max_list_items=2,
+        sample_rates={"noisy": 0.0},
+    )
+    sampled_before = _dropped("sampled")
+    configure_logging(config, stream=out)
+    try:
+        logger = structlog.get_logger("test")
+        logger.info("noisy", n=1)
+        logger.warning("noisy", n=2)  # warnings are never sampled out
+        logger.debug("hidden")
+        logger.info("run_start", query="x" * 50, paths=["a", "b", "c", "d"])
+    finally:
+        shutdown_logging()
+        structlog.reset_defaults()
+
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [e["event"] for e in events] == ["noisy", "run_start"]
+    assert events[0]["level"] == "warning"
+    assert events[1]["query"] == "x" * 10 + "...[+40 chars]"
+    assert events[1]["paths"] == ["a", "b", "...[+2 items]"]
+    assert _dropped("sampled") == sampled_before + 1
+
+
+def test_truncator_leaves_small_values_alone():
+    truncate = FieldTruncator(max_chars=5, max_items=3)
+    event = truncate(None, "info", {"event": "e" * 20, "n": 3, "s": "abc", "d": {"k": "abcdefgh"}})
+    assert event == {"event": "e" * 20, "n": 3, "s": "abc", "d": {"k": "abcde...[+3 chars]"}}
+
+
+class _BlockingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, s):
+        self.release.wait(5)
+        return super().write(s)
+
+
+def test_writer_drops_when_queue_is_full():
+    stream = _BlockingStream()
+    writer = QueuedLogWriter(stream, maxsize=2, batch_size=1)
+    before = _dropped("queue_full")
+
+    results = [writer.submit({"event": f"e{i}"}) for i in range(10)]
+    stream.release.set()
+    writer.close()
+
+    assert not all(results)
+    assert _dropped("queue_full") == before + results.count(False)
+    written = [json.loads(line)["event"] for line in stream.getvalue().splitlines()]
+    assert len(written) == results.count(True)
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import sys
+import importlib
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from dexter_py.utils.metrics import LLMStreamTimer
+from dexter_py.agent.orchestrator import Orchestrator, AgentOptions
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_stream_timer_records_ttft_and_inter_token():
+    labels = {"source": "test", "model": "timer-model"}
+    before_ttft = _sample("dexter_llm_time_to_first_token_seconds_count", **labels)
+    before_itl = _sample("dexter_llm_inter_token_latency_seconds_count", **labels)
+
+    timer = LLMStreamTimer("test", "timer-model")
+    for _ in range(3):
+        timer.on_token()
+    timer.finish()
+
+    assert timer.tokens == 3
+    assert timer.first_token_s is not None
+    assert _sample("dexter_llm_time_to_first_token_seconds_count", **labels) == before_ttft + 1
+    assert _sample("dexter_llm_inter_token_latency_seconds_count", **labels) == before_itl + 2
+
+
+class _Understand:
+    async def run(self, **kwargs):
+        return {"intent": kwargs["query"]}
+
+
+class _Plan:
+    async def run(self, **kwargs):
+        return {"summary": "plan", "tasks": []}
+
+
+class _Reflect:
+    async def run(self, **kwargs):
+        return {"is_complete": True}
+
+    def build_planning_guidance(self, reflection):
+        return None
+
+
+class _Answer:
+    async def run(self, **kwargs):
+        yield "done"
+
+
+def test_orchestrator_run_exports_phase_and_run_metrics():
+    orchestrator = Orchestrator(AgentOptions(
+        model="test-model",
+        custom_phases={
+            "understand": _Understand(),
+            "plan": _Plan(),
+            "reflect": _Reflect(),
+            "answer": _Answer(),
+        },
+    ))
+    phase_before = _sample("dexter_phase_duration_seconds_count", phase="plan", outcome="success")
+    runs_before = _sample("dexter_agent_run_iterations_count")
+
+    asyncio.run(orchestrator.run("What is AAPL?"))
+
+    assert _sample("dexter_phase_duration_seconds_count", phase="plan", outcome="success") == phase_before + 1
+    assert _sample("dexter_agent_run_iterations_count") == runs_before + 1
+    assert _sample("dexter_agent_runs_in_flight") == 0
+
+
+def test_metrics_endpoint_exposes_histograms():
+    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if repo_root not in sys.path:
+        sys.path.insert(0, repo_root)
+    main_mod = importlib.import_module("app.main")
+
+    with TestClient(main_mod.app) as client:
+        client.get("/health")
+        body = client.get("/metrics").text
+
+    assert 'dexter_request_duration_seconds_bucket{le="0.005",method="GET",route="/health",status="200"}' in body
+    assert "dexter_session_store_sessions" in body
+    assert "dexter_sse_streams_open" in body
+
+
+def test_session_store_size_is_sampled_off_the_scrape_path():
+    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    if repo_root not in sys.path:
+        sys.path.insert(0, repo_root)
+    main_mod = importlib.import_module("app.main")
+
+    class CountingStore:
+        calls = 0
+
+        def __len__(self):
+            CountingStore.calls += 1
+            return 7
+
+    async def scenario():
+        task = asyncio.create_task(main_mod._sample_session_store_size(CountingStore(), interval=60))
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert _sample("dexter_session_store_sessions") == 7
+    assert CountingStore.calls == 1
@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+from dexter_py.agent.multiplex import RunMultiplexer
+from dexter_py.agent.orchestrator import AgentEvent, AgentEventType
+from dexter_py.utils.sse import SSEConfig
+
+
+class FakeOrchestrator:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.closed = []
+
+    async def run_stream(self, query, run_id, **kwargs):
+        try:
+            yield AgentEvent(AgentEventType.PHASE_START, run_id, {"phase": "answer"})
+            for word in query.split():
+                await asyncio.sleep(self.delay)
+                yield AgentEvent(AgentEventType.ANSWER_TOKEN, run_id, {"token": word + " "})
+            yield AgentEvent(AgentEventType.DONE, run_id, {"answer": query})
+        finally:
+            self.closed.append(run_id)
+
+
+def _mux(orchestrator):
+    frames = []
+
+    async def send(text):
+        frames.append(json.loads(text))
+
+    mux = RunMultiplexer(orchestrator, send, sse_config=SSEConfig(flush_interval=0.0, max_buffer_bytes=1))
+    return mux, frames
+
+
+async def _until(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+def test_concurrent_runs_are_tagged_with_their_run_id():
+    async def scenario():
+        mux, frames = _mux(FakeOrchestrator(delay=0.005))
+        await mux.handle({"type": "run", "run_id": "a", "query": "one two three", "session_id": "s1"})
+        await mux.handle({"type": "run", "run_id": "b", "query": "four five", "session_id": "s2"})
+        await _until(lambda: mux.active_runs == 0)
+        return frames
+
+    frames = asyncio.run(scenario())
+    assert all("run_id" in f for f in frames)
+    for run_id, text in (("a", "one two three "), ("b", "four five ")):
+        own = [f for f in frames if f["run_id"] == run_id]
+        assert own[0] == {"type": "accepted", "run_id": run_id, "session_id": "s1" if run_id == "a" else "s2"}
+        assert "".join(f["token"] for f in own if f["type"] == "answer_token") == text
+        assert own[-1]["type"] == "done"
+
+
+def test_cancel_stops_the_orchestrator_run():
+    async def scenario():
+        orchestrator = FakeOrchestrator(delay=10)
+        mux, frames = _mux(orchestrator)
+        await mux.handle({"type": "run", "run_id": "slow", "query": "never finishes"})
+        await _until(lambda: any(f["type"] == "phase_start" for f in frames))
+        await mux.handle({"type": "cancel", "run_id": "slow"})
+        await _until(lambda: mux.active_runs == 0)
+        await _until(lambda: orchestrator.closed == ["slow"])
+        await mux.handle({"type": "cancel", "run_id": "slow"})
+        return frames
+
+    frames = asyncio.run(scenario())
+    assert [f["type"] for f in frames] == ["accepted", "phase_start", "cancelled", "error"]
+    assert frames[-1]["error"] == "unknown run_id"
+
+
+def test_invalid_messages_get_error_frames():
+    async def scenario():
+        mux, frames = _mux(FakeOrchestrator())
+        await mux.handle({"type": "bogus"})
+        await mux.handle({"type": "run", "run_id": "x"})
+        await mux.handle({"type": "ping"})
+        return frames
+
+    frames = asyncio.run(scenario())
+    assert [f["type"] for f in frames] == ["error", "error", "pong"]
+    assert frames[1] == {"type": "error", "run_id": "x", "error": "query required"}
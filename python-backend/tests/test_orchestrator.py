@@ -0,0 +1,222 @@
+import asyncio
+
+from dexter_py.agent.orchestrator import Orchestrator, AgentOptions, AgentEventType
+
+
+class _Understand:
+    async def run(self, **kwargs):
+        return {"intent": kwargs["query"], "entities": []}
+
+
+class _Plan:
+    async def run(self, **kwargs):
+        return {"summary": "plan", "tasks": [{"id": "t1", "description": "look up AAPL"}]}
+
+
+class _Reflect:
+    async def run(self, **kwargs):
+        return {"is_complete": True}
+
+    def build_planning_guidance(self, reflection):
+        return None
+
+
+class _Answer:
+    async def run(self, **kwargs):
+        for token in ["Hello ", "world"]:
+            yield token
+
+
+def _make_orchestrator():
+    return Orchestrator(AgentOptions(
+        model="test-model",
+        custom_phases={
+            "understand": _Understand(),
+            "plan": _Plan(),
+            "reflect": _Reflect(),
+            "answer": _Answer(),
+        },
+    ))
+
+
+def test_run_stream_emits_events_in_order():
+    orchestrator = _make_orchestrator()
+
+    async def collect():
+        return [event async for event in orchestrator.run_stream("What is AAPL?")]
+
+    events = asyncio.run(collect())
+    types = [e.type for e in events]
+
+    assert types[0] is AgentEventType.PHASE_START
+    assert AgentEventType.PLAN in types
+    assert AgentEventType.REFLECTION in types
+    assert types[-1] is AgentEventType.DONE
+
+    task_events = [e for e in events if e.type is AgentEventType.TASK_RESULT]
+    assert [e.data["task_id"] for e in task_events] == ["t1"]
+
+    tokens = [e.data["token"] for e in events if e.type is AgentEventType.ANSWER_TOKEN]
+    assert tokens == ["Hello ", "world"]
+    assert events[-1].data["answer"] == "Hello world"
+    # Answer tokens are forwarded before the run completes
+    assert types.index(AgentEventType.ANSWER_TOKEN) < types.index(AgentEventType.DONE)
+
+
+def test_run_returns_concatenated_answer():
+    orchestrator = _make_orchestrator()
+    answer = asyncio.run(orchestrator.run("What is AAPL?"))
+    assert answer == "Hello world"
+
+
+def test_event_to_dict_is_json_safe():
+    import json
+
+    orchestrator = _make_orchestrator()
+
+    async def collect():
+        return [event.to_dict() async for event in orchestrator.run_stream("What is AAPL?")]
+
+    payloads = asyncio.run(collect())
+    json.dumps(payloads)
+    assert payloads[-1]["type"] == "done"
+
+
+def test_closing_stream_mid_run_cancels_run():
+    from prometheus_client import REGISTRY
+
+    class _SlowAnswer:
+        async def run(self, **kwargs):
+            yield "partial"
+            await asyncio.sleep(10)
+            yield "never"
+
+    orchestrator = _make_orchestrator()
+    orchestrator.phases["answer"] = _SlowAnswer()
+    before = REGISTRY.get_sample_value("dexter_agent_runs_cancelled_total") or 0.0
+
+    async def scenario():
+        stream = orchestrator.run_stream("What is AAPL?")
+        async for event in stream:
+            if event.type is AgentEventType.ANSWER_TOKEN:
+                break
+        await stream.aclose()
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=2))
+    assert REGISTRY.get_sample_value("dexter_agent_runs_cancelled_total") == before + 1
+
+
+def test_phase_model_map_overrides_default_model():
+    import pytest
+    from dexter_py.agent.orchestrator import parse_phase_models
+
+    models = parse_phase_models("understand=small, reflect=small,answer=large")
+    orchestrator = Orchestrator(AgentOptions(model="default", phase_models=models))
+    assert orchestrator.phases["understand"].model == "small"
+    assert orchestrator.phases["reflect"].model == "small"
+    assert orchestrator.phases["answer"].model == "large"
+    assert orchestrator.phases["plan"].model == "default"
+
+    with pytest.raises(ValueError):
+        parse_phase_models("summarize=small")
+    with pytest.raises(ValueError):
+        Orchestrator(AgentOptions(model="default", phase_models={"anwser": "large"}))
+
+
+def test_closing_answer_stream_cancels_provider_call(monkeypatch):
+    from types import SimpleNamespace
+    from dexter_py.agent.phases.answer import StreamingResponseHandler
+    from dexter_py.model import client_pool
+    from dexter_py.utils import _utils
+    from dexter_py.utils.metrics import LLM_STREAMS_CANCELLED
+
+    provider = {"finished": False, "cancelled": False}
+
+    async def agenerate(messages, callbacks):
+        try:
+            for handler in callbacks:
+                await handler.on_llm_new_token("Apple")
+            await asyncio.sleep(10)
+            provider["finished"] = True
+        except asyncio.CancelledError:
+            provider["cancelled"] = True
+            raise
+
+    async def resolve(model):
+        return SimpleNamespace(agenerate=agenerate)
+
+    monkeypatch.setattr(_utils, "async_callback_handler", lambda: object)
+    monkeypatch.setattr(client_pool, "resolve_llm_client", resolve)
+    cancelled = LLM_STREAMS_CANCELLED.labels("answer")
+    before = cancelled._value.get()
+
+    async def scenario():
+        handler = StreamingResponseHandler(_utils.ProductionLLMClient())
+        stream = handler.stream_with_recovery("What is AAPL?", "analyst", "gpt-4o")
+        assert await stream.__anext__() == "Apple"
+        await stream.aclose()
+        await asyncio.sleep(0)
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=2))
+    assert provider == {"finished": False, "cancelled": True}
+    assert cancelled._value.get() == before + 1
+
+
+def test_answer_phase_and_its_llm_stream_are_traced(monkeypatch):
+    from types import SimpleNamespace
+    from dexter_py.model import client_pool
+    from dexter_py.utils import _utils, tracing
+
+    async def agenerate(messages, callbacks):
+        for handler in callbacks:
+            for token in ("Hello ", "world"):
+                await handler.on_llm_new_token(token)
+            await handler.on_llm_end()
+
+    async def resolve(model):
+        return SimpleNamespace(agenerate=agenerate)
+
+    monkeypatch.setattr(_utils, "async_callback_handler", lambda: object)
+    monkeypatch.setattr(client_pool, "resolve_llm_client", resolve)
+    client = _utils.ProductionLLMClient()
+
+    class _StreamingAnswer:
+        def __init__(self, delay=0.0):
+            self.delay = delay
+
+        async def run(self, **kwargs):
+            async for token in client.stream("q", model="answer-model"):
+                yield token
+            await asyncio.sleep(self.delay)
+
+    def orchestrator(answer, timeout=60):
+        return Orchestrator(AgentOptions(
+            model="test-model",
+            phase_timeouts={"answer": timeout},
+            custom_phases={"understand": _Understand(), "plan": _Plan(), "reflect": _Reflect(), "answer": answer},
+        ))
+
+    async def traced_run(trace_id, agent):
+        root = tracing.start_trace(trace_id, "http.request")
+        token = tracing.attach(root)
+        try:
+            return await agent.run("What is AAPL?")
+        finally:
+            tracing.detach(token)
+            root.end()
+
+    collector = tracing.configure_tracing(enabled=True)
+    try:
+        assert asyncio.run(traced_run("req-answer", orchestrator(_StreamingAnswer()))) == "Hello world"
+        asyncio.run(traced_run("req-timeout", orchestrator(_StreamingAnswer(delay=5), timeout=0.05)))
+    finally:
+        tracing.configure_tracing(enabled=True)
+
+    spans = {s.name: s for s in collector.get("req-answer")}
+    phase, stream = spans["phase.answer"], spans["llm.stream"]
+    assert stream.parent_id == phase.span_id
+    assert stream.attributes == {"model": "answer-model", "chunks": 2}
+    assert phase.status == "ok" and phase.duration_ms is not None
+
+    phase = next(s for s in collector.get("req-timeout") if s.name == "phase.answer")
+    assert phase.attributes["timeout"] is True and phase.status == "error"
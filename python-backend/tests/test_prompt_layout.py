@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+from types import SimpleNamespace
+
+from dexter_py.agent import prompts
+from dexter_py.model import llm
+from dexter_py.model.prompt_layout import CACHE_CONTROL, extract_usage
+from dexter_py.utils.metrics import LLM_PROMPT_TOKENS
+
+
+class FakeCachingProvider:
+    """Anthropic-style ``messages.create`` with a prefix cache keyed at cache_control breakpoints."""
+
+    def __init__(self):
+        self.requests = []
+        self._prefixes = set()
+        self.messages = SimpleNamespace(create=self.create)
+
+    @staticmethod
+    def _tokens(text):
+        return max(1, len(text) // 4)
+
+    async def create(self, *, system, messages, **kwargs):
+        self.requests.append({"system": system, "messages": messages})
+        prefix = ""
+        cached = written = 0  # chars of the prompt read from / written to the cache
+        for block in list(system) + list(messages[0]["content"]):
+            prefix += block["text"]
+            if block.get("cache_control"):
+                key = hashlib.sha256(prefix.encode()).hexdigest()
+                if key in self._prefixes:
+                    cached = len(prefix)
+                else:
+                    self._prefixes.add(key)
+                    written = len(prefix)
+        read = self._tokens(prefix[:cached]) if cached else 0
+        write = self._tokens(prefix[:written]) - read if written else 0
+        usage = {
+            "input_tokens": self._tokens(prefix) - read - write,
+            "cache_read_input_tokens": read,
+            "cache_creation_input_tokens": write,
+            "output_tokens": 1,
+        }
+        return SimpleNamespace(content=[SimpleNamespace(text="ok")], usage=usage)
+
+
+def _counter(model, kind):
+    return LLM_PROMPT_TOKENS.labels(model, kind)._value.get()
+
+
+def test_static_prefix_is_served_from_provider_cache(monkeypatch):
+    provider = FakeCachingProvider()
+    monkeypatch.setattr("dexter_py.utils._utils._client_instance", provider)
+    system = "You are a careful analyst. " * 50
+    history = "user: what about AAPL?\nassistant: AAPL is ... " * 20
+    read_before = _counter("fake-model", "cache_read")
+
+    async def scenario():
+        for query in ("Compare margins", "Now revenue growth"):
+            await llm.call_llm(query, model="fake-model", system_prompt=system, context=history, use_cache=False)
+
+    asyncio.run(scenario())
+
+    first, second = provider.requests
+    # Static content first with a breakpoint; history second with a breakpoint; query last
+    assert first["system"] == [{"type": "text", "text": system, "cache_control": CACHE_CONTROL}]
+    content = second["messages"][0]["content"]
+    assert content[0] == {"type": "text", "text": history.strip(), "cache_control": CACHE_CONTROL}
+    assert content[-1] == {"type": "text", "text": "Now revenue growth"}
+    assert first["system"] == second["system"]
+    # The second request reads system + history from the cache
+    assert _counter("fake-model", "cache_read") - read_before >= (len(system) + len(history.strip())) // 4
+
+
+def test_breakpoints_can_be_disabled(monkeypatch):
+    captured = {}
+
+    async def create(**kwargs):
+        captured.update(kwargs)
+        return SimpleNamespace(content=[SimpleNamespace(text="ok")])
+
+    client = SimpleNamespace(messages=SimpleNamespace(create=create))
+    monkeypatch.setattr("dexter_py.utils._utils._client_instance", client)
+    monkeypatch.setenv("LLM_PROMPT_CACHING", "0")
+    asyncio.run(llm.call_llm("q", model="m", system_prompt="sys", context="ctx", use_cache=False))
+    assert captured["system"] == "sys"
+    assert captured["messages"] == [{"role": "user", "content": "ctx\n\nq"}]
+
+
+def test_system_prompts_are_date_free_and_stable():
+    static = prompts.get_plan_system_prompt(include_date=False)
+    assert "Current date" not in static
+    dated = prompts.get_plan_system_prompt(date_override="Monday, January 5, 2026")
+    assert dated.startswith(static)
+    assert dated.rstrip().endswith("Monday, January 5, 2026")
+    user = prompts.build_plan_user_prompt("q", "intent", "AAPL", current_date="Monday, January 5, 2026")
+    assert "Current date: Monday, January 5, 2026" in user
+
+
+def test_extract_usage_normalizes_providers():
+    openai_style = SimpleNamespace(usage={"prompt_tokens": 1200, "completion_tokens": 5, "prompt_tokens_details": {"cached_tokens": 1024}})
+    usage = extract_usage(openai_style)
+    assert (usage.input_tokens, usage.cache_read_tokens, usage.output_tokens) == (176, 1024, 5)
+
+    message = SimpleNamespace(usage_metadata={
+        "input_tokens": 2000,
+        "output_tokens": 7,
+        "input_token_details": {"cache_read": 1500, "cache_creation": 100},
+    })
+    langchain_result = SimpleNamespace(generations=[[SimpleNamespace(message=message)]])
+    usage = extract_usage(langchain_result)
+    assert (usage.input_tokens, usage.cache_read_tokens, usage.cache_write_tokens) == (400, 1500, 100)
+
+    assert extract_usage("plain text") is None
+
+
+def test_answer_phase_history_is_cached_behind_the_system_prompt(monkeypatch):
+    from dexter_py.agent.phases.answer import AnswerPhase
+    from dexter_py.utils._utils import ProductionLLMClient
+
+    provider = FakeCachingProvider()
+    monkeypatch.setattr("dexter_py.utils._utils._client_instance", provider)
+    history = SimpleNamespace(
+        has_messages=lambda: True,
+        format_for_planning=lambda: "user: what about AAPL?\nassistant: AAPL is ... " * 20,
+    )
+    phase = AnswerPhase(model="fake-answer", context_manager=None, llm_client=ProductionLLMClient())
+    read_before = _counter("fake-answer", "cache_read")
+
+    async def answer(query):
+        return "".join([t async for t in phase.run(
+            query=query, completed_plans=[], task_results={"t1": "AAPL margin 45%"}, message_history=history,
+        )])
+
+    async def scenario():
+        return [await answer("Compare margins"), await answer("Now revenue growth")]
+
+    assert asyncio.run(scenario()) == ["ok", "ok"]
+    first, second = provider.requests
+    assert first["system"][0]["cache_control"] == CACHE_CONTROL
+    context, dynamic = second["messages"][0]["content"]
+    assert context["text"].startswith("user: what about AAPL?") and context["cache_control"] == CACHE_CONTROL
+    assert "Now revenue growth" in dynamic["text"] and "cache_control" not in dynamic
+    assert _counter("fake-answer", "cache_read") > read_before
@@ -0,0 +1,50 @@
+from dexter_py.utils.request_stats import RollingStats, RecentRequestLog, StatsConfig, OVERFLOW_KEY
+
+
+def test_rolling_stats_aggregates_per_route_and_client():
+    stats = RollingStats(StatsConfig(window_seconds=60, slot_seconds=10))
+    for ms in (10, 20, 30, 40):
+        stats.begin("/query", "1.1.1.1")
+        stats.end("/query", "1.1.1.1", ms, error=False, now=1000.0)
+    stats.begin("/query", "2.2.2.2")
+    stats.end("/query", "2.2.2.2", 900, error=True, now=1001.0)
+
+    snap = stats.snapshot(now=1002.0)
+    route = snap["routes"]["/query"]
+    assert route["count"] == 5
+    assert route["errors"] == 1
+    assert route["error_rate"] == 0.2
+    assert route["in_flight"] == 0
+    assert snap["clients"]["1.1.1.1"]["avg_ms"] == 25
+    assert 500 <= route["p99_ms"] <= 1000
+
+
+def test_rolling_stats_window_expires_old_slots():
+    stats = RollingStats(StatsConfig(window_seconds=30, slot_seconds=10))
+    stats.begin("/a", "c")
+    stats.end("/a", "c", 5, error=False, now=100.0)
+    assert stats.snapshot(now=105.0)["routes"]["/a"]["count"] == 1
+    assert stats.snapshot(now=140.0)["routes"]["/a"]["count"] == 0
+
+
+def test_rolling_stats_tracks_in_flight_and_caps_keys():
+    stats = RollingStats(StatsConfig(max_keys=2))
+    stats.begin("/a", "c1")
+    stats.begin("/b", "c2")
+    stats.begin("/c", "c3")
+    snap = stats.snapshot()
+    assert snap["in_flight"] == 3
+    assert set(snap["routes"]) == {"/a", "/b", OVERFLOW_KEY}
+
+
+def test_recent_log_cursor_returns_only_new_entries():
+    log = RecentRequestLog(maxlen=3)
+    for i in range(5):
+        log.add({"path": f"/p{i}", "timestamp": 0})
+    assert [e["path"] for e in log.since(0)] == ["/p4", "/p3", "/p2"]
+    cursor = log.last_seq
+    assert log.since(cursor) == []
+    log.add({"path": "/p5"})
+    new = log.since(cursor)
+    assert [e["path"] for e in new] == ["/p5"]
+    assert new[0]["ts_iso"]
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from dexter_py.model.singleflight import SingleFlight
+from dexter_py.model.llm import llm_request_key
+from dexter_py.utils.metrics import SINGLE_FLIGHT_ACTIVE
+
+
+def test_concurrent_identical_streams_share_one_upstream():
+    flights = SingleFlight(name="test")
+    calls = 0
+
+    async def scenario():
+        nonlocal calls
+        gate = asyncio.Event()
+
+        async def upstream():
+            nonlocal calls
+            calls += 1
+            yield "a"
+            await gate.wait()
+            yield "b"
+            yield "c"
+
+        async def consume():
+            return [t async for t in flights.stream("k", upstream)]
+
+        first = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)  # leader has buffered "a"
+        late = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        gate.set()
+        return await first, await late
+
+    first, late = asyncio.run(scenario())
+    assert calls == 1
+    # The late joiner replays the buffered prefix
+    assert first == late == ["a", "b", "c"]
+    assert flights.in_flight() == 0
+
+
+def test_upstream_error_reaches_every_subscriber():
+    flights = SingleFlight(name="test")
+
+    async def upstream():
+        yield "a"
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def consume():
+        return [t async for t in flights.stream("k", upstream)]
+
+    async def scenario():
+        return await asyncio.gather(consume(), consume(), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_upstream_cancelled_when_last_subscriber_leaves():
+    flights = SingleFlight(name="test")
+    cancelled = False
+
+    async def upstream():
+        nonlocal cancelled
+        try:
+            yield "a"
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    async def scenario():
+        stream = flights.stream("k", upstream)
+        assert await stream.__anext__() == "a"
+        await stream.aclose()
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert cancelled
+    assert flights.in_flight() == 0
+
+
+def test_active_gauge_balanced_when_leader_leaves_before_upstream_starts():
+    flights = SingleFlight(name="test_early_leave")
+    active = SINGLE_FLIGHT_ACTIVE.labels("test_early_leave")
+
+    async def upstream():
+        yield "a"
+
+    async def scenario():
+        stream = flights.stream("k", upstream)
+        # Step the leader by hand until it waits for the first chunk, then
+        # cancel it before the upstream task has run a single step
+        step = stream.__anext__()
+        step.send(None)
+        with pytest.raises(asyncio.CancelledError):
+            step.throw(asyncio.CancelledError())
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert active._value.get() == 0
+    assert flights.in_flight() == 0
+
+
+def test_request_key_resolves_defaults():
+    assert llm_request_key("hi") == llm_request_key("hi", temperature=None)
+    assert llm_request_key("hi") != llm_request_key("hi", temperature=0.1)
+    assert llm_request_key("hi", model="a") != llm_request_key("hi", model="b")
@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+import pytest
+
+from dexter_py.utils.sse import SSEWriter, SSEConfig, SSEResponse
+
+
+def _decode(frame: bytes) -> dict:
+    text = frame.decode("utf-8")
+    assert text.startswith("data: ") and text.endswith("\n\n")
+    return json.loads(text[len("data: "):-2])
+
+
+def test_token_frame_matches_legacy_json_shape():
+    writer = SSEWriter(static_fields={"role": "assistant", "request_id": "abc"}, config=SSEConfig())
+    token = 'he said "hi" \u00e9'
+    frame = writer.token_frame(token)
+    payload = {"token": token, "role": "assistant", "request_id": "abc"}
+    legacy = f"data: {json.dumps(payload)}\n\n"
+    assert frame == legacy.encode("utf-8")
+
+
+def test_push_coalesces_until_byte_threshold():
+    writer = SSEWriter(static_fields={"request_id": "r"}, config=SSEConfig(flush_interval=10, max_buffer_bytes=8))
+    assert writer.push("abc", now=0.0) is None
+    assert writer.push("def", now=0.001) is None
+    frame = writer.push("gh", now=0.002)
+    assert _decode(frame)["token"] == "abcdefgh"
+    assert writer.flush() is None
+
+
+def test_push_flushes_after_time_window():
+    writer = SSEWriter(config=SSEConfig(flush_interval=0.05, max_buffer_bytes=1024))
+    assert writer.push("a", now=1.0) is None
+    frame = writer.push("b", now=1.06)
+    assert _decode(frame)["token"] == "ab"
+
+
+def test_stream_flushes_pending_tokens_when_upstream_stalls():
+    writer = SSEWriter(config=SSEConfig(flush_interval=0.01, max_buffer_bytes=1024))
+
+    async def tokens():
+        yield "first"
+        await asyncio.sleep(0.1)
+        yield "second"
+
+    async def collect():
+        frames = []
+        async for frame in writer.stream_tokens(tokens()):
+            frames.append(_decode(frame)["token"])
+        return frames
+
+    assert asyncio.run(collect()) == ["first", "second"]
+
+
+def test_event_frame_appends_static_fields_and_keeps_order():
+    writer = SSEWriter(static_fields={"session_id": "s", "request_id": "r"},
+                       config=SSEConfig(flush_interval=10, max_buffer_bytes=1024))
+
+    async def items():
+        yield ("token", "a")
+        yield ("token", "b")
+        yield ("event", {"type": "done"})
+
+    async def collect():
+        return [
+            _decode(f)
+            async for f in writer.stream(
+                items(),
+                token_of=lambda item: item[1] if item[0] == "token" else None,
+                frame_of=lambda item: writer.event_frame(item[1]),
+            )
+        ]
+
+    frames = asyncio.run(collect())
+    assert frames == [
+        {"token": "ab", "session_id": "s", "request_id": "r"},
+        {"type": "done", "session_id": "s", "request_id": "r"},
+    ]
+
+
+def test_sse_response_closes_body_when_send_fails():
+    closed = []
+
+    async def body():
+        try:
+            yield b"data: 1\n\n"
+            yield b"data: 2\n\n"
+        finally:
+            closed.append(True)
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            raise OSError("client went away")
+
+    async def scenario():
+        response = SSEResponse(body())
+        with pytest.raises(OSError):
+            await response.stream_response(send)
+
+    asyncio.run(scenario())
+    assert closed == [True]
@@ -0,0 +1,96 @@
+import asyncio
+import re
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from dexter_py.agent.orchestrator import HistorySummarizer
+from dexter_py.agent.phases.answer import AnswerConfig, ContextAssembler
+from dexter_py.model.prompt_layout import HISTORY_TRUNCATED, PromptLayout, fit_to_context_window
+from dexter_py.utils import tokens
+from dexter_py.utils.message_history import Message, MessageHistory
+from dexter_py.utils.tokens import TokenBudget, TokenCounter
+
+
+class WordEncoding:
+    """Stand-in BPE encoding: one token per word (with its leading whitespace)."""
+
+    def encode(self, text, disallowed_special=()):
+        return re.findall(r"\s*\S+|\s+", text)
+
+    def decode(self, ids):
+        return "".join(ids)
+
+
+@pytest.fixture
+def counter(monkeypatch):
+    monkeypatch.setattr(tokens, "optional_import", lambda name: SimpleNamespace(get_encoding=lambda _: WordEncoding()))
+    return TokenCounter("cl100k_base")
+
+
+def test_counts_are_exact_and_memoized(counter):
+    assert counter.exact and counter.encoding_name == "cl100k_base"
+    text = "Revenue grew twelve percent year over year"
+    assert counter.count(text) == 7
+    counter.count(text)
+    assert counter.count.cache_info().hits == 1
+
+    cut = counter.truncate(text, 4, "...")
+    assert cut == "Revenue grew twelve..." and counter.count(cut) <= 4
+    tail = counter.truncate(text, 4, "[cut]", keep="tail")
+    assert tail == "[cut] year over year" and counter.count(tail) <= 4
+    assert counter.truncate(text, 7, "...") == text
+
+
+def test_falls_back_to_estimate_without_tokenizer(monkeypatch):
+    monkeypatch.setattr(tokens, "optional_import", lambda name: None)
+    estimate = TokenCounter("cl100k_base")
+    assert not estimate.exact and estimate.encoding_name == "approx"
+    assert estimate.count("x" * 10) == 3
+    assert estimate.count(estimate.truncate("x" * 100, 5, "..")) <= 5
+    assert tokens.encoding_for_model("gpt-4o-mini") == "o200k_base"
+    assert tokens.encoding_for_model("claude-sonnet-4-20250514") == "cl100k_base"
+
+
+def test_context_assembler_packs_to_token_budget(counter):
+    results = {f"task-{i}": "price " * 30 for i in range(10)}
+    assembler = ContextAssembler(AnswerConfig(max_context_tokens=100), token_counter=counter)
+    context = assembler.assemble([], results)
+
+    assert counter.count(context) <= 100
+    assert "**task-0:**" in context and "task-9" not in context
+    assert "more results truncated]" in context
+
+    budget = TokenBudget(counter, 5)
+    assert budget.add("one two three") == "one two three"
+    assert budget.add("four five six") is None
+    assert budget.add("four five six", truncation_suffix="") == "four five"
+    assert budget.remaining == 0
+
+
+def test_call_layout_drops_oldest_context_to_fit_window(counter, monkeypatch):
+    monkeypatch.setattr(tokens, "_counter_for_encoding", lambda name: counter)
+    monkeypatch.setenv("LLM_CONTEXT_WINDOW", "60")
+    history = " ".join(f"turn{i}" for i in range(100))
+    layout = PromptLayout(system="be brief " * 5, dynamic="what changed?", context=history)
+
+    fitted = fit_to_context_window(layout, "gpt-4o", reserve_tokens=20)
+    assert fitted.context.startswith(HISTORY_TRUNCATED) and fitted.context.endswith("turn99")
+    total = sum(counter.count(part) for part in (fitted.system, fitted.dynamic, fitted.context))
+    assert total <= 40
+    assert fit_to_context_window(layout, "gpt-4o", reserve_tokens=-1000) is layout
+
+
+def test_history_summarizer_keeps_recent_turns_within_budget(counter, monkeypatch):
+    monkeypatch.setattr("dexter_py.agent.orchestrator.get_token_counter", lambda model: counter)
+    history = MessageHistory(model="m")
+    for i in range(6):
+        history._messages.append(Message(
+            id=i, query=f"question {i}", answer="word " * 20, summary="s", timestamp=datetime.now(),
+        ))
+    summarizer = HistorySummarizer("m", max_tokens=50)
+    window = asyncio.run(summarizer.get_context_window(history))
+
+    assert [m.id for m in window[1:]] == [4, 5]
+    assert window[0].query == "Earlier conversation" and "question 0" in window[0].summary
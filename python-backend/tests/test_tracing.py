@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from dexter_py.utils import tracing
+
+
+@pytest.fixture
+def collector():
+    collector = tracing.configure_tracing(enabled=True)
+    yield collector
+    tracing.configure_tracing(enabled=True)
+
+
+def test_spans_nest_through_context_and_tasks(collector):
+    async def tool():
+        with tracing.span("tool.execute", tool="search"):
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        root = tracing.start_trace("req-1", "http.request")
+        token = tracing.attach(root)
+        try:
+            with tracing.span("phase.plan") as phase:
+                await asyncio.gather(asyncio.create_task(tool()), tool())
+                phase.set_attribute("tasks", 2)
+        finally:
+            tracing.detach(token)
+            root.end()
+
+    asyncio.run(scenario())
+    spans = collector.get("req-1")
+    by_name = {}
+    for s in spans:
+        by_name.setdefault(s.name, []).append(s)
+    root = by_name["http.request"][0]
+    phase = by_name["phase.plan"][0]
+    assert root.parent_id is None
+    assert phase.parent_id == root.span_id
+    assert phase.attributes["tasks"] == 2
+    assert [t.parent_id for t in by_name["tool.execute"]] == [phase.span_id] * 2
+    assert all(s.duration_ms is not None for s in spans)
+
+    rows = tracing.waterfall(spans)["spans"]
+    assert [r["depth"] for r in rows] == [0, 1, 2, 2]
+
+
+def test_spans_are_noops_outside_a_trace(collector):
+    with tracing.span("orphan") as s:
+        s.set_attribute("x", 1)
+    assert not s.recording
+    assert collector.trace_ids() == []
+
+
+def test_errors_are_recorded_and_exported_as_otlp(collector):
+    root = tracing.start_trace("0f0e0d0c-0b0a-0908-0706-050403020100", "http.request", path="/x")
+    token = tracing.attach(root)
+    with pytest.raises(ValueError):
+        with tracing.span("llm.call"):
+            raise ValueError("bad")
+    tracing.detach(token)
+    root.end()
+
+    spans = collector.get(root.trace_id)
+    failed = next(s for s in spans if s.name == "llm.call")
+    assert failed.status == "error" and "bad" in failed.error
+
+    otlp = tracing.to_otlp(spans)
+    exported = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert {s["traceId"] for s in exported} == {"0f0e0d0c0b0a09080706050403020100"}
+    child = next(s for s in exported if s["name"] == "llm.call")
+    assert child["parentSpanId"] == root.span_id
+    assert child["status"]["code"] == 2
+
+
+def test_collector_evicts_oldest_traces():
+    collector = tracing.configure_tracing(enabled=True, collector=tracing.TraceCollector(max_traces=2))
+    try:
+        for i in range(3):
+            tracing.start_trace(f"t{i}", "http.request").end()
+        assert collector.trace_ids() == ["t1", "t2"]
+    finally:
+        tracing.configure_tracing(enabled=True)
@@ -0,0 +1,69 @@
+import asyncio
+
+from dexter_py.utils.warmup import ComponentUnavailable, WarmupConfig, WarmupManager
+from dexter_py.utils.message_history import MessageHistory, get_shared_embedding_provider
+
+
+def _manager(required, timeout=1.0, enabled=True):
+    return WarmupManager(WarmupConfig(enabled=enabled, timeout=timeout, required=required))
+
+
+def test_ready_once_required_components_succeed():
+    manager = _manager(["client"])
+
+    async def ok():
+        await asyncio.sleep(0.01)
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    manager.register("client", ok)
+    manager.register("optional", broken)
+    assert not manager.ready
+
+    asyncio.run(manager.run())
+    report = manager.report()
+    assert report["ready"] is True
+    assert report["components"]["client"]["state"] == "ready"
+    assert report["components"]["client"]["duration_ms"] >= 10
+    assert report["components"]["optional"]["state"] == "failed"
+    assert "boom" in report["components"]["optional"]["error"]
+
+
+def test_failed_or_slow_required_component_blocks_readiness():
+    manager = _manager(["slow", "missing"], timeout=0.05)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def missing():
+        raise ComponentUnavailable("not installed")
+
+    manager.register("slow", slow)
+    manager.register("missing", missing)
+    asyncio.run(manager.run())
+
+    components = manager.report()["components"]
+    assert manager.ready is False
+    assert components["slow"]["state"] == "failed"
+    assert "timed out" in components["slow"]["error"]
+    assert components["missing"]["state"] == "skipped"
+
+
+def test_disabled_warmup_is_ready_without_running_steps():
+    manager = _manager(["client"], enabled=False)
+    calls = []
+
+    async def step():
+        calls.append(1)
+
+    manager.register("client", step)
+    asyncio.run(manager.run())
+    assert manager.ready is True
+    assert calls == []
+    assert manager.report()["components"]["client"]["state"] == "skipped"
+
+
+def test_histories_share_one_embedding_provider():
+    assert MessageHistory(model="m").embedding_provider is MessageHistory(model="m").embedding_provider
+    assert MessageHistory(model="m").embedding_provider is get_shared_embedding_provider()